@@ -23,7 +23,8 @@
 export const EmailSendingStatus = {
     NotRequired: 'NOT_REQUIRED',
     SentToEmailServiceSuccess: 'SENT_TO_EMAIL_SERVICE_SUCCESS',
-    SentToEmailServiceFailure: 'SENT_TO_EMAIL_SERVICE_FAILURE'
+    SentToEmailServiceFailure: 'SENT_TO_EMAIL_SERVICE_FAILURE',
+    QueuedForEmailService: 'QUEUED_FOR_EMAIL_SERVICE'
 } as const;
 
 export type EmailSendingStatus = typeof EmailSendingStatus[keyof typeof EmailSendingStatus];
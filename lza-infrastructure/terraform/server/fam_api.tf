@@ -66,6 +66,13 @@ resource "aws_iam_role_policy" "fam_api_lambda_access_policy" {
                 "kms:*"
             ],
         "Resource": "${aws_kms_key.bcsc_key.arn}"
+      },
+      {
+        "Effect": "Allow",
+        "Action": [
+          "lambda:InvokeFunction"
+        ],
+        "Resource": "arn:aws:lambda:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:function:${local.role_assignment_job_worker_lambda_name}"
       }
     ]
   }
@@ -144,6 +151,7 @@ resource "aws_lambda_function" "fam-api-function" {
       IDIM_PROXY_API_KEY = "${var.idim_proxy_api_api_key}"
       GC_NOTIFY_EMAIL_API_KEY = "${var.gc_notify_email_api_key}"
       TARGET_ENV = "${var.target_env}"
+      ROLE_ASSIGNMENT_JOB_WORKER_FUNCTION = local.role_assignment_job_worker_lambda_name
     }
 
   }
@@ -0,0 +1,70 @@
+# Email outbox dispatcher: sends the notification emails stored by the grant
+# requests (app_fam.fam_email_outbox) through GC Notify. Same package, role and
+# database access as the FAM API Lambda, with its own handler, invoked on a
+# schedule.
+
+locals {
+  email_outbox_dispatcher_lambda_name = "fam-api-email-outbox-dispatcher-lambda-${var.target_env}"
+}
+
+resource "aws_lambda_function" "fam-api-email-outbox-dispatcher-function" {
+  filename      = "fam-ui-api.zip"
+  function_name = local.email_outbox_dispatcher_lambda_name
+  role          = aws_iam_role.fam_api_lambda_exec.arn
+  handler       = "api.app.email_outbox_dispatcher.handler"
+
+  source_code_hash = filebase64sha256("fam-ui-api.zip")
+
+  runtime = "python3.12"
+
+  vpc_config {
+    security_group_ids = ["${aws_security_group.fam_app_sg.id}"]
+    subnet_ids         = [data.aws_subnet.a_app.id, data.aws_subnet.b_app.id]
+  }
+
+  memory_size = 256
+
+  # The dispatcher sends for the time left less a 2 second margin (to record
+  # the last outcomes); emails it claimed but did not send are released.
+  timeout = 15
+
+  # One dispatcher at a time is enough; queued emails locked by a running
+  # dispatcher are skipped by another one anyway.
+  reserved_concurrent_executions = 1
+
+  environment {
+
+    variables = {
+      DB_SECRET               = "${data.aws_secretsmanager_secret.db_api_creds_secret.name}"
+      PG_DATABASE             = "${data.aws_rds_cluster.api_database.database_name}"
+      PG_PORT                 = "5432"
+      PG_HOST                 = "${data.aws_db_proxy.api_lambda_db_proxy.endpoint}"
+      GC_NOTIFY_EMAIL_API_KEY = "${var.gc_notify_email_api_key}"
+      TARGET_ENV              = "${var.target_env}"
+    }
+
+  }
+
+  tags = {
+    "managed-by" = "terraform"
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "fam_api_email_outbox_dispatcher_schedule" {
+  name                = "${local.email_outbox_dispatcher_lambda_name}-schedule"
+  description         = "Sends the queued FAM notification emails"
+  schedule_expression = "rate(1 minute)"
+}
+
+resource "aws_cloudwatch_event_target" "fam_api_email_outbox_dispatcher_schedule_target" {
+  rule = aws_cloudwatch_event_rule.fam_api_email_outbox_dispatcher_schedule.name
+  arn  = aws_lambda_function.fam-api-email-outbox-dispatcher-function.arn
+}
+
+resource "aws_lambda_permission" "fam_api_email_outbox_dispatcher_allow_schedule" {
+  statement_id  = "AllowExecutionFromEventBridgeSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.fam-api-email-outbox-dispatcher-function.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.fam_api_email_outbox_dispatcher_schedule.arn
+}
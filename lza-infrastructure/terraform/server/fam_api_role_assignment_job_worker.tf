@@ -0,0 +1,77 @@
+# User role assignment job worker: grants the users of the jobs stored by
+# "POST /user-role-assignment/jobs" (app_fam.fam_user_role_assignment_job).
+# Same package, role and database access as the FAM API Lambda, with its own
+# handler. Invoked asynchronously by the API when a job is created (and by
+# itself to carry on a job past its time budget), and on a schedule to resume
+# jobs left unfinished.
+
+locals {
+  role_assignment_job_worker_lambda_name = "fam-api-role-assignment-job-worker-lambda-${var.target_env}"
+}
+
+resource "aws_lambda_function" "fam-api-role-assignment-job-worker-function" {
+  filename      = "fam-ui-api.zip"
+  function_name = local.role_assignment_job_worker_lambda_name
+  role          = aws_iam_role.fam_api_lambda_exec.arn
+  handler       = "api.app.role_assignment_job_worker.handler"
+
+  source_code_hash = filebase64sha256("fam-ui-api.zip")
+
+  runtime = "python3.12"
+
+  vpc_config {
+    security_group_ids = ["${aws_security_group.fam_app_sg.id}"]
+    subnet_ids         = [data.aws_subnet.a_app.id, data.aws_subnet.b_app.id]
+  }
+
+  memory_size = 512
+
+  # The worker stops starting new batches of users after 80 seconds.
+  timeout = 120
+
+  # A job is locked by the worker running it; another worker skips it.
+  reserved_concurrent_executions = 2
+
+  environment {
+
+    variables = {
+      DB_SECRET                           = "${data.aws_secretsmanager_secret.db_api_creds_secret.name}"
+      PG_DATABASE                         = "${data.aws_rds_cluster.api_database.database_name}"
+      PG_PORT                             = "5432"
+      PG_HOST                             = "${data.aws_db_proxy.api_lambda_db_proxy.endpoint}"
+      FC_API_BASE_URL_TEST                = "${var.forest_client_api_base_url_test}"
+      FC_API_TOKEN_TEST                   = "${var.forest_client_api_api_key_test}"
+      FC_API_BASE_URL_PROD                = "${var.forest_client_api_base_url_prod}"
+      FC_API_TOKEN_PROD                   = "${var.forest_client_api_api_key_prod}"
+      IDIM_PROXY_BASE_URL_PROD            = "${var.idim_proxy_api_base_url_prod}"
+      IDIM_PROXY_API_KEY                  = "${var.idim_proxy_api_api_key}"
+      GC_NOTIFY_EMAIL_API_KEY             = "${var.gc_notify_email_api_key}"
+      TARGET_ENV                          = "${var.target_env}"
+      ROLE_ASSIGNMENT_JOB_WORKER_FUNCTION = local.role_assignment_job_worker_lambda_name
+    }
+
+  }
+
+  tags = {
+    "managed-by" = "terraform"
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "fam_api_role_assignment_job_worker_schedule" {
+  name                = "${local.role_assignment_job_worker_lambda_name}-schedule"
+  description         = "Resumes the unfinished FAM user role assignment jobs"
+  schedule_expression = "rate(5 minutes)"
+}
+
+resource "aws_cloudwatch_event_target" "fam_api_role_assignment_job_worker_schedule_target" {
+  rule = aws_cloudwatch_event_rule.fam_api_role_assignment_job_worker_schedule.name
+  arn  = aws_lambda_function.fam-api-role-assignment-job-worker-function.arn
+}
+
+resource "aws_lambda_permission" "fam_api_role_assignment_job_worker_allow_schedule" {
+  statement_id  = "AllowExecutionFromEventBridgeSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.fam-api-role-assignment-job-worker-function.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.fam_api_role_assignment_job_worker_schedule.arn
+}
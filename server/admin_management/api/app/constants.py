@@ -57,6 +57,7 @@ class EmailSendingStatus(str, Enum):
     NOT_REQUIRED = "NOT_REQUIRED"  # does not require sending email.
     SENT_TO_EMAIL_SERVICE_SUCCESS = "SENT_TO_EMAIL_SERVICE_SUCCESS"  # send to external service successful.
     SENT_TO_EMAIL_SERVICE_FAILURE = "SENT_TO_EMAIL_SERVICE_FAILURE"  # technical/validation failure during sending to external service.
+    QUEUED_FOR_EMAIL_SERVICE = "QUEUED_FOR_EMAIL_SERVICE"  # stored in the email outbox, to be sent to external service.
 
 # Note! There is an issue for openapi generator to generate an enum with only 1 constant.
 # Since in future we plan to use "District", it is added (and can be used later) here
@@ -79,6 +80,22 @@ class SortOrderEnum(str, Enum):
     ASC = "asc"
     DESC = "desc"
 
+class PageCountMode(str, Enum):
+    # How the paginated queries get the total count of rows.
+    EXACT = "exact"  # separate "SELECT count(*)" query
+    WINDOW = "window"  # "count(*) OVER ()" with the page query
+    ESTIMATED = "estimated"  # WINDOW, or cached count / planner estimate (see PAGE_COUNT_ constants)
+
+class DbPoolMode(str, Enum):
+    # How the database connections are pooled (DB_POOL_MODE).
+    QUEUE = "queue"  # DB_POOL_SIZE connections kept open, long-running server (uvicorn)
+    SINGLE = "single"  # one connection kept open, Lambda (one request at a time per container)
+    NULL = "null"  # a connection per session, pooling left to RDS Proxy
+
+class DbSessionClass(str, Enum):
+    # What a database session is for, sets its transaction timeouts.
+    API = "api"  # http request
+
 class DelegatedAdminSortByEnum(str, Enum):
     # Note: this is not the exact model column name, requires table column mapping.
     CREATE_DATE = "create_date"
@@ -118,6 +135,12 @@ MIN_PAGE_SIZE = 10
 MAX_PAGE_SIZE = 100000
 SEARCH_FIELD_MIN_LENGTH = 3
 SEARCH_FIELD_MAX_LENGTH = 30
+PAGE_CURSOR_MAX_LENGTH = 500
+# PageCountMode.ESTIMATED: the planner's row estimate is used as total from this many rows; under it, the
+# exact count of the first page is cached and reused by the following pages with the same filter for a while.
+PAGE_COUNT_ESTIMATE_THRESHOLD = 10000
+PAGE_COUNT_CACHE_TTL_SECONDS = 300
+PAGE_COUNT_CACHE_MAX_SIZE = 1000
 
 DEFAULT_FC_API_SEARCH_PAGE = 0  # FC api is 0 index
 DEFAULT_FC_API_SEARCH_PAGE_SIZE = 50
@@ -131,3 +154,6 @@ ERROR_CODE_MISSING_KEY_ATTRIBUTE = "missing_key_attribute"
 ERROR_CODE_UNKNOWN_STATE = "unknown_state"
 ERROR_CODE_UPSTREAM_TIMEOUT = "UPSTREAM_TIMEOUT"
 ERROR_CODE_UPSTREAM_CONNECTION_ERROR = "UPSTREAM_CONNECTION_ERROR"
+ERROR_CODE_REQUEST_DEADLINE_EXCEEDED = "REQUEST_DEADLINE_EXCEEDED"
+# Time left in the request needed to start the database work of a grant (it is not cut short midway).
+REQUEST_DEADLINE_DB_WORK_SECONDS = 2
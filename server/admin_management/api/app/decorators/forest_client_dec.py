@@ -19,7 +19,8 @@ def post_sync_forest_clients_dec(original_func):
     """
     A decorator to perform post action on syncing forest client details from external Forest Client API search.
     Due to Forest Client API's TEST environment instability, if it happens and search returns Timeout or ConnectionError,
-    it will be handled softly by logging a warning and skipping the client name update (client name will be None).
+    it will be handled softly by logging a warning and using the client names last known in the cache (client name
+    will be None when not cached).
 
     Important! using the Python `@functools.wraps(original_func)` feature. This makes decorated_func get almost all the
           original function's metadata and makes it possible and easier for testing original function in isolation.
@@ -154,7 +155,8 @@ def __search_forest_clients_with_retry(
 ):
     """
         Search Forest Client API with retry_on_timeout set to True for search call
-        and soft-fail handling.
+        and soft-fail handling: when the FC API is not available (including its circuit
+        being open), the client names last known in the cache are used, if any.
     """
     try:
         return forest_client_integration_service.search(
@@ -162,9 +164,10 @@ def __search_forest_clients_with_retry(
             retry_on_timeout=True
         )
     except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        cached_results = forest_client_integration_service.search_cached(fc_search_params)
         LOGGER.warning(
             "Forest Client API search failed with timeout/connection error after retry. "
-            "Skip forest client name update.",
+            f"Use cached client names for {len(cached_results)} forest client(s).",
             exc_info=True
         )
-        return []
\ No newline at end of file
+        return cached_results
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Circuit breaker for the calls to an upstream service.
+
+After "failure_threshold" consecutive failed calls (timeouts, connection
+errors) the circuit opens: calls fail right away with `CircuitOpenError` for
+"reset_timeout" seconds instead of each waiting for its own timeout. After
+that, a single call is let through to probe the upstream (half-open): the
+circuit closes when it succeeds and opens again when it fails.
+
+`CircuitOpenError` is a `requests` ConnectionError, callers handle it as the
+upstream not being available (a 504 response, or their own soft-fail).
+
+Breakers are shared per upstream by the process (`get_circuit_breaker`);
+their state changes are logged as warnings and `get_circuit_breaker_stats`
+returns them.
+"""
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+import requests
+
+LOGGER = logging.getLogger(__name__)
+
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = 30
+
+
+class CircuitState(str, Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The circuit of the upstream is open, the call is not attempted."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.__reset()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._state
+
+    def before_request(self):
+        """
+        To call before each call to the upstream: raises CircuitOpenError when
+        the circuit is open, or half-open with its probe call in progress.
+        """
+        with self._lock:
+            if self._state == CircuitState.OPEN:
+                if time.monotonic() < self._opened_at + self.reset_timeout:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError(
+                        f"Circuit of {self.name} is open, retry in {self.__retry_in_seconds():.0f}s."
+                    )
+                self.__transition(CircuitState.HALF_OPEN)
+
+            if self._state == CircuitState.HALF_OPEN:
+                if self._probe_in_progress:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError(f"Circuit of {self.name} is half-open, probe in progress.")
+                self._probe_in_progress = True
+
+    def record_success(self):
+        """The upstream responded (whatever the http status)."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probe_in_progress = False
+            if self._state != CircuitState.CLOSED:
+                self.__transition(CircuitState.CLOSED)
+
+    def record_failure(self):
+        """The upstream did not respond (timeout, connection error)."""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_progress = False
+            # calls started before the circuit opened may still fail after
+            if self._state != CircuitState.OPEN and (
+                self._state == CircuitState.HALF_OPEN
+                or self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._stats["opened"] += 1
+                self.__transition(CircuitState.OPEN)
+
+    def release(self):
+        """The call ended without telling whether the upstream is available."""
+        with self._lock:
+            self._probe_in_progress = False
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._state == CircuitState.OPEN
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "state": self._state.value,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_seconds": (
+                    round(self.__retry_in_seconds(), 1)
+                    if self._state == CircuitState.OPEN
+                    else None
+                ),
+            }
+
+    def clear(self):
+        with self._lock:
+            self.__reset()
+
+    def __reset(self):
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_progress = False
+        self._stats = {"opened": 0, "rejected": 0}
+
+    def __retry_in_seconds(self) -> float:
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def __transition(self, state: CircuitState):
+        LOGGER.warning(
+            f"Circuit breaker of {self.name}: {self._state.value} -> {state.value} "
+            f"({self._consecutive_failures} consecutive failure(s))."
+        )
+        self._state = state
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """The circuit breaker of the upstream "name" (e.g. its base url), shared by the process."""
+    with _circuit_breakers_lock:
+        circuit_breaker = _circuit_breakers.get(name)
+        if circuit_breaker is None:
+            circuit_breaker = _circuit_breakers[name] = CircuitBreaker(name)
+        return circuit_breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, dict]:
+    with _circuit_breakers_lock:
+        circuit_breakers = list(_circuit_breakers.values())
+    return {circuit_breaker.name: circuit_breaker.get_stats() for circuit_breaker in circuit_breakers}
+
+
+def clear_circuit_breakers():
+    with _circuit_breakers_lock:
+        for circuit_breaker in _circuit_breakers.values():
+            circuit_breaker.clear()
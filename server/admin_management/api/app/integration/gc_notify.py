@@ -1,6 +1,7 @@
 import logging
+from typing import Optional
 
-import requests
+from api.app.integration.http_transport import HttpTransport, get_http_transport
 from api.app.schemas.schemas import GCNotifyGrantDelegatedAdminEmailParam
 from api.app.utils.utils import is_success_response
 from api.config import config
@@ -22,7 +23,7 @@ class GCNotifyEmailService:
 
     TIMEOUT = (5, 10)  # Timeout (connect, read) in seconds.
 
-    def __init__(self):
+    def __init__(self, transport: Optional[HttpTransport] = None):
         self.API_KEY = config.get_gc_notify_email_api_key()
         self.email_base_url = GC_NOTIFY_EMAIL_BASE_URL
         self.headers = {
@@ -30,13 +31,20 @@ class GCNotifyEmailService:
             "Authorization": "ApiKey-v1 " + self.API_KEY,
         }
 
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.transport = transport or get_http_transport(self.email_base_url, self.TIMEOUT)
+        self.session = self.transport.create_session(self.headers)
 
     def send_delegated_admin_granted_email(self, params: GCNotifyGrantDelegatedAdminEmailParam):
         """
         Send email notification for new delegated admin
         """
+        return self.send_email(self.build_delegated_admin_granted_email(params))
+
+    def build_delegated_admin_granted_email(self, params: GCNotifyGrantDelegatedAdminEmailParam) -> dict:
+        """
+        Build email notification for new delegated admin (GC Notify email_address, template_id and
+        personalisation), to send with "send_email" now or later (email outbox).
+        """
         # GC Notify does not have sufficient conditional rendering, cannot send None to variable, and does not support
         # 'variable' within coditional text. Easier to do this in code.
         application_role_granted_text = self.__to_application_role_granted_text(params)
@@ -76,10 +84,16 @@ class GCNotifyEmailService:
             "template_id": GC_NOTIFY_GRANT_DELEGATED_ADMIN_EMAIL_TEMPLATE_ID,
             "personalisation": personalisation_params
         }
+        return email_params
+
+    def send_email(self, email_params: dict):
+        """
+        Send email, "email_params" are the GC Notify email_address, template_id and personalisation.
+        """
         gc_notify_email_send_url = f"{self.email_base_url}/v2/notifications/email"
 
         r = self.session.post(
-            gc_notify_email_send_url, timeout=self.TIMEOUT, json=email_params
+            gc_notify_email_send_url, timeout=self.transport.timeout, json=email_params
         )
 
         if not is_success_response(r):
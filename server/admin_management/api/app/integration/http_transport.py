@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from api.app.request_deadline import clamp_timeout
+from api.config import config
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+LOGGER = logging.getLogger(__name__)
+
+# Connect/TLS durations of the connection opened (if any) by the request
+# currently being sent on this thread.
+_connection_timing = threading.local()
+
+
+@dataclass(frozen=True)
+class HttpTiming:
+    """
+    Time spent on one request, in seconds. "connect" and "tls" are 0 when a
+    pooled keep-alive connection was reused; "read" is sending the request and
+    waiting for the response headers.
+    """
+    connect: float
+    tls: float
+    read: float
+
+    def to_log_str(self) -> str:
+        return (
+            f"connect={self.connect * 1000:.1f}ms tls={self.tls * 1000:.1f}ms "
+            f"read={self.read * 1000:.1f}ms"
+        )
+
+
+class _TimedNewConnMixin:
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _connection_timing.connect = time.perf_counter() - start
+
+
+class _TimedHTTPConnection(_TimedNewConnMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedNewConnMixin, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connection_timing.tls = max(
+            time.perf_counter() - start - getattr(_connection_timing, "connect", 0.0), 0.0
+        )
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that adds "timing" (HttpTiming) to every response it returns,
+    and cuts the timeout of each request to the time left in the current
+    request deadline (see request_deadline).
+    The underlying urllib3 pool manager is thread-safe, so one adapter can be
+    mounted on many sessions and used from many threads.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        kwargs["timeout"] = clamp_timeout(
+            kwargs.get("timeout"), f"{request.method} {urlsplit(request.url).netloc}"
+        )
+        _connection_timing.connect = 0.0
+        _connection_timing.tls = 0.0
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        total = time.perf_counter() - start
+
+        connect = _connection_timing.connect
+        tls = _connection_timing.tls
+        response.timing = HttpTiming(
+            connect=connect, tls=tls, read=max(total - connect - tls, 0.0)
+        )
+        LOGGER.debug(
+            f"{request.method} {urlsplit(request.url).netloc} "
+            f"status={response.status_code} {response.timing.to_log_str()}"
+        )
+        return response
+
+
+class HttpTransport:
+    """
+    Connection pool for one upstream host (scheme://host[:port]), shared by
+    every integration service instance in the process. Services are created per
+    request; with the pool living here instead of in their session, keep-alive
+    connections and TLS sessions to the host are reused across requests (and
+    warm Lambda invocations).
+
+    Each service still creates its own `requests.Session` with
+    `create_session()` so headers stay per instance; the session sends
+    requests for this host through the shared adapter.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Tuple[float, float],
+        pool_maxsize: Optional[int] = None,
+    ):
+        self.base_url = _to_origin(base_url)
+        self.timeout = timeout  # (connect, read) in seconds.
+        self.pool_maxsize = pool_maxsize or config.get_http_pool_maxsize()
+        self.adapter = TimedHTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_maxsize
+        )
+
+    def create_session(self, headers: Optional[dict] = None) -> requests.Session:
+        session = requests.Session()
+        session.mount(self.base_url, self.adapter)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    def close(self):
+        self.adapter.close()
+
+
+_transports: Dict[str, HttpTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def _to_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_http_transport(base_url: str, timeout: Tuple[float, float]) -> HttpTransport:
+    """
+    Returns the shared transport for the host of "base_url", creating it with
+    "timeout" on first use.
+    """
+    origin = _to_origin(base_url)
+    with _transports_lock:
+        transport = _transports.get(origin)
+        if transport is None:
+            LOGGER.debug(f"Creating http transport for {origin}")
+            transport = HttpTransport(origin, timeout=timeout)
+            _transports[origin] = transport
+        return transport
+
+
+def set_http_transport(transport: HttpTransport):
+    """Registers "transport" for its host; e.g. tests injecting a transport."""
+    with _transports_lock:
+        _transports[transport.base_url] = transport
+
+
+def clear_http_transports():
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
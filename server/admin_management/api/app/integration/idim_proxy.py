@@ -1,9 +1,10 @@
 import logging
 from http import HTTPStatus
+from typing import Optional
 
-import requests
 from api.app.constants import (IDIM_PROXY_ACCOUNT_TYPE_MAP, ApiInstanceEnv,
                                UserType)
+from api.app.integration.http_transport import HttpTransport, get_http_transport
 from api.app.jwt_validation import ERROR_PERMISSION_REQUIRED
 from api.app.schemas.schemas import (IdimProxyBceidInfo,
                                      IdimProxyBceidSearchParam,
@@ -23,7 +24,12 @@ class IdimProxyService:
 
     TIMEOUT = (5, 10)  # Timeout (connect, read) in seconds.
 
-    def __init__(self, requester: Requester,  api_instance_env: ApiInstanceEnv = ApiInstanceEnv.TEST):
+    def __init__(
+        self,
+        requester: Requester,
+        api_instance_env: ApiInstanceEnv = ApiInstanceEnv.TEST,
+        transport: Optional[HttpTransport] = None,
+    ):
         self.requester = requester
         self.api_idim_proxy_url = (
             f"{config.get_idim_proxy_api_baseurl(api_instance_env)}/api/idim-webservice"
@@ -31,8 +37,8 @@ class IdimProxyService:
         self.API_KEY = config.get_idim_proxy_api_key()
         self.headers = {"Accept": "application/json", "X-API-KEY": self.API_KEY}
 
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.transport = transport or get_http_transport(self.api_idim_proxy_url, self.TIMEOUT)
+        self.session = self.transport.create_session(self.headers)
 
     def lookup_idir(self, search_params: IdimProxySearchParam) -> IdimProxyIdirInfo:
         """
@@ -47,7 +53,7 @@ class IdimProxyService:
             f"IdimProxyService lookup_idir() - url: {url} and param: {query_params}"
         )
 
-        r = self.session.get(url, timeout=self.TIMEOUT, params=query_params)
+        r = self.session.get(url, timeout=self.transport.timeout, params=query_params)
         r.raise_for_status()  # There is a general error handler, see: requests_http_error_handler
         api_result = r.json()
         LOGGER.debug(f"API result: {api_result}")
@@ -75,7 +81,7 @@ class IdimProxyService:
             f"IdimProxyService lookup_business_bceid() - url: {url} and param: {query_params}"
         )
 
-        r = self.session.get(url, timeout=self.TIMEOUT, params=query_params)
+        r = self.session.get(url, timeout=self.transport.timeout, params=query_params)
         r.raise_for_status()  # There is a general error handler, see: requests_http_error_handler
         api_result = r.json()
 
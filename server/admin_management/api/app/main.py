@@ -8,7 +8,11 @@ from api.app.exception_handlers import (requests_http_error_handler,
 from api.app.routers import (router_access_control_privilege,
                              router_admin_user_accesses,
                              router_application_admin, router_smoke_test)
-from api.config.config import get_allow_origins, get_root_path
+from api.app.query_stats import QueryStatsMiddleware
+from api.app.request_deadline import RequestDeadlineMiddleware
+from api.config.config import (get_allow_origins, get_query_repeat_threshold,
+                               get_request_deadline_seconds, get_root_path,
+                               get_slow_query_seconds)
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
@@ -68,6 +72,12 @@ app.add_middleware(
     allow_headers=["*"],
     allow_credentials=True,
 )
+app.add_middleware(RequestDeadlineMiddleware, deadline_seconds=get_request_deadline_seconds())
+app.add_middleware(
+    QueryStatsMiddleware,
+    slow_query_seconds=get_slow_query_seconds(),
+    repeat_threshold=get_query_repeat_threshold(),
+)
 app.add_exception_handler(Timeout, requests_gateway_timeout_error_handler)
 app.add_exception_handler(ConnectionError, requests_gateway_timeout_error_handler)
 app.add_exception_handler(HTTPError, requests_http_error_handler)
@@ -1,11 +1,11 @@
 import datetime
-from typing import Optional
+from typing import List, Optional
 
 from sqlalchemy import (BigInteger, Boolean, Column, ForeignKey,
                         ForeignKeyConstraint, Identity, Index, Integer,
                         PrimaryKeyConstraint, String, UniqueConstraint, func,
                         text)
-from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TIMESTAMP
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import (Mapped, declarative_base, mapped_column,
                             relationship)
@@ -798,3 +798,81 @@ class FamPrivilegeChangeAudit(Base):
 
     def __repr__(self):
         return f"<FamPrivilegeChangeAudit(privilege_change_audit_id={self.privilege_change_audit_id}, application_id={self.application_id})>"
+
+
+class FamEmailOutbox(Base):
+    __tablename__ = "fam_email_outbox"
+    __table_args__ = (
+        Index(
+            "ix_app_fam_fam_email_outbox_queued",
+            "next_attempt_date",
+            postgresql_where=text(
+                "email_sending_status IN ('QUEUED_FOR_EMAIL_SERVICE', 'SENDING_TO_EMAIL_SERVICE')"
+            ),
+        ),
+        Index(
+            "ix_app_fam_fam_email_outbox_user_role_xref_ids",
+            "user_role_xref_ids",
+            postgresql_using="gin",
+        ),
+        {
+            "comment": "Notification emails waiting to be sent, or sent, through GC "
+            "Notify by the email outbox dispatcher.",
+            "schema": "app_fam",
+        },
+    )
+
+    email_outbox_id: Mapped[int] = mapped_column(
+        BigInteger, Identity(start=1, increment=1), primary_key=True
+    )
+    template_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    send_to_email: Mapped[str] = mapped_column(String(250), nullable=False)
+    personalisation: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    email_sending_status: Mapped[str] = mapped_column(
+        String(50),
+        server_default=text("'QUEUED_FOR_EMAIL_SERVICE'"),
+        nullable=False,
+    )
+    attempt_count: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"), nullable=False
+    )
+    next_attempt_date: Mapped[datetime.datetime] = mapped_column(
+        TIMESTAMP, server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(String(1000))
+    notification_id: Mapped[Optional[str]] = mapped_column(String(36))
+    user_role_xref_ids: Mapped[Optional[List[int]]] = mapped_column(ARRAY(BigInteger))
+    create_user: Mapped[str] = mapped_column(String(100), nullable=False)
+    create_date: Mapped[datetime.datetime] = mapped_column(
+        TIMESTAMP, server_default=func.now(), nullable=False
+    )
+    update_user: Mapped[Optional[str]] = mapped_column(String(100))
+    update_date: Mapped[Optional[datetime.datetime]] = mapped_column(
+        TIMESTAMP, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<FamEmailOutbox(email_outbox_id={self.email_outbox_id}, email_sending_status={self.email_sending_status})>"
+
+
+class FamCatalogVersion(Base):
+    __tablename__ = "fam_catalog_version"
+    __table_args__ = {
+        "comment": "Single row version of the application catalog (fam_application "
+        "and fam_application_client rows) cached by the APIs. "
+        "Maintained by triggers, never written by the applications.",
+        "schema": "app_fam",
+    }
+
+    catalog_version_id: Mapped[int] = mapped_column(
+        Integer, server_default=text("1"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("1"), nullable=False
+    )
+    update_date: Mapped[datetime.datetime] = mapped_column(
+        TIMESTAMP(timezone=True, precision=6), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<FamCatalogVersion(version={self.version})>"
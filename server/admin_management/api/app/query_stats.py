@@ -0,0 +1,169 @@
+"""
+Per-request statistics of the SQL statements executed.
+
+`QueryStatsMiddleware` counts the statements executed during each http request
+and their total time (cursor execute events of every SQLAlchemy engine), and
+reports them in the response "Server-Timing" header, e.g.
+`db;dur=12.5;desc="7 queries, 1 repeated"`, and in a structured (JSON) log line
+at the end of the request, with:
+- the statement shapes (SQL with its placeholders) executed "repeat_threshold"
+  times or more, likely an N+1 (e.g. a lazy relationship loaded in a loop),
+  logged as a warning;
+- the statements slower than "slow_query_seconds", each logged as a warning
+  with its bound parameters redacted (their names and types only).
+
+The stats are a context variable, like the request deadline: statements run
+outside of a request (jobs, scripts) are not counted.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+LOGGER = logging.getLogger(__name__)
+
+# Length statements are shortened to in the logs.
+LOGGED_STATEMENT_MAX_LENGTH = 300
+
+_query_stats: ContextVar[Optional["RequestQueryStats"]] = ContextVar("request_query_stats", default=None)
+
+
+def shorten_statement(statement: str) -> str:
+    statement = re.sub(r"\s+", " ", statement).strip()
+    if len(statement) > LOGGED_STATEMENT_MAX_LENGTH:
+        return statement[:LOGGED_STATEMENT_MAX_LENGTH] + "..."
+    return statement
+
+
+def redact_parameters(parameters, executemany: bool = False):
+    """The bound parameters with their values replaced by their type names."""
+    if executemany:
+        return f"{len(parameters)} parameter sets"
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class RequestQueryStats:
+    """Statements executed by one request."""
+
+    def __init__(self, slow_query_seconds: float, repeat_threshold: int):
+        self.slow_query_seconds = slow_query_seconds
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slow_count = 0
+        self._statement_counts = Counter()
+
+    def record(self, statement: str, parameters, executemany: bool, seconds: float):
+        slow = seconds >= self.slow_query_seconds
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.slow_count += slow
+            self._statement_counts[statement] += 1
+        if slow:
+            LOGGER.warning(
+                f"Slow query ({seconds * 1000:.1f} ms): {shorten_statement(statement)} "
+                f"parameters: {redact_parameters(parameters, executemany)}"
+            )
+
+    def get_repeated_statements(self) -> dict:
+        """Statement shapes executed "repeat_threshold" times or more, with their count."""
+        with self._lock:
+            return {
+                shorten_statement(statement): count
+                for statement, count in self._statement_counts.most_common()
+                if count >= self.repeat_threshold
+            }
+
+    def get_server_timing(self) -> str:
+        with self._lock:
+            count, total_seconds, slow_count = self.count, self.total_seconds, self.slow_count
+        description = [f"{count} queries"]
+        if slow_count:
+            description.append(f"{slow_count} slow")
+        repeated_count = len(self.get_repeated_statements())
+        if repeated_count:
+            description.append(f"{repeated_count} repeated")
+        return f'db;dur={total_seconds * 1000:.1f};desc="{", ".join(description)}"'
+
+    def log(self, method: str, path: str, status_code: Optional[int]):
+        repeated_statements = self.get_repeated_statements()
+        with self._lock:
+            log_item = {
+                "event": "request_queries",
+                "method": method,
+                "path": path,
+                "status": status_code,
+                "queries": self.count,
+                "db_ms": round(self.total_seconds * 1000, 1),
+                "slow_queries": self.slow_count,
+                "repeated_queries": repeated_statements,
+            }
+        if repeated_statements:
+            LOGGER.warning(json.dumps(log_item, default=str))
+        else:
+            LOGGER.info(json.dumps(log_item, default=str))
+
+
+def get_request_query_stats() -> Optional[RequestQueryStats]:
+    """The query stats of the current request, None outside of a request."""
+    return _query_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _query_stats.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_stats = _query_stats.get()
+    start = getattr(context, "_query_stats_start", None)
+    if query_stats is not None and start is not None:
+        query_stats.record(statement, parameters, executemany, time.perf_counter() - start)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware counting the statements executed by each http request."""
+
+    def __init__(self, app, slow_query_seconds: float, repeat_threshold: int):
+        self.app = app
+        self.slow_query_seconds = slow_query_seconds
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_stats = RequestQueryStats(self.slow_query_seconds, self.repeat_threshold)
+        status_code = None
+
+        async def send_with_server_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", query_stats.get_server_timing())
+            await send(message)
+
+        token = _query_stats.set(query_stats)
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            _query_stats.reset(token)
+            if query_stats.count:
+                query_stats.log(scope["method"], scope["path"], status_code)
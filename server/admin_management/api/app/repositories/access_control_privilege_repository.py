@@ -2,7 +2,7 @@ import logging
 from datetime import datetime
 from typing import List
 
-from api.app.constants import DelegatedAdminSortByEnum
+from api.app.constants import DelegatedAdminSortByEnum, PageCountMode
 from api.app.datetime_format import TIMESTAMP_FORMAT_DEFAULT
 from api.app.models.model import (FamAccessControlPrivilege, FamForestClient,
                                   FamRole, FamUser)
@@ -26,6 +26,9 @@ class AccessControlPrivilegeRepository(SimplePaginateRepository):
     This class also inherits from "SimplePaginateRepository", an abstract base class which
     provides functionality for simple pagination for query on fam_access_control_privilege.
     """
+    # total counted with the page, in the same query
+    count_mode = PageCountMode.WINDOW
+
     def __init__(self, db: Session):
         self.db = db
         super().__init__(db=db)
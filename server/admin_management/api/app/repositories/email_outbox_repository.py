@@ -0,0 +1,35 @@
+import logging
+
+from api.app.models.model import FamEmailOutbox
+from sqlalchemy.orm import Session
+
+LOGGER = logging.getLogger(__name__)
+
+
+class EmailOutboxRepository:
+    """
+    Emails stored here in the current transaction are sent by the email outbox
+    dispatcher (backend "email_outbox_dispatcher") once it is committed.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # --- Create ---
+
+    def save(self, email_params: dict, requester: str) -> FamEmailOutbox:
+        """
+        :param email_params: GC Notify email_address, template_id and personalisation.
+        :param requester: cognito_user_id of the requester.
+        """
+        db_item = FamEmailOutbox(
+            template_id=email_params["template_id"],
+            send_to_email=email_params["email_address"],
+            personalisation=email_params["personalisation"],
+            create_user=requester,
+        )
+        # savepoint: failing to queue the email does not fail the transaction
+        with self.db.begin_nested():
+            self.db.add(db_item)
+        LOGGER.debug(f"Email {db_item.email_outbox_id} queued for {db_item.send_to_email}")
+        return db_item
@@ -1,22 +1,59 @@
 
+import base64
+import binascii
+import json
 import logging
 from abc import ABC, abstractmethod
+from datetime import datetime
 from enum import StrEnum
+from http import HTTPStatus
+from typing import Optional, Tuple
 
-from api.app.constants import SortOrderEnum
+from api.app.constants import (ERROR_CODE_INVALID_REQUEST_PARAMETER, MIN_PAGE,
+                               PAGE_COUNT_CACHE_MAX_SIZE,
+                               PAGE_COUNT_CACHE_TTL_SECONDS,
+                               PAGE_COUNT_ESTIMATE_THRESHOLD, PageCountMode,
+                               SortOrderEnum)
 from api.app.schemas.pagination import (PagedResultsSchema, PageParamsSchema,
                                         PageResultMetaSchema)
+from api.app.utils import utils
+from api.app.utils.ttl_cache import TtlLruCache, register_cache
 from pydantic import BaseModel
-from sqlalchemy import ColumnElement, Select, asc, desc, func, select
+from sqlalchemy import (ColumnElement, Select, and_, asc, desc, func, inspect,
+                        or_, select)
 from sqlalchemy.orm import Session
 
 LOGGER = logging.getLogger(__name__)
 
+# Total counts of paginated queries keyed by the filtered query (sql and parameters); a cached
+# value is (total, estimated).
+page_count_cache = register_cache(
+    TtlLruCache(ttl=PAGE_COUNT_CACHE_TTL_SECONDS, max_size=PAGE_COUNT_CACHE_MAX_SIZE)
+)
+
+
 class SimplePaginateRepository(ABC):
     """
     This class is an abstract base class which provides functionality for simple pagination.
     Subclass needs to provides implementation for abstract methods.
+
+    Two paging modes:
+        - page number ('page_params.page'): the query skips the rows of the previous pages (OFFSET).
+        - cursor ('page_params.cursor', from 'next_cursor' of the previous page's meta): the query
+          starts after the last row of the previous page (keyset), as fast for deep pages as
+          for the first one. The cursor is an opaque token of the last row's sort_by column value
+          and primary key (rows are ordered by both), with the sort used and the page number.
+
+    The total count ('count_mode', subclass can override):
+        - EXACT: a separate count query over the filtered base query.
+        - WINDOW: counted by the page query itself ("count(*) OVER ()"), a single query. The count
+          query is still needed for a page past the last one.
+        - ESTIMATED: as WINDOW, but the first page's count is cached ('page_count_cache') and reused
+          by the next pages with the same filter; and from PAGE_COUNT_ESTIMATE_THRESHOLD rows, the
+          planner's row estimate is used instead (meta 'total_estimated').
     """
+    count_mode: PageCountMode = PageCountMode.EXACT
+
     def __init__(self, db: Session):
         self.db = db
 
@@ -36,10 +73,11 @@ class SimplePaginateRepository(ABC):
         """
         Paginate the query results.
         Main implemented function for this abstract repository, it will apply 'filter (where clause)', 'order_by clause'
-        if needed and apply paging based on calculated 'offset' and 'limit'
+        if needed and apply paging based on the cursor, or calculated 'offset' and 'limit'
 
         Arguments:
             base_query (Select): A base Select query provided from subclass repository to be based on.
+                Its first entity's primary key is used as the tie-breaker of the order.
             page_params (PageParamsSchema): pagination parameters for query to return paged results.
             ResultSchema (type[BaseModel]): This is the return type Class and used for paged result conversion.
 
@@ -50,63 +88,200 @@ class SimplePaginateRepository(ABC):
         LOGGER.debug(f"Obtaining paginated results with page params: {page_params}")
         self.base_query = base_query
         self.page_params = page_params
-        self.page = page_params.page
+        self.__sort_column = self.__get_sort_by_column()
+        self.__id_column = inspect(base_query.column_descriptions[0]["entity"]).primary_key[0]
+        # not a str when the page params are not from the request (the field's default is its 'Query')
+        cursor = page_params.cursor if isinstance(page_params.cursor, str) else None
+        self.__cursor = self.__decode_cursor(cursor) if cursor else None
+        self.page = self.__cursor["page"] if self.__cursor else page_params.page
         self.size = page_params.size
         self.__limit = self.size
         self.__offset = (self.page - 1) * self.size
 
         paged_query = self.__apply_filter_by(self.base_query, page_params)
         paged_query = self.__apply_order_by(paged_query)
-        paged_query = paged_query.offset(self.__offset).limit(self.__limit)
-        total_counts = self.__get_total_count()
+        if self.__cursor:
+            paged_query = paged_query.where(self.__after_cursor_criteria())
+        else:
+            paged_query = paged_query.offset(self.__offset)
+        # the sort_by column and id of the last row make the next page's cursor
+        paged_query = paged_query.limit(self.__limit).add_columns(self.__sort_column, self.__id_column)
+
+        total_count = None
+        if self.count_mode == PageCountMode.ESTIMATED:
+            total_count, total_estimated = self.__get_cached_or_estimated_count()
+        if total_count is None and self.count_mode != PageCountMode.EXACT:
+            paged_query = paged_query.add_columns(func.count().over())
+
+        rows = self.db.execute(paged_query).all()
+        if total_count is None:
+            total_count, total_estimated = self.__get_total_count(rows), False
+            if self.count_mode == PageCountMode.ESTIMATED:
+                page_count_cache.set(self.__count_cache_key(), (total_count, total_estimated))
+
         results = PagedResultsSchema[ResultSchema](
             meta = PageResultMetaSchema(
-                total=total_counts,
-                number_of_pages=self.__get_number_of_pages(total_counts),
+                total=total_count,
+                number_of_pages=self.__get_number_of_pages(total_count),
                 page_number=self.page,
-                page_size=self.size
+                page_size=self.size,
+                total_estimated=total_estimated,
+                next_cursor=self.__encode_next_cursor(rows, total_count, total_estimated)
             ),
-            results=[ResultSchema.model_validate(item) for item in self.db.scalars(paged_query)]
+            results=[ResultSchema.model_validate(row[0]) for row in rows]
         )
         return results
 
-    def __get_total_count(self) -> int:
+    def __get_total_count(self, rows) -> int:
+        if self.count_mode != PageCountMode.EXACT:
+            if rows:
+                # "count(*) OVER ()" counts the rows matching the query before LIMIT/OFFSET,
+                # which with a cursor are the ones after the previous pages.
+                window_count = rows[0][-1]
+                return window_count + self.__offset if self.__cursor else window_count
+            if self.page == MIN_PAGE and not self.__cursor:
+                return 0
+
         total_count_q = self.__apply_filter_by(self.base_query, self.page_params)
         count = self.db.scalar(
             select(func.count()).select_from(total_count_q.subquery())
         )
         return count
 
+    def __get_cached_or_estimated_count(self) -> Tuple[Optional[int], bool]:
+        """
+        (total, estimated) of the filtered query from the count cache (not for the first
+        page, its count is refreshed), or the planner's estimate when it is over
+        PAGE_COUNT_ESTIMATE_THRESHOLD; (None, False) when it has to be counted.
+        """
+        cache_key = self.__count_cache_key()
+        if self.page > MIN_PAGE:
+            cached = page_count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        filtered_query, params = cache_key
+        plan = self.db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {filtered_query}", dict(params)
+        ).scalar()
+        estimated_rows = int(plan[0]["Plan"]["Plan Rows"])
+        LOGGER.debug(f"Planner row estimate for the paginated query: {estimated_rows}")
+        if estimated_rows < PAGE_COUNT_ESTIMATE_THRESHOLD:
+            return None, False
+
+        page_count_cache.set(cache_key, (estimated_rows, True))
+        return estimated_rows, True
+
+    def __count_cache_key(self) -> tuple:
+        """The filtered base query, as its sql and (sorted) parameters."""
+        compiled = self.__apply_filter_by(self.base_query, self.page_params).compile(
+            dialect=self.db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+        )
+        return compiled.string, tuple(sorted(compiled.params.items()))
+
     def __get_number_of_pages(self, count: int) -> int:
         rest = count % self.size
         quotient = count // self.size
         return quotient if not rest else quotient + 1
 
-    def __apply_order_by(self, q: Select) -> Select:
-        """
-        Based on 'sort_by' and 'sort_order' page_params to build SQL "ORDER BY"
-        clause, e.g., ("ORDER BY app_fam.fam_user.user_name ASC") to return
-        for the query.
-        """
+    def __get_sort_by_column(self):
         sort_by = self.page_params.sort_by
-        sort_order = self.page_params.sort_order
         column_mapping = self.get_sort_by_column_mapping()
-        mapped_column = (
+        return (
             list(column_mapping.values())[0]  # default sort_by column
             if sort_by is None
             else column_mapping.get(sort_by)
         )
 
-        order_by_criteria = asc(mapped_column) if sort_order == SortOrderEnum.ASC else desc(mapped_column)
+    def __is_sort_asc(self) -> bool:
+        return self.page_params.sort_order == SortOrderEnum.ASC
+
+    def __apply_order_by(self, q: Select) -> Select:
+        """
+        Based on 'sort_by' and 'sort_order' page_params to build SQL "ORDER BY"
+        clause, e.g., ("ORDER BY app_fam.fam_user.user_name ASC") to return
+        for the query. Rows with the same sort_by value are ordered by id, for
+        the pages not to overlap.
+        """
+        direction = asc if self.__is_sort_asc() else desc
+        order_by_criteria = direction(self.__sort_column)
 
         LOGGER.debug(f"Applying order_by criteria: {order_by_criteria}")
-        if order_by_criteria is not None:
-            q = q.order_by(order_by_criteria)
-        return q
+        return q.order_by(order_by_criteria, direction(self.__id_column))
 
     def __apply_filter_by(self, q: Select, page_params: PageParamsSchema) -> Select:
         filter_by_criteria = self.get_filter_by_criteria(page_params)
         LOGGER.debug(f"Applying filter criteria: {filter_by_criteria}")
         if filter_by_criteria is not None:
               q = q.filter(filter_by_criteria)
-        return q
\ No newline at end of file
+        return q
+
+    def __after_cursor_criteria(self) -> ColumnElement[bool]:
+        """
+        Rows after the cursor's (sort_by value, id) in the order of the query.
+        Note, PostgreSQL sorts NULLs last in ascending order and first in descending order.
+        """
+        column, id_column = self.__sort_column, self.__id_column
+        last_value, last_id = self.__cursor["last_value"], self.__cursor["last_id"]
+        if self.__is_sort_asc():
+            if last_value is None:
+                return and_(column.is_(None), id_column > last_id)
+            return or_(
+                column > last_value,
+                and_(column == last_value, id_column > last_id),
+                column.is_(None),
+            )
+
+        if last_value is None:
+            return or_(column.is_not(None), and_(column.is_(None), id_column < last_id))
+        return or_(column < last_value, and_(column == last_value, id_column < last_id))
+
+    def __encode_next_cursor(self, rows, total_count: int, total_estimated: bool) -> str | None:
+        # an estimated total can be under the actual count, then only a page not full is the last one
+        is_last_page = len(rows) < self.size if total_estimated else self.page * self.size >= total_count
+        if not rows or is_last_page:
+            return None
+
+        last_value, last_id = rows[-1][1], rows[-1][2]
+        cursor = {
+            **self.__cursor_sort(),
+            "page": self.page + 1,
+            "last_value": last_value.isoformat() if isinstance(last_value, datetime) else last_value,
+            "last_id": last_id,
+        }
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode().rstrip("=")
+
+    def __decode_cursor(self, token: str) -> dict:
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            if not isinstance(cursor["page"], int) or not isinstance(cursor["last_id"], int):
+                raise ValueError("page and last_id must be integers")
+            last_value = cursor["last_value"]
+            if not isinstance(last_value, (str, int, float, type(None))):
+                raise ValueError("last_value must be a sort_by column value")
+            if last_value is not None and self.__sort_column.type.python_type is datetime:
+                cursor["last_value"] = datetime.fromisoformat(last_value)
+
+        except (binascii.Error, ValueError, TypeError, KeyError) as e:
+            LOGGER.debug(f"Invalid page cursor {token}: {e}")
+            utils.raise_http_exception(
+                status_code=HTTPStatus.BAD_REQUEST,
+                error_code=ERROR_CODE_INVALID_REQUEST_PARAMETER,
+                error_msg="Invalid page cursor."
+            )
+
+        if {key: cursor.get(key) for key in ("sort_by", "sort_order")} != self.__cursor_sort():
+            utils.raise_http_exception(
+                status_code=HTTPStatus.BAD_REQUEST,
+                error_code=ERROR_CODE_INVALID_REQUEST_PARAMETER,
+                error_msg="Page cursor is for a different sorting, 'sortBy' and 'sortOrder' have to stay the same."
+            )
+        return cursor
+
+    def __cursor_sort(self) -> dict:
+        sort_by = self.page_params.sort_by
+        sort_order = self.page_params.sort_order
+        return {
+            "sort_by": sort_by.value if sort_by is not None else None,
+            "sort_order": sort_order.value if sort_order is not None else None,
+        }
@@ -0,0 +1,99 @@
+"""
+Request-scoped deadline for outbound calls.
+
+`RequestDeadlineMiddleware` gives every request a deadline (a bit under the
+Lambda timeout, itself under the API Gateway timeout). Outbound http calls
+sent through the shared transport (see `http_transport.TimedHTTPAdapter`) get
+their connect/read timeouts cut to the time left, and fail with
+`RequestDeadlineExceeded` (a `requests` Timeout, so a 504 response) when too
+little is left, instead of the request being cut off by the gateway.
+
+The deadline is a context variable: it follows the request into the sync
+endpoint threads, but code submitting work to its own thread pool has to run
+it in a copy of the context (`contextvars.copy_context().run`).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple, Union
+
+import requests
+
+LOGGER = logging.getLogger(__name__)
+
+# Less time than this left: an outbound call is not worth starting.
+MIN_OUTBOUND_CALL_SECONDS = 0.5
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class RequestDeadlineExceeded(requests.exceptions.Timeout):
+    """Not enough time left in the request for the work (an outbound call) to complete."""
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Sets the deadline of the work done in the block (and what it calls) to "seconds" from now."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left before the deadline, None when there is no deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_time_left(seconds: float) -> bool:
+    remaining = remaining_seconds()
+    return remaining is None or remaining >= seconds
+
+
+def ensure_time_left(seconds: float, work: str):
+    """Raises RequestDeadlineExceeded when less than "seconds" are left for "work"."""
+    remaining = remaining_seconds()
+    if remaining is not None and remaining < seconds:
+        raise RequestDeadlineExceeded(
+            f"Not enough time left in the request for {work}: "
+            f"{max(remaining, 0):.1f}s left, {seconds}s needed."
+        )
+
+
+def clamp_timeout(
+    timeout: Union[None, float, Tuple[float, float]], work: str = "the outbound call"
+) -> Union[None, float, Tuple[float, float]]:
+    """
+    Cuts a `requests` timeout ((connect, read), a number or None) to the time
+    left; unchanged when there is no deadline.
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        return timeout
+    ensure_time_left(MIN_OUTBOUND_CALL_SECONDS, work)
+    if timeout is None:
+        return (remaining, remaining)
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return (min(connect, remaining), min(read, remaining))
+    return min(timeout, remaining)
+
+
+class RequestDeadlineMiddleware:
+    """ASGI middleware setting the deadline of each http request."""
+
+    def __init__(self, app, deadline_seconds: float):
+        self.app = app
+        self.deadline_seconds = deadline_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with request_deadline(self.deadline_seconds):
+            await self.app(scope, receive, send)
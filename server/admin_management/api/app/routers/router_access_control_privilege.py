@@ -2,7 +2,8 @@ import logging
 from datetime import datetime
 from typing import List
 
-from api.app import jwt_validation
+from api.app import jwt_validation, request_deadline
+from api.app.constants import REQUEST_DEADLINE_DB_WORK_SECONDS
 from api.app.models.model import FamUser
 from api.app.routers.router_guards import (
     authorize_by_app_id, authorize_by_application_role,
@@ -83,6 +84,11 @@ def create_access_control_privilege_many(
         )
         audit_event_log.application = audit_event_log.role.application
 
+        # Target user verification may have used most of the request time: do not start granting without enough left.
+        request_deadline.ensure_time_left(
+            REQUEST_DEADLINE_DB_WORK_SECONDS, "granting the access control privileges"
+        )
+
         response = FamAccessControlPrivilegeResponse(
             assignments_detail=access_control_privilege_service.create_access_control_privilege_many(
                 access_control_privilege_request, requester, target_user
@@ -95,10 +101,10 @@ def create_access_control_privilege_many(
             access_control_privilege_request.user_guid,
         )
 
-        # Send email notification if required
+        # Queue email notification if required, sent after commit
         if access_control_privilege_request.requires_send_user_email:
             response.email_sending_status = access_control_privilege_service.send_email_notification(
-                target_user, response.assignments_detail
+                target_user, response.assignments_detail, requester
             )
 
         return response
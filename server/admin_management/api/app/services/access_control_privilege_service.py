@@ -9,6 +9,8 @@ from api.app.integration.forest_client_integration import \
 from api.app.integration.gc_notify import GCNotifyEmailService
 from api.app.repositories.access_control_privilege_repository import \
     AccessControlPrivilegeRepository
+from api.app.repositories.email_outbox_repository import \
+    EmailOutboxRepository
 from api.app.schemas.forest_client_integration import \
     ForestClientIntegrationSearchParmsSchema
 from api.app.schemas.pagination import (DelegatedAdminPageParamsSchema,
@@ -39,6 +41,7 @@ class AccessControlPrivilegeService:
         self.role_service = RoleService(db)
         self.permission_audit_service = PermissionAuditService(db)
         self.access_control_privilege_repository = AccessControlPrivilegeRepository(db)
+        self.email_outbox_repository = EmailOutboxRepository(db)
 
     @post_sync_forest_clients_dec
     def get_paged_delegated_admin_assignment_by_application_id(
@@ -284,7 +287,12 @@ class AccessControlPrivilegeService:
         self,
         target_user: TargetUser,
         access_control_priviliege_response: List[FamAccessControlPrivilegeCreateResponse],
+        requester: Requester,
     ):
+        """
+        Queue the email notification for the new delegated admin in the email outbox, in the
+        same transaction as the granted privileges; the email outbox dispatcher sends it.
+        """
         try:
             granted_roles_res = list(filter(
                 lambda res: res.status_code == HTTPStatus.OK,
@@ -303,7 +311,7 @@ class AccessControlPrivilegeService:
                 if is_forest_client_scoped_role
                 else None
             )
-            email_response = gc_notify_email_service.send_delegated_admin_granted_email(
+            email_params = gc_notify_email_service.build_delegated_admin_granted_email(
                 GCNotifyGrantDelegatedAdminEmailParam(
                     ** {
                         "send_to_email_address": target_user.email,
@@ -317,11 +325,12 @@ class AccessControlPrivilegeService:
                     }
                 )
             )
-            LOGGER.debug(f"Email is sent to {target_user.email}: {email_response}")
-            return famConstants.EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS
+            self.email_outbox_repository.save(email_params, requester.cognito_user_id)
+            LOGGER.debug(f"Email is queued for {target_user.email}")
+            return famConstants.EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
         except Exception as e:
             LOGGER.debug(
-                f"Failure sending email to the new delegated admin {target_user.email}."
+                f"Failure queuing email to the new delegated admin {target_user.email}."
             )
             LOGGER.debug(f"Failure reason : {e}.")
             return famConstants.EmailSendingStatus.SENT_TO_EMAIL_SERVICE_FAILURE
\ No newline at end of file
@@ -1,16 +1,18 @@
 import logging
-from sqlalchemy.orm import Session
+from typing import Optional
 
-from api.app.repositories.application_repository import ApplicationRepository
+from sqlalchemy.orm import Session
 
+from api.app import catalog
+from api.app.catalog import CatalogApplication
 
 LOGGER = logging.getLogger(__name__)
 
 
 class ApplicationService:
     def __init__(self, db: Session):
-        self.application_repo = ApplicationRepository(db)
-
-    def get_application(self, application_id: int):
-        return self.application_repo.get_application(application_id)
+        self.db = db
 
+    def get_application(self, application_id: int) -> Optional[CatalogApplication]:
+        # from the application catalog (see "catalog"), not queried per request
+        return catalog.get_catalog(self.db).get_application(application_id)
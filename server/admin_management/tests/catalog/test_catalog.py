@@ -0,0 +1,37 @@
+from api.app import catalog
+from api.app.models.model import FamApplication
+from api.app.services.application_service import ApplicationService
+from sqlalchemy.orm import Session
+
+from tests.constants import (TEST_APPLICATION_ID_FAM, TEST_APPLICATION_NAME_FAM,
+                             TEST_NOT_EXIST_APPLICATION_ID)
+
+
+def test_application_service_get_application_from_catalog(db_pg_session: Session, mocker):
+    application_service = ApplicationService(db_pg_session)
+    execute_spy = mocker.spy(db_pg_session, "execute")
+
+    application = application_service.get_application(TEST_APPLICATION_ID_FAM)
+    assert application.application_name == TEST_APPLICATION_NAME_FAM
+    statement_count = execute_spy.call_count
+    assert application_service.get_application(TEST_NOT_EXIST_APPLICATION_ID) is None
+    assert application_service.get_application(TEST_APPLICATION_ID_FAM) is application
+    assert execute_spy.call_count == statement_count  # from the loaded catalog
+
+
+def test_catalog_reloaded_when_version_changes(db_pg_session: Session, monkeypatch):
+    monkeypatch.setenv("CATALOG_VERSION_CHECK_SECONDS", "0")
+    fam_catalog = catalog.get_catalog(db_pg_session)
+
+    application = FamApplication(
+        application_name="CATALOG_TEST_APP",
+        application_description="Catalog test application",
+        create_user="test",
+    )
+    db_pg_session.add(application)
+    db_pg_session.flush()
+
+    reloaded_catalog = catalog.get_catalog(db_pg_session)
+    assert reloaded_catalog.version > fam_catalog.version
+    assert reloaded_catalog.get_application(application.application_id).application_name == "CATALOG_TEST_APP"
+    assert fam_catalog.get_application(application.application_id) is None
@@ -18,6 +18,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 import api.app.database as database
 import api.app.jwt_validation as jwt_validation
 from api.app.constants import AppEnv, RoleType, UserType
+from api.app.integration.circuit_breaker import clear_circuit_breakers
 from api.app.integration.forest_client_integration import \
     ForestClientIntegrationService
 from api.app.main import app
@@ -43,6 +44,7 @@ from api.app.services.forest_client_service import ForestClientService
 from api.app.services.permission_audit_service import PermissionAuditService
 from api.app.services.role_service import RoleService
 from api.app.services.user_service import UserService
+from api.app.utils.ttl_cache import clear_caches
 from tests.constants import (TEST_ACCESS_CONTROL_PRIVILEGE_CREATE_REQUEST,
                              TEST_CREATOR, TEST_DUMMY_COGNITO_USER_ID,
                              TEST_FOM_DEV_REVIEWER_ROLE_ID,
@@ -310,6 +312,22 @@ def override_get_verified_target_user(test_client_fixture):
     return _override_get_verified_target_user
 
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_process_caches():
+    # Caches are shared per process (see ttl_cache.register_cache), start each test empty.
+    clear_caches()
+    yield
+    clear_caches()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_upstream_circuit_breakers():
+    # Circuit breakers are shared per process, start each test with closed circuits.
+    clear_circuit_breakers()
+    yield
+    clear_circuit_breakers()
+
+
 @pytest.fixture(scope="function", autouse=True)
 def mock_forest_client_integration_service():
     # Mocked dependency class object
@@ -0,0 +1,46 @@
+import psycopg2
+import pytest
+from api.app import database
+
+
+def test_connect_uses_current_db_credentials(mocker):
+    mocker.patch.object(database.config, "get_aws_db_credentials", return_value=("user", "pw1"))
+    invalidate = mocker.patch.object(database.config, "invalidate_aws_db_secret")
+    dialect = mocker.Mock()
+    cparams = {"host": "db", "user": "url-user", "password": "url-pw"}
+
+    connection = database._connect_with_current_db_credentials(dialect, None, (), cparams)
+
+    assert connection is dialect.connect.return_value
+    dialect.connect.assert_called_once_with(host="db", user="user", password="pw1")
+    invalidate.assert_not_called()
+
+
+def test_connect_refreshes_db_credentials_after_rotation(mocker):
+    mocker.patch.object(
+        database.config, "get_aws_db_credentials", side_effect=[("user", "pw1"), ("user", "pw2")]
+    )
+    invalidate = mocker.patch.object(database.config, "invalidate_aws_db_secret")
+    dialect = mocker.Mock()
+    new_connection = mocker.Mock()
+    dialect.connect.side_effect = [
+        psycopg2.OperationalError("password authentication failed"),
+        new_connection,
+    ]
+
+    connection = database._connect_with_current_db_credentials(dialect, None, (), {"host": "db"})
+
+    assert connection is new_connection
+    invalidate.assert_called_once()
+    assert dialect.connect.call_args_list[1] == mocker.call(host="db", user="user", password="pw2")
+
+
+def test_connect_raises_when_refreshed_db_credentials_fail(mocker):
+    mocker.patch.object(database.config, "get_aws_db_credentials", return_value=("user", "pw1"))
+    mocker.patch.object(database.config, "invalidate_aws_db_secret")
+    dialect = mocker.Mock()
+    dialect.connect.side_effect = psycopg2.OperationalError("password authentication failed")
+
+    with pytest.raises(psycopg2.OperationalError):
+        database._connect_with_current_db_credentials(dialect, None, (), {"host": "db"})
+    assert dialect.connect.call_count == 2
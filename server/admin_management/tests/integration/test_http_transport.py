@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from api.app.constants import ApiInstanceEnv
+from api.app.integration.forest_client_integration import \
+    ForestClientIntegrationService
+from api.app.integration.gc_notify import GCNotifyEmailService
+from api.app.integration.http_transport import (HttpTransport,
+                                                clear_http_transports,
+                                                get_http_transport)
+from api.app.request_deadline import (RequestDeadlineExceeded, clamp_timeout,
+                                      request_deadline)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+
+    def do_GET(self):
+        _KeepAliveHandler.client_ports.append(self.client_address[1])
+        if self.path.endswith("/slow"):
+            time.sleep(2)
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="function")
+def local_http_server():
+    _KeepAliveHandler.client_ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="function")
+def fresh_http_transports():
+    clear_http_transports()
+    yield
+    clear_http_transports()
+
+
+def test_transport_shared_per_host(fresh_http_transports):
+    fc_test = ForestClientIntegrationService(ApiInstanceEnv.TEST)
+    fc_test_again = ForestClientIntegrationService(ApiInstanceEnv.TEST)
+    gc_notify = GCNotifyEmailService()
+
+    assert fc_test.transport is fc_test_again.transport
+    assert fc_test.transport is get_http_transport(fc_test.api_base_url, (1, 1))
+    assert gc_notify.transport is not fc_test.transport
+    # sessions (and headers) are still per instance
+    assert fc_test.session is not fc_test_again.session
+    assert fc_test.transport.timeout == ForestClientIntegrationService.TIMEOUT
+
+
+def test_transport_injected(fresh_http_transports):
+    base_url = ForestClientIntegrationService().api_base_url
+    transport = HttpTransport(base_url, timeout=(1, 2), pool_maxsize=2)
+
+    fc_api = ForestClientIntegrationService(transport=transport)
+
+    assert fc_api.transport is transport
+    assert fc_api.session.get_adapter(fc_api.api_clients_url) is transport.adapter
+    assert get_http_transport(base_url, (1, 2)) is not transport
+
+
+def test_connection_reused_across_sessions(local_http_server):
+    transport = HttpTransport(local_http_server, timeout=(1, 2))
+    first_session = transport.create_session({"X-API-KEY": "first"})
+    second_session = transport.create_session({"X-API-KEY": "second"})
+
+    first = first_session.get(f"{local_http_server}/api/clients/search", timeout=transport.timeout)
+    second = second_session.get(f"{local_http_server}/api/clients/search", timeout=transport.timeout)
+
+    assert first.status_code == second.status_code == 200
+    # one connection: the second request from another session reused it
+    assert len(set(_KeepAliveHandler.client_ports)) == 1
+    assert first.timing.connect > 0
+    assert second.timing.connect == 0
+    assert second.timing.tls == 0
+    assert second.timing.read > 0
+
+
+def test_clamp_timeout_to_request_deadline():
+    assert clamp_timeout((5, 10)) == (5, 10)
+
+    with request_deadline(3):
+        connect, read = clamp_timeout((5, 10))
+        assert connect <= 3 and read <= 3
+        assert clamp_timeout((1, 2)) == (1, 2)
+        assert clamp_timeout(None)[1] <= 3
+        assert clamp_timeout(10) <= 3
+
+    with request_deadline(0.1):
+        with pytest.raises(RequestDeadlineExceeded):
+            clamp_timeout((5, 10))
+
+
+def test_request_timeout_cut_to_request_deadline(local_http_server):
+    transport = HttpTransport(local_http_server, timeout=(5, 10))
+    session = transport.create_session({})
+
+    start = time.monotonic()
+    with request_deadline(1):
+        with pytest.raises(requests.exceptions.Timeout):
+            session.get(f"{local_http_server}/slow", timeout=transport.timeout)
+    assert time.monotonic() - start < 2
+
+    with request_deadline(0):
+        with pytest.raises(RequestDeadlineExceeded):
+            session.get(f"{local_http_server}/api/clients/search", timeout=transport.timeout)
@@ -0,0 +1,53 @@
+import json
+import logging
+import re
+
+import tests.jwt_utils as jwt_utils
+from api.app import query_stats
+from api.app.constants import AdminRoleAuthGroup
+from api.app.main import apiPrefix
+from api.app.query_stats import RequestQueryStats
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+SERVER_TIMING_PATTERN = re.compile(r'^db;dur=[\d.]+;desc="(\d+) queries(, [^"]+)?"$')
+
+
+def test_request_query_stats_in_server_timing_and_log(test_client_fixture: TestClient, test_rsa_key, caplog):
+    token = jwt_utils.create_jwt_token(test_rsa_key, [AdminRoleAuthGroup.FAM_ADMIN])
+    with caplog.at_level(logging.INFO, logger=query_stats.__name__):
+        response = test_client_fixture.get(f"{apiPrefix}/application-admins", headers=jwt_utils.headers(token))
+
+    assert response.status_code == 200
+    match = SERVER_TIMING_PATTERN.match(response.headers["Server-Timing"])
+    assert match is not None
+    assert int(match.group(1)) >= 1
+
+    log_items = [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == query_stats.__name__ and "request_queries" in record.getMessage()
+    ]
+    assert len(log_items) == 1
+    assert log_items[0]["queries"] == int(match.group(1))
+
+
+def test_request_query_stats_repeated_and_slow_statements(db_pg_session: Session, caplog):
+    stats = RequestQueryStats(slow_query_seconds=0, repeat_threshold=3)
+    token = query_stats._query_stats.set(stats)
+    try:
+        with caplog.at_level(logging.WARNING, logger=query_stats.__name__):
+            for user_name in ["SECRET_A", "SECRET_B", "SECRET_C"]:
+                db_pg_session.execute(
+                    text("SELECT count(*) FROM app_fam.fam_user WHERE user_name = :user_name"),
+                    {"user_name": user_name},
+                )
+    finally:
+        query_stats._query_stats.reset(token)
+
+    assert stats.get_repeated_statements() == {
+        "SELECT count(*) FROM app_fam.fam_user WHERE user_name = %(user_name)s": 3
+    }
+    slow_query_logs = [record.getMessage() for record in caplog.records if "Slow query" in record.getMessage()]
+    assert len(slow_query_logs) == 3
+    assert not any("SECRET" in message for message in slow_query_logs)
@@ -379,7 +379,7 @@ def test_get_access_control_privileges_by_application_id__no_params_in_request_t
     assert service_fn_mock.call_args.args[1] == DelegatedAdminPageParamsSchema(
         page=1, size=50, search=None,
         sort_order=SortOrderEnum.DESC,
-        sort_by=DelegatedAdminSortByEnum.CREATE_DATE
+        sort_by=DelegatedAdminSortByEnum.CREATE_DATE, cursor=None
     )
 
 def test_export_access_control_privileges_by_application_id_success(
@@ -2,9 +2,13 @@ import logging
 from http import HTTPStatus
 
 import pytest
-from api.app.constants import (DEFAULT_PAGE_SIZE, MIN_PAGE,
-                               DelegatedAdminSortByEnum, SortOrderEnum)
-from api.app.models.model import FamRole
+from api.app.constants import (DEFAULT_PAGE_SIZE,
+                               ERROR_CODE_INVALID_REQUEST_PARAMETER, MIN_PAGE,
+                               DelegatedAdminSortByEnum, EmailSendingStatus,
+                               PageCountMode, SortOrderEnum)
+from api.app.integration.gc_notify import \
+    GC_NOTIFY_GRANT_DELEGATED_ADMIN_EMAIL_TEMPLATE_ID
+from api.app.models.model import FamEmailOutbox, FamRole
 from api.app.repositories.access_control_privilege_repository import \
     AccessControlPrivilegeRepository
 from api.app.schemas import schemas
@@ -16,6 +20,7 @@ from api.app.services.role_service import RoleService
 from api.app.services.user_service import UserService
 from fastapi import HTTPException
 from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from tests.conftest import to_mocked_target_user
 from tests.constants import (
@@ -227,6 +232,42 @@ def test_create_access_control_privilege_many(
     )
 
 
+def test_send_email_notification_queued(
+    access_control_privilege_service: AccessControlPrivilegeService,
+    db_pg_session: Session,
+    new_idir_requester,
+):
+    target_user = to_mocked_target_user(
+        {
+            **TEST_ACCESS_CONTROL_PRIVILEGE_CREATE_REQUEST_CONCRETE,
+            "email": "new.delegated.admin@example.com",
+        }
+    )
+    return_result = access_control_privilege_service.create_access_control_privilege_many(
+        schemas.FamAccessControlPrivilegeCreateRequest(
+            **TEST_ACCESS_CONTROL_PRIVILEGE_CREATE_REQUEST_CONCRETE
+        ),
+        new_idir_requester,
+        target_user,
+    )
+
+    email_sending_status = access_control_privilege_service.send_email_notification(
+        target_user, return_result, new_idir_requester
+    )
+
+    # stored in the same transaction as the granted privilege, sent later by the dispatcher
+    assert email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+    outbox_email = db_pg_session.scalars(
+        select(FamEmailOutbox).where(
+            FamEmailOutbox.send_to_email == "new.delegated.admin@example.com"
+        )
+    ).one()
+    assert outbox_email.template_id == GC_NOTIFY_GRANT_DELEGATED_ADMIN_EMAIL_TEMPLATE_ID
+    assert outbox_email.personalisation["user_name"] == target_user.user_name
+    assert outbox_email.create_user == new_idir_requester.cognito_user_id
+    assert outbox_email.email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+
+
 def test_create_access_control_privilege_many_invalid_user_type(
     access_control_privilege_service: AccessControlPrivilegeService,
 ):
@@ -433,4 +474,78 @@ def test_get_paged_delegated_admin_assignment_on_pagination(
         assert all(
             contains_any_insensitive(result_data[i], search_attributes, test_page_params.search)
             for i in range(len(result_data) - 1)
-        )
\ No newline at end of file
+        )
+
+
+@pytest.mark.parametrize("sort_by", list(DelegatedAdminSortByEnum))
+@pytest.mark.parametrize("sort_order", [SortOrderEnum.ASC, SortOrderEnum.DESC])
+def test_get_paged_delegated_admin_assignment_cursor_pagination(
+    load_fom_dev_delegated_admin_role_test_data,
+    access_control_privilege_service: AccessControlPrivilegeService,
+    sort_by, sort_order
+):
+    """
+    Paging with 'next_cursor' returns the same delegated admin assignments as
+    paging with page number, for every sortBy column.
+    """
+    original_delegated_admin_assignments_fn = (
+        access_control_privilege_service.get_paged_delegated_admin_assignment_by_application_id.__wrapped__
+    )
+
+    def get_page(page: int, cursor: str | None):
+        page_params = DelegatedAdminPageParamsSchema(
+            page=page, size=10, search=None, sort_by=sort_by, sort_order=sort_order, cursor=cursor
+        )
+        return original_delegated_admin_assignments_fn(
+            access_control_privilege_service, application_id=TEST_APPLICATION_ID_FOM_DEV, page_params=page_params
+        )
+
+    first_page = get_page(MIN_PAGE, None)
+    assert first_page.meta.number_of_pages > 1
+    next_cursor = first_page.meta.next_cursor
+    for page in range(MIN_PAGE + 1, first_page.meta.number_of_pages + 1):
+        cursor_page = get_page(MIN_PAGE, next_cursor)
+        assert cursor_page.meta.page_number == page
+        assert [item.access_control_privilege_id for item in cursor_page.results] == [
+            item.access_control_privilege_id for item in get_page(page, None).results
+        ]
+        next_cursor = cursor_page.meta.next_cursor
+
+    assert next_cursor is None
+
+
+def test_get_paged_delegated_admin_assignment_invalid_cursor(
+    access_control_privilege_service: AccessControlPrivilegeService,
+):
+    page_params = DelegatedAdminPageParamsSchema(
+        page=MIN_PAGE, size=10, search=None, sort_by=None, sort_order=None, cursor="not-a-cursor"
+    )
+    with pytest.raises(HTTPException) as e:
+        access_control_privilege_service.get_paged_delegated_admin_assignment_by_application_id.__wrapped__(
+            access_control_privilege_service, application_id=TEST_APPLICATION_ID_FOM_DEV, page_params=page_params
+        )
+
+    assert e.value.status_code == HTTPStatus.BAD_REQUEST
+    assert e.value.detail["code"] == ERROR_CODE_INVALID_REQUEST_PARAMETER
+
+
+@pytest.mark.parametrize("count_mode", list(PageCountMode))
+def test_get_paged_delegated_admin_assignment_count_modes_same_total(
+    load_fom_dev_delegated_admin_role_test_data,
+    access_control_privilege_service: AccessControlPrivilegeService,
+    count_mode, monkeypatch
+):
+    def get_total(page: int):
+        page_params = DelegatedAdminPageParamsSchema(
+            page=page, size=10, search=None, sort_by=None, sort_order=None
+        )
+        return access_control_privilege_service.get_paged_delegated_admin_assignment_by_application_id.__wrapped__(
+            access_control_privilege_service, application_id=TEST_APPLICATION_ID_FOM_DEV, page_params=page_params
+        ).meta.total
+
+    expected_total = get_total(MIN_PAGE)
+    monkeypatch.setattr(AccessControlPrivilegeRepository, "count_mode", count_mode)
+
+    assert get_total(MIN_PAGE) == expected_total
+    assert get_total(2) == expected_total
+    assert get_total(100000) == expected_total  # past the last page
@@ -0,0 +1,104 @@
+"""
+Replays synthetic Cognito pre-token events against a local (flyway
+bootstrapped) database and reports cold vs warm "lambda_handler" latency.
+
+- cold: the module level connection is discarded after every invocation, the
+  same as every login opening its own connection.
+- warm: the connection (and its prepared statements) is reused between
+  invocations, the same as a warm Lambda container.
+
+Synthetic users are created with a "BENCH" guid prefix and deleted at the end.
+
+Usage (from server/auth_function, local database running):
+    set -o allexport; source .env.local; set +o allexport
+    python benchmarks/bench_lambda_handler.py [invocations]
+"""
+import copy
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import lambda_function  # noqa: E402
+
+BENCH_USER_GUID_PREFIX = "BENCH"
+LOGIN_EVENT_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "test", "login_event.json"
+)
+
+
+def get_local_db_string():
+    return (
+        f"user={os.getenv('POSTGRES_USER', 'postgres')} "
+        f"password={os.getenv('POSTGRES_PASSWORD', 'postgres')} "
+        f"host={os.getenv('POSTGRES_HOST', 'localhost')} "
+        f"port={os.getenv('POSTGRES_PORT', '5432')} "
+        f"dbname={os.getenv('POSTGRES_DB', 'fam')}"
+    )
+
+
+def synthetic_events(count: int) -> list:
+    with open(LOGIN_EVENT_FILE, "r") as file:
+        template = json.load(file)
+
+    events = []
+    for i in range(count):
+        event = copy.deepcopy(template)
+        user_guid = f"{BENCH_USER_GUID_PREFIX}{i:027d}"
+        event["request"]["userAttributes"]["custom:idp_user_id"] = user_guid
+        event["request"]["userAttributes"]["custom:idp_username"] = f"BENCH{i}"
+        event["userName"] = f"idir_{user_guid.lower()}@idir"
+        events.append(event)
+    return events
+
+
+def replay(events: list, warm: bool) -> list:
+    lambda_function.discard_db_connection(lambda_function.obtain_db_connection())
+    latencies = []
+    for event in events:
+        start = time.perf_counter()
+        lambda_function.lambda_handler(copy.deepcopy(event), {})
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not warm:
+            lambda_function.discard_db_connection(lambda_function._db_connection)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:5} n={len(latencies):5}  mean={statistics.mean(latencies):7.2f} ms  "
+        f"p50={statistics.median(latencies):7.2f} ms  p95={p95:7.2f} ms"
+    )
+
+
+def cleanup():
+    connection = psycopg2.connect(get_local_db_string(), sslmode="disable")
+    with connection, connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM app_fam.fam_user WHERE user_guid LIKE %s",
+            (f"{BENCH_USER_GUID_PREFIX}%",),
+        )
+    connection.close()
+
+
+def main(invocations: int):
+    logging.getLogger().setLevel(logging.WARNING)
+    lambda_function.config.get_db_connection_string = get_local_db_string
+
+    events = synthetic_events(invocations)
+    try:
+        report("cold", replay(events, warm=False))
+        report("warm", replay(events, warm=True))
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
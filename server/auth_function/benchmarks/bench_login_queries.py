@@ -0,0 +1,242 @@
+"""
+Benchmarks the pre-token login statements against a seeded local database.
+
+Compares the previous five statement flow (historical guid update, user
+upsert, roles, application name, FAM app-admins) with the current flow of two
+prepared statements (user upsert, groups). Both run on one warm connection,
+so the numbers isolate statement and round trip cost.
+
+The seed adds 100k users, 1M user role assignments (10 of 20 benchmark FAM
+roles per user) and makes 1% of the users application admins. Seeded rows are
+removed at the end unless "--keep-seed" is given ("--skip-seed" reuses them).
+
+Usage (from server/auth_function, local database running):
+    set -o allexport; source .env.local; set +o allexport
+    python benchmarks/bench_login_queries.py [logins] [--keep-seed] [--skip-seed]
+"""
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import lambda_function  # noqa: E402
+from bench_lambda_handler import get_local_db_string  # noqa: E402
+
+SEED_USERS = 100_000
+SEED_ROLES = 20
+SEED_ROLES_PER_USER = 10
+BENCH_PREFIX = "BENCH"
+BENCH_CLIENT_ID = "benchmarkfamclient"
+
+
+def seed(db_connection):
+    cursor = db_connection.cursor()
+    cursor.execute(
+        """
+        INSERT INTO app_fam.fam_application_client
+            (cognito_client_id, application_id, create_user, update_user)
+        SELECT %(client)s, application_id, CURRENT_USER, CURRENT_USER
+        FROM app_fam.fam_application WHERE application_name = 'FAM';
+
+        INSERT INTO app_fam.fam_role
+            (role_name, role_purpose, application_id, role_type_code, create_user, update_user)
+        SELECT %(prefix)s || '_ROLE_' || i, 'benchmark', application_id, 'C',
+            CURRENT_USER, CURRENT_USER
+        FROM app_fam.fam_application, generate_series(1, %(roles)s) i
+        WHERE application_name = 'FAM';
+
+        INSERT INTO app_fam.fam_user
+            (user_type_code, user_name, user_guid, cognito_user_id,
+            create_user, create_date, update_user, update_date)
+        SELECT 'I', %(prefix)s || i, %(prefix)s || lpad(i::text, 27, '0'),
+            'idir_' || lower(%(prefix)s) || i || '@idir',
+            CURRENT_USER, CURRENT_DATE, CURRENT_USER, CURRENT_DATE
+        FROM generate_series(1, %(users)s) i;
+
+        WITH bench_user AS (
+            SELECT user_id, row_number() OVER (ORDER BY user_id) AS n
+            FROM app_fam.fam_user WHERE user_guid LIKE %(prefix)s || '%%'
+        ), bench_role AS (
+            SELECT role_id, row_number() OVER (ORDER BY role_id) - 1 AS n
+            FROM app_fam.fam_role WHERE role_name LIKE %(prefix)s || '\\_ROLE\\_%%'
+        )
+        INSERT INTO app_fam.fam_user_role_xref (user_id, role_id, create_user, update_user)
+        SELECT bench_user.user_id, bench_role.role_id, CURRENT_USER, CURRENT_USER
+        FROM bench_user
+            CROSS JOIN generate_series(0, %(roles_per_user)s - 1) k
+            JOIN bench_role ON bench_role.n = (bench_user.n + k) %% %(roles)s;
+
+        INSERT INTO app_fam.fam_application_admin
+            (user_id, application_id, create_user, update_user)
+        SELECT user_id, (SELECT application_id FROM app_fam.fam_application
+                         WHERE application_name = 'FAM'), CURRENT_USER, CURRENT_USER
+        FROM app_fam.fam_user
+        WHERE user_guid LIKE %(prefix)s || '%%' AND user_id %% 100 = 0;
+        """,
+        {
+            "client": BENCH_CLIENT_ID,
+            "prefix": BENCH_PREFIX,
+            "roles": SEED_ROLES,
+            "users": SEED_USERS,
+            "roles_per_user": SEED_ROLES_PER_USER,
+        },
+    )
+    db_connection.commit()
+    db_connection.autocommit = True
+    cursor.execute("ANALYZE app_fam.fam_user; ANALYZE app_fam.fam_user_role_xref;")
+    db_connection.autocommit = False
+
+
+def remove_seed(db_connection):
+    cursor = db_connection.cursor()
+    cursor.execute(
+        """
+        DELETE FROM app_fam.fam_application_admin WHERE user_id IN (
+            SELECT user_id FROM app_fam.fam_user WHERE user_guid LIKE %(prefix)s || '%%');
+        DELETE FROM app_fam.fam_user_role_xref WHERE user_id IN (
+            SELECT user_id FROM app_fam.fam_user WHERE user_guid LIKE %(prefix)s || '%%');
+        DELETE FROM app_fam.fam_user WHERE user_guid LIKE %(prefix)s || '%%';
+        DELETE FROM app_fam.fam_role WHERE role_name LIKE %(prefix)s || '\\_ROLE\\_%%';
+        DELETE FROM app_fam.fam_application_client WHERE cognito_client_id = %(client)s;
+        """,
+        {"prefix": BENCH_PREFIX, "client": BENCH_CLIENT_ID},
+    )
+    db_connection.commit()
+
+
+def login_event(i: int) -> dict:
+    return {
+        "callerContext": {"clientId": BENCH_CLIENT_ID},
+        "request": {
+            "userAttributes": {
+                "custom:idp_name": "idir",
+                "custom:idp_user_id": f"{BENCH_PREFIX}{i:027d}",
+                "custom:idp_username": f"{BENCH_PREFIX}{i}",
+                "email": f"bench{i}@test.com",
+            }
+        },
+        "response": {},
+        "userName": f"idir_{BENCH_PREFIX.lower()}{i}@idir",
+    }
+
+
+def previous_login(db_connection, event) -> list:
+    """The login statements as they were before the single round trip lookup."""
+    attributes = event["request"]["userAttributes"]
+    user_type_code = lambda_function.USER_TYPE_CODE_DICT[attributes["custom:idp_name"]]
+    user_guid = attributes["custom:idp_user_id"]
+    user_name = attributes["custom:idp_username"]
+    cognito_client_id = event["callerContext"]["clientId"]
+    cursor = db_connection.cursor()
+    cursor.execute(
+        """UPDATE app_fam.fam_user SET user_guid=%s
+        WHERE user_type_code=%s and LOWER(user_name)=%s and user_guid is null""",
+        (user_guid, user_type_code, user_name.lower()),
+    )
+    cursor.execute(
+        """INSERT INTO app_fam.fam_user
+        (user_type_code, user_guid, cognito_user_id, user_name, business_guid, email,
+        create_user, create_date, update_user, update_date)
+        VALUES(%s, %s, %s, %s, %s, %s, CURRENT_USER, CURRENT_DATE, CURRENT_USER, CURRENT_DATE)
+        ON CONFLICT (user_type_code, user_guid) DO
+        UPDATE SET user_name = EXCLUDED.user_name, cognito_user_id = EXCLUDED.cognito_user_id,
+        business_guid = EXCLUDED.business_guid, email = EXCLUDED.email,
+        update_user = CURRENT_USER, update_date = CURRENT_DATE""",
+        (user_type_code, user_guid, event["userName"], user_name, None, attributes["email"]),
+    )
+    cursor.execute(
+        """SELECT role.role_name, role.client_number_id, parent_role.role_name
+        FROM app_fam.fam_role role
+            LEFT JOIN app_fam.fam_role parent_role ON role.parent_role_id = parent_role.role_id
+            INNER JOIN app_fam.fam_application application ON role.application_id = application.application_id
+            JOIN app_fam.fam_application_client client ON application.application_id = client.application_id
+            JOIN app_fam.fam_user_role_xref role_assignment ON role.role_id = role_assignment.role_id
+                AND (role_assignment.expiry_date IS NULL OR role_assignment.expiry_date >= CURRENT_TIMESTAMP)
+            JOIN app_fam.fam_user user_assigned ON role_assignment.user_id = user_assigned.user_id
+        WHERE user_assigned.user_guid = %s AND user_assigned.user_type_code = %s
+            AND client.cognito_client_id = %s""",
+        (user_guid, user_type_code, cognito_client_id),
+    )
+    groups = [record[0] for record in cursor]
+    cursor.execute(
+        """SELECT application.application_name
+        FROM app_fam.fam_application application
+            JOIN app_fam.fam_application_client client ON application.application_id = client.application_id
+        WHERE client.cognito_client_id = %s""",
+        (cognito_client_id,),
+    )
+    if any(record[0] == "FAM" for record in cursor.fetchall()):
+        cursor.execute(
+            """SELECT application.application_name
+            FROM app_fam.fam_application_admin app_admin
+                INNER JOIN app_fam.fam_application application ON app_admin.application_id = application.application_id
+                JOIN app_fam.fam_user fam_user ON app_admin.user_id = fam_user.user_id
+            WHERE fam_user.user_guid = %s AND fam_user.user_type_code = %s""",
+            (user_guid, user_type_code),
+        )
+        groups.extend(f"{record[0]}_ADMIN" for record in cursor)
+    return groups
+
+
+def current_login(db_connection, event) -> list:
+    lambda_function.populate_user_if_necessary(db_connection, event)
+    event = lambda_function.access_token_groups_override(db_connection, event)
+    return event["response"]["claimsAndScopeOverrideDetails"]["groupOverrideDetails"][
+        "groupsToOverride"
+    ]
+
+
+def run(name, login, db_connection, user_numbers):
+    latencies = []
+    for i in user_numbers:
+        start = time.perf_counter()
+        login(db_connection, login_event(i))
+        db_connection.commit()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{name:9} n={len(latencies):5}  mean={statistics.mean(latencies):6.2f} ms  "
+        f"p50={statistics.median(latencies):6.2f} ms  "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1]:6.2f} ms"
+    )
+
+
+def main(logins: int, keep_seed: bool, skip_seed: bool):
+    logging.getLogger().setLevel(logging.WARNING)
+    db_connection = psycopg2.connect(get_local_db_string(), sslmode="disable")
+    db_connection.autocommit = False
+
+    if not skip_seed:
+        start = time.perf_counter()
+        seed(db_connection)
+        print(f"seeded {SEED_USERS} users in {time.perf_counter() - start:.1f}s")
+
+    try:
+        user_numbers = random.Random(42).sample(range(1, SEED_USERS + 1), logins)
+        # same users for both so each one runs against identical data
+        sample_event = login_event(user_numbers[0])
+        assert sorted(previous_login(db_connection, sample_event)) == sorted(
+            current_login(db_connection, sample_event)
+        ), "previous and current login groups differ"
+        db_connection.rollback()
+
+        run("previous", previous_login, db_connection, user_numbers)
+        run("current", current_login, db_connection, user_numbers)
+    finally:
+        if not keep_seed:
+            remove_seed(db_connection)
+        db_connection.close()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    main(
+        int(args[0]) if args else 1000,
+        keep_seed="--keep-seed" in sys.argv,
+        skip_seed="--skip-seed" in sys.argv,
+    )
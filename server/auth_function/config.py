@@ -1,5 +1,6 @@
 import os
 import logging
+import time
 import boto3
 import json
 
@@ -8,6 +9,15 @@ import json
 
 LOGGER = logging.getLogger(__name__)
 
+# The secret is cached for the life of the Lambda container and re-read after
+# the TTL, or straight away when invalidated (database rejected the rotated
+# credentials).
+DB_SECRET_CACHE_TTL_SECONDS = 300
+
+_secretsmanager_client = None
+_db_secret = None
+_db_secret_fetched_at = 0.0
+
 
 def get_db_connection_string():
     secret_value = get_aws_db_secret()
@@ -26,12 +36,33 @@ def get_db_connection_string():
     return db_conn_string
 
 
+def get_secretsmanager_client():
+    global _secretsmanager_client
+    if _secretsmanager_client is None:
+        region_name = "ca-central-1"
+        session = boto3.session.Session()
+        _secretsmanager_client = session.client(
+            service_name="secretsmanager", region_name=region_name
+        )
+    return _secretsmanager_client
+
+
 def get_aws_db_secret():
-    secret_name = os.environ.get("DB_SECRET")
-    region_name = "ca-central-1"
+    global _db_secret
+    global _db_secret_fetched_at
+
+    if (
+        _db_secret is None
+        or time.monotonic() - _db_secret_fetched_at >= DB_SECRET_CACHE_TTL_SECONDS
+    ):
+        secret_name = os.environ.get("DB_SECRET")
+        _db_secret = get_secretsmanager_client().get_secret_value(SecretId=secret_name)
+        _db_secret_fetched_at = time.monotonic()
+        LOGGER.debug("Database secret retrieved from secrets manager.")
+
+    return _db_secret
 
-    # Create a Secrets Manager client
-    session = boto3.session.Session()
-    client = session.client(service_name="secretsmanager", region_name=region_name)
 
-    return client.get_secret_value(SecretId=secret_name)
+def invalidate_aws_db_secret():
+    global _db_secret
+    _db_secret = None
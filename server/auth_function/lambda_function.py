@@ -3,14 +3,15 @@ import json
 import logging
 import logging.config
 import os
+import time
+import weakref
 from enum import Enum
 from typing import Any
 
 import config
 import event_type
 import psycopg2
-from psycopg2 import sql
-from psycopg2.extensions import connection
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, connection
 
 # seeing as a simple lambda function, use a simple fileconfig for the audit logging
 # config, and setting up manually if the function is called directly
@@ -44,6 +45,22 @@ USER_TYPE_CODE_DICT = {
     IDP_NAME_BCSC_PROD: USER_TYPE_BCSC_PROD,
 }
 
+# The database connection is kept at module level so it survives warm Lambda
+# invocations. A connection idle for longer than this is pinged before reuse
+# (the Lambda may have been frozen and RDS may have dropped the connection).
+DB_CONNECTION_IDLE_PING_SECONDS = 60
+
+_db_connection = None
+_db_connection_last_used = 0.0
+
+# Connections on which the login statements are already prepared (prepared
+# statements live as long as the database session).
+_prepared_connections = weakref.WeakSet()
+
+# A login runs exactly two statements: the user upsert and the groups lookup.
+PREPARED_USER_UPSERT = "fam_auth_user_upsert"
+PREPARED_LOGIN_GROUPS = "fam_auth_login_groups"
+
 
 class AuditEventOutcome(str, Enum):
     SUCCESS = 1
@@ -131,24 +148,156 @@ def lambda_handler(event: event_type.Event, context: Any) -> event_type.Event:
     LOGGER.debug(f"event - {event.get("version", "V1_0")}: {event}")
 
     db_connection = obtain_db_connection()
-    populate_user_if_necessary(db_connection, event)
+    try:
+        event_with_authz = process_event(db_connection, event)
+
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        # The warm connection can be dropped by the server while the Lambda is
+        # frozen; reconnect and try once more before failing the login.
+        LOGGER.warning(f"Database connection error, reconnecting: {e}")
+        discard_db_connection(db_connection)
+        db_connection = obtain_db_connection()
+        try:
+            event_with_authz = process_event(db_connection, event)
+        except Exception:
+            rollback_db_connection(db_connection)
+            raise
 
-    event_with_authz = handle_event(db_connection, event)
+    except Exception:
+        rollback_db_connection(db_connection)
+        raise
 
     release_db_connection(db_connection)
     return event_with_authz
 
 
+def process_event(db_connection, event) -> event_type.Event:
+    populate_user_if_necessary(db_connection, event)
+    return handle_event(db_connection, event)
+
+
 def obtain_db_connection() -> Any:
-    db_connection_string = config.get_db_connection_string()
-    db_connection = psycopg2.connect(db_connection_string, sslmode="disable")
+    """
+    Returns the warm module level connection, or opens a new one when there is
+    none yet or the current one is no longer usable.
+    """
+    global _db_connection
+    if _db_connection is not None and not is_db_connection_usable(_db_connection):
+        discard_db_connection(_db_connection)
+
+    if _db_connection is None:
+        _db_connection = open_db_connection()
+    return _db_connection
+
+
+def open_db_connection() -> Any:
+    try:
+        db_connection = psycopg2.connect(config.get_db_connection_string(), sslmode="disable")
+    except psycopg2.OperationalError as e:
+        # Cached credentials may be stale after a secret rotation; re-read the
+        # secret and try once more.
+        LOGGER.warning(f"Database connect failed, refreshing credentials: {e}")
+        config.invalidate_aws_db_secret()
+        db_connection = psycopg2.connect(config.get_db_connection_string(), sslmode="disable")
     db_connection.autocommit = False
+    LOGGER.debug("New database connection opened.")
     return db_connection
 
 
+def is_db_connection_usable(db_connection) -> bool:
+    # Client side state is free to check; only ping the server when the
+    # connection has been idle long enough to have been dropped.
+    if db_connection.closed or db_connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+        return False
+
+    if time.monotonic() - _db_connection_last_used < DB_CONNECTION_IDLE_PING_SECONDS:
+        return True
+
+    try:
+        with db_connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        db_connection.rollback()
+        return True
+    except psycopg2.Error as e:
+        LOGGER.debug(f"Idle database connection is not usable: {e}")
+        return False
+
+
 def release_db_connection(db_connection):
+    global _db_connection_last_used
     db_connection.commit()
-    db_connection.close()
+    _db_connection_last_used = time.monotonic()
+
+
+def rollback_db_connection(db_connection):
+    try:
+        db_connection.rollback()
+    except psycopg2.Error as e:
+        LOGGER.warning(f"Database rollback failed, discarding connection: {e}")
+        discard_db_connection(db_connection)
+
+
+def discard_db_connection(db_connection):
+    global _db_connection
+    if db_connection is _db_connection:
+        _db_connection = None
+    try:
+        db_connection.close()
+    except psycopg2.Error:
+        pass
+
+
+def prepare_statements(db_connection):
+    """
+    Prepares the login statements once per database session, they are then
+    run with "EXECUTE" on every following login using the same connection.
+    """
+    if db_connection in _prepared_connections:
+        return
+
+    cursor = db_connection.cursor()
+    # $1 user_type_code, $2 user_guid, $3 cognito_user_id, $4 user_name,
+    # $5 business_guid, $6 email
+    #
+    # In the case of historical FAM user that has no user_guid stored, the
+    # user is matched by user_name and its user_guid is added ("historical").
+    # Otherwise insert new user, or update user information.
+    cursor.execute(f"""
+    PREPARE {PREPARED_USER_UPSERT} (varchar, varchar, varchar, varchar, varchar, varchar) AS
+    WITH historical AS (
+        UPDATE app_fam.fam_user SET
+            user_guid = $2, user_name = $4, cognito_user_id = $3, business_guid = $5,
+            email = $6, update_user = CURRENT_USER, update_date = CURRENT_DATE
+        WHERE user_type_code = $1
+            AND LOWER(user_name) = LOWER($4)
+            AND user_guid IS NULL
+        RETURNING user_id
+    )
+    INSERT INTO app_fam.fam_user
+        (user_type_code, user_guid, cognito_user_id, user_name, business_guid, email,
+        create_user, create_date, update_user, update_date)
+    SELECT $1, $2, $3, $4, $5, $6,
+        CURRENT_USER, CURRENT_DATE, CURRENT_USER, CURRENT_DATE
+    WHERE NOT EXISTS (SELECT 1 FROM historical)
+    ON CONFLICT (user_type_code, user_guid) DO
+    UPDATE SET user_name = $4, cognito_user_id = $3, business_guid = $5, email = $6,
+        update_user = CURRENT_USER, update_date = CURRENT_DATE;
+    """)
+    # $1 user_guid, $2 user_type_code, $3 cognito_client_id
+    #
+    # Groups of the user for the Cognito client from the login groups
+    # projection (kept current by database triggers, see V95), expired role
+    # assignments left out.
+    cursor.execute(f"""
+    PREPARE {PREPARED_LOGIN_GROUPS} (varchar, varchar, varchar) AS
+    SELECT login_group.group_name
+    FROM app_fam.fam_user_login_group login_group
+    WHERE login_group.user_guid = $1
+        AND login_group.user_type_code = $2
+        AND login_group.cognito_client_id = $3
+        AND (login_group.expiry_date IS NULL OR login_group.expiry_date >= CURRENT_TIMESTAMP);
+    """)
+    _prepared_connections.add(db_connection)
 
 
 def populate_user_if_necessary(db_connection, event) -> None:
@@ -173,44 +322,13 @@ def populate_user_if_necessary(db_connection, event) -> None:
     LOGGER.debug(f"'populate_user_if_necessary': (user_name: {user_name}, user_type_code: {user_type_code}, "
                  f"user_guid: {user_guid}, business_guid: {business_guid}, email: {email})")
 
+    prepare_statements(db_connection)
     cursor = db_connection.cursor()
-
-    # in the case of historical FAM user that has no user_guid stored, add their user_guid
-    # if user does not exist or user has a user_guid already, this update query will do nothing
-    query_add_guid= """
-        UPDATE app_fam.fam_user SET
-        user_guid={user_guid}
-        WHERE user_type_code={user_type_code}
-        and LOWER(user_name)={user_name}
-        and user_guid is null
-    """
-    sql_query_query_add_guid = sql.SQL(query_add_guid).format(
-        user_guid=sql.Literal(user_guid),
-        user_type_code=sql.Literal(user_type_code),
-        user_name=sql.Literal(user_name.lower()),
-    )
-    cursor.execute(sql_query_query_add_guid)
-
-    # insert new user, or update user information
-    raw_query = """INSERT INTO app_fam.fam_user
-        (user_type_code, user_guid, cognito_user_id, user_name, business_guid, email,
-        create_user, create_date, update_user, update_date)
-        VALUES( {user_type_code}, {user_guid}, {cognito_user_id}, {user_name}, {business_guid}, {email},
-        CURRENT_USER, CURRENT_DATE, CURRENT_USER, CURRENT_DATE)
-        ON CONFLICT (user_type_code, user_guid) DO
-        UPDATE SET user_name = {user_name},  cognito_user_id = {cognito_user_id}, business_guid = {business_guid}, email = {email}, update_user = CURRENT_USER, update_date = CURRENT_DATE;"""
-
-    sql_query = sql.SQL(raw_query).format(
-        user_type_code=sql.Literal(user_type_code),
-        user_guid=sql.Literal(user_guid),
-        cognito_user_id=sql.Literal(cognito_user_id),
-        user_name=sql.Literal(user_name),
-        business_guid=sql.Literal(business_guid),
-        email=sql.Literal(email),
+    cursor.execute(
+        f"EXECUTE {PREPARED_USER_UPSERT} (%s, %s, %s, %s, %s, %s)",
+        (user_type_code, user_guid, cognito_user_id, user_name, business_guid, email),
     )
 
-    cursor.execute(sql_query)
-
 
 def handle_event(db_connection, event) -> event_type.Event:
     """
@@ -249,7 +367,10 @@ def access_token_groups_override(db_connection: connection, event: event_type.Ev
     - claimsAndScopeOverrideDetails.groupOverrideDetails.groupsToOverride
     - ref: https://docs.aws.amazon.com/cognito/latest/developerguide/user-pool-lambda-pre-token-generation.html
 
-    Roles are fetched from FAM database based on the user info from the event.
+    Roles are fetched from FAM database based on the user info from the event,
+    with one index lookup on `app_fam.fam_user_login_group` ("PREPARED_LOGIN_GROUPS").
+    The table is a projection of `app_fam.v_user_login_group`, maintained by
+    database triggers on the role and admin tables.
     Roles to be added:
     1. Standard User Roles:
        - Source Table: `app_fam.fam_user_role_xref` and `app_fam.fam_role`.
@@ -262,80 +383,19 @@ def access_token_groups_override(db_connection: connection, event: event_type.Ev
     :param event: The cognito event
     :return: Updated event with groups overridden
     """
-    cursor = db_connection.cursor()
-    query = """
-    SELECT
-        role.role_name,
-        role.client_number_id,
-        parent_role.role_name as parent_role
-    FROM app_fam.fam_role role
-        LEFT JOIN app_fam.fam_role parent_role ON
-            role.parent_role_id = parent_role.role_id
-        INNER JOIN app_fam.fam_application application ON
-            role.application_id = application.application_id
-        JOIN app_fam.fam_application_client client ON
-            application.application_id = client.application_id
-        JOIN app_fam.fam_user_role_xref role_assignment ON
-            role.role_id = role_assignment.role_id
-            AND (role_assignment.expiry_date IS NULL OR role_assignment.expiry_date >= CURRENT_TIMESTAMP)
-        JOIN app_fam.fam_user user_assigned ON
-            role_assignment.user_id = user_assigned.user_id
-    WHERE
-        user_assigned.user_guid = {user_guid}
-        AND user_assigned.user_type_code = {user_type_code}
-        AND client.cognito_client_id = {cognito_client_id};
-    """
     user_guid = event["request"]["userAttributes"]["custom:idp_user_id"]
     user_type_code = USER_TYPE_CODE_DICT.get(
         event["request"]["userAttributes"].get("custom:idp_name", ""), ""
     )
     cognito_client_id = event["callerContext"]["clientId"]
 
-    sql_query = sql.SQL(query).format(
-        user_guid=sql.Literal(user_guid),
-        user_type_code=sql.Literal(user_type_code),
-        cognito_client_id=sql.Literal(cognito_client_id),
-    )
-
-    cursor.execute(sql_query)
-    role_list = []
-    for record in cursor:
-        role_list.append(record[0])
-
-    # check if login through FAM
-    query_application = """
-    SELECT application.application_name
-    FROM app_fam.fam_application application
-        JOIN app_fam.fam_application_client client ON
-            application.application_id = client.application_id
-    WHERE
-        client.cognito_client_id = {cognito_client_id};
-    """
-    sql_query_application = sql.SQL(query_application).format(
-        cognito_client_id=sql.Literal(cognito_client_id),
+    prepare_statements(db_connection)
+    cursor = db_connection.cursor()
+    cursor.execute(
+        f"EXECUTE {PREPARED_LOGIN_GROUPS} (%s, %s, %s)",
+        (user_guid, user_type_code, cognito_client_id),
     )
-    cursor.execute(sql_query_application)
-    # if login through FAM, check fam app admin and add to role list
-    for record in cursor:
-        if record[0] == "FAM":
-            query_fam_app_admin = """
-            SELECT application.application_name
-            FROM app_fam.fam_application_admin app_admin
-                INNER JOIN app_fam.fam_application application ON
-                    app_admin.application_id = application.application_id
-                JOIN app_fam.fam_user fam_user ON
-                    app_admin.user_id = fam_user.user_id
-            WHERE
-                fam_user.user_guid = {user_guid}
-                AND fam_user.user_type_code = {user_type_code};
-            """
-            sql_query_fam_app_admin = sql.SQL(query_fam_app_admin).format(
-                user_guid=sql.Literal(user_guid),
-                user_type_code=sql.Literal(user_type_code),
-            )
-            cursor.execute(sql_query_fam_app_admin)
-            for record in cursor:
-                role_list.append(f"{record[0]}_ADMIN")
+    role_list = [record[0] for record in cursor]
 
     if event["response"].get("claimsAndScopeOverrideDetails") is None:
         claims_and_scope_override_details = {}
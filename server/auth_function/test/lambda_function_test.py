@@ -1,12 +1,15 @@
 import copy
 import datetime
+import json
 import logging
 import os
 import pprint
 import sys
 from zoneinfo import ZoneInfo
 
+import psycopg2
 import pytest
+from conftest import get_local_db_string
 from constant import TEST_ADMIN_ROLE_NAME, TEST_ROLE_NAME
 from psycopg2 import sql
 
@@ -532,3 +535,378 @@ def test_access_token_custom_claims_override(idp_name, idp_username, expected_cl
     claims = updated_event["response"]["claimsAndScopeOverrideDetails"]["accessTokenGeneration"]["claimsToAddOrOverride"]
 
     assert claims == expected_claims
+
+
+# --- Login Statement Tests ---
+class _StatementCountingCursor(psycopg2.extensions.cursor):
+    statements = []
+
+    def execute(self, query, vars=None):
+        _StatementCountingCursor.statements.append(str(query).strip())
+        return super().execute(query, vars)
+
+
+@pytest.fixture(scope="function")
+def counted_statements(db_pg_transaction):
+    _StatementCountingCursor.statements = []
+    db_pg_transaction.cursor_factory = _StatementCountingCursor
+    yield _StatementCountingCursor.statements
+    db_pg_transaction.cursor_factory = psycopg2.extensions.cursor
+
+
+@pytest.mark.parametrize(
+    "cognito_event",
+    [
+        "login_event.json",
+        "login_event_bceid.json",
+        "login_event_bcsc.json",
+    ],
+    indirect=True,
+)
+def test_login_runs_user_upsert_and_one_groups_statement(
+    db_pg_transaction,
+    cognito_event,
+    cognito_context,
+    initial_user,
+    create_test_fam_role,
+    create_test_fam_cognito_client,
+    create_user_role_xref_record,
+    create_fam_application_admin_record,
+    counted_statements,
+):
+    create_test_fam_role()
+    create_user_role_xref_record()
+    lambda_function.prepare_statements(db_pg_transaction)
+    counted_statements.clear()
+
+    result = lambda_function.lambda_handler(copy.deepcopy(cognito_event), cognito_context)
+
+    groups = result["response"]["claimsAndScopeOverrideDetails"]["groupOverrideDetails"][
+        "groupsToOverride"
+    ]
+    assert sorted(groups) == sorted([TEST_ROLE_NAME, TEST_ADMIN_ROLE_NAME])
+    assert len(counted_statements) == 2
+    assert counted_statements[0].startswith(f"EXECUTE {lambda_function.PREPARED_USER_UPSERT}")
+    assert counted_statements[1].startswith(f"EXECUTE {lambda_function.PREPARED_LOGIN_GROUPS}")
+
+
+@pytest.mark.parametrize("cognito_event", ["login_event.json"], indirect=True)
+def test_admin_groups_only_for_fam_login(
+    db_pg_transaction,
+    cognito_event,
+    cognito_context,
+    initial_user,
+    create_test_fam_role,
+    create_user_role_xref_record,
+    create_fam_application_admin_record,
+):
+    """
+    The user is FAM application admin and has a FAM role, but logs in through a
+    client of another application: neither the FAM role nor "FAM_ADMIN" apply.
+    """
+    create_test_fam_role()
+    create_user_role_xref_record()
+    cursor = db_pg_transaction.cursor()
+    cursor.execute(
+        """
+        INSERT INTO app_fam.fam_application_client
+            (cognito_client_id, application_id, create_user, update_user)
+        VALUES (%s, (SELECT application_id FROM app_fam.fam_application
+                     WHERE application_name = 'FOM_DEV'), CURRENT_USER, CURRENT_USER)
+        """,
+        [cognito_event["callerContext"]["clientId"]],
+    )
+
+    result = lambda_function.lambda_handler(copy.deepcopy(cognito_event), cognito_context)
+
+    groups = result["response"]["claimsAndScopeOverrideDetails"]["groupOverrideDetails"][
+        "groupsToOverride"
+    ]
+    assert groups == []
+
+
+# --- Login Groups Projection Tests ---
+def _login_group_differences(db_connection):
+    cursor = db_connection.cursor()
+    cursor.execute("SELECT * FROM app_fam.check_user_login_group()")
+    return cursor.fetchall()
+
+
+@pytest.mark.parametrize("cognito_event", ["login_event.json"], indirect=True)
+def test_login_group_projection_follows_grant_and_revoke(
+    db_pg_transaction,
+    cognito_event,
+    cognito_context,
+    initial_user,
+    create_test_fam_role,
+    create_test_fam_cognito_client,
+    create_user_role_xref_record,
+    create_fam_application_admin_record,
+):
+    create_test_fam_role()
+    create_user_role_xref_record()
+    assert _login_group_differences(db_pg_transaction) == []
+
+    cursor = db_pg_transaction.cursor()
+    cursor.execute(
+        """
+        DELETE FROM app_fam.fam_application_admin WHERE user_id = (
+            SELECT user_id FROM app_fam.fam_user WHERE user_guid = %s)
+        """,
+        [cognito_event["request"]["userAttributes"]["custom:idp_user_id"]],
+    )
+    cursor.execute(
+        """
+        UPDATE app_fam.fam_user_role_xref SET expiry_date = CURRENT_TIMESTAMP - INTERVAL '1 day'
+        WHERE role_id = (SELECT role_id FROM app_fam.fam_role WHERE role_name = %s)
+        """,
+        [TEST_ROLE_NAME],
+    )
+    assert _login_group_differences(db_pg_transaction) == []
+
+    result = lambda_function.lambda_handler(copy.deepcopy(cognito_event), cognito_context)
+
+    groups = result["response"]["claimsAndScopeOverrideDetails"]["groupOverrideDetails"][
+        "groupsToOverride"
+    ]
+    assert groups == []
+
+
+@pytest.mark.parametrize("cognito_event", ["login_event.json"], indirect=True)
+def test_login_group_projection_for_historical_user(
+    db_pg_transaction,
+    cognito_event,
+    cognito_context,
+    initial_user_without_guid_or_cognito_id,
+    create_test_fam_role,
+    create_test_fam_cognito_client,
+    create_user_role_xref_record,
+):
+    """
+    A user added without guid has no projection rows until the first login
+    stores the guid, the login then already gets the roles.
+    """
+    create_test_fam_role()
+    create_user_role_xref_record()
+    cursor = db_pg_transaction.cursor()
+    cursor.execute(
+        "SELECT count(*) FROM app_fam.fam_user_login_group WHERE group_name = %s",
+        [TEST_ROLE_NAME],
+    )
+    assert cursor.fetchone()[0] == 0
+
+    result = lambda_function.lambda_handler(copy.deepcopy(cognito_event), cognito_context)
+
+    groups = result["response"]["claimsAndScopeOverrideDetails"]["groupOverrideDetails"][
+        "groupsToOverride"
+    ]
+    assert groups == [TEST_ROLE_NAME]
+    assert _login_group_differences(db_pg_transaction) == []
+
+
+@pytest.mark.parametrize("cognito_event", ["login_event.json"], indirect=True)
+def test_login_group_projection_follows_client_changes(
+    db_pg_transaction,
+    cognito_event,
+    initial_user,
+    create_test_fam_role,
+    create_user_role_xref_record,
+    create_fam_application_admin_record,
+):
+    create_test_fam_role()
+    create_user_role_xref_record()
+    cursor = db_pg_transaction.cursor()
+    cursor.execute(
+        """
+        INSERT INTO app_fam.fam_application_client
+            (cognito_client_id, application_id, create_user, update_user)
+        VALUES ('projectiontestclient', (SELECT application_id FROM app_fam.fam_application
+                WHERE application_name = 'FAM'), CURRENT_USER, CURRENT_USER)
+        """
+    )
+    cursor.execute(
+        """
+        SELECT group_name FROM app_fam.fam_user_login_group
+        WHERE user_guid = %s AND cognito_client_id = 'projectiontestclient'
+        """,
+        [cognito_event["request"]["userAttributes"]["custom:idp_user_id"]],
+    )
+    assert sorted(record[0] for record in cursor) == sorted(
+        [TEST_ROLE_NAME, TEST_ADMIN_ROLE_NAME]
+    )
+
+    cursor.execute(
+        "DELETE FROM app_fam.fam_application_client WHERE cognito_client_id = 'projectiontestclient'"
+    )
+    assert _login_group_differences(db_pg_transaction) == []
+
+
+def test_login_group_projection_rebuild(db_pg_transaction):
+    cursor = db_pg_transaction.cursor()
+    cursor.execute("DELETE FROM app_fam.fam_user_login_group")
+    cursor.execute("SELECT count(*) FROM app_fam.v_user_login_group")
+    live_count = cursor.fetchone()[0]
+    assert len(_login_group_differences(db_pg_transaction)) == live_count
+
+    cursor.execute("SELECT app_fam.rebuild_user_login_group()")
+
+    assert cursor.fetchone()[0] == live_count
+    assert _login_group_differences(db_pg_transaction) == []
+
+
+def test_login_group_projection_refresh_locks_users_not_table(db_pg_transaction):
+    cursor = db_pg_transaction.cursor()
+    # a large refresh takes the same (sorted) user lock slots as a small one
+    cursor.execute(
+        "SELECT app_fam.refresh_user_login_group(ARRAY(SELECT generate_series(1, 1000)::bigint))"
+    )
+
+    cursor.execute(
+        """
+        SELECT locktype, mode FROM pg_locks
+        WHERE pid = pg_backend_pid()
+            AND (locktype = 'advisory' OR relation = 'app_fam.fam_user_login_group'::regclass)
+        """
+    )
+    locks = cursor.fetchall()
+    assert ("relation", "ShareRowExclusiveLock") not in locks
+    assert len([lock for lock in locks if lock[0] == "advisory"]) == 256
+    assert _login_group_differences(db_pg_transaction) == []
+
+
+# --- Warm Connection Tests ---
+# These tests go through the real connection holder, so the handler commits;
+# the event uses its own user which is deleted again at teardown.
+WARM_TEST_USER_GUID = "WARMCONNECTIONTESTUSERGUID000001"
+
+
+@pytest.fixture(scope="function")
+def warm_cognito_event(db_pg_container, monkeypatch):
+    """Points the real connection holder at the local database and resets it."""
+    monkeypatch.setattr(
+        lambda_function.config, "get_db_connection_string", get_local_db_string
+    )
+    monkeypatch.setattr(lambda_function, "_db_connection", None)
+
+    event_file_path = os.path.join(os.path.dirname(__file__), "login_event.json")
+    with open(event_file_path, "r") as file:
+        event = json.load(file)
+    event["request"]["userAttributes"]["custom:idp_user_id"] = WARM_TEST_USER_GUID
+    event["request"]["userAttributes"]["custom:idp_username"] = "WARMTEST"
+    event["userName"] = f"idir_{WARM_TEST_USER_GUID.lower()}@idir"
+
+    yield event
+
+    if lambda_function._db_connection is not None:
+        lambda_function.discard_db_connection(lambda_function._db_connection)
+    cleanup_connection = psycopg2.connect(get_local_db_string(), sslmode="disable")
+    with cleanup_connection, cleanup_connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM app_fam.fam_user WHERE user_guid = %s", (WARM_TEST_USER_GUID,)
+        )
+    cleanup_connection.close()
+
+
+def test_db_connection_reused_across_invocations(warm_cognito_event, monkeypatch):
+    first_connection = lambda_function.obtain_db_connection()
+    lambda_function.release_db_connection(first_connection)
+
+    open_db_connection = lambda_function.open_db_connection
+    opened = []
+    monkeypatch.setattr(
+        lambda_function,
+        "open_db_connection",
+        lambda: opened.append(1) or open_db_connection(),
+    )
+
+    assert lambda_function.obtain_db_connection() is first_connection
+    assert opened == []
+
+    # a closed connection is replaced by a new one
+    first_connection.close()
+    second_connection = lambda_function.obtain_db_connection()
+    assert second_connection is not first_connection
+    assert second_connection.closed == 0
+    assert opened == [1]
+
+
+def test_statements_prepared_once_per_connection(warm_cognito_event, cognito_context):
+    lambda_function.lambda_handler(copy.deepcopy(warm_cognito_event), cognito_context)
+    db_connection = lambda_function._db_connection
+    assert db_connection in lambda_function._prepared_connections
+
+    # second (warm) invocation reuses the connection and its prepared statements
+    lambda_function.lambda_handler(copy.deepcopy(warm_cognito_event), cognito_context)
+    assert lambda_function._db_connection is db_connection
+
+    cursor = db_connection.cursor()
+    cursor.execute(
+        "SELECT count(*) FROM pg_prepared_statements WHERE name LIKE 'fam_auth_%'"
+    )
+    assert cursor.fetchone()[0] == 2
+    db_connection.rollback()
+
+
+def test_rollback_on_error_keeps_connection_usable(warm_cognito_event, cognito_context):
+    lambda_function.lambda_handler(copy.deepcopy(warm_cognito_event), cognito_context)
+    db_connection = lambda_function._db_connection
+
+    # email longer than the column allows fails inside the database transaction
+    bad_event = copy.deepcopy(warm_cognito_event)
+    bad_event["request"]["userAttributes"]["email"] = "x" * 300 + "@test.com"
+    with pytest.raises(psycopg2.DataError):
+        lambda_function.lambda_handler(bad_event, cognito_context)
+
+    assert lambda_function._db_connection is db_connection
+    assert lambda_function.is_db_connection_usable(db_connection)
+
+    result = lambda_function.lambda_handler(copy.deepcopy(warm_cognito_event), cognito_context)
+    assert lambda_function._db_connection is db_connection
+    assert "groupOverrideDetails" in result["response"]["claimsAndScopeOverrideDetails"]
+
+
+# --- Secret Cache Tests ---
+class _FakeSecretsManagerClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        return {"SecretString": json.dumps({"username": "user", "password": f"pw{self.calls}"})}
+
+
+@pytest.fixture(scope="function")
+def fake_secretsmanager_client(monkeypatch):
+    client = _FakeSecretsManagerClient()
+    monkeypatch.setattr(lambda_function.config, "_secretsmanager_client", client)
+    monkeypatch.setattr(lambda_function.config, "_db_secret", None)
+    return client
+
+
+def test_db_secret_cached_until_ttl(fake_secretsmanager_client, monkeypatch):
+    first = lambda_function.config.get_db_connection_string()
+    assert lambda_function.config.get_db_connection_string() == first
+    assert fake_secretsmanager_client.calls == 1
+
+    monkeypatch.setattr(lambda_function.config, "DB_SECRET_CACHE_TTL_SECONDS", 0)
+    assert "password=pw2" in lambda_function.config.get_db_connection_string()
+    assert fake_secretsmanager_client.calls == 2
+
+
+def test_db_secret_refreshed_when_connect_fails(fake_secretsmanager_client, monkeypatch):
+    lambda_function.config.get_db_connection_string()  # cache "pw1"
+    connect_attempts = []
+    mock_connection = type("MockConnection", (), {"autocommit": True})()
+
+    def fake_connect(db_connection_string, sslmode):
+        connect_attempts.append(db_connection_string)
+        if "password=pw1" in db_connection_string:
+            raise psycopg2.OperationalError("password authentication failed")
+        return mock_connection
+
+    monkeypatch.setattr(lambda_function.psycopg2, "connect", fake_connect)
+
+    assert lambda_function.open_db_connection() is mock_connection
+    assert len(connect_attempts) == 2
+    assert "password=pw2" in connect_attempts[1]
+    assert fake_secretsmanager_client.calls == 2
@@ -0,0 +1,187 @@
+"""
+In-process catalog of the applications and their (Cognito) clients.
+
+These rows change only through migrations and rare admin actions, yet were
+read on every request (application admin checks, external API client id
+lookups). The catalog keeps them as an immutable, versioned snapshot shared
+by the requests of the process:
+- every "CATALOG_VERSION_CHECK_SECONDS", the next lookup compares the snapshot
+  version with "fam_catalog_version" (a single row incremented by triggers on
+  every change of the catalog tables, see the V100 migration) and reloads the
+  snapshot when it differs;
+- a snapshot older than CATALOG_MAX_AGE_SECONDS is reloaded anyway.
+Postgres LISTEN/NOTIFY is not used: on Lambda the container is frozen between
+requests and its pooled (RDS Proxy) connection cannot keep a listener.
+
+Lookups return frozen dataclasses rather than ORM instances: they are not
+attached to the request db session (no lazy loads) and are safe to share
+between threads. Use the session for what needs the relationships.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from api.app import database
+from api.app.models import model as models
+from api.app.utils.ttl_cache import register_cache
+from api.config import config
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+LOGGER = logging.getLogger(__name__)
+
+# Reloaded at least this often, even when the version did not change.
+CATALOG_MAX_AGE_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class CatalogApplication:
+    application_id: int
+    application_name: str
+    application_description: str
+    app_environment: Optional[str]
+    cognito_client_ids: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: int
+    applications: Mapping[int, CatalogApplication]
+    application_ids_by_client_id: Mapping[str, int]
+
+    def get_application(self, application_id: int) -> Optional[CatalogApplication]:
+        return self.applications.get(application_id)
+
+    def get_application_by_client_id(self, cognito_client_id: str) -> Optional[CatalogApplication]:
+        application_id = self.application_ids_by_client_id.get(cognito_client_id)
+        return self.applications.get(application_id) if application_id is not None else None
+
+
+def load_catalog(connection: Connection, version: int) -> Catalog:
+    client_ids = {}
+    for application_id, cognito_client_id in connection.execute(
+        select(
+            models.FamApplicationClient.application_id,
+            models.FamApplicationClient.cognito_client_id,
+        ).order_by(models.FamApplicationClient.application_client_id)
+    ):
+        client_ids.setdefault(application_id, []).append(cognito_client_id)
+
+    applications = {
+        row.application_id: CatalogApplication(
+            application_id=row.application_id,
+            application_name=row.application_name,
+            application_description=row.application_description,
+            app_environment=row.app_environment,
+            cognito_client_ids=tuple(client_ids.get(row.application_id, ())),
+        )
+        for row in connection.execute(
+            select(
+                models.FamApplication.application_id,
+                models.FamApplication.application_name,
+                models.FamApplication.application_description,
+                models.FamApplication.app_environment,
+            )
+        )
+    }
+    return Catalog(
+        version=version,
+        applications=MappingProxyType(applications),
+        application_ids_by_client_id=MappingProxyType({
+            cognito_client_id: application.application_id
+            for application in applications.values()
+            for cognito_client_id in application.cognito_client_ids
+        }),
+    )
+
+
+class CatalogCache:
+    """The current catalog snapshot, checked against the database version periodically."""
+
+    def __init__(self, max_age: float = CATALOG_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        # guards the snapshot and the stats; never held while querying
+        self._lock = threading.Lock()
+        # held by the one thread checking (or reloading) the catalog
+        self._check_lock = threading.Lock()
+        self.clear()
+
+    def get(self, db: Session) -> Catalog:
+        """
+        The catalog, its version checked when due. The check (and a reload)
+        reads on a short-lived connection of its own (connect_outside_session):
+        only committed changes are cached, never the uncommitted (and maybe
+        rolled back) changes of the caller's transaction. While one thread
+        checks, the others get the current snapshot rather than waiting.
+        """
+        with self._lock:
+            catalog = self._catalog
+            if catalog is not None and time.monotonic() < self._next_check_at:
+                self._stats["hits"] += 1
+                return catalog
+
+        # only the first load is waited for
+        if not self._check_lock.acquire(blocking=catalog is None):
+            with self._lock:
+                self._stats["hits"] += 1
+            return catalog
+        try:
+            with self._lock:
+                catalog, loaded_at = self._catalog, self._loaded_at
+                if catalog is not None and time.monotonic() < self._next_check_at:
+                    # checked by another thread meanwhile
+                    self._stats["hits"] += 1
+                    return catalog
+            return self.__check(db, catalog, loaded_at)
+        finally:
+            self._check_lock.release()
+
+    def __check(self, db: Session, catalog: Optional[Catalog], loaded_at: float) -> Catalog:
+        now = time.monotonic()
+        with database.connect_outside_session(db) as connection:
+            # the version is read first: the catalog loaded is at least that
+            # recent, a newer one is reloaded again at the next check.
+            version = connection.scalar(select(models.FamCatalogVersion.version)) or 0
+            reload = catalog is None or catalog.version != version or now >= loaded_at + self.max_age
+            if reload:
+                LOGGER.info(
+                    f"Loading the application catalog version {version} "
+                    f"(was {catalog.version if catalog else None})."
+                )
+                catalog = load_catalog(connection, version)
+
+        with self._lock:
+            self._stats["version_checks"] += 1
+            if reload:
+                self._catalog = catalog
+                self._loaded_at = now
+                self._stats["reloads"] += 1
+            self._next_check_at = now + config.get_catalog_version_check_seconds()
+        return catalog
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            catalog = self._catalog
+            return {
+                **self._stats,
+                "version": catalog.version if catalog else None,
+                "applications": len(catalog.applications) if catalog else 0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._catalog: Optional[Catalog] = None
+            self._loaded_at = 0.0
+            self._next_check_at = 0.0
+            self._stats = {"hits": 0, "version_checks": 0, "reloads": 0}
+
+
+catalog_cache = register_cache(CatalogCache())
+
+
+def get_catalog(db: Session) -> Catalog:
+    return catalog_cache.get(db)
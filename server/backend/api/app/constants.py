@@ -28,6 +28,23 @@ class SortOrderEnum(str, Enum):
     ASC = "asc"
     DESC = "desc"
 
+class PageCountMode(str, Enum):
+    # How the paginated queries get the total count of rows.
+    EXACT = "exact"  # separate "SELECT count(*)" query
+    WINDOW = "window"  # "count(*) OVER ()" with the page query
+    ESTIMATED = "estimated"  # WINDOW, or cached count / planner estimate (see PAGE_COUNT_ constants)
+
+class DbPoolMode(str, Enum):
+    # How the database connections are pooled (DB_POOL_MODE).
+    QUEUE = "queue"  # DB_POOL_SIZE connections kept open, long-running server (uvicorn)
+    SINGLE = "single"  # one connection kept open, Lambda (one request at a time per container)
+    NULL = "null"  # a connection per session, pooling left to RDS Proxy
+
+class DbSessionClass(str, Enum):
+    # What a database session is for, sets its transaction timeouts.
+    API = "api"  # http request
+    JOB = "job"  # background work: jobs, dispatchers
+
 class UserRoleSortByEnum(str, Enum):
     # Note: this is not the exact model column name, requires table column mapping.
     USER_NAME = "user_name"
@@ -82,6 +99,12 @@ class FamForestClientStatusType(str, Enum):
     ACTIVE = "A"
     INACTIVE = "I"
 
+class RoleAssignmentJobStatus(str, Enum):
+    QUEUED = "QUEUED"  # stored, not started by the worker yet.
+    IN_PROGRESS = "IN_PROGRESS"  # some users processed, results available so far.
+    COMPLETED = "COMPLETED"  # all users processed.
+    FAILED = "FAILED"  # stopped on an error, users not processed yet are not granted.
+
 class IdimSearchUserParamType(str, Enum):
     USER_GUID = "userGuid"
     USER_ID = "userId"
@@ -93,6 +116,8 @@ class EmailSendingStatus(str, Enum):
         "SENT_TO_EMAIL_SERVICE_SUCCESS"  # send to external service successful.
     )
     SENT_TO_EMAIL_SERVICE_FAILURE = "SENT_TO_EMAIL_SERVICE_FAILURE"  # technical/validation failure during sending to external service.
+    QUEUED_FOR_EMAIL_SERVICE = "QUEUED_FOR_EMAIL_SERVICE"  # stored in the email outbox, to be sent to external service.
+    SENDING_TO_EMAIL_SERVICE = "SENDING_TO_EMAIL_SERVICE"  # email outbox only: claimed by the dispatcher sending it.
 
 
 class UserRoleSortByEnum(str, Enum):
@@ -131,6 +156,7 @@ MIN_PAGE = 1
 DEFAULT_PAGE_SIZE = 50
 MIN_PAGE_SIZE = 10
 MAX_NUM_USERS_ASSIGNMENT_GRANT = 50
+MAX_NUM_USERS_ASSIGNMENT_GRANT_JOB = 1000
 
 # -- external API constants
 EXT_MIN_PAGE = 1 # External API pagination is 1 index
@@ -138,6 +164,39 @@ EXT_DEFAULT_PAGE_SIZE = 50
 EXT_MIN_PAGE_SIZE = 10
 EXT_MAX_PAGE_SIZE = 100
 EXT_IDIM_SEARCH_MAX_PAGE_SIZE = 500  # IDIM Webservice max allowed.
+# Target users of one request verified at the same time with IDIM Proxy, and the total time allowed
+# for all of them (under the 15s fam_api Lambda timeout, leaving time for the grants and the response).
+IDIM_VERIFY_MAX_CONCURRENCY = 8
+IDIM_VERIFY_DEADLINE_SECONDS = 10
+# Sync of user information from IDIM: lookups at the same time, the time one invocation keeps
+# starting new batches of users (under the 15s Lambda timeout; the next invocation resumes), and the
+# time left in the request needed to start a batch (its lookups and update).
+IDIM_SYNC_MAX_CONCURRENCY = 8
+IDIM_SYNC_TIME_BUDGET_SECONDS = 9
+IDIM_SYNC_BATCH_SECONDS = 3
+IDIM_SYNC_CHECKPOINT_NAME = "IDIM_USER_INFO"
+# Email outbox dispatcher: emails claimed per batch (fewer when the time left does not allow sending them
+# at the send rate), sent at the same time and per second (GC Notify allows 1000 per minute), attempts
+# before giving up (retried after 1, 2, 4... minutes), and how long a claimed email is not claimed again
+# (its outcome is recorded as soon as it is sent). The time to send is the Lambda's remaining time less the
+# safety margin (kept for recording the last outcomes), or the time budget when run locally.
+EMAIL_OUTBOX_DISPATCH_BATCH_SIZE = 50
+EMAIL_OUTBOX_DISPATCH_MAX_CONCURRENCY = 4
+EMAIL_OUTBOX_DISPATCH_RATE_PER_SECOND = 10
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_CLAIM_SECONDS = 300
+EMAIL_OUTBOX_DISPATCH_TIME_BUDGET_SECONDS = 9
+EMAIL_OUTBOX_DISPATCH_SAFETY_MARGIN_SECONDS = 2
+# Role assignment job worker: users granted per batch (one transaction, the job checkpoint), and the
+# time one invocation keeps starting new batches (under the 120s worker Lambda timeout, a batch taking
+# at most IDIM_VERIFY_DEADLINE_SECONDS plus the grants; the next invocation resumes).
+ROLE_ASSIGNMENT_JOB_BATCH_SIZE = 25
+ROLE_ASSIGNMENT_JOB_TIME_BUDGET_SECONDS = 80
+# A batch failing on an error that may not happen again is retried after ROLE_ASSIGNMENT_JOB_RETRY_BASE_SECONDS,
+# doubled at each attempt; the job fails after ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS failed attempts in a row.
+ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS = 5
+ROLE_ASSIGNMENT_JOB_RETRY_BASE_SECONDS = 60
 EXT_MAX_IDP_USERNAME_LEN = 20
 EXT_MAX_FIRST_NAME_LEN = 50
 EXT_MAX_LAST_NAME_LEN = 50
@@ -152,6 +211,12 @@ EXT_ROLE_DISPLAY_NAME_MAX_LEN = 100
 MAX_PAGE_SIZE = 100000
 SEARCH_FIELD_MIN_LENGTH = 3
 SEARCH_FIELD_MAX_LENGTH = 30
+PAGE_CURSOR_MAX_LENGTH = 500
+# PageCountMode.ESTIMATED: the planner's row estimate is used as total from this many rows; under it, the
+# exact count of the first page is cached and reused by the following pages with the same filter for a while.
+PAGE_COUNT_ESTIMATE_THRESHOLD = 10000
+PAGE_COUNT_CACHE_TTL_SECONDS = 300
+PAGE_COUNT_CACHE_MAX_SIZE = 1000
 
 DEFAULT_FC_API_SEARCH_PAGE = 0  # FC api is 0 index
 DEFAULT_FC_API_SEARCH_PAGE_SIZE = 50
@@ -191,3 +256,6 @@ ERROR_CODE_TERMS_CONDITIONS_REQUIRED = "terms_condition_required"
 ERROR_CODE_UNKNOWN_STATE = "unknown_state"
 ERROR_CODE_UPSTREAM_TIMEOUT = "UPSTREAM_TIMEOUT"
 ERROR_CODE_UPSTREAM_CONNECTION_ERROR = "UPSTREAM_CONNECTION_ERROR"
+ERROR_CODE_REQUEST_DEADLINE_EXCEEDED = "REQUEST_DEADLINE_EXCEEDED"
+# Time left in the request needed to start the database work of a grant (it is not cut short midway).
+REQUEST_DEADLINE_DB_WORK_SECONDS = 2
@@ -1,16 +1,19 @@
 import logging
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
+from typing import Optional
 
-from api.app.constants import UserRoleSortByEnum, UserType
+from api.app import catalog
+from api.app.catalog import CatalogApplication
+from api.app.constants import PageCountMode, UserRoleSortByEnum, UserType
 from api.app.crud.services.paginate_service import PaginateService
-from api.app.datetime_format import TIMESTAMP_FORMAT_DEFAULT
 from api.app.decorators.forest_client_dec import post_sync_forest_clients_dec
 from api.app.models import model as models
 from api.app.schemas import (FamApplicationUserRoleAssignmentGetSchema,
                              RequesterSchema)
 from api.app.schemas.pagination import (PagedResultsSchema,
                                         UserRolePageParamsSchema)
-from sqlalchemy import Column, asc, desc, func, or_, select
+from sqlalchemy import and_, asc, desc, func, or_, select
 from sqlalchemy.orm import Session
 
 from . import crud_utils as crud_utils
@@ -29,49 +32,98 @@ USER_ROLE_SORT_BY_MAPPED_COLUMN = {
     UserRoleSortByEnum.FOREST_CLIENT_NUMBER: models.FamForestClient.forest_client_number
 }
 
-def get_application(db: Session, application_id: int):
-    """gets a single application"""
-    application = (
-        db.query(models.FamApplication)
-        .filter(models.FamApplication.application_id == application_id)
-        .one_or_none()
-    )
-    return application
+def get_application(db: Session, application_id: int) -> Optional[CatalogApplication]:
+    """gets a single application, from the application catalog (see "catalog")"""
+    return catalog.get_catalog(db).get_application(application_id)
+
+
+# Keyword that is a date/timestamp prefix in the TIMESTAMP_FORMAT_DEFAULT
+# format ("YYYY", "YYYY-MM", ... "YYYY-MM-DD HH24:MI:SS").
+SEARCH_KEYWORD_DATE_PREFIX_PATTERN = re.compile(
+    r"^(\d{4})(?:-(\d{2})(?:-(\d{2})(?: (\d{2})(?::(\d{2})(?::(\d{2}))?)?)?)?)?$"
+)
+
+
+def __search_keyword_date_range(search_keyword: str) -> tuple[datetime, datetime] | None:
+    """
+    The [start, end) range of the dates starting with the 'search' keyword
+    (e.g. "2025-04" -> [2025-04-01, 2025-05-01)), None when the keyword is not
+    a (valid) date prefix.
+    """
+    match = SEARCH_KEYWORD_DATE_PREFIX_PATTERN.match(search_keyword)
+    if match is None:
+        return None
+    parts = [int(part) for part in match.groups() if part is not None]
+    try:
+        start = datetime(*parts, *[1] * (3 - len(parts)))
+        if len(parts) == 1:
+            end = start.replace(year=start.year + 1)
+        elif len(parts) == 2:
+            end = (start + timedelta(days=31)).replace(day=1)
+        else:
+            end = start + timedelta(
+                **{("days", "hours", "minutes", "seconds")[len(parts) - 3]: 1}
+            )
+    except (ValueError, OverflowError):
+        return None
+    return start, end
 
 
 def __build_filter_criteria(page_params: UserRolePageParamsSchema):
     """
     Based on 'search' keyword from page_params to build additional 'where'
-    clause. In this endpoint pagination case, all mapped columns to be
-    filtered on can apply with 'ilike' (case-insensitive operator) with
-    'OR' sql condition,
-    e.g., (app_fam.fam_user.user_name ILIKE %(user_name_1)s OR
-           app_fam.fam_user.user_type_code ILIKE %(user_type_code_1)s OR
-           app_fam.fam_user.email ILIKE %(email_1)s OR ...)
-    to return for the query.
+    clause. The keyword is matched with 'ilike' (case-insensitive operator)
+    anywhere in the user name, email, full name, role display name and
+    forest client number (the mapped sort columns), or as a date prefix of
+    the assignment create date, with 'OR' sql condition.
+
+    Users and roles are searched in subqueries, run once with the trigram
+    indexes on these columns (see V99 migration), instead of applying each
+    'ilike' to every joined row, e.g.,
+    (app_fam.fam_user_role_xref.user_id IN (SELECT user_id FROM app_fam.fam_user
+        WHERE user_name ILIKE %(user_name_1)s OR email ILIKE %(email_1)s OR ...) OR
+     app_fam.fam_user_role_xref.role_id IN (SELECT role_id FROM app_fam.fam_role
+        WHERE display_name ILIKE %(display_name_1)s OR client_number_id IN (...)) OR
+     app_fam.fam_user_role_xref.create_date >= %(create_date_1)s AND ...)
+
+    Note, the user type code (domain) is a code of 1-2 characters, it cannot
+    contain a keyword (3 characters minimum) and is not searched.
     """
     search_keyword = page_params.search
-    filter_on_columns = USER_ROLE_SORT_BY_MAPPED_COLUMN.values()
+    if search_keyword is None:
+        return None
 
-    def operate_on_column(column: Column):
-        """
-        Determines column type to apply sql operator/function for filtering.
-        """
-        column_type = column.type.python_type
-        if column_type is str:
-            return column.ilike(f"%{search_keyword}%")
-        elif column_type is datetime:
-            return func.to_char(column, TIMESTAMP_FORMAT_DEFAULT).ilike(f"%{search_keyword}%")
-
-
-    return (
+    search_pattern = f"%{search_keyword}%"
+    matching_user_ids = select(models.FamUser.user_id).where(
+        or_(
+            models.FamUser.user_name.ilike(search_pattern),
+            models.FamUser.email.ilike(search_pattern),
+            models.FamUser.full_name.ilike(search_pattern),  # this is a hybrid column
+        )
+    )
+    matching_role_ids = select(models.FamRole.role_id).where(
         or_(
-            # build where ... "OR" conditions for all mapped columns.
-            *list(map(lambda column: operate_on_column(column), filter_on_columns))
+            models.FamRole.display_name.ilike(search_pattern),
+            models.FamRole.client_number_id.in_(
+                select(models.FamForestClient.client_number_id).where(
+                    models.FamForestClient.forest_client_number.ilike(search_pattern)
+                )
+            ),
         )
-        if search_keyword is not None
-        else None
     )
+    criteria = [
+        models.FamUserRoleXref.user_id.in_(matching_user_ids),
+        models.FamUserRoleXref.role_id.in_(matching_role_ids),
+    ]
+    create_date_range = __search_keyword_date_range(search_keyword)
+    if create_date_range is not None:
+        criteria.append(
+            and_(
+                models.FamUserRoleXref.create_date >= create_date_range[0],
+                models.FamUserRoleXref.create_date < create_date_range[1],
+            )
+        )
+    return or_(*criteria)
 
 @post_sync_forest_clients_dec
 def get_application_role_assignments(
@@ -100,7 +152,11 @@ def get_application_role_assignments(
         db, query_user_roles_by_app_privilege,
         __build_filter_criteria(page_params),
         USER_ROLE_SORT_BY_MAPPED_COLUMN,
-        page_params
+        page_params,
+        # most used admin screen: total counted with the page, reused by the next pages.
+        # The planner cannot estimate the rows found by a search (subqueries): counted
+        # with the page instead.
+        PageCountMode.ESTIMATED if page_params.search is None else PageCountMode.WINDOW
     )
     qresult = paginated_service.get_paginated_results(FamApplicationUserRoleAssignmentGetSchema)
     LOGGER.debug(
@@ -188,17 +244,12 @@ def __query_user_roles_by_app_privilege(db: Session, requester: RequesterSchema,
             )
     return q
 
-def get_application_by_app_client_id(db: Session, app_client_id: str):
+def get_application_by_app_client_id(db: Session, app_client_id: str) -> Optional[CatalogApplication]:
     """
-    Retrieve a FamApplication by its app_client_id (cognito_client_id).
+    Retrieve an application by its app_client_id (cognito_client_id), from the
+    application catalog (see "catalog").
     :param db: SQLAlchemy session
     :param app_client_id: The cognito_client_id
-    :return: FamApplication instance or None
+    :return: CatalogApplication or None
     """
-    stmt = (
-        select(models.FamApplication)
-        .join(models.FamApplicationClient, models.FamApplication.application_id == models.FamApplicationClient.application_id)
-        .where(models.FamApplicationClient.cognito_client_id == app_client_id)
-    )
-    result = db.execute(stmt).scalars().one_or_none()
-    return result
\ No newline at end of file
+    return catalog.get_catalog(db).get_application_by_client_id(app_client_id)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, List, Optional
+
+from api.app.constants import EmailSendingStatus
+from api.app.models.model import FamEmailOutbox
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+LOGGER = logging.getLogger(__name__)
+
+
+def create_outbox_email(
+    db: Session,
+    email_params: dict,
+    requester: str,  # cognito_user_id
+    user_role_xref_ids: Optional[List[int]] = None,
+) -> FamEmailOutbox:
+    """
+    Stores the email in the email outbox, in the current transaction; the
+    email outbox dispatcher sends it once the transaction is committed.
+
+    :param email_params: GC Notify email_address, template_id and personalisation.
+    :param user_role_xref_ids: the role assignments the email notifies of, to
+        read its sending status by (see get_email_sending_status_by_user_role_xref_id).
+    """
+    outbox_email = FamEmailOutbox(
+        **{
+            "template_id": email_params["template_id"],
+            "send_to_email": email_params["email_address"],
+            "personalisation": email_params["personalisation"],
+            "user_role_xref_ids": user_role_xref_ids,
+            "create_user": requester,
+        }
+    )
+    # savepoint: failing to queue the email does not fail the transaction
+    with db.begin_nested():
+        db.add(outbox_email)
+    LOGGER.debug(f"Email {outbox_email.email_outbox_id} queued for {outbox_email.send_to_email}")
+    return outbox_email
+
+
+def get_queued_outbox_emails_due(db: Session, limit: int) -> List[FamEmailOutbox]:
+    """
+    Returns the queued emails due for a sending attempt, and the emails claimed
+    by a dispatcher whose claim has run out (stopped while sending), locked for
+    the current transaction. Emails locked by another dispatcher are skipped.
+    """
+    return db.scalars(
+        select(FamEmailOutbox)
+        .where(
+            FamEmailOutbox.email_sending_status.in_([
+                EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE,
+                EmailSendingStatus.SENDING_TO_EMAIL_SERVICE,
+            ]),
+            FamEmailOutbox.next_attempt_date <= func.now(),
+        )
+        .order_by(FamEmailOutbox.next_attempt_date, FamEmailOutbox.email_outbox_id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+
+def get_email_sending_status_by_user_role_xref_id(
+    db: Session, user_role_xref_ids: List[int]
+) -> Dict[int, EmailSendingStatus]:
+    """
+    Returns the sending status of the emails notifying of the role assignments
+    "user_role_xref_ids", by role assignment. An email claimed by the
+    dispatcher is still QUEUED_FOR_EMAIL_SERVICE: not known to be sent yet.
+    """
+    if not user_role_xref_ids:
+        return {}
+
+    user_role_xref_ids = set(user_role_xref_ids)
+    email_sending_status_by_user_role_xref_id = {}
+    for outbox_user_role_xref_ids, email_sending_status in db.execute(
+        select(FamEmailOutbox.user_role_xref_ids, FamEmailOutbox.email_sending_status)
+        .where(FamEmailOutbox.user_role_xref_ids.overlap(list(user_role_xref_ids)))
+        .order_by(FamEmailOutbox.email_outbox_id)
+    ):
+        if email_sending_status == EmailSendingStatus.SENDING_TO_EMAIL_SERVICE:
+            email_sending_status = EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+        for user_role_xref_id in user_role_xref_ids.intersection(outbox_user_role_xref_ids):
+            email_sending_status_by_user_role_xref_id[user_role_xref_id] = EmailSendingStatus(
+                email_sending_status
+            )
+    return email_sending_status_by_user_role_xref_id
@@ -1,6 +1,8 @@
 import logging
+from typing import Dict, List
 
 from api.app.models import model as models
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from api.app.schemas import FamForestClientCreateSchema
@@ -57,3 +59,44 @@ def find_or_create(db: Session, forest_client_number: str, requester: str):
 
     LOGGER.debug(f"Forest_Client {fam_forest_client.client_number_id} found.")
     return fam_forest_client
+
+
+def find_or_create_many(
+    db: Session, forest_client_numbers: List[str], requester: str
+) -> Dict[str, models.FamForestClient]:
+    """
+    Set-based `find_or_create`: one INSERT ... ON CONFLICT DO NOTHING for the
+    missing forest clients and one query for all of them.
+    :return: fam_forest_client for each forest client number.
+    """
+    LOGGER.debug(
+        "Forest Client - 'find_or_create_many' with forest_client_numbers: "
+        f"{forest_client_numbers}."
+    )
+    unique_forest_client_numbers = list(dict.fromkeys(forest_client_numbers))
+    if not unique_forest_client_numbers:
+        return {}
+
+    db.execute(
+        insert(models.FamForestClient)
+        .values(
+            [
+                {"forest_client_number": forest_client_number, "create_user": requester}
+                for forest_client_number in unique_forest_client_numbers
+            ]
+        )
+        .on_conflict_do_nothing(
+            index_elements=[models.FamForestClient.forest_client_number]
+        )
+    )
+    fam_forest_clients = (
+        db.query(models.FamForestClient)
+        .filter(
+            models.FamForestClient.forest_client_number.in_(unique_forest_client_numbers)
+        )
+        .all()
+    )
+    return {
+        fam_forest_client.forest_client_number: fam_forest_client
+        for fam_forest_client in fam_forest_clients
+    }
@@ -5,16 +5,14 @@ from api.app.models import model as models
 from api.app.schemas import FamForestClientCreateSchema, FamRoleCreateSchema
 from sqlalchemy.orm import Session
 
-from . import crud_forest_client
+from . import crud_forest_client, crud_utils
 
 LOGGER = logging.getLogger(__name__)
 
 
 def get_role(db: Session, role_id: int) -> Optional[models.FamRole]:
-    # get a single role based on role_id
-    return (
-        db.query(models.FamRole).filter(models.FamRole.role_id == role_id).one_or_none()
-    )
+    # get a single role based on role_id, from the session if already loaded
+    return crud_utils.get_by_id(db, models.FamRole, role_id)
 
 
 def create_role(role: FamRoleCreateSchema, db: Session) -> models.FamRole:
@@ -1,7 +1,16 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from datetime import datetime
-
-from api.app.constants import ApiInstanceEnv, IdimSearchUserParamType, UserType
+from typing import Dict, List, Optional, Set
+
+from api.app import request_deadline, requester_cache
+from api.app.constants import (IDIM_SYNC_BATCH_SECONDS,
+                               IDIM_SYNC_CHECKPOINT_NAME,
+                               IDIM_SYNC_MAX_CONCURRENCY,
+                               IDIM_SYNC_TIME_BUDGET_SECONDS, ApiInstanceEnv,
+                               IdimSearchUserParamType, UserType)
 from api.app.crud import crud_utils
 from api.app.integration.idim_proxy import IdimProxyService
 from api.app.models import model as models
@@ -9,8 +18,11 @@ from api.app.schemas import (FamUserSchema, FamUserUpdateResponseSchema,
                              IdimProxyBceidSearchParamSchema,
                              IdimProxySearchParamSchema, TargetUserSchema)
 from api.config import config
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import (BigInteger, String, case, column, exists, func,
+                        select, update as sql_update, values)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased, joinedload
 
 LOGGER = logging.getLogger(__name__)
 
@@ -145,6 +157,109 @@ def find_or_create(
     return fam_user
 
 
+def find_or_create_many(
+    db: Session,
+    user_type_code: str,
+    target_users: List[TargetUserSchema],
+    requester: str,  # cognito_user_id
+) -> Dict[str, models.FamUser]:
+    """
+    Set-based `find_or_create` + `update_user_properties_from_verified_target_user`
+    for verified users of the same user type, in two statements regardless of the
+    number of users:
+    - historical FAM users (found by user_name, no user_guid stored) get their user_guid.
+    - users are inserted, or updated with their verified properties, on
+      (user_type_code, user_guid).
+    :return: fam_user for each target user, keyed by user_guid.
+    """
+    LOGGER.debug(
+        f"User - 'find_or_create_many' with user_type: {user_type_code}, "
+        + f"{len(target_users)} user(s)."
+    )
+    # Last one wins for a user repeated in the request, the same as updating it twice.
+    target_users_by_guid = {
+        target_user.user_guid: target_user for target_user in target_users
+    }
+    if not target_users_by_guid:
+        return {}
+
+    user_guid_by_lower_name = {
+        target_user.user_name.lower(): user_guid
+        for user_guid, target_user in target_users_by_guid.items()
+    }
+    historical_user_guid = case(
+        user_guid_by_lower_name, value=func.lower(models.FamUser.user_name)
+    )
+    user_with_guid = aliased(models.FamUser)
+    db.execute(
+        sql_update(models.FamUser)
+        .where(
+            models.FamUser.user_type_code == user_type_code,
+            models.FamUser.user_guid.is_(None),
+            func.lower(models.FamUser.user_name).in_(user_guid_by_lower_name),
+            ~exists().where(
+                user_with_guid.user_type_code == user_type_code,
+                user_with_guid.user_guid == historical_user_guid,
+            ),
+        )
+        .values(
+            user_guid=historical_user_guid,
+            update_user=requester,
+            update_date=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    upsert_stmt = insert(models.FamUser).values(
+        [
+            {
+                "user_type_code": user_type_code,
+                "user_name": target_user.user_name,
+                "user_guid": user_guid,
+                "first_name": target_user.first_name,
+                "last_name": target_user.last_name,
+                "email": target_user.email,
+                "business_guid": (
+                    target_user.business_guid
+                    if target_user.user_type_code == UserType.BCEID
+                    else None
+                ),
+                "create_user": requester,
+            }
+            for user_guid, target_user in target_users_by_guid.items()
+        ]
+    )
+    upsert_stmt = upsert_stmt.on_conflict_do_update(
+        index_elements=[models.FamUser.user_type_code, models.FamUser.user_guid],
+        set_={
+            # same as `update_user_name`, user_name only changes when it is not a case change
+            models.FamUser.user_name: case(
+                (
+                    func.lower(models.FamUser.user_name)
+                    != func.lower(upsert_stmt.excluded.user_name),
+                    upsert_stmt.excluded.user_name,
+                ),
+                else_=models.FamUser.user_name,
+            ),
+            models.FamUser.first_name: upsert_stmt.excluded.first_name,
+            models.FamUser.last_name: upsert_stmt.excluded.last_name,
+            models.FamUser.email: upsert_stmt.excluded.email,
+            models.FamUser.business_guid: func.coalesce(
+                upsert_stmt.excluded.business_guid, models.FamUser.business_guid
+            ),
+            models.FamUser.update_user: requester,
+            models.FamUser.update_date: func.now(),
+        },
+    )
+    fam_users = db.scalars(
+        upsert_stmt.returning(models.FamUser),
+        execution_options={"populate_existing": True},
+    ).all()
+    LOGGER.debug(f"{len(fam_users)} user(s) found or created.")
+    requester_cache.invalidate_users(db, [fam_user.user_id for fam_user in fam_users])
+    return {fam_user.user_guid: fam_user for fam_user in fam_users}
+
+
 def get_user_by_cognito_user_id(db: Session, cognito_user_id: str) -> models.FamUser:
     user = (
         db.query(models.FamUser)
@@ -167,6 +282,7 @@ def update(
         .update({**update_values, models.FamUser.update_user: requester})
     )
     LOGGER.debug(f"{update_count} row updated.")
+    requester_cache.invalidate_users(db, [user_id])
     return update_count
 
 
@@ -258,152 +374,374 @@ def fetch_initial_requester_info(db: Session, cognito_user_id: str):
 
 
 def update_user_info_from_idim_source(
-    db: Session, use_pagination: bool, page: int, per_page: int
+    db: Session,
+    use_pagination: bool,
+    page: int,
+    per_page: int,
+    time_budget_seconds: float = IDIM_SYNC_TIME_BUDGET_SECONDS,
+    max_concurrency: int = IDIM_SYNC_MAX_CONCURRENCY,
 ) -> FamUserUpdateResponseSchema:
     """
-    Go through each user record in the database,
+    Go through user records in the database,
     update the user information to match the record in IDIM web service,
     only for IDIR and Business BCeID users, ignore bc service card users
+
+    With "use_pagination", only the users on "page" are synced. Otherwise the
+    sync resumes after the last user recorded in the checkpoint
+    (fam_user_idim_sync_checkpoint) and goes through the users in batches of
+    "per_page" (in user_id order) until all users are done, "time_budget_seconds"
+    is used up or too little of the request deadline is left for another batch.
+    Each batch is committed with the checkpoint, which stops before the first
+    user whose lookup failed (e.g. IDIM timed out): the next run retries it. The
+    checkpoint goes back to the start once all users are done.
+
+    The users of a batch are looked up in IDIM at the same time (up to
+    "max_concurrency") and updated with one statement.
     """
     run_on = datetime.now()
+    start = time.monotonic()
     # get a requester from the database
     requester = get_user_by_domain_and_name(
         db, UserType.IDIR, config.get_requester_name_for_update_user_info()
     )
 
-    # setup IDIM web service
+    # setup IDIM web service, the sync needs current information: no lookup cache.
     api_instance_env = (
         ApiInstanceEnv.PROD if crud_utils.is_on_aws_prod() else ApiInstanceEnv.TEST
     )
-    idim_proxy_service = IdimProxyService(requester, api_instance_env)
+    idim_proxy_service = IdimProxyService(requester, api_instance_env, use_cache=False)
 
-    # grab fam users from user table
-    fam_users = get_users(db)
-    total_db_users_count = len(fam_users)
+    total_db_users_count = db.scalar(select(func.count(models.FamUser.user_id)))
     LOGGER.debug(f"Total number of users in database: {total_db_users_count}")
 
+    sync_result = {
+        "success_user_update_list": [],
+        "failed_user_update_list": [],
+        "ignored_user_update_list": [], # we ignore for bcsc users; IDIM does not provide bcsc users information
+        "mismatch_user_update_list": [], # for the users whose user_guid record does not match the user_guid from IDIM
+    }
+    users_count = 0
+    checkpoint_user_id = None
+    sync_completed = None
+
     if use_pagination:
-        fam_users = (
-            db.query(models.FamUser)
+        fam_users = db.execute(
+            __select_users_to_sync()
             .order_by(models.FamUser.user_id.asc())
             .offset((page - 1) * per_page)
             .limit(per_page)
-            .all()
-        )
+        ).all()
         LOGGER.debug(
             f"Updating information for users on page {page}, there are {per_page} users on each page"
         )
+        __sync_users_with_idim(
+            db, idim_proxy_service, fam_users, requester, max_concurrency, sync_result
+        )
+        users_count = len(fam_users)
 
-    success_user_update_list = []
-    failed_user_update_list = []
-    ignored_user_update_list = [] # we ignore for bcsc users; IDIM does not provide bcsc users information
-    mismatch_user_update_list = [] # for the users whose user_guid record does not match the user_guid from IDIM
-
-    for user in fam_users:
-        log_currernt_user = {
-            'user_id':user.user_id, 'user_name': user.user_name, 'user_type': user.user_type_code, 'user_guid': user.user_guid, 'email': user.email
-        }
-        try:
-            LOGGER.debug(
-                f"Updating information for user: {log_currernt_user}"
-            )
-            search_result = None
-            properties_to_update = {}
-
-            if user.user_type_code == UserType.IDIR:
-                # IDIM web service doesn't support search IDIR by user_guid, so we search by userID
-                search_result = idim_proxy_service.lookup_idir(
-                    IdimProxySearchParamSchema(**{"userId": user.user_name})
-                )
-
-            elif user.user_type_code == UserType.BCEID:
-                if user.user_guid:
-                    # IDIM recommends searching by user_guid.
-                    # if found business bceid user by user_guid, update username if necessary
-                    search_result = idim_proxy_service.lookup_business_bceid(
-                        IdimProxyBceidSearchParamSchema(
-                            **{
-                                "searchUserBy": IdimSearchUserParamType.USER_GUID,
-                                "searchValue": user.user_guid,
-                            }
-                        )
-                    )
-                    properties_to_update = {
-                        models.FamUser.user_name: search_result.get("userId"),
-                    }
-
-                else:
-                    # if user has no user_guid in our database, find by user_name and add user_guid to database
-                    search_result = idim_proxy_service.lookup_business_bceid(
-                        IdimProxyBceidSearchParamSchema(
-                            **{
-                                "searchUserBy": IdimSearchUserParamType.USER_ID,
-                                "searchValue": user.user_name,
-                            }
-                        )
-                    )
-                    properties_to_update = {
-                        models.FamUser.user_guid: search_result.get("guid"),
-                    }
-            else:
-                # ignore bc service card users
-                ignored_user_update_list.append(log_currernt_user)
-                LOGGER.debug(
-                    f"Updating information for user {user.user_name} is ignored because we only focus on IDIR and Business BCeID"
-                )
-                continue
-
-            # Update various target_user fields from idim search if exists
-            if search_result and search_result.get("found"):
-                if (user.user_guid and user.user_guid != search_result.get("guid")):
-                    # if found user's user_guid does not match our record
-                    # which is the edge case that could cause by the username change, ignore this situation
-                    # only IDIR user has this edge case, because IDIM does not support search IDIR by user_guid
-                    mismatch_user_update_list.append(log_currernt_user)
-                    LOGGER.debug(
-                        f"Updating information for user {user.user_name} is ignored because the user_guid does not match"
-                    )
-                    continue
-
-                properties_to_update = {
-                    **properties_to_update,
-                    models.FamUser.user_guid: search_result.get("guid"),
-                    models.FamUser.first_name: search_result.get("firstName"),
-                    models.FamUser.last_name: search_result.get("lastName"),
-                    models.FamUser.email: search_result.get("email"),
-                    models.FamUser.business_guid: search_result.get("businessGuid"),
-                }
-
-                update(
-                    db, user.user_id, properties_to_update, requester.cognito_user_id
+    else:
+        checkpoint = __lock_idim_sync_checkpoint(db)
+        if checkpoint is None:
+            LOGGER.info("Updating user information is skipped, another sync is in progress")
+            sync_completed = False
+        else:
+            start_user_id = checkpoint_user_id = checkpoint.last_user_id
+            sync_completed = False
+            request_deadline.ensure_time_left(IDIM_SYNC_BATCH_SECONDS, "syncing users with IDIM")
+            # at least one batch per run, so the sync always progresses
+            while True:
+                fam_users = db.execute(
+                    __select_users_to_sync()
+                    .where(models.FamUser.user_id > checkpoint_user_id)
+                    .order_by(models.FamUser.user_id.asc())
+                    .limit(per_page)
+                ).all()
+                retry_user_id = __sync_users_with_idim(
+                    db, idim_proxy_service, fam_users, requester, max_concurrency, sync_result
                 )
-                LOGGER.debug(f"Updating information for user {user.user_name} is done")
-                updated_user = get_user(db=db, user_id=user.user_id)
-                log_currernt_user = {
-                    'user_id':updated_user.user_id, 'user_name': updated_user.user_name, 'user_type': updated_user.user_type_code, 'user_guid': updated_user.user_guid, 'email': updated_user.email
-                }
-                success_user_update_list.append(log_currernt_user)
-            else:
-                LOGGER.debug(
-                    f"Cannot find user {user.user_name} {user.user_guid} with user type {user.user_type_code}"
+                users_count += len(fam_users)
+                done_users = [
+                    user for user in fam_users if retry_user_id is None or user.user_id < retry_user_id
+                ]
+                if done_users:
+                    checkpoint_user_id = done_users[-1].user_id
+                sync_completed = retry_user_id is None and len(fam_users) < per_page
+                __save_idim_sync_checkpoint(
+                    checkpoint, 0 if sync_completed else checkpoint_user_id, requester
                 )
-                failed_user_update_list.append(log_currernt_user)
+                # committed per batch: a later failure does not undo the batches done
+                db.commit()
+                if (
+                    sync_completed
+                    or retry_user_id is not None
+                    or time.monotonic() - start >= time_budget_seconds
+                    or not request_deadline.has_time_left(IDIM_SYNC_BATCH_SECONDS)
+                ):
+                    break
+                # the commit released the checkpoint (another sync may have moved it since)
+                checkpoint = __lock_idim_sync_checkpoint(db)
+                if checkpoint is None:
+                    break
+                checkpoint_user_id = checkpoint.last_user_id
 
-        except Exception as e:
-            LOGGER.debug(f"Failed to update user info: {e}")
-            failed_user_update_list.append(log_currernt_user)
+            LOGGER.debug(
+                f"Updated information for {users_count} users after user {start_user_id}, "
+                f"stopped at user {checkpoint_user_id}, all users done: {sync_completed}"
+            )
 
     end = datetime.now()
     return FamUserUpdateResponseSchema(
         **{
             "total_db_users_count": total_db_users_count,
             "current_page": page,
-            "users_count_on_page": len(fam_users),
-            "success_user_update_list": success_user_update_list,
-            "failed_user_update_list": failed_user_update_list,
-            "ignored_user_update_list": ignored_user_update_list,
-            "mismatch_user_update_list": mismatch_user_update_list,
+            "users_count_on_page": users_count,
+            **sync_result,
             "run_on": run_on,
             "elapsed": f"{(end - run_on).total_seconds()}s",
+            "checkpoint_user_id": checkpoint_user_id,
+            "sync_completed": sync_completed,
         }
     )
+
+
+def __select_users_to_sync():
+    return select(
+        models.FamUser.user_id,
+        models.FamUser.user_name,
+        models.FamUser.user_type_code,
+        models.FamUser.user_guid,
+        models.FamUser.email,
+    )
+
+
+def __lock_idim_sync_checkpoint(db: Session) -> Optional[models.FamUserIdimSyncCheckpoint]:
+    """
+    Returns the sync checkpoint locked for this transaction (created on the
+    first sync), or None when another sync holds it.
+    """
+    db.execute(
+        insert(models.FamUserIdimSyncCheckpoint)
+        .values(sync_name=IDIM_SYNC_CHECKPOINT_NAME)
+        .on_conflict_do_nothing()
+    )
+    return db.scalars(
+        select(models.FamUserIdimSyncCheckpoint)
+        .where(models.FamUserIdimSyncCheckpoint.sync_name == IDIM_SYNC_CHECKPOINT_NAME)
+        .with_for_update(skip_locked=True)
+        .execution_options(populate_existing=True)
+    ).one_or_none()
+
+
+def __save_idim_sync_checkpoint(
+    checkpoint: models.FamUserIdimSyncCheckpoint, last_user_id: int, requester: models.FamUser
+):
+    """Records "last_user_id" as done; 0 starts a new pass over all users."""
+    if last_user_id == 0:
+        checkpoint.pass_start_date = func.now()
+    checkpoint.last_user_id = last_user_id
+    checkpoint.update_user = requester.cognito_user_id
+
+
+def __lookup_user_in_idim(idim_proxy_service: IdimProxyService, user) -> dict:
+    if user.user_type_code == UserType.IDIR:
+        # IDIM web service doesn't support search IDIR by user_guid, so we search by userID
+        return idim_proxy_service.lookup_idir(
+            IdimProxySearchParamSchema(**{"userId": user.user_name})
+        )
+
+    # IDIM recommends searching by user_guid; if user has no user_guid in our database, find by user_name
+    return idim_proxy_service.lookup_business_bceid(
+        IdimProxyBceidSearchParamSchema(
+            **{
+                "searchUserBy": (
+                    IdimSearchUserParamType.USER_GUID
+                    if user.user_guid
+                    else IdimSearchUserParamType.USER_ID
+                ),
+                "searchValue": user.user_guid or user.user_name,
+            }
+        )
+    )
+
+
+def __sync_users_with_idim(
+    db: Session,
+    idim_proxy_service: IdimProxyService,
+    fam_users: list,
+    requester: models.FamUser,
+    max_concurrency: int,
+    sync_result: dict,
+):
+    """
+    Looks up "fam_users" in IDIM at the same time and updates the found ones,
+    adding each user to one of the lists of "sync_result".
+
+    :return: the user_id of the first user whose lookup failed (or was cut by
+        the request deadline), to be synced again; None when all were looked up.
+    """
+    users_to_lookup = []
+    for user in fam_users:
+        if user.user_type_code in (UserType.IDIR, UserType.BCEID):
+            users_to_lookup.append(user)
+        else:
+            # ignore bc service card users
+            sync_result["ignored_user_update_list"].append(__to_log_user(user))
+            LOGGER.debug(
+                f"Updating information for user {user.user_name} is ignored because we only focus on IDIR and Business BCeID"
+            )
+    if not users_to_lookup:
+        return None
+
+    with ThreadPoolExecutor(
+        max_workers=min(max_concurrency, len(users_to_lookup)),
+        thread_name_prefix="idim-sync",
+    ) as executor:
+        futures = [
+            # each in a copy of the request context, so lookups see the request deadline
+            executor.submit(copy_context().run, __lookup_user_in_idim, idim_proxy_service, user)
+            for user in users_to_lookup
+        ]
+
+    user_updates = []
+    retry_user_id = None
+    for user, future in zip(users_to_lookup, futures):
+        try:
+            search_result = future.result()
+        except Exception as e:
+            LOGGER.debug(f"Failed to update user info: {e}")
+            sync_result["failed_user_update_list"].append(__to_log_user(user))
+            if retry_user_id is None:
+                retry_user_id = user.user_id
+            continue
+
+        # Update various target_user fields from idim search if exists
+        if not (search_result and search_result.get("found")):
+            LOGGER.debug(
+                f"Cannot find user {user.user_name} {user.user_guid} with user type {user.user_type_code}"
+            )
+            sync_result["failed_user_update_list"].append(__to_log_user(user))
+            continue
+
+        if user.user_guid and user.user_guid != search_result.get("guid"):
+            # if found user's user_guid does not match our record
+            # which is the edge case that could cause by the username change, ignore this situation
+            # only IDIR user has this edge case, because IDIM does not support search IDIR by user_guid
+            sync_result["mismatch_user_update_list"].append(__to_log_user(user))
+            LOGGER.debug(
+                f"Updating information for user {user.user_name} is ignored because the user_guid does not match"
+            )
+            continue
+
+        user_updates.append(
+            {
+                "user_id": user.user_id,
+                # if found business bceid user by user_guid, update username if necessary
+                "user_name": (
+                    search_result.get("userId")
+                    if user.user_type_code == UserType.BCEID and user.user_guid
+                    else None
+                ),
+                "user_guid": search_result.get("guid"),
+                "first_name": search_result.get("firstName"),
+                "last_name": search_result.get("lastName"),
+                "email": search_result.get("email"),
+                "business_guid": search_result.get("businessGuid"),
+            }
+        )
+
+    failed_user_ids = __update_users_from_idim(db, user_updates, requester.cognito_user_id)
+    users_by_id = {user.user_id: user for user in users_to_lookup}
+    for user_update in user_updates:
+        user = users_by_id[user_update["user_id"]]
+        if user_update["user_id"] in failed_user_ids:
+            sync_result["failed_user_update_list"].append(__to_log_user(user))
+            continue
+        sync_result["success_user_update_list"].append(
+            {
+                "user_id": user.user_id,
+                "user_name": user_update["user_name"] or user.user_name,
+                "user_type": user.user_type_code,
+                "user_guid": user_update["user_guid"],
+                "email": user_update["email"],
+            }
+        )
+    return retry_user_id
+
+
+def __update_users_from_idim(
+    db: Session, user_updates: List[dict], requester: str  # cognito_user_id
+) -> Set[int]:
+    """
+    Updates the users with their IDIM information in one statement. If that
+    fails (e.g. a user_guid already used by another user), updates them one by
+    one so only the offending users fail.
+
+    :return: user_ids of the users that could not be updated.
+    """
+    if not user_updates:
+        return set()
+    requester_cache.invalidate_users(db, [user_update["user_id"] for user_update in user_updates])
+    try:
+        with db.begin_nested():
+            db.execute(__build_update_users_from_idim(user_updates, requester))
+        LOGGER.debug(f"Updated information for {len(user_updates)} users")
+        return set()
+    except SQLAlchemyError as e:
+        LOGGER.debug(f"Failed to update user info in bulk, updating one by one: {e}")
+
+    failed_user_ids = set()
+    for user_update in user_updates:
+        try:
+            with db.begin_nested():
+                db.execute(__build_update_users_from_idim([user_update], requester))
+        except SQLAlchemyError as e:
+            LOGGER.debug(f"Failed to update user info: {e}")
+            failed_user_ids.add(user_update["user_id"])
+    return failed_user_ids
+
+
+def __build_update_users_from_idim(user_updates: List[dict], requester: str):
+    # UPDATE fam_user ... FROM (VALUES ...) idim_user WHERE fam_user.user_id = idim_user.user_id
+    idim_user = values(
+        column("user_id", BigInteger),
+        column("user_name", String),
+        column("user_guid", String),
+        column("first_name", String),
+        column("last_name", String),
+        column("email", String),
+        column("business_guid", String),
+        name="idim_user",
+    ).data(
+        [
+            (
+                user_update["user_id"],
+                user_update["user_name"],
+                user_update["user_guid"],
+                user_update["first_name"],
+                user_update["last_name"],
+                user_update["email"],
+                user_update["business_guid"],
+            )
+            for user_update in user_updates
+        ]
+    )
+    return (
+        sql_update(models.FamUser)
+        .where(models.FamUser.user_id == idim_user.c.user_id)
+        .values(
+            user_name=func.coalesce(idim_user.c.user_name, models.FamUser.user_name),
+            user_guid=idim_user.c.user_guid,
+            first_name=idim_user.c.first_name,
+            last_name=idim_user.c.last_name,
+            email=idim_user.c.email,
+            business_guid=idim_user.c.business_guid,
+            update_user=requester,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def __to_log_user(user) -> dict:
+    return {
+        'user_id': user.user_id, 'user_name': user.user_name, 'user_type': user.user_type_code, 'user_guid': user.user_guid, 'email': user.email
+    }
@@ -1,10 +1,11 @@
 import logging
 from datetime import datetime
 from http import HTTPStatus
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from api.app import constants as famConstants
-from api.app.crud import crud_forest_client, crud_role, crud_user, crud_utils
+from api.app.crud import (crud_email_outbox, crud_forest_client, crud_role,
+                          crud_user, crud_utils)
 from api.app.crud.services.permission_audit_service import \
     PermissionAuditService
 from api.app.crud.validator.user_role_assignment_validator import validate_request_type, validate_bceid_same_org_users
@@ -26,8 +27,10 @@ from api.app.schemas.forest_client_integration import \
     ForestClientIntegrationSearchParmsSchema
 from api.app.schemas.requester import RequesterSchema
 from api.app.crud.validator.user_role_assignment_validator import validate_request_type
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, aliased
-from sqlalchemy import or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import or_, tuple_
 from api.app.utils.utils import raise_http_exception
 
 LOGGER = logging.getLogger(__name__)
@@ -81,42 +84,74 @@ def create_user_role_assignment_many(
         fam_role.role_type_code == famConstants.RoleType.ROLE_TYPE_ABSTRACT
     )
 
+    # Validate all requested forest client numbers once (one FC API search) for all users.
+    forest_client_search_returns = {}
+    forest_client_search_error = None
+    if require_child_role and valid_users and request.forest_client_numbers:
+        try:
+            forest_client_search_returns = search_forest_clients_by_number(
+                fam_role, request.forest_client_numbers
+            )
+        except Exception as e:
+            # Reported on each user/forest client number below.
+            forest_client_search_error = e
+
     # Group role assignments by user, used for audit record creation later
     user_role_assignments = {}
 
-    # Iterate over valid users
-    for target_user in valid_users:
-        try:
-            fam_user = crud_user.find_or_create(
-                db, request.user_type_code, target_user.user_name, target_user.user_guid, requester.cognito_user_id
-            )
-            fam_user = crud_user.update_user_properties_from_verified_target_user(
-                db, fam_user.user_id, target_user, requester.cognito_user_id,
-            )
+    # Valid users are granted with set-based statements, a constant number of statements
+    # per request regardless of the number of users and forest client numbers.
+    valid_users_first_result_index = len(new_user_permission_granted_list)
+    try:
+        # One savepoint: a failed statement is rolled back on its own (the session stays
+        # usable for the results and audit records), along with the users upserted for it.
+        with db.begin_nested():
+            fam_users = crud_user.find_or_create_many(
+                db, request.user_type_code, valid_users, requester.cognito_user_id
+            ) if valid_users else {}
+
+            child_roles = {}
+            if require_child_role and forest_client_search_returns:
+                child_roles = find_or_create_forest_client_child_roles(
+                    db,
+                    [
+                        forest_client_number
+                        for forest_client_number, forest_client_search_return in forest_client_search_returns.items()
+                        if forest_client_number_exists(forest_client_search_return)
+                        and forest_client_active(forest_client_search_return)
+                    ],
+                    fam_role,
+                    requester.cognito_user_id,
+                )
+
+            # (result index, user, role, forest client search return) of each assignment to create.
+            pending_assignments = []
+            for target_user in valid_users:
+                fam_user = fam_users[target_user.user_guid]
+
+                if require_child_role:
+                    if (
+                        not hasattr(request, "forest_client_numbers")
+                        or request.forest_client_numbers is None
+                        or len(request.forest_client_numbers) < 1
+                    ):
+                        new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
+                            status_code=HTTPStatus.BAD_REQUEST,
+                            detail=None,
+                            error_message="Invalid user role assignment request, missing forest client number.",
+                        ))
+                        continue
 
-            if require_child_role:
-                if (
-                    not hasattr(request, "forest_client_numbers")
-                    or request.forest_client_numbers is None
-                    or len(request.forest_client_numbers) < 1
-                ):
-                    new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
-                        status_code=HTTPStatus.BAD_REQUEST,
-                        detail=None,
-                        error_message="Invalid user role assignment request, missing forest client number.",
-                    ))
-                    continue
-
-                api_instance_env = crud_utils.use_api_instance_by_app(fam_role.application)
-                forest_client_integration_service = ForestClientIntegrationService(api_instance_env)
-
-                for forest_client_number in request.forest_client_numbers:
-                    try:
-                        forest_client_search_return = (
-                            forest_client_integration_service.search(
-                                ForestClientIntegrationSearchParmsSchema(forest_client_numbers=[forest_client_number])
-                            )
-                        )
+                    for forest_client_number in request.forest_client_numbers:
+                        if forest_client_search_error:
+                            new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
+                                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+                                detail=None,
+                                error_message=str(forest_client_search_error),
+                            ))
+                            continue
+
+                        forest_client_search_return = forest_client_search_returns[forest_client_number]
 
                         if not forest_client_number_exists(forest_client_search_return):
                             new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
@@ -138,58 +173,87 @@ def create_user_role_assignment_many(
                             ))
                             continue
 
-                        child_role = find_or_create_forest_client_child_role(
-                            db, forest_client_number, fam_role, requester.cognito_user_id,
-                        )
-                        new_user_role_assginment_res = create_user_role_assignment(
-                            db, fam_user, child_role, requester.cognito_user_id, expiry_date=request._expiry_date
-                        )
-                        new_user_role_assginment_res.detail.role.forest_client = FamForestClientSchema.from_api_json(forest_client_search_return[0])
-                        new_user_permission_granted_list.append(new_user_role_assginment_res)
-
-                        _group_assignments_by_user(user_role_assignments, fam_user, new_user_role_assginment_res)
-
-                    except Exception as e:
-                        new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
-                            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-                            detail=None,
-                            error_message=str(e),
+                        pending_assignments.append((
+                            len(new_user_permission_granted_list),
+                            fam_user,
+                            child_roles[forest_client_number],
+                            forest_client_search_return,
                         ))
-            else:
-                try:
-                    new_user_role_assginment_res = create_user_role_assignment(
-                        db, fam_user, fam_role, requester.cognito_user_id, expiry_date=request._expiry_date
-                    )
-                    new_user_permission_granted_list.append(new_user_role_assginment_res)
-
-                    _group_assignments_by_user(user_role_assignments, fam_user, new_user_role_assginment_res)
-
-                except Exception as e:
-                    new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
-                        status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-                        detail=None,
-                        error_message=str(e),
-                    ))
-        except Exception as e:
+                        new_user_permission_granted_list.append(None)
+                else:
+                    pending_assignments.append((len(new_user_permission_granted_list), fam_user, fam_role, None))
+                    new_user_permission_granted_list.append(None)
+
+            new_user_role_assignment_res_list = create_user_role_assignments(
+                db,
+                [(fam_user, role) for _, fam_user, role, _ in pending_assignments],
+                requester.cognito_user_id,
+                expiry_date=request._expiry_date,
+            )
+            for (result_index, fam_user, _, forest_client_search_return), new_user_role_assginment_res in zip(
+                pending_assignments, new_user_role_assignment_res_list
+            ):
+                if forest_client_search_return:
+                    new_user_role_assginment_res.detail.role.forest_client = FamForestClientSchema.from_api_json(forest_client_search_return[0])
+                new_user_permission_granted_list[result_index] = new_user_role_assginment_res
+
+                _group_assignments_by_user(user_role_assignments, fam_user, new_user_role_assginment_res)
+
+    except Exception as e:
+        # The statements are shared by all valid users, a failure is reported on each of them.
+        LOGGER.warning(f"User/Role assignment failed for {len(valid_users)} user(s): {e}")
+        del new_user_permission_granted_list[valid_users_first_result_index:]
+        user_role_assignments = {}
+        for _ in valid_users:
             new_user_permission_granted_list.append(FamUserRoleAssignmentCreateRes(
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
                 detail=None,
                 error_message=str(e),
             ))
 
-    # Save audit records for each user
+    # Save audit records for each user, inserted together with one flush
     permission_audit_service = PermissionAuditService(db)
     for user_id, data in user_role_assignments.items():
         permission_audit_service.store_user_permissions_granted_audit_history(
             requester=requester,
             change_target_user=data["user"],
-            new_user_permission_granted_list=data["assignments"]
+            new_user_permission_granted_list=data["assignments"],
+            flush=False,
         )
+    db.flush()
 
     LOGGER.info(f"User/Role assignment executed: {new_user_permission_granted_list}")
     return new_user_permission_granted_list
 
 
+def search_forest_clients_by_number(
+    fam_role: models.FamRole, forest_client_numbers: List[str]
+) -> Dict[str, List[dict]]:
+    """
+    Search all forest client numbers with one FC API search (FC API accepts repeated 'id').
+    :return: search return for each number, in the exact number search form ([] or [found client])
+        expected by forest_client_validator.
+    """
+    unique_forest_client_numbers = list(dict.fromkeys(forest_client_numbers))
+    api_instance_env = crud_utils.use_api_instance_by_app(fam_role.application)
+    forest_client_integration_service = ForestClientIntegrationService(api_instance_env)
+    fc_search_results = forest_client_integration_service.search(
+        ForestClientIntegrationSearchParmsSchema(
+            forest_client_numbers=unique_forest_client_numbers,
+            size=max(len(unique_forest_client_numbers), famConstants.DEFAULT_FC_API_SEARCH_PAGE_SIZE),
+        )
+    )
+    found_forest_clients = {fc["clientNumber"]: fc for fc in fc_search_results}
+    return {
+        forest_client_number: (
+            [found_forest_clients[forest_client_number]]
+            if forest_client_number in found_forest_clients
+            else []
+        )
+        for forest_client_number in unique_forest_client_numbers
+    }
+
+
 def create_user_role_assignment(
     db: Session, user: models.FamUser, role: models.FamRole,
     requester_cognito_user_id: str, expiry_date: Optional[datetime] = None
@@ -225,12 +289,66 @@ def create_user_role_assignment(
     return new_user_role_assginment_res
 
 
+def create_user_role_assignments(
+    db: Session, user_roles: List[Tuple[models.FamUser, models.FamRole]],
+    requester_cognito_user_id: str, expiry_date: Optional[datetime] = None
+) -> List[FamUserRoleAssignmentCreateRes]:
+    """
+    Set-based `create_user_role_assignment`: the missing assignments are created
+    with one INSERT ... ON CONFLICT DO NOTHING and the already assigned ones are
+    loaded with one query.
+    :return: one response for each (user, role), in order. CONFLICT when the role
+        was already assigned, including a (user, role) repeated in "user_roles".
+    """
+    LOGGER.debug(f"Creating {len(user_roles)} user role assignment(s) with expiry_date {expiry_date}.")
+    if not user_roles:
+        return []
+
+    user_role_ids = list(dict.fromkeys((user.user_id, role.role_id) for user, role in user_roles))
+    fam_user_role_xrefs = {
+        (fam_user_role_xref.user_id, fam_user_role_xref.role_id): fam_user_role_xref
+        for fam_user_role_xref in create_many(db, user_role_ids, requester_cognito_user_id, expiry_date)
+    }
+    created_user_role_ids = set(fam_user_role_xrefs)
+    assigned_user_role_ids = [ids for ids in user_role_ids if ids not in created_user_role_ids]
+    if assigned_user_role_ids:
+        for fam_user_role_xref in get_user_roles_by_user_id_and_role_id_many(db, assigned_user_role_ids):
+            fam_user_role_xrefs[(fam_user_role_xref.user_id, fam_user_role_xref.role_id)] = fam_user_role_xref
+
+    new_user_role_assginment_res_list = []
+    for user, role in user_roles:
+        user_role_id = (user.user_id, role.role_id)
+        fam_user_role_xref = fam_user_role_xrefs[user_role_id]
+        if user_role_id in created_user_role_ids:
+            created_user_role_ids.remove(user_role_id)
+            # RETURNING does not load relationships, they are already in the session.
+            set_committed_value(fam_user_role_xref, "user", user)
+            set_committed_value(fam_user_role_xref, "role", role)
+            new_user_role_assginment_res_list.append(FamUserRoleAssignmentCreateRes(
+                **{
+                    "status_code": HTTPStatus.OK,
+                    "detail": FamApplicationUserRoleAssignmentGetSchema(
+                        **fam_user_role_xref.__dict__
+                    ),
+                }
+            ))
+        else:
+            error_msg = f"Role {fam_user_role_xref.role.role_name} already assigned to user {fam_user_role_xref.user.user_name}."
+            new_user_role_assginment_res_list.append(FamUserRoleAssignmentCreateRes(
+                **{
+                    "status_code": HTTPStatus.CONFLICT,
+                    "detail": FamApplicationUserRoleAssignmentGetSchema(
+                        **fam_user_role_xref.__dict__
+                    ),
+                    "error_message": error_msg,
+                }
+            ))
+
+    return new_user_role_assginment_res_list
+
+
 def delete_fam_user_role_assignment(db: Session, requester: RequesterSchema, user_role_xref_id: int):
-    record = (
-        db.query(models.FamUserRoleXref)
-        .filter(models.FamUserRoleXref.user_role_xref_id == user_role_xref_id)
-        .one()
-    )
+    record = db.get_one(models.FamUserRoleXref, user_role_xref_id)
 
     # save audit record
     permission_audit_service = PermissionAuditService(db)
@@ -262,6 +380,37 @@ def create(db: Session, user_id: int, role_id: int, requester_cognito_user_id: s
     return new_fam_user_role
 
 
+def create_many(
+    db: Session, user_role_ids: List[Tuple[int, int]], requester_cognito_user_id: str,
+    expiry_date: Optional[datetime] = None
+) -> List[models.FamUserRoleXref]:
+    """
+    Creates FamUserRoleXref for each (user_id, role_id) not assigned yet.
+    :return: the created ones only.
+    """
+    LOGGER.debug(f"FamUserRoleXref - 'create_many' with {len(user_role_ids)} (user_id, role_id).")
+    new_fam_user_roles = db.scalars(
+        insert(models.FamUserRoleXref)
+        .values(
+            [
+                {
+                    "user_id": user_id,
+                    "role_id": role_id,
+                    "create_user": requester_cognito_user_id,
+                    "expiry_date": expiry_date,
+                }
+                for user_id, role_id in user_role_ids
+            ]
+        )
+        .on_conflict_do_nothing(
+            index_elements=[models.FamUserRoleXref.user_id, models.FamUserRoleXref.role_id]
+        )
+        .returning(models.FamUserRoleXref)
+    ).all()
+    LOGGER.debug(f"{len(new_fam_user_roles)} new FamUserRoleXref added.")
+    return new_fam_user_roles
+
+
 def get_use_role_by_user_id_and_role_id(
     db: Session, user_id: int, role_id: int
 ) -> models.FamUserRoleXref:
@@ -276,6 +425,18 @@ def get_use_role_by_user_id_and_role_id(
     return user_role
 
 
+def get_user_roles_by_user_id_and_role_id_many(
+    db: Session, user_role_ids: List[Tuple[int, int]]
+) -> List[models.FamUserRoleXref]:
+    return (
+        db.query(models.FamUserRoleXref)
+        .filter(
+            tuple_(models.FamUserRoleXref.user_id, models.FamUserRoleXref.role_id).in_(user_role_ids)
+        )
+        .all()
+    )
+
+
 def construct_forest_client_role_name(parent_role_name: str, forest_client_number: str):
     return f"{parent_role_name}_{forest_client_number}"
 
@@ -344,25 +505,94 @@ def find_or_create_forest_client_child_role(
     return child_role
 
 
-def find_by_id(db: Session, user_role_xref_id: int) -> models.FamUserRoleXref:
-    user_role = (
-        db.query(models.FamUserRoleXref)
-        .filter(models.FamUserRoleXref.user_role_xref_id == user_role_xref_id)
-        .one_or_none()
+def find_or_create_forest_client_child_roles(
+    db: Session, forest_client_numbers: List[str], parent_role: models.FamRole, requester_cognito_user_id: str
+) -> Dict[str, models.FamRole]:
+    """
+    Set-based `find_or_create_forest_client_child_role`: the forest clients and the
+    missing child roles are inserted with INSERT ... ON CONFLICT DO NOTHING, then
+    the child roles are loaded with one query.
+    :return: child role for each forest client number.
+    """
+    unique_forest_client_numbers = list(dict.fromkeys(forest_client_numbers))
+    if not unique_forest_client_numbers:
+        return {}
+
+    forest_clients = crud_forest_client.find_or_create_many(
+        db, unique_forest_client_numbers, requester_cognito_user_id
     )
-    return user_role
+    forest_client_role_names = {
+        construct_forest_client_role_name(parent_role.role_name, forest_client_number): forest_client_number
+        for forest_client_number in unique_forest_client_numbers
+    }
+
+    child_role_values = []
+    for forest_client_role_name, forest_client_number in forest_client_role_names.items():
+        child_role_dict = FamRoleCreateSchema(
+            **{
+                "parent_role_id": parent_role.role_id,
+                "application_id": parent_role.application_id,
+                "forest_client_number": forest_client_number,
+                "role_name": forest_client_role_name,
+                "display_name": parent_role.display_name,
+                "role_purpose": construct_forest_client_role_purpose(
+                    parent_role_purpose=parent_role.role_purpose,
+                    forest_client_number=forest_client_number,
+                ),
+                "create_user": requester_cognito_user_id,
+                "call_api_flag": parent_role.call_api_flag,
+                "role_type_code": famConstants.RoleType.ROLE_TYPE_CONCRETE,
+            }
+        ).model_dump()
+        del child_role_dict["forest_client_number"]
+        child_role_dict["client_number_id"] = forest_clients[forest_client_number].client_number_id
+        child_role_values.append(child_role_dict)
+
+    db.execute(
+        insert(models.FamRole)
+        .values(child_role_values)
+        .on_conflict_do_nothing(
+            index_elements=[models.FamRole.role_name, models.FamRole.application_id]
+        )
+    )
+    child_roles = (
+        db.query(models.FamRole)
+        .filter(
+            models.FamRole.application_id == parent_role.application_id,
+            models.FamRole.role_name.in_(forest_client_role_names),
+        )
+        .all()
+    )
+    LOGGER.debug(
+        f"{len(child_roles)} Forest Client child role(s) found or created for parent role "
+        f"{parent_role.role_name}."
+    )
+    return {
+        forest_client_role_names[child_role.role_name]: child_role
+        for child_role in child_roles
+    }
+
+
+def find_by_id(db: Session, user_role_xref_id: int) -> Optional[models.FamUserRoleXref]:
+    # from the session if already loaded (e.g. by the router guards)
+    return crud_utils.get_by_id(db, models.FamUserRoleXref, user_role_xref_id)
 
 
 def send_users_access_granted_emails(
+    db: Session,
     target_users: List[TargetUserSchema],
     roles_assignment_responses: List[FamUserRoleAssignmentCreateRes],
+    requester: RequesterSchema,
 ) -> None:
     """
-    Send access-granted emails for multiple users and record the email sending status.
+    Queue access-granted emails for multiple users and record the email sending status.
 
     This method processes multiple users and their role assignment responses. For each user,
-    it sends a single email summarizing all successful role assignments and updates the
-    email_sending_status field in the role assignment responses.
+    it stores a single email summarizing all successful role assignments in the email outbox,
+    in the same transaction as the role assignments; the email outbox dispatcher sends it.
+    The email_sending_status field in the role assignment responses is updated accordingly
+    (queued); the status of the email once sent is read from the outbox by the role
+    assignments (see crud_email_outbox.get_email_sending_status_by_user_role_xref_id).
     """
     # Create a mapping of user_name to TargetUserSchema for quick lookup
     target_users_map = {user.user_name: user for user in target_users}
@@ -410,16 +640,21 @@ def send_users_access_granted_emails(
                 }
             )
 
-            # Send the email
-            email_service.send_user_access_granted_email(email_params)
-            LOGGER.debug(f"Email sent to {email_params.send_to_email}.")
+            # Queue the email
+            crud_email_outbox.create_outbox_email(
+                db,
+                email_service.build_user_access_granted_email(email_params),
+                requester.cognito_user_id,
+                [response.detail.user_role_xref_id for response in successful_responses],
+            )
+            LOGGER.debug(f"Email queued for {email_params.send_to_email}.")
 
             # Update email_sending_status for successful responses
             for response in successful_responses:
-                response.email_sending_status = famConstants.EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS
+                response.email_sending_status = famConstants.EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
 
         except Exception as e:
-            LOGGER.warning(f"Failed to send email to user_name: {user_name}. Reason: {e}")
+            LOGGER.warning(f"Failed to queue email to user_name: {user_name}. Reason: {e}")
             for response in successful_responses:
                 response.email_sending_status = famConstants.EmailSendingStatus.SENT_TO_EMAIL_SERVICE_FAILURE
 
@@ -0,0 +1,81 @@
+import logging
+from typing import Optional
+
+from api.app.constants import EmailSendingStatus, RoleAssignmentJobStatus
+from api.app.crud import crud_email_outbox
+from api.app.models.model import FamUserRoleAssignmentJob
+from api.app.schemas import (FamUserRoleAssignmentJobCreateSchema,
+                             FamUserRoleAssignmentJobRes, RequesterSchema)
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+LOGGER = logging.getLogger(__name__)
+
+
+def create_job(
+    db: Session,
+    role_assignment_request: FamUserRoleAssignmentJobCreateSchema,
+    requester: RequesterSchema,
+) -> FamUserRoleAssignmentJob:
+    """
+    Stores the user role assignment request as a job, queued for the role
+    assignment job worker once the transaction is committed.
+    """
+    job = FamUserRoleAssignmentJob(
+        **{
+            "role_assignment_request": role_assignment_request.model_dump(mode="json"),
+            "requester": requester.model_dump(mode="json"),
+            "total_count": len(role_assignment_request.users),
+            "create_user": requester.cognito_user_id,
+        }
+    )
+    db.add(job)
+    db.flush()
+    db.refresh(job)
+    LOGGER.debug(f"User role assignment job {job.user_role_assignment_job_id} queued for {job.total_count} users")
+    return job
+
+
+def get_job(db: Session, user_role_assignment_job_id: int) -> Optional[FamUserRoleAssignmentJob]:
+    return db.get(FamUserRoleAssignmentJob, user_role_assignment_job_id)
+
+
+def to_job_response(db: Session, job: FamUserRoleAssignmentJob) -> FamUserRoleAssignmentJobRes:
+    """
+    The job with its results so far; the "email_sending_status" of the results
+    saved as queued is the current status of their email in the email outbox.
+    """
+    job_res = FamUserRoleAssignmentJobRes.model_validate(job)
+    queued_results = [
+        result
+        for result in job_res.assignments_detail
+        if result.detail and result.email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+    ]
+    email_sending_status_by_user_role_xref_id = crud_email_outbox.get_email_sending_status_by_user_role_xref_id(
+        db, [result.detail.user_role_xref_id for result in queued_results]
+    )
+    for result in queued_results:
+        result.email_sending_status = email_sending_status_by_user_role_xref_id.get(
+            result.detail.user_role_xref_id, result.email_sending_status
+        )
+    return job_res
+
+
+def get_next_job_to_process(db: Session) -> Optional[FamUserRoleAssignmentJob]:
+    """
+    Returns the oldest queued or in progress job due to be processed (not
+    waiting to retry a failed batch), locked for the current transaction. Jobs
+    locked by another worker are skipped.
+    """
+    return db.scalars(
+        select(FamUserRoleAssignmentJob)
+        .where(
+            FamUserRoleAssignmentJob.job_status.in_(
+                [RoleAssignmentJobStatus.QUEUED, RoleAssignmentJobStatus.IN_PROGRESS]
+            ),
+            FamUserRoleAssignmentJob.next_attempt_date <= func.now(),
+        )
+        .order_by(FamUserRoleAssignmentJob.user_role_assignment_job_id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
@@ -1,6 +1,7 @@
 import logging
 from http import HTTPStatus
 
+from api.app import requester_cache
 from api.app.constants import CURRENT_TERMS_AND_CONDITIONS_VERSION
 from api.app.models.model import FamUserTermsConditions
 from api.app.utils.utils import raise_http_exception
@@ -45,4 +46,5 @@ def create_user_terms_conditions(
     db.add(new_user_terms_conditions)
     db.flush()
     db.refresh(new_user_terms_conditions)
+    requester_cache.invalidate_users(db, [user_id])
     return new_user_terms_conditions
@@ -17,6 +17,26 @@ from sqlalchemy import exists, or_, select
 LOGGER = logging.getLogger(__name__)
 
 
+# Session "info" key of the instances looked up by primary key (see get_by_id).
+SESSION_INFO_LOOKUPS = "lookups"
+
+
+def get_by_id(db: Session, model, id):
+    """
+    The "model" row with primary key "id", None if not found. Looked up in the
+    session (identity map) first: the router guards and the handler of a
+    request share its db session, so a row is queried once per request however
+    many of them look it up (and many-to-one relationships to it, e.g.
+    "role.application", are loaded without a query too). The session only
+    references its instances weakly, the found instance is kept referenced by
+    the session ("info") until it is closed.
+    """
+    instance = db.get(model, id)
+    if instance is not None:
+        db.info.setdefault(SESSION_INFO_LOOKUPS, set()).add(instance)
+    return instance
+
+
 def to_upper(elements: List[str]) -> List[str]:
     return [x.upper() for x in elements] if elements else None
 
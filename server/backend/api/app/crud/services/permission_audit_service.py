@@ -39,7 +39,8 @@ class PermissionAuditService:
         self,
         requester: RequesterSchema,
         change_target_user: FamUser,
-        new_user_permission_granted_list: List[FamUserRoleAssignmentCreateRes]
+        new_user_permission_granted_list: List[FamUserRoleAssignmentCreateRes],
+        flush: bool = True,
     ):
         success_granted_list = list(filter(
             lambda res: res.status_code == HTTPStatus.OK, new_user_permission_granted_list
@@ -61,7 +62,7 @@ class PermissionAuditService:
         )
 
         LOGGER.debug(f"Adding audit record for ({change_type}): {audit_record}")
-        self.repo.save(audit_record)
+        self.repo.save(audit_record, flush=flush)
 
     def store_user_permissions_revoked_audit_history(
         self, requester: RequesterSchema, delete_record: FamUserRoleXref
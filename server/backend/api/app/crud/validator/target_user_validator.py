@@ -1,9 +1,13 @@
 import copy
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Optional
 
 from api.app.constants import (ERROR_CODE_INVALID_REQUEST_PARAMETER,
-                               ApiInstanceEnv, IdimSearchUserParamType,
-                               UserType)
+                               IDIM_VERIFY_DEADLINE_SECONDS,
+                               IDIM_VERIFY_MAX_CONCURRENCY, ApiInstanceEnv,
+                               IdimSearchUserParamType, UserType)
 from api.app.integration.idim_proxy import IdimProxyService
 from api.app.schemas import (IdimProxyBceidSearchParamSchema,
                              IdimProxySearchParamSchema, RequesterSchema,
@@ -12,6 +16,7 @@ from api.app.utils import utils
 from api.app.models.model import FamRole
 from api.app.schemas.target_user_validation_result import FailedTargetUserSchema, TargetUserValidationResultSchema
 from api.app.crud import crud_utils
+from api.app import request_deadline
 
 LOGGER = logging.getLogger(__name__)
 
@@ -21,10 +26,11 @@ class TargetUserValidator:
         requester: RequesterSchema,
         target_user: TargetUserSchema,
         api_instance_env: ApiInstanceEnv,
+        idim_proxy_service: Optional[IdimProxyService] = None,
     ):
         LOGGER.debug(f"Validating target_user - {target_user.user_id}, target env set to: {api_instance_env}")
         self.verified_target_user = copy.deepcopy(target_user)
-        self.idim_proxy_service = IdimProxyService(requester, api_instance_env)
+        self.idim_proxy_service = idim_proxy_service or IdimProxyService(requester, api_instance_env)
 
     def verify_user_exist(self) -> TargetUserSchema:
         search_result = None
@@ -107,7 +113,9 @@ class TargetUserValidator:
 def validate_target_users(
     requester: RequesterSchema,
     target_users: list[TargetUserSchema],
-    role: FamRole
+    role: FamRole,
+    max_concurrency: int = IDIM_VERIFY_MAX_CONCURRENCY,
+    deadline_seconds: float = IDIM_VERIFY_DEADLINE_SECONDS,
 ) -> TargetUserValidationResultSchema:
     """
     Validate a list of target users by calling the IDIM web service.
@@ -116,30 +124,74 @@ def validate_target_users(
     business GUID and other user details as needed (especially for BCeID users). If a user
     is invalid or cannot be verified, it is added to the failed_users list; otherwise, it is added to verified_users.
 
+    Users are verified concurrently (at most "max_concurrency" IDIM requests at a time, sharing one
+    IdimProxyService). Users not verified within "deadline_seconds" in total are failed users.
+    Verified and failed users keep the order of "target_users".
+
     Parameters:
         requester (RequesterSchema): The user making the request, used for context and authorization.
         target_users (list[TargetUserSchema]): The list of users to be validated.
         role (FamRole): The application role context for the validation.
+        max_concurrency (int): Maximum number of users verified at the same time.
+        deadline_seconds (float): Total time allowed to verify all users.
 
     Returns:
         TargetUserValidationResult: An object containing lists of verified and failed TargetUserSchema objects.
     """
     LOGGER.debug(f"Validating {len(target_users)} target users for application: {role.application}")
-    api_instance_env = crud_utils.use_api_instance_by_app(role.application)
     verified_users = []
     failed_users = []
-    for target_user in target_users:
-        try:
-            target_user_validator = TargetUserValidator(requester, target_user, api_instance_env)
-            verified_user = target_user_validator.verify_user_exist()
-            verified_users.append(verified_user)
-        except Exception as e:
-            LOGGER.error(f"Validation failed for user {target_user.user_name}: {str(e)}")
-            failed_users.append(FailedTargetUserSchema(
-                user_name=target_user.user_name,
-                user_guid=target_user.user_guid,
-                error_reason=str(e)
-            ))
+    if not target_users:
+        return TargetUserValidationResultSchema(verified_users=verified_users, failed_users=failed_users)
+
+    api_instance_env = crud_utils.use_api_instance_by_app(role.application)
+    idim_proxy_service = IdimProxyService(requester, api_instance_env)
+
+    def verify_user_exist(target_user: TargetUserSchema) -> TargetUserSchema:
+        target_user_validator = TargetUserValidator(
+            requester, target_user, api_instance_env, idim_proxy_service
+        )
+        return target_user_validator.verify_user_exist()
+
+    # the request deadline, if sooner, also bounds the wait (lookups themselves are cut to it)
+    remaining = request_deadline.remaining_seconds()
+    wait_seconds = deadline_seconds if remaining is None else max(min(deadline_seconds, remaining), 0)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_concurrency, len(target_users))),
+        thread_name_prefix="idim-verify",
+    )
+    try:
+        futures = [
+            # each in a copy of the request context, so lookups see the request deadline
+            executor.submit(copy_context().run, verify_user_exist, target_user)
+            for target_user in target_users
+        ]
+        _, not_done = wait(futures, timeout=wait_seconds)
+    finally:
+        # Does not wait for (or interrupt) lookups still running after the deadline.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if not_done:
+        LOGGER.warning(
+            f"{len(not_done)} of {len(target_users)} target users not verified within {round(wait_seconds, 1):g}s."
+        )
+
+    for target_user, future in zip(target_users, futures):
+        if future in not_done:
+            error_reason = f"Verifying user with IDIM did not complete within {round(wait_seconds, 1):g} seconds."
+        elif future.exception():
+            error_reason = str(future.exception())
+        else:
+            verified_users.append(future.result())
+            continue
+
+        LOGGER.error(f"Validation failed for user {target_user.user_name}: {error_reason}")
+        failed_users.append(FailedTargetUserSchema(
+            user_name=target_user.user_name,
+            user_guid=target_user.user_guid,
+            error_reason=error_reason
+        ))
 
     return TargetUserValidationResultSchema(verified_users=verified_users, failed_users=failed_users)
 
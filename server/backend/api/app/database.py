@@ -1,9 +1,14 @@
-
 import logging
+import threading
+import time
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import psycopg2
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 
+from api.app.constants import DbPoolMode, DbSessionClass
 from api.config import config
 
 LOGGER = logging.getLogger(__name__)
@@ -13,27 +18,153 @@ logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
 
 Base = declarative_base()
 
+# Waiting longer than this for a pool connection is logged as a warning.
+DB_POOL_SLOW_CHECKOUT_SECONDS = 1
+
 _db_url = None
+_engine = None
+_unpooled_engine = None
 _session_local = None
+_session_local_lock = threading.Lock()
 
 
-def get_db():
-    try:
-        # Initialize session local on first call
-        global _db_url
-        global _session_local
-        if not _session_local:
-            LOGGER.debug("starting a new db session")
+class PoolCheckoutStats:
+    """Time spent getting a connection from the pool (connecting included)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["timeouts"] += timed_out
+            self._total_seconds += seconds
+            self._max_seconds = max(self._max_seconds, seconds)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            checkouts = self._stats["checkouts"]
+            return {
+                **self._stats,
+                "wait_ms_avg": round(self._total_seconds * 1000 / checkouts, 1) if checkouts else 0,
+                "wait_ms_max": round(self._max_seconds * 1000, 1),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats = {"checkouts": 0, "timeouts": 0}
+            self._total_seconds = 0.0
+            self._max_seconds = 0.0
+
+
+pool_checkout_stats = PoolCheckoutStats()
+
+
+class _TimedCheckoutPool:
+    """Pool mixin recording the time each connection checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            pool_checkout_stats.record(seconds, timed_out)
+            if seconds >= DB_POOL_SLOW_CHECKOUT_SECONDS:
+                LOGGER.warning(
+                    f"Database connection checkout waited {seconds:.2f}s "
+                    f"(timed out: {timed_out}). Pool: {self.status()}"
+                )
+
+
+class _TimedQueuePool(_TimedCheckoutPool, QueuePool):
+    pass
+
+
+class _TimedNullPool(_TimedCheckoutPool, NullPool):
+    pass
+
+
+def _create_engine():
+    """
+    The engine with the connection pool of DB_POOL_MODE:
+    - QUEUE: DB_POOL_SIZE connections kept open (long-running server, e.g. uvicorn).
+    - SINGLE: one connection kept open and no overflow, the default on Lambda
+      where a container serves one request at a time (the connections are
+      pooled by RDS Proxy). The short-lived connections of
+      "connect_outside_session" are opened apart from the pool.
+    - NULL: a connection per session, closed after it.
+    Pooled connections are checked before use (pre-ping) and replaced after
+    DB_POOL_RECYCLE_SECONDS, so a connection dropped while the container was
+    frozen or by the proxy is not handed to a request.
+    """
+    pool_mode = config.get_db_pool_mode()
+    if pool_mode == DbPoolMode.NULL:
+        pool_args = {"poolclass": _TimedNullPool}
+    else:
+        pool_args = {
+            "poolclass": _TimedQueuePool,
+            "pool_size": 1 if pool_mode == DbPoolMode.SINGLE else config.get_db_pool_size(),
+            "max_overflow": 0 if pool_mode == DbPoolMode.SINGLE else config.get_db_pool_max_overflow(),
+            "pool_timeout": config.get_db_pool_timeout_seconds(),
+            "pool_recycle": config.get_db_pool_recycle_seconds(),
+            "pool_pre_ping": True,
+        }
+    engine = _new_engine(pool_args)
+    LOGGER.debug(f"database engine created! pool: {pool_mode.value}")
+    return engine
 
+
+def _new_engine(pool_args: dict):
+    engine = create_engine(_db_url, echo=False, **pool_args)
+    if config.is_on_aws():
+        event.listen(engine, "do_connect", _connect_with_current_db_credentials)
+    return engine
+
+
+def connect_outside_session(db: Session) -> Connection:
+    """
+    A short-lived connection of its own, outside the transaction of "db" (e.g.
+    to read committed versions). In the SINGLE pool mode, where the pooled
+    connection may be the one of "db", it is opened (and closed) apart from
+    the pool.
+    """
+    global _unpooled_engine
+    engine = db.get_bind().engine
+    if engine is _engine and config.get_db_pool_mode() == DbPoolMode.SINGLE:
+        with _session_local_lock:
+            if not _unpooled_engine:
+                _unpooled_engine = _new_engine({"poolclass": _TimedNullPool})
+            engine = _unpooled_engine
+    return engine.connect()
+
+
+def _get_session_local():
+    # Initialize session local on first call
+    global _db_url
+    global _engine
+    global _session_local
+    with _session_local_lock:
+        if not _session_local:
             if not _db_url:
                 _db_url = config.get_db_string()
-            engine = create_engine(_db_url, echo=False)
-            LOGGER.debug("database engine created!")
+            _engine = _create_engine()
             _session_local = sessionmaker(autocommit=False,
                                           autoflush=False,
-                                          bind=engine)
+                                          bind=_engine)
+            event.listen(_session_local, "after_begin", _set_transaction_timeouts)
+        return _session_local
+
 
-        db = _session_local()
+def _get_db_session(session_class: DbSessionClass):
+    LOGGER.debug("starting a new db session")
+    db = _get_session_local()(info={"session_class": session_class})
+    try:
         yield db
         db.commit()
 
@@ -45,3 +176,59 @@ def get_db():
     finally:
         LOGGER.debug("closing db session")
         db.close()
+
+
+def get_db():
+    """The db session of an http request."""
+    yield from _get_db_session(DbSessionClass.API)
+
+
+def get_job_db():
+    """The db session of background work (jobs, dispatchers): longer timeouts."""
+    yield from _get_db_session(DbSessionClass.JOB)
+
+
+def _set_transaction_timeouts(session, transaction, connection):
+    """
+    Sets the statement and idle in transaction timeouts of the session class
+    for the transaction only (set_config "is_local"): the pooled (or RDS Proxy)
+    connection is left with its defaults for the next session.
+    """
+    statement_timeout, idle_in_transaction_timeout = config.get_db_session_timeouts_seconds(
+        session.info.get("session_class", DbSessionClass.API)
+    )
+    connection.exec_driver_sql(
+        "SELECT set_config('statement_timeout', %s, true), "
+        "set_config('idle_in_transaction_session_timeout', %s, true)",
+        (f"{int(statement_timeout * 1000)}ms", f"{int(idle_in_transaction_timeout * 1000)}ms"),
+    )
+
+
+def get_db_pool_stats() -> dict:
+    """Pool mode, size and connections in use, and the time waited for connections."""
+    stats = {"mode": config.get_db_pool_mode().value}
+    pool = _engine.pool if _engine is not None else None
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "idle": pool.checkedin(),
+        })
+    return {**stats, "checkout": pool_checkout_stats.get_stats()}
+
+
+def _connect_with_current_db_credentials(dialect, conn_rec, cargs, cparams):
+    """
+    New pool connections use the (cached) credentials from the DB secret rather
+    than the ones the engine url was built with, so a secret rotation is picked
+    up without restarting the process.
+    """
+    cparams["user"], cparams["password"] = config.get_aws_db_credentials()
+    try:
+        return dialect.connect(*cargs, **cparams)
+    except psycopg2.OperationalError as e:
+        LOGGER.warning(f"Database connect failed, refreshing credentials: {e}")
+        config.invalidate_aws_db_secret()
+        cparams["user"], cparams["password"] = config.get_aws_db_credentials()
+        return dialect.connect(*cargs, **cparams)
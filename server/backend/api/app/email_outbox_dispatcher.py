@@ -0,0 +1,255 @@
+"""
+Sends the emails of the email outbox (fam_email_outbox) through GC Notify.
+
+Grant requests store their notification emails in the outbox in the same
+transaction as the grant; this dispatcher sends them afterwards, a batch at a
+time with bounded concurrency, a send rate limit and retries with backoff.
+The emails of a batch are claimed (committed) before they are sent and each
+outcome is committed as it arrives, so stopping the dispatcher does not send
+the batch again.
+
+Runs as a scheduled Lambda ("handler"), or locally as a worker loop:
+    python -m api.app.email_outbox_dispatcher
+"""
+import logging.config
+import os.path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import copy_context
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from api.app import database, request_deadline
+from api.app.constants import (EMAIL_OUTBOX_CLAIM_SECONDS,
+                               EMAIL_OUTBOX_DISPATCH_BATCH_SIZE,
+                               EMAIL_OUTBOX_DISPATCH_MAX_CONCURRENCY,
+                               EMAIL_OUTBOX_DISPATCH_RATE_PER_SECOND,
+                               EMAIL_OUTBOX_DISPATCH_SAFETY_MARGIN_SECONDS,
+                               EMAIL_OUTBOX_DISPATCH_TIME_BUDGET_SECONDS,
+                               EMAIL_OUTBOX_MAX_ATTEMPTS,
+                               EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+                               EmailSendingStatus)
+from api.app.crud import crud_email_outbox
+from api.app.integration.gc_notify import GCNotifyEmailService
+from api.app.models.model import FamEmailOutbox
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+logConfigFile = os.path.join(
+    os.path.dirname(__file__), "..", "config", "logging.config"
+)
+
+logging.config.fileConfig(logConfigFile, disable_existing_loggers=False)
+
+LOGGER = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_DISPATCHER_USER = "fam_email_outbox_dispatcher"
+WORKER_POLL_INTERVAL_SECONDS = 5
+
+
+class SendRateLimiter:
+    """Spaces out sends, from any thread, to at most "rate_per_second"."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second
+        self._next_send_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            send_time = max(now, self._next_send_time)
+            self._next_send_time = send_time + self.interval
+        time.sleep(send_time - now)
+
+
+@dataclass(frozen=True)
+class ClaimedEmail:
+    """An outbox email claimed for sending, as of its claim (committed)."""
+
+    email_outbox_id: int
+    send_to_email: str
+    attempt_count: int
+    email_params: dict
+
+
+def dispatch_outbox_batch(
+    db: Session,
+    email_service: GCNotifyEmailService,
+    rate_limiter: SendRateLimiter,
+    batch_size: int = EMAIL_OUTBOX_DISPATCH_BATCH_SIZE,
+    max_concurrency: int = EMAIL_OUTBOX_DISPATCH_MAX_CONCURRENCY,
+) -> int:
+    """
+    Claims one batch of emails due for an attempt and commits the claim before
+    sending any of them, then sends them and commits the outcome of each email
+    as soon as it is known. Stopped while sending (e.g. the Lambda timed out),
+    only the emails being sent are left claimed, until their claim runs out.
+
+    :return: number of emails claimed; less than "batch_size" when no more are due.
+    """
+    outbox_emails = crud_email_outbox.get_queued_outbox_emails_due(db, batch_size)
+    if not outbox_emails:
+        return 0
+
+    claimed_emails = [
+        claimed_email
+        for claimed_email in map(__claim, outbox_emails)
+        if claimed_email is not None
+    ]
+    db.commit()
+    if not claimed_emails:
+        return len(outbox_emails)
+
+    with ThreadPoolExecutor(
+        max_workers=min(max_concurrency, len(claimed_emails)),
+        thread_name_prefix="email-outbox",
+    ) as executor:
+        futures = {
+            executor.submit(
+                copy_context().run, __send_email, email_service, rate_limiter, claimed_email.email_params
+            ): claimed_email
+            for claimed_email in claimed_emails
+        }
+        for future in as_completed(futures):
+            __record_attempt(db, futures[future], future)
+            db.commit()
+    return len(outbox_emails)
+
+
+def dispatch_email_outbox(
+    email_service: Optional[GCNotifyEmailService] = None,
+    time_budget_seconds: float = EMAIL_OUTBOX_DISPATCH_TIME_BUDGET_SECONDS,
+) -> int:
+    """
+    Sends queued emails a batch at a time, until none are due or the
+    "time_budget_seconds" are used up. A batch is no larger than what the send
+    rate allows in the time left, and sends are cut to the time left (see
+    request_deadline): an email not started in time is released, not failed.
+
+    :return: number of emails attempted.
+    """
+    email_service = email_service or GCNotifyEmailService()
+    rate_limiter = SendRateLimiter(EMAIL_OUTBOX_DISPATCH_RATE_PER_SECOND)
+    attempted_count = 0
+    with request_deadline.request_deadline(time_budget_seconds):
+        while True:
+            batch_size = min(
+                EMAIL_OUTBOX_DISPATCH_BATCH_SIZE,
+                int(request_deadline.remaining_seconds() * EMAIL_OUTBOX_DISPATCH_RATE_PER_SECOND),
+            )
+            if batch_size < 1:
+                return attempted_count
+
+            with contextmanager(database.get_job_db)() as db:
+                batch_count = dispatch_outbox_batch(db, email_service, rate_limiter, batch_size)
+            attempted_count += batch_count
+            if batch_count < batch_size:
+                return attempted_count
+
+
+def handler(event, context):
+    """Lambda entry point, invoked on a schedule."""
+    time_budget_seconds = (
+        context.get_remaining_time_in_millis() / 1000 - EMAIL_OUTBOX_DISPATCH_SAFETY_MARGIN_SECONDS
+    )
+    attempted_count = dispatch_email_outbox(time_budget_seconds=time_budget_seconds)
+    LOGGER.info(f"Email outbox dispatched: {attempted_count} email(s) attempted")
+    return {"attempted_count": attempted_count}
+
+
+def __claim(outbox_email: FamEmailOutbox) -> Optional[ClaimedEmail]:
+    outbox_email.update_user = EMAIL_OUTBOX_DISPATCHER_USER
+    if outbox_email.attempt_count >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+        # claimed by a dispatcher stopped while sending it on its last attempt: it may have been sent.
+        outbox_email.email_sending_status = EmailSendingStatus.SENT_TO_EMAIL_SERVICE_FAILURE
+        outbox_email.last_error = "Sending was not confirmed, giving up."
+        LOGGER.warning(
+            f"Email {outbox_email.email_outbox_id} to {outbox_email.send_to_email} not confirmed sent, "
+            f"giving up after {outbox_email.attempt_count} attempt(s)."
+        )
+        return None
+
+    outbox_email.email_sending_status = EmailSendingStatus.SENDING_TO_EMAIL_SERVICE
+    outbox_email.attempt_count += 1
+    outbox_email.next_attempt_date = func.now() + timedelta(seconds=EMAIL_OUTBOX_CLAIM_SECONDS)
+    return ClaimedEmail(
+        email_outbox_id=outbox_email.email_outbox_id,
+        send_to_email=outbox_email.send_to_email,
+        attempt_count=outbox_email.attempt_count,
+        email_params={
+            "email_address": outbox_email.send_to_email,
+            "template_id": outbox_email.template_id,
+            "personalisation": outbox_email.personalisation,
+        },
+    )
+
+
+def __send_email(
+    email_service: GCNotifyEmailService, rate_limiter: SendRateLimiter, email_params: dict
+) -> dict:
+    rate_limiter.wait()
+    return email_service.send_email(email_params)
+
+
+def __record_attempt(db: Session, claimed_email: ClaimedEmail, future):
+    outcome = {"update_user": EMAIL_OUTBOX_DISPATCHER_USER}
+    try:
+        send_email_result = future.result()
+        outcome.update({
+            "email_sending_status": EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS,
+            "notification_id": send_email_result.get("id"),
+            "last_error": None,
+        })
+        LOGGER.debug(f"Email {claimed_email.email_outbox_id} sent to {claimed_email.send_to_email}")
+
+    except request_deadline.RequestDeadlineExceeded as e:
+        # not sent (no time left to start sending): released for the next dispatcher.
+        outcome.update({
+            "email_sending_status": EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE,
+            "attempt_count": claimed_email.attempt_count - 1,
+            "next_attempt_date": func.now(),
+        })
+        LOGGER.debug(f"Email {claimed_email.email_outbox_id} not sent, released. Reason: {e}")
+
+    except Exception as e:
+        outcome["last_error"] = str(e)[:1000]
+        if claimed_email.attempt_count >= EMAIL_OUTBOX_MAX_ATTEMPTS or not __is_retryable(e):
+            outcome["email_sending_status"] = EmailSendingStatus.SENT_TO_EMAIL_SERVICE_FAILURE
+            LOGGER.warning(
+                f"Failed to send email {claimed_email.email_outbox_id} to {claimed_email.send_to_email}, "
+                f"giving up after {claimed_email.attempt_count} attempt(s). Reason: {e}"
+            )
+        else:
+            retry_seconds = EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (claimed_email.attempt_count - 1)
+            outcome.update({
+                "email_sending_status": EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE,
+                "next_attempt_date": func.now() + timedelta(seconds=retry_seconds),
+            })
+            LOGGER.debug(
+                f"Failed to send email {claimed_email.email_outbox_id}, retrying in {retry_seconds}s. Reason: {e}"
+            )
+
+    db.execute(
+        update(FamEmailOutbox)
+        .where(FamEmailOutbox.email_outbox_id == claimed_email.email_outbox_id)
+        .values(**outcome)
+    )
+
+
+def __is_retryable(e: Exception) -> bool:
+    # GC Notify rejecting the email (bad address, template...) fails again on retry, rate limiting does not.
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        status_code = e.response.status_code
+        return not (400 <= status_code < 500) or status_code == 429
+    return True
+
+
+if __name__ == "__main__":
+    while True:
+        if dispatch_email_outbox() == 0:
+            time.sleep(WORKER_POLL_INTERVAL_SECONDS)
@@ -3,8 +3,10 @@ import logging
 import sys
 from http import HTTPStatus
 
-from api.app.constants import (ERROR_CODE_UPSTREAM_CONNECTION_ERROR,
+from api.app.constants import (ERROR_CODE_REQUEST_DEADLINE_EXCEEDED,
+                               ERROR_CODE_UPSTREAM_CONNECTION_ERROR,
                                ERROR_CODE_UPSTREAM_TIMEOUT)
+from api.app.request_deadline import RequestDeadlineExceeded
 from fastapi import Request
 from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import ValidationError
@@ -34,7 +36,12 @@ def requests_gateway_timeout_error_handler(
     )
     upstream_url = getattr(getattr(exc, "request", None), "url", None)
 
-    if isinstance(exc, Timeout):
+    if isinstance(exc, RequestDeadlineExceeded):
+        error_content = {
+            "failureCode": ERROR_CODE_REQUEST_DEADLINE_EXCEEDED,
+            "message": "Request could not complete in time.",
+        }
+    elif isinstance(exc, Timeout):
         error_content = {
             "failureCode": ERROR_CODE_UPSTREAM_TIMEOUT,
             "message": "Upstream service timed out.",
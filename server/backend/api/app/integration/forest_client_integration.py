@@ -1,16 +1,140 @@
 import logging
+import threading
 import time
 from http import HTTPStatus
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
-from api.app.constants import ApiInstanceEnv
+from api.app import request_deadline
+from api.app.constants import (DEFAULT_FC_API_SEARCH_PAGE,
+                               DEFAULT_FC_API_SEARCH_PAGE_SIZE, ApiInstanceEnv)
+from api.app.integration.circuit_breaker import (CircuitBreaker,
+                                                 get_circuit_breaker)
+from api.app.integration.http_transport import HttpTransport, get_http_transport
 from api.app.schemas.forest_client_integration import \
     ForestClientIntegrationSearchParmsSchema
+from api.app.utils.ttl_cache import TtlLruCache, register_cache
 from api.config import config
 
 LOGGER = logging.getLogger(__name__)
 
+# Forest client lookups by number are cached per API instance. Client names and
+# statuses rarely change, a found client is reused for FC_CACHE_TTL_SECONDS and,
+# after that, still served for FC_CACHE_STALE_SECONDS while it is refreshed in
+# the background. Not found numbers are kept for a shorter time and not served
+# stale, so a newly created client is found soon.
+FC_CACHE_TTL_SECONDS = 600
+FC_CACHE_STALE_SECONDS = 3600
+FC_CACHE_NEGATIVE_TTL_SECONDS = 60
+FC_CACHE_MAX_SIZE = 5000
+
+
+class ForestClientCache(TtlLruCache):
+    """
+    Bounded (LRU) cache of Forest Client API search results, keyed by
+    (api_instance_env, client_number). A cached value is the FC API client json
+    for the number, or None when the number was not found.
+    """
+
+    def __init__(
+        self,
+        ttl: float = FC_CACHE_TTL_SECONDS,
+        stale: float = FC_CACHE_STALE_SECONDS,
+        negative_ttl: float = FC_CACHE_NEGATIVE_TTL_SECONDS,
+        max_size: int = FC_CACHE_MAX_SIZE,
+    ):
+        super().__init__(
+            ttl=ttl,
+            max_size=max_size,
+            negative_ttl=negative_ttl,
+            is_negative=lambda client: client is None,
+            stale=stale,
+            stats=("refreshes", "refresh_errors"),
+        )
+        self._refreshing = set()
+
+    def lookup(
+        self, api_instance_env: str, client_numbers: List[str]
+    ) -> Tuple[Dict[str, Optional[dict]], List[str], List[str]]:
+        """
+        :return: (cached, missing, stale) - cached values by client number
+            (including stale ones), numbers to search, and numbers served stale
+            that should be refreshed.
+        """
+        cached, missing, stale = {}, [], []
+        for client_number in dict.fromkeys(client_numbers):
+            entry = self.get_entry((api_instance_env, client_number))
+            if entry is None:
+                missing.append(client_number)
+                continue
+
+            cached[client_number], is_stale = entry
+            if is_stale:
+                stale.append(client_number)
+        return cached, missing, stale
+
+    def peek_clients(self, api_instance_env: str, client_numbers: List[str]) -> Dict[str, dict]:
+        """
+        Found clients still held for "client_numbers", expired or not; for when
+        the FC API is not available. Not counted in the stats.
+        """
+        clients = [
+            self.peek((api_instance_env, client_number))
+            for client_number in dict.fromkeys(client_numbers)
+        ]
+        return {client["clientNumber"]: client for client in clients if client is not None}
+
+    def store(self, api_instance_env: str, client_numbers: List[str], api_result: List[dict]):
+        """Stores the FC API search result for the searched "client_numbers"."""
+        found = {client["clientNumber"]: client for client in api_result}
+        for client_number in client_numbers:
+            self.set((api_instance_env, client_number), found.get(client_number))
+
+    def refresh_in_background(
+        self,
+        api_instance_env: str,
+        client_numbers: List[str],
+        search: Callable[[List[str]], List[dict]],
+    ):
+        """
+        Refreshes stale numbers in a daemon thread with "search"; numbers already
+        being refreshed are skipped. On failure the stale values stay until
+        they run out.
+        """
+        with self._lock:
+            client_numbers = [
+                client_number for client_number in client_numbers
+                if (api_instance_env, client_number) not in self._refreshing
+            ]
+            self._refreshing.update((api_instance_env, n) for n in client_numbers)
+        if not client_numbers:
+            return
+
+        threading.Thread(
+            target=self.__refresh,
+            args=(api_instance_env, client_numbers, search),
+            daemon=True,
+        ).start()
+
+    def __refresh(self, api_instance_env, client_numbers, search):
+        try:
+            self.store(api_instance_env, client_numbers, search(client_numbers))
+            self.count("refreshes")
+        except Exception:
+            LOGGER.warning(
+                f"Forest client cache refresh failed for {client_numbers}.", exc_info=True
+            )
+            self.count("refresh_errors")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(
+                    (api_instance_env, n) for n in client_numbers
+                )
+
+
+forest_client_cache = register_cache(ForestClientCache())
+
+
 class ForestClientIntegrationService():
     """
     The class is used for making requests to get information from Forest Client API.
@@ -31,22 +155,34 @@ class ForestClientIntegrationService():
     TIMEOUT = (5, 10)  # Timeout (connect, read) in seconds.
     # Note: AWS API Gateway has a hard timeout beyong 29 seconds, so the total time -
     # including lambda starts and execution, network latency and plus timeout and retry, should be less than 29 seconds.
-    # Two attempts with 5 seconds connect timeout and 10 seconds read timeout, plus 2 seconds retry delay, should be safe
-    # on hitting API Gateway timeout.
+    # Both attempts are also bound by the request deadline (see request_deadline.py): the timeouts are cut to the
+    # time left, and the retry is skipped when too little is left for it.
+    # Calls to an API instance go through its circuit breaker (see circuit_breaker.py): after consecutive
+    # timeouts/connection errors, calls fail right away for a while instead of each waiting for its timeouts.
     RETRY_MAX_ATTEMPTS = 2
     RETRY_DELAY_SECONDS = 2
 
-    def __init__(self, api_instance_env=ApiInstanceEnv.TEST):
+    def __init__(
+        self,
+        api_instance_env=ApiInstanceEnv.TEST,
+        transport: Optional[HttpTransport] = None,
+        cache: Optional[ForestClientCache] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         LOGGER.debug(f"ForestClientIntegrationService() use API instance - {api_instance_env}")
+        self.api_instance_env = api_instance_env
+        self.cache = cache or forest_client_cache
         self.api_base_url = config.get_forest_client_api_baseurl(api_instance_env)
         self.api_clients_url = f"{self.api_base_url}/api/clients"
         self.API_TOKEN = config.get_forest_client_api_token(api_instance_env)
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(self.api_base_url)
 
         self.headers = {"Accept": "application/json", "X-API-KEY": self.API_TOKEN}
 
         # See Python: https://requests.readthedocs.io/en/latest/user/advanced/
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # The session sends through the connection pool shared for the FC API host.
+        self.transport = transport or get_http_transport(self.api_base_url, self.TIMEOUT)
+        self.session = self.transport.create_session(self.headers)
 
     def search(
         self,
@@ -72,7 +208,66 @@ class ForestClientIntegrationService():
             * Not exact 8 digits: 200 []
             * With mix of ids found and ids not found (e.g., &id=00001011&id=99999999):
                 [{"clientNumber": "00001011"}]
+
+        Number searches returned in the first page go through "forest_client_cache",
+        only the numbers not cached (or expired) are searched with the FC API.
+        """
+        if not self.__is_cacheable(search_params):
+            return self.__search(search_params, retry_on_timeout)
+
+        cached, missing, stale = self.cache.lookup(
+            self.api_instance_env, search_params.forest_client_numbers
+        )
+        if stale:
+            self.cache.refresh_in_background(
+                self.api_instance_env, stale, self.__search_client_numbers
+            )
+        if missing:
+            api_result = self.__search_client_numbers(missing, retry_on_timeout)
+            self.cache.store(self.api_instance_env, missing, api_result)
+            cached.update({client["clientNumber"]: client for client in api_result})
+
+        LOGGER.debug(
+            f"Forest client cache: {len(missing)} searched, {len(stale)} stale. "
+            f"Stats: {self.cache.get_stats()}"
+        )
+        return [
+            cached[client_number]
+            for client_number in dict.fromkeys(search_params.forest_client_numbers)
+            if cached.get(client_number) is not None
+        ]
+
+    def search_cached(self, search_params: ForestClientIntegrationSearchParmsSchema):
+        """
+        Forest Client(s) of a number search found in "forest_client_cache",
+        expired or not, without calling the FC API. For serving the client
+        names last known while the FC API is not available.
         """
+        found = self.cache.peek_clients(self.api_instance_env, search_params.forest_client_numbers or [])
+        return list(found.values())
+
+    def __is_cacheable(self, search_params: ForestClientIntegrationSearchParmsSchema):
+        """Number searches fully returned in the first page."""
+        return (
+            bool(search_params.forest_client_numbers)
+            and search_params.page == DEFAULT_FC_API_SEARCH_PAGE
+            and search_params.size >= len(set(search_params.forest_client_numbers))
+        )
+
+    def __search_client_numbers(self, client_numbers: List[str], retry_on_timeout: bool = False):
+        return self.__search(
+            ForestClientIntegrationSearchParmsSchema(
+                forest_client_numbers=client_numbers,
+                size=max(len(client_numbers), DEFAULT_FC_API_SEARCH_PAGE_SIZE),
+            ),
+            retry_on_timeout,
+        )
+
+    def __search(
+        self,
+        search_params: ForestClientIntegrationSearchParmsSchema,
+        retry_on_timeout: bool = False
+    ):
         request_params = (
             f"page={search_params.page}&size={search_params.size}"
             f"{self.__construct_fc_number_search_params(search_params.forest_client_numbers)}"
@@ -86,10 +281,19 @@ class ForestClientIntegrationService():
         max_attempts = self.RETRY_MAX_ATTEMPTS if retry_on_timeout else 1
 
         for attempt in range(1, max_attempts + 1):
+            # raises CircuitOpenError (a ConnectionError) while the FC API instance is considered down
+            self.circuit_breaker.before_request()
             try:
-                return self.__fetch_json_response(url=url, params=params)
+                api_result = self.__fetch_json_response(url=url, params=params)
+                self.circuit_breaker.record_success()
+                return api_result
 
             except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as rte:
+                if isinstance(rte, request_deadline.RequestDeadlineExceeded):
+                    # not attempted, says nothing about the FC API
+                    self.circuit_breaker.release()
+                    raise
+                self.circuit_breaker.record_failure()
                 if self.__retry_request_on_connection_or_timeout(
                     rte=rte,
                     attempt=attempt,
@@ -100,11 +304,16 @@ class ForestClientIntegrationService():
 
             # Below except catches only HTTPError not general errors like network connection/timeout.
             except requests.exceptions.HTTPError as he:
+                self.circuit_breaker.record_success()
                 return self.__handle_http_error(he)
 
+            except Exception:
+                self.circuit_breaker.release()
+                raise
+
     def __fetch_json_response(self, url, params=None):
         """Execute request and return JSON response body."""
-        response = self.session.get(url, timeout=self.TIMEOUT, params=params)
+        response = self.session.get(url, timeout=self.transport.timeout, params=params)
         response.raise_for_status()
 
         # !! Don't map and return FamForestClientSchema or object from "scheam.py" as that
@@ -116,8 +325,18 @@ class ForestClientIntegrationService():
         return api_result
 
     def __retry_request_on_connection_or_timeout(self, rte, attempt, max_attempts, url):
-        """Retry once on timeout/connection errors when enabled; otherwise re-raise."""
-        if attempt < max_attempts:
+        """
+        Retry once on timeout/connection errors when enabled, the request deadline
+        leaves time for it and the circuit is not open (the retry would be rejected);
+        otherwise re-raise.
+        """
+        if (
+            attempt < max_attempts
+            and not self.circuit_breaker.is_open()
+            and request_deadline.has_time_left(
+                self.RETRY_DELAY_SECONDS + request_deadline.MIN_OUTBOUND_CALL_SECONDS
+            )
+        ):
             LOGGER.warning(
                 "Forest Client API request failed (%s). Retrying in %s seconds "
                 "(attempt %s/%s). url=%s",
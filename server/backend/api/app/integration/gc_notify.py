@@ -1,6 +1,7 @@
 import logging
+from typing import Optional
 
-import requests
+from api.app.integration.http_transport import HttpTransport, get_http_transport
 from api.app.schemas import GCNotifyGrantAccessEmailParamSchema
 from api.app.utils.utils import is_success_response
 from api.config import config
@@ -18,7 +19,7 @@ class GCNotifyEmailService:
 
     TIMEOUT = (5, 10)  # Timeout (connect, read) in seconds.
 
-    def __init__(self):
+    def __init__(self, transport: Optional[HttpTransport] = None):
         # For lower environment to send email, FAM uses GC Notify 'team and safelist' API_KEY type.
         # For production it uses 'live' key.
         # ref: https://documentation.notification.canada.ca/en/keys.html
@@ -30,8 +31,8 @@ class GCNotifyEmailService:
             "Authorization": "ApiKey-v1 " + self.API_KEY,
         }
 
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.transport = transport or get_http_transport(self.email_base_url, self.TIMEOUT)
+        self.session = self.transport.create_session(self.headers)
 
     def send_user_access_granted_email(
         self, params: GCNotifyGrantAccessEmailParamSchema
@@ -39,6 +40,15 @@ class GCNotifyEmailService:
         """
         Send grant access email
         """
+        return self.send_email(self.build_user_access_granted_email(params))
+
+    def build_user_access_granted_email(
+        self, params: GCNotifyGrantAccessEmailParamSchema
+    ) -> dict:
+        """
+        Build grant access email (GC Notify email_address, template_id and personalisation),
+        to send with "send_email" now or later (email outbox).
+        """
         # GC Notify does not have sufficient conditional rendering, cannot send None to variable, and does not support
         # 'variable' within coditional text. Easier to do this in code.
         application_role_granted_text = self.__to_application_role_granted_text(params)
@@ -59,11 +69,17 @@ class GCNotifyEmailService:
             "template_id": self.grant_access_email_template_id,
             "personalisation": personalisation_params,
         }
-        LOGGER.debug(f"Sending user access granted email with param {email_params}")
+        return email_params
+
+    def send_email(self, email_params: dict):
+        """
+        Send email, "email_params" are the GC Notify email_address, template_id and personalisation.
+        """
+        LOGGER.debug(f"Sending email with param {email_params}")
         gc_notify_email_send_url = f"{self.email_base_url}/v2/notifications/email"
 
         r = self.session.post(
-            gc_notify_email_send_url, timeout=self.TIMEOUT, json=email_params
+            gc_notify_email_send_url, timeout=self.transport.timeout, json=email_params
         )
 
         if not is_success_response(r):
@@ -1,10 +1,11 @@
 import logging
 import time
 from http import HTTPStatus
+from typing import List, Optional
 
-import requests
 from api.app.constants import (IDIM_PROXY_ACCOUNT_TYPE_MAP, ApiInstanceEnv,
-                               UserType)
+                               IdimSearchUserParamType, UserType)
+from api.app.integration.http_transport import HttpTransport, get_http_transport
 from api.app.jwt_validation import ERROR_PERMISSION_REQUIRED
 from api.app.schemas import (
     IdimProxyBceidSearchParamSchema,
@@ -15,11 +16,60 @@ from api.app.schemas.idim_proxy_idir_users_search import (
     IdimProxyIdirUsersSearchParamReqSchema,
     IdimProxyIdirUsersSearchResSchema,
 )
+from api.app.utils.ttl_cache import TtlLruCache, register_cache
 from api.config import config
 from fastapi import HTTPException
 
 LOGGER = logging.getLogger(__name__)
 
+# IDIR/BCeID lookups are cached for a short time, so the user looked up on the
+# identity-lookup endpoints is not looked up again when the grant is submitted
+# (guards and validators). Not found users are kept for a shorter time.
+IDIM_CACHE_TTL_SECONDS = 120
+IDIM_CACHE_NEGATIVE_TTL_SECONDS = 30
+IDIM_CACHE_MAX_SIZE = 2000
+
+IDIM_LOOKUP_IDIR = "idir"
+IDIM_LOOKUP_BUSINESS_BCEID = "businessBceid"
+
+
+class IdimLookupCache(TtlLruCache):
+    """
+    Bounded (LRU) cache of IDIM Proxy lookup results, keyed by
+    (api_instance_env, lookup type, lookup key, requester scope).
+
+    The requester scope is the requester's user type, and for BCeID requesters
+    also their business guid: a lookup made for a BCeID requester is only reused
+    for requesters of the same organization. Checks on the result (the BCeID
+    same organization check) still run on every lookup.
+    """
+
+    def __init__(
+        self,
+        ttl: float = IDIM_CACHE_TTL_SECONDS,
+        negative_ttl: float = IDIM_CACHE_NEGATIVE_TTL_SECONDS,
+        max_size: int = IDIM_CACHE_MAX_SIZE,
+    ):
+        super().__init__(
+            ttl=ttl,
+            max_size=max_size,
+            negative_ttl=negative_ttl,
+            is_negative=lambda api_result: not api_result.get("found"),
+        )
+
+    def get(self, key: tuple, default=None) -> Optional[dict]:
+        """:return: a copy of the cached lookup result, or "default" when not cached (or expired)."""
+        api_result = super().get(key)
+        return default if api_result is None else dict(api_result)
+
+    def put(self, keys: List[tuple], api_result: dict):
+        """Stores the lookup result under each of "keys" (a found user can be looked up by id or guid)."""
+        for key in keys:
+            self.set(key, dict(api_result))
+
+
+idim_lookup_cache = register_cache(IdimLookupCache())
+
 
 class IdimProxyService:
     """
@@ -44,8 +94,12 @@ class IdimProxyService:
         self,
         requester: RequesterSchema,
         api_instance_env: ApiInstanceEnv = ApiInstanceEnv.TEST,
+        transport: Optional[HttpTransport] = None,
+        cache: Optional[IdimLookupCache] = None,
+        use_cache: bool = True,
     ):
         self.requester = requester
+        self.api_instance_env = api_instance_env
         # by default use test idim proxy url if not specify the api instance enviornment
         self.api_idim_proxy_url = (
             f"{config.get_idim_proxy_api_baseurl(api_instance_env)}/api/idim-webservice"
@@ -53,14 +107,23 @@ class IdimProxyService:
         self.API_KEY = config.get_idim_proxy_api_key()
         self.headers = {"Accept": "application/json", "X-API-KEY": self.API_KEY}
 
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.transport = transport or get_http_transport(self.api_idim_proxy_url, self.TIMEOUT)
+        self.session = self.transport.create_session(self.headers)
+        # without "use_cache" every lookup is requested from IDIM Proxy, and not stored.
+        self.cache = (cache or idim_lookup_cache) if use_cache else None
 
     def lookup_idir(self, search_params: IdimProxySearchParamSchema):
         """
         Lookup single IDIR user.
         Note, current idim-proxy only does exact match.
+        Results are cached for a short time, see "idim_lookup_cache".
         """
+        cache_key = self.__cache_key(IDIM_LOOKUP_IDIR, search_params.userId)
+        api_result = self.cache.get(cache_key) if self.cache else None
+        if api_result is not None:
+            LOGGER.debug(f"IDIM lookup cache hit: {cache_key}. Stats: {self.cache.get_stats()}")
+            return api_result
+
         query_params = vars(search_params)
         query_params.update({"requesterUserGuid": self.requester.user_guid})
         url = f"{self.api_idim_proxy_url}/idir-account-detail"
@@ -68,10 +131,12 @@ class IdimProxyService:
             f"IdimProxyService lookup_idir() - url: {url} and param: {query_params}"
         )
 
-        r = self.session.get(url, timeout=self.TIMEOUT, params=query_params)
+        r = self.session.get(url, timeout=self.transport.timeout, params=query_params)
         r.raise_for_status()  # There is a general error handler, see: requests_http_error_handler
         api_result = r.json()
         LOGGER.debug(f"API result: {api_result}")
+        if self.cache:
+            self.cache.put([cache_key], api_result)
         return api_result
 
     def lookup_business_bceid(self, search_params: IdimProxyBceidSearchParamSchema):
@@ -82,7 +147,47 @@ class IdimProxyService:
         search_param: is of type "IdimProxyBceidSearchParamSchema" and can be 'searchUserBy'
             - "userId" or
             - "userGuid" (preferred)
+        Results are cached for a short time, see "idim_lookup_cache".
         """
+        cache_key = self.__bceid_cache_key(search_params.searchUserBy, search_params.searchValue)
+        api_result = self.cache.get(cache_key) if self.cache else None
+        if api_result is not None:
+            LOGGER.debug(f"IDIM lookup cache hit: {cache_key}. Stats: {self.cache.get_stats()}")
+        else:
+            api_result = self.__request_business_bceid(search_params)
+            if self.cache:
+                # found users are also cached under their other key: looked up by user id on the
+                # identity-lookup endpoint, verified by user guid when the grant is submitted.
+                cache_keys = [cache_key]
+                if api_result.get("found"):
+                    cache_keys += [
+                        self.__bceid_cache_key(search_user_by, search_value)
+                        for search_user_by, search_value in [
+                            (IdimSearchUserParamType.USER_ID, api_result.get("userId")),
+                            (IdimSearchUserParamType.USER_GUID, api_result.get("guid")),
+                        ]
+                        if search_value
+                    ]
+                self.cache.put(cache_keys, api_result)
+
+        if (
+            api_result.get("found") == True
+            and self.requester.user_type_code == UserType.BCEID
+            and self.requester.business_guid != api_result.get("businessGuid")
+        ):
+            raise HTTPException(
+                status_code=HTTPStatus.FORBIDDEN,
+                detail={
+                    "code": ERROR_PERMISSION_REQUIRED,
+                    "description": "Operation requires business bceid users to be within the same organization",
+                },
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        LOGGER.debug(f"API result: {api_result}")
+        return api_result
+
+    def __request_business_bceid(self, search_params: IdimProxyBceidSearchParamSchema) -> dict:
         # query_params to request to idim-proxy, vars(search_params) returns a dict of the search_params
         query_params = vars(search_params)
         query_params.update({"requesterUserGuid": self.requester.user_guid})
@@ -99,26 +204,22 @@ class IdimProxyService:
             f"IdimProxyService lookup_business_bceid() - url: {url} and param: {query_params}"
         )
 
-        r = self.session.get(url, timeout=self.TIMEOUT, params=query_params)
+        r = self.session.get(url, timeout=self.transport.timeout, params=query_params)
         r.raise_for_status()  # There is a general error handler, see: requests_http_error_handler
-        api_result = r.json()
+        return r.json()
 
-        if (
-            api_result.get("found") == True
-            and self.requester.user_type_code == UserType.BCEID
-            and self.requester.business_guid != api_result.get("businessGuid")
-        ):
-            raise HTTPException(
-                status_code=HTTPStatus.FORBIDDEN,
-                detail={
-                    "code": ERROR_PERMISSION_REQUIRED,
-                    "description": "Operation requires business bceid users to be within the same organization",
-                },
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    def __bceid_cache_key(self, search_user_by: IdimSearchUserParamType, search_value: str) -> tuple:
+        return self.__cache_key(
+            IDIM_LOOKUP_BUSINESS_BCEID,
+            f"{IdimSearchUserParamType(search_user_by).value}:{search_value}",
+        )
 
-        LOGGER.debug(f"API result: {api_result}")
-        return api_result
+    def __cache_key(self, lookup_type: str, lookup_key: str) -> tuple:
+        requester_scope = (self.requester.user_type_code,)
+        if self.requester.user_type_code == UserType.BCEID:
+            # lookups for a BCeID requester are not shared outside of their organization
+            requester_scope += (self.requester.business_guid or f"user:{self.requester.user_guid}",)
+        return (self.api_instance_env, lookup_type, lookup_key.lower(), requester_scope)
 
     def search_idir_users(
         self, search_params: IdimProxyIdirUsersSearchParamReqSchema
@@ -140,7 +241,7 @@ class IdimProxyService:
         try:
             r = self.session.post(
                 url,
-                timeout=self.TIMEOUT,
+                timeout=self.transport.timeout,
                 params=query_params,
                 json=body,
             )
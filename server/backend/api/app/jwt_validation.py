@@ -1,14 +1,18 @@
+import hashlib
 import json
 import logging
+import threading
+import time
 from urllib.request import urlopen
 
 import jwt
 from api.app.constants import COGNITO_USERNAME_KEY
+from api.app.utils.ttl_cache import TtlLruCache, register_cache
 from api.config.config import (get_aws_region, get_fam_oidc_client_id,
                                get_user_pool_domain_name, get_user_pool_id)
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2AuthorizationCodeBearer
-from jwt import PyJWKClient
+from jwt import PyJWK, PyJWKSet
 
 JWT_GROUPS_KEY = "cognito:groups"
 JWT_CLIENT_ID_KEY = "client_id"
@@ -43,18 +47,185 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
 
 jwks_url = f"https://cognito-idp.{aws_region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
 
-_jwks = None
+# Cognito signing keys rotate rarely; the key set is re-read in the background
+# once it is older than the refresh interval. An unknown "kid" triggers an
+# on-demand fetch, but no more often than the minimum fetch interval so a flood
+# of forged tokens cannot turn into a flood of JWKS requests.
+JWKS_REFRESH_INTERVAL_SECONDS = 3600
+JWKS_MIN_FETCH_INTERVAL_SECONDS = 30
+JWKS_FETCH_TIMEOUT_SECONDS = 5
 
 
-def init_jwks():
-    global _jwks
+class JwksKeyStore:
+    """
+    Process-wide store of JWKS signing keys keyed by "kid".
+    A (re)load that changes the set of kids bumps "version" so dependent caches
+    can tell the key set has rotated.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = JWKS_REFRESH_INTERVAL_SECONDS,
+        min_fetch_interval: float = JWKS_MIN_FETCH_INTERVAL_SECONDS,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_fetch_interval = min_fetch_interval
+        self.version = 0
+        self._keys: dict[str, PyJWK] = {}
+        self._loaded_at = None
+        self._refresh_due_at = None
+        self._last_fetch_at = None
+        self._fetch_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._stats = {"hits": 0, "misses": 0, "fetches": 0, "fetch_errors": 0}
+
+    def load(self, jwks: dict):
+        keys = {}
+        for jwk in PyJWKSet.from_dict(jwks).keys:
+            if jwk.key_id:
+                keys[jwk.key_id] = jwk
+        if keys.keys() != self._keys.keys():
+            self.version += 1
+        self._keys = keys
+        self._loaded_at = time.monotonic()
+        self._refresh_due_at = self._loaded_at + self.refresh_interval
+        LOGGER.debug(f"Loaded {len(keys)} jwks signing keys (version {self.version}).")
+
+    def fetch(self) -> dict:
+        """
+        Fetch the key set from the JWKS url and load it. Callers are expected to
+        hold "_fetch_lock" so only one fetch is in flight at a time.
+        """
+        self._last_fetch_at = time.monotonic()
+        self._stats["fetches"] += 1
+        try:
+            with urlopen(self.url, timeout=JWKS_FETCH_TIMEOUT_SECONDS) as response:
+                jwks = json.loads(response.read().decode("utf-8"))
+        except Exception:
+            self._stats["fetch_errors"] += 1
+            raise
+        self.load(jwks)
+        return jwks
+
+    def get_signing_key(self, kid: str):
+        self._refresh_in_background_if_stale()
+
+        jwk = self._keys.get(kid)
+        if jwk:
+            self._stats["hits"] += 1
+            return jwk.key
+
+        self._stats["misses"] += 1
+        return self._fetch_for_unknown_kid(kid)
+
+    def get_stats(self) -> dict:
+        return {**self._stats, "keys": len(self._keys), "version": self.version}
+
+    def _fetch_for_unknown_kid(self, kid: str):
+        with self._fetch_lock:
+            # another request may have loaded the key while we were waiting.
+            jwk = self._keys.get(kid)
+            if jwk:
+                return jwk.key
+
+            if (
+                self._last_fetch_at is not None
+                and time.monotonic() - self._last_fetch_at < self.min_fetch_interval
+            ):
+                LOGGER.debug(f"Unknown jwks kid {kid}, fetch skipped (rate limited).")
+                return None
+
+            LOGGER.debug(f"Unknown jwks kid {kid}, fetching jwks...")
+            try:
+                self.fetch()
+            except Exception as e:
+                LOGGER.warning(f"Failed to fetch jwks for unknown kid {kid}: {e}")
+                return None
+
+        jwk = self._keys.get(kid)
+        return jwk.key if jwk else None
+
+    def _refresh_in_background_if_stale(self):
+        if self._refresh_due_at is None or time.monotonic() < self._refresh_due_at:
+            return
+
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            with self._fetch_lock:
+                self.fetch()
+        except Exception as e:
+            # keep serving the current keys; the first stale read after the
+            # minimum fetch interval retries.
+            LOGGER.warning(f"Background jwks refresh failed: {e}")
+            self._refresh_due_at = time.monotonic() + self.min_fetch_interval
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+
+
+jwks_key_store = JwksKeyStore(jwks_url)
+
+
+# Frontend reuses the same access token until it expires, so verified claims
+# are kept (keyed by token digest, never the token itself) until token "exp".
+VERIFIED_CLAIMS_CACHE_MAX_SIZE = 2048
+
+
+class VerifiedClaimsCache(TtlLruCache):
+    """
+    Bounded LRU of claims that already passed "validate_token", keyed by the
+    SHA-256 digest of the raw token. Entries expire at the token's "exp" and
+    the whole cache is dropped when the JWKS key set version changes.
+    """
+
+    def __init__(self, key_store: JwksKeyStore, max_size: int = VERIFIED_CLAIMS_CACHE_MAX_SIZE):
+        super().__init__(max_size=max_size)
+        self.key_store = key_store
+        self._jwks_version = key_store.version
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str, default=None):
+        with self._lock:
+            self._evict_all_if_key_set_rotated()
+            return super().get(self.digest(token), default)
 
+    def put(self, token: str, claims: dict):
+        expires_at = claims.get("exp")
+        if not expires_at:
+            return
+
+        with self._lock:
+            self._evict_all_if_key_set_rotated()
+            self.set(self.digest(token), claims, ttl=float(expires_at) - time.time())
+
+    def _evict_all_if_key_set_rotated(self):
+        if self._jwks_version != self.key_store.version:
+            self.count("evictions", self.discard_if(lambda digest, claims: True))
+            self._jwks_version = self.key_store.version
+
+
+verified_claims_cache = register_cache(VerifiedClaimsCache(jwks_key_store))
+
+
+def init_jwks():
     LOGGER.debug(
         f"Requesting aws jwks with region {aws_region} and user pood id {user_pool_id}..."
     )
     try:
-        with urlopen(jwks_url) as response:
-            _jwks = json.loads(response.read().decode("utf-8"))
+        with jwks_key_store._fetch_lock:
+            jwks_key_store.fetch()
 
     except Exception as e:
         LOGGER.error(f"init_jwks function failed to reach AWS: {e}.")
@@ -67,13 +238,11 @@ def get_rsa_key_method():
 
 
 def get_rsa_key(token):
-    global _jwks
-    if not _jwks:
+    if jwks_key_store.version == 0:
         init_jwks()
 
-    pyjwks_client = PyJWKClient(jwks_url)
-    signing_key = pyjwks_client.get_signing_key_from_jwt(token)
-    return signing_key.key
+    kid = jwt.get_unverified_header(token).get("kid")
+    return jwks_key_store.get_signing_key(kid)
 
 
 def validate_token(
@@ -81,6 +250,10 @@ def validate_token(
     get_rsa_key_method: callable = Depends(get_rsa_key_method),
 ) -> dict:
 
+    cached_claims = verified_claims_cache.get(token)
+    if cached_claims is not None:
+        return cached_claims
+
     try:
         unverified_header = jwt.get_unverified_header(token)
     except jwt.InvalidTokenError:
@@ -166,6 +339,7 @@ def validate_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    verified_claims_cache.put(token, claims)
     return claims
 
 def enforce_fam_client_token(
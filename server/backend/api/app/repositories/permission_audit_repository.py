@@ -15,8 +15,13 @@ class PermissionAuditRepository:
 
     # --- Create ---
 
-    def save(self, item: PermissionAuditHistoryCreateSchema) -> FamPrivilegeChangeAudit:
+    def save(self, item: PermissionAuditHistoryCreateSchema, flush: bool = True) -> FamPrivilegeChangeAudit:
+        """
+        :param flush: False to leave the insert to the caller's next flush, so records
+            saved together are inserted with one statement.
+        """
         db_item = FamPrivilegeChangeAudit(**item.model_dump())
         self.db.add(db_item)
-        self.db.flush()
+        if flush:
+            self.db.flush()
         return db_item
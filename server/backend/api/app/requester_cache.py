@@ -0,0 +1,139 @@
+"""
+Short-lived cache of the requesters, keyed by cognito user id.
+
+"get_current_requester" runs for nearly every request: it loads the requester
+user with its access control privileges and terms and conditions acceptance
+(to derive "is_delegated_admin" and "requires_accept_tc"). An admin clicking
+through the UI sends dozens of requests a minute, each loading the same
+requester. The cache keeps the requester built from the database (without the
+access roles of the token, set per request) for REQUESTER_CACHE_TTL_SECONDS.
+
+Invalidation:
+- every REQUESTER_VERSION_CHECK_SECONDS, the next lookup compares the cache
+  version with "fam_requester_version" (a single row incremented by triggers
+  on every change of the users, privileges and terms acceptances, see the
+  V101 migration) and clears the cache when it differs: changes made by the
+  admin management API, the pre-token Lambda or by hand are seen within that
+  interval;
+- the write paths of this API invalidate the users they change at once (see
+  "invalidate_users").
+"""
+import logging
+import time
+from typing import Iterable, Optional
+
+from api.app import database
+from api.app.models import model as models
+from api.app.schemas import RequesterSchema
+from api.app.utils.ttl_cache import TtlLruCache, register_cache
+from api.config import config
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+LOGGER = logging.getLogger(__name__)
+
+REQUESTER_CACHE_MAX_SIZE = 5000
+
+# Session "info" key of the user ids to invalidate again when the session commits.
+SESSION_INFO_INVALIDATED_USER_IDS = "requester_cache_invalidated_user_ids"
+
+
+class RequesterCache(TtlLruCache):
+    """
+    Bounded (LRU) cache of the requesters, keyed by cognito user id. Not found
+    requesters are not cached.
+    """
+
+    def __init__(self, max_size: int = REQUESTER_CACHE_MAX_SIZE):
+        super().__init__(max_size=max_size, stats=("invalidations", "version_checks", "version_changes"))
+        # incremented by every invalidation, see "store"
+        self._generation = 0
+        # database requester version of the cached requesters, see "check_version"
+        self._version: Optional[int] = None
+        self._next_check_at = 0.0
+
+    @property
+    def generation(self) -> int:
+        """The generation to store a requester loaded after a "get" miss with (read before "get")."""
+        return self._generation
+
+    def store(self, requester: RequesterSchema, generation: int):
+        """
+        Stores the requester loaded after "get" missed at "generation"; skipped
+        when a user was invalidated meanwhile, as it may have been loaded
+        before the change.
+        """
+        ttl = config.get_requester_cache_ttl_seconds()
+        with self._lock:
+            if ttl <= 0 or generation != self._generation:
+                return
+            self.set(requester.cognito_user_id, requester, ttl)
+
+    def check_version(self, db: Session):
+        """
+        Clears the cache when the database requester version changed; checked
+        when due only, by one thread (the others use the cache meanwhile). The
+        version is read on a short-lived connection of its own
+        (connect_outside_session): an uncommitted (and maybe rolled back)
+        change of the caller's transaction is not taken for the current version.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_check_at:
+                return
+            self._next_check_at = now + config.get_requester_version_check_seconds()
+
+        try:
+            with database.connect_outside_session(db) as connection:
+                version = connection.scalar(select(models.FamRequesterVersion.version)) or 0
+        except Exception:
+            with self._lock:
+                self._next_check_at = 0.0  # checked again by the next lookup
+            raise
+
+        with self._lock:
+            self.count("version_checks")
+            if version != self._version:
+                if self._version is not None:
+                    LOGGER.debug(f"Requester version {version} (was {self._version}), cache cleared.")
+                    self.count("version_changes")
+                self._version = version
+                self._generation += 1
+                self.discard_if(lambda cognito_user_id, requester: True)
+
+    def invalidate(self, user_ids: Iterable[int]):
+        user_ids = set(user_ids)
+        with self._lock:
+            self._generation += 1
+            self.count(
+                "invalidations",
+                self.discard_if(lambda cognito_user_id, requester: requester.user_id in user_ids),
+            )
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._generation += 1
+            self._version = None
+            self._next_check_at = 0.0
+
+
+requester_cache = register_cache(RequesterCache())
+
+
+def invalidate_users(db: Session, user_ids: Iterable[int]):
+    """
+    Invalidates the cached requesters of users changed in "db": now, and again
+    when "db" commits, as a concurrent request may load (and cache) a user
+    before the change is committed.
+    """
+    user_ids = set(user_ids)
+    requester_cache.invalidate(user_ids)
+    db.info.setdefault(SESSION_INFO_INVALIDATED_USER_IDS, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    user_ids = session.info.pop(SESSION_INFO_INVALIDATED_USER_IDS, None)
+    if user_ids:
+        requester_cache.invalidate(user_ids)
@@ -0,0 +1,275 @@
+"""
+Runs the user role assignment jobs (fam_user_role_assignment_job).
+
+"POST /user-role-assignment/jobs" stores the grant request as a job; this
+worker runs it the same way as "POST /user-role-assignment" does (IDIM
+verification, grants, notification emails), a batch of users (and
+transaction) at a time. The results of each batch are saved with the job, so
+they can be read while the job runs, and a job interrupted midway resumes after
+its last saved batch.
+
+Started once the job is committed: on AWS by invoking the worker Lambda
+("handler") asynchronously, which is also run on a schedule to resume jobs left
+unfinished; locally in a thread of the API process. Also runs locally as a
+worker loop:
+    python -m api.app.role_assignment_job_worker
+"""
+import logging.config
+import os.path
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from http import HTTPStatus
+from typing import List
+
+import requests
+from api.app import database
+from api.app.constants import (ROLE_ASSIGNMENT_JOB_BATCH_SIZE,
+                               ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS,
+                               ROLE_ASSIGNMENT_JOB_RETRY_BASE_SECONDS,
+                               ROLE_ASSIGNMENT_JOB_TIME_BUDGET_SECONDS,
+                               RoleAssignmentJobStatus)
+from api.app.crud import (crud_role, crud_user_role,
+                          crud_user_role_assignment_job)
+from api.app.crud.validator.target_user_validator import validate_target_users
+from api.app.models.model import FamUserRoleAssignmentJob
+from api.app.schemas import (FamUserRoleAssignmentCreateRes,
+                             FamUserRoleAssignmentJobCreateSchema,
+                             RequesterSchema, TargetUserSchema)
+from api.app.utils.audit_util import (AuditEventLog, AuditEventOutcome,
+                                      AuditEventType)
+from api.config import config
+from fastapi import HTTPException
+from sqlalchemy import event, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+logConfigFile = os.path.join(
+    os.path.dirname(__file__), "..", "config", "logging.config"
+)
+
+logging.config.fileConfig(logConfigFile, disable_existing_loggers=False)
+
+LOGGER = logging.getLogger(__name__)
+
+ROLE_ASSIGNMENT_JOB_WORKER_USER = "fam_role_assignment_job_worker"
+WORKER_POLL_INTERVAL_SECONDS = 5
+START_AFTER_COMMIT_KEY = "start_role_assignment_jobs_after_commit"
+
+# Runs the jobs locally (no worker Lambda), one at a time.
+_local_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="role-assignment-job")
+
+
+def process_job_batch(
+    db: Session,
+    job: FamUserRoleAssignmentJob,
+    batch_size: int = ROLE_ASSIGNMENT_JOB_BATCH_SIZE,
+) -> int:
+    """
+    Grants the next batch of users of the job and saves their results with the
+    job progress. When the batch fails (savepoint: nothing of the batch is
+    granted) on an error that may not happen again (IDIM or database not
+    available), the job is retried later, and fails after
+    ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS attempts; on other errors it fails right
+    away. A failed job keeps the results saved so far.
+
+    :return: number of users processed.
+    """
+    job.update_user = ROLE_ASSIGNMENT_JOB_WORKER_USER
+    try:
+        with db.begin_nested():
+            batch_results = __grant_next_batch(db, job, batch_size)
+
+    except Exception as e:
+        job.attempt_count += 1
+        job.last_error = str(e.detail if isinstance(e, HTTPException) else e)[:1000]
+        if job.attempt_count >= ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS or not __is_retryable(e):
+            LOGGER.error(
+                f"User role assignment job {job.user_role_assignment_job_id} failed "
+                f"after {job.processed_count} of {job.total_count} users "
+                f"({job.attempt_count} attempt(s)): {e}",
+                exc_info=True,
+            )
+            job.job_status = RoleAssignmentJobStatus.FAILED
+        else:
+            retry_seconds = ROLE_ASSIGNMENT_JOB_RETRY_BASE_SECONDS * 2 ** (job.attempt_count - 1)
+            LOGGER.warning(
+                f"User role assignment job {job.user_role_assignment_job_id} batch failed "
+                f"after {job.processed_count} of {job.total_count} users, retrying in {retry_seconds}s: {e}"
+            )
+            job.job_status = RoleAssignmentJobStatus.IN_PROGRESS
+            job.next_attempt_date = func.now() + timedelta(seconds=retry_seconds)
+        db.flush()
+        return 0
+
+    batch_user_count = min(batch_size, job.total_count - job.processed_count)
+    # new list: the jsonb column is only saved when assigned
+    job.results = job.results + [result.model_dump(mode="json") for result in batch_results]
+    job.processed_count += batch_user_count
+    job.attempt_count = 0
+    job.last_error = None
+    job.job_status = (
+        RoleAssignmentJobStatus.COMPLETED
+        if job.processed_count >= job.total_count
+        else RoleAssignmentJobStatus.IN_PROGRESS
+    )
+    db.flush()
+    LOGGER.debug(f"User role assignment job {job.user_role_assignment_job_id}: {job.processed_count}/{job.total_count} users processed")
+    return batch_user_count
+
+
+def run_role_assignment_jobs(
+    time_budget_seconds: float = ROLE_ASSIGNMENT_JOB_TIME_BUDGET_SECONDS,
+) -> int:
+    """
+    Processes the unfinished jobs a batch (and transaction) at a time, until
+    none is left or "time_budget_seconds" is used up, in which case the worker
+    is started again to carry on.
+
+    :return: number of users processed.
+    """
+    start = time.monotonic()
+    processed_count = 0
+    while time.monotonic() - start < time_budget_seconds:
+        with contextmanager(database.get_job_db)() as db:
+            job = crud_user_role_assignment_job.get_next_job_to_process(db)
+            if job is None:
+                return processed_count
+            processed_count += process_job_batch(db, job)
+
+    start_role_assignment_jobs()
+    return processed_count
+
+
+def start_role_assignment_jobs():
+    """
+    Starts the worker without waiting for it: invokes the worker Lambda when
+    configured, runs it in a local thread otherwise.
+    """
+    worker_function = config.get_role_assignment_job_worker_function()
+    try:
+        if worker_function:
+            config.get_lambda_client().invoke(
+                FunctionName=worker_function, InvocationType="Event", Payload=b"{}"
+            )
+        else:
+            _local_worker.submit(__run_role_assignment_jobs_locally)
+
+    except Exception as e:
+        # the scheduled worker runs the queued jobs anyway
+        LOGGER.error(f"Failed to start the role assignment job worker: {e}", exc_info=True)
+
+
+def start_role_assignment_jobs_after_commit(db: Session):
+    """Starts the worker once the current transaction of "db" (storing a job) is committed."""
+    db.info[START_AFTER_COMMIT_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _start_role_assignment_jobs_on_commit(session: Session):
+    # also called when a savepoint is released, the job is only stored for good by the transaction commit
+    if not session.in_nested_transaction() and session.info.pop(START_AFTER_COMMIT_KEY, False):
+        start_role_assignment_jobs()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_start_role_assignment_jobs(session: Session, transaction):
+    # transaction rolled back (committed: already cleared)
+    if transaction.parent is None:
+        session.info.pop(START_AFTER_COMMIT_KEY, None)
+
+
+def handler(event, context):
+    """Lambda entry point, invoked when jobs are created and on a schedule."""
+    processed_count = run_role_assignment_jobs()
+    LOGGER.info(f"Role assignment jobs run: {processed_count} user(s) processed")
+    return {"processed_count": processed_count}
+
+
+def __grant_next_batch(
+    db: Session, job: FamUserRoleAssignmentJob, batch_size: int
+) -> List[FamUserRoleAssignmentCreateRes]:
+    role_assignment_request = FamUserRoleAssignmentJobCreateSchema.from_stored_request(
+        job.role_assignment_request
+    )
+    requester = RequesterSchema.model_validate(job.requester)
+    batch_users = role_assignment_request.users[
+        job.processed_count:job.processed_count + batch_size
+    ]
+    target_users = [
+        TargetUserSchema(
+            user_name=user.user_name,
+            user_guid=user.user_guid,
+            user_type_code=role_assignment_request.user_type_code,
+        )
+        for user in batch_users
+    ]
+
+    role = crud_role.get_role(db, role_assignment_request.role_id)
+    if not role:
+        raise ValueError(f"Role id {role_assignment_request.role_id} does not exist.")
+
+    audit_event_log = AuditEventLog(
+        event_type=AuditEventType.CREATE_USER_ROLE_ACCESS,
+        forest_client_numbers=role_assignment_request.forest_client_numbers,
+        role_assignment_expiry_date=role_assignment_request.expiry_date_date,
+        event_outcome=AuditEventOutcome.SUCCESS,
+        role=role,
+        application=role.application,
+        requesting_user=requester,
+    )
+    try:
+        target_users_validation = validate_target_users(requester, target_users, role)
+        assignments_results = crud_user_role.create_user_role_assignment_many(
+            db, role_assignment_request, target_users_validation.verified_users, requester
+        )
+        if role_assignment_request.requires_send_user_email:
+            crud_user_role.send_users_access_granted_emails(
+                db, target_users_validation.verified_users, assignments_results, requester
+            )
+
+        batch_results = assignments_results + [
+            # users that did not pass IDIM validation
+            FamUserRoleAssignmentCreateRes(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail=None,
+                error_message=failed_user.error_reason,
+            )
+            for failed_user in target_users_validation.failed_users
+        ]
+        audit_event_log.user_assignment_results = batch_results
+        return batch_results
+
+    except Exception as e:
+        audit_event_log.event_outcome = AuditEventOutcome.FAIL
+        audit_event_log.exception = e
+        raise e
+
+    finally:
+        audit_event_log.log_event()
+
+
+def __is_retryable(e: Exception) -> bool:
+    # upstream (IDIM, GC Notify) or database not available: may succeed later; a request the
+    # upstream rejects, or an invalid job (e.g. its role deleted), fails again on retry.
+    if isinstance(e, (requests.ConnectionError, requests.Timeout, OperationalError)):
+        return True
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code >= 500 or e.response.status_code == 429
+    if isinstance(e, HTTPException):
+        return e.status_code >= 500
+    return False
+
+
+def __run_role_assignment_jobs_locally():
+    try:
+        run_role_assignment_jobs()
+    except Exception as e:
+        LOGGER.error(f"Role assignment job worker failed: {e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    while True:
+        if run_role_assignment_jobs() == 0:
+            time.sleep(WORKER_POLL_INTERVAL_SECONDS)
@@ -4,7 +4,7 @@ import logging
 from http import HTTPStatus
 from typing import List
 
-from api.app import database
+from api.app import database, requester_cache
 from api.app.constants import (APPLICATION_FAM,
                                CURRENT_TERMS_AND_CONDITIONS_VERSION,
                                ERROR_CODE_DIFFERENT_ORG_GRANT_PROHIBITED,
@@ -54,29 +54,35 @@ def get_current_requester(
     LOGGER.debug(
         f"Retrieving current Requester from: request_cognito_user_id: {request_cognito_user_id}"
     )
-    fam_user: FamUser = crud_user.fetch_initial_requester_info(
-        db, request_cognito_user_id
-    )
-    LOGGER.debug(f"Current retrieved fam_user: {fam_user}")
-
-    if fam_user is None:
-        utils.raise_http_exception(
-            error_msg="Requester does not exist, action is not allowed.",
-            error_code=ERROR_CODE_REQUESTER_NOT_EXISTS,
-            status_code=HTTPStatus.FORBIDDEN,
+    requester_cache.requester_cache.check_version(db)
+    generation = requester_cache.requester_cache.generation
+    requester = requester_cache.requester_cache.get(request_cognito_user_id)
+    if requester is None:
+        fam_user: FamUser = crud_user.fetch_initial_requester_info(
+            db, request_cognito_user_id
         )
+        LOGGER.debug(f"Current retrieved fam_user: {fam_user}")
+
+        if fam_user is None:
+            utils.raise_http_exception(
+                error_msg="Requester does not exist, action is not allowed.",
+                error_code=ERROR_CODE_REQUESTER_NOT_EXISTS,
+                status_code=HTTPStatus.FORBIDDEN,
+            )
 
-    else:
         custom_fields = _parse_custom_requester_fields(fam_user)
         requester = RequesterSchema.model_validate(
             {
                 **fam_user.__dict__,  # base db 'user' info
-                "access_roles": access_roles,  # role from JWT
                 **custom_fields,  # build/convert to custom attributes
             }
         )
-        LOGGER.debug(f"Current request user (Requester): {requester}")
-        return requester
+        requester_cache.requester_cache.store(requester, generation)
+
+    # roles from JWT, per request: the cached requester is never modified
+    requester = requester.model_copy(update={"access_roles": access_roles})
+    LOGGER.debug(f"Current request user (Requester): {requester}")
+    return requester
 
 
 def _parse_custom_requester_fields(fam_user: FamUser):
@@ -170,7 +176,8 @@ async def get_request_role_from_id(
     role = None
 
     if "user_role_xref_id" in request.path_params:
-        user_role_xref_id = request.path_params["user_role_xref_id"]
+        # int like the handler's parameter: found in the session by the next lookups
+        user_role_xref_id = int(request.path_params["user_role_xref_id"])
         LOGGER.debug(f"Retrieving role by user_role_xref_id: " f"{user_role_xref_id}")
         user_role = crud_user_role.find_by_id(db, user_role_xref_id)
         role = user_role.role
@@ -308,7 +315,7 @@ async def get_target_users_from_ids(
     target_users = []
     # from path_param - "user_role_xref_id"; should exist already in db.
     if "user_role_xref_id" in request.path_params:
-        urxid = request.path_params["user_role_xref_id"]
+        urxid = int(request.path_params["user_role_xref_id"])
         LOGGER.debug(
             "Dependency 'get_target_users_from_ids' called with "
             + f"request containing user_role_xref_id path param {urxid}."
@@ -390,6 +397,19 @@ def internal_only_action(
         )
 
 
+def authorize_fam_admin(
+    _enforce_fam_access_validated = Depends(enforce_fam_client_token),
+    access_roles: List[str] = Depends(get_access_roles),
+):
+    """Only the administrators of FAM itself ("FAM_ADMIN" access group)."""
+    if f"{APPLICATION_FAM}_ADMIN" not in (access_roles or []):
+        utils.raise_http_exception(
+            status_code=HTTPStatus.FORBIDDEN,
+            error_code=ERROR_PERMISSION_REQUIRED,
+            error_msg="Requester has no admin access to FAM.",
+        )
+
+
 def external_delegated_admin_only_action(
     _enforce_fam_access_validated = Depends(enforce_fam_client_token),
     requester: RequesterSchema = Depends(get_current_requester),
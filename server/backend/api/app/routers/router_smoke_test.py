@@ -3,7 +3,9 @@ import logging
 from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 from .. import database
+from api.app.integration.circuit_breaker import get_circuit_breaker_stats
 from api.app.models import model as models
+from api.app.routers import router_guards
 
 
 LOGGER = logging.getLogger(__name__)
@@ -35,4 +37,11 @@ def smoke_test(
         raise e
 
 
-
+@router.get("/stats", dependencies=[Depends(router_guards.authorize_fam_admin)])
+def smoke_test_stats():
+    """
+    FAM administrators only: the circuit breakers of the upstream services
+    called so far by this API instance, and its database connection pool
+    (size, connections in use, time waited for a connection).
+    """
+    return {"circuit_breakers": get_circuit_breaker_stats(), "db_pool": database.get_db_pool_stats()}
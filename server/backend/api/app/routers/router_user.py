@@ -26,6 +26,9 @@ def update_user_information_from_idim_source(
 ):
     """
     Call IDIM web service to grab latest user information and update records in FAM database for IDIR and Business BCeID users
+
+    Without "use_pagination", each call resumes where the previous one stopped and works through
+    the users (in batches of "per_page") for a limited time; call again until "sync_completed".
     """
     LOGGER.debug("Updating database user information")
 
@@ -1,16 +1,23 @@
 import logging
 from http import HTTPStatus
 
-from api.app.crud import crud_role, crud_user_role
+from api.app import request_deadline, role_assignment_job_worker
+from api.app.constants import (ERROR_CODE_INVALID_REQUEST_PARAMETER,
+                               REQUEST_DEADLINE_DB_WORK_SECONDS)
+from api.app.crud import (crud_role, crud_user_role,
+                          crud_user_role_assignment_job)
 from api.app.routers.router_guards import (
     authorize_by_application_role, authorize_by_privilege,
     authorize_by_user_type, enforce_bceid_by_same_org_guard,
     enforce_bceid_terms_conditions_guard, enforce_self_grant_guard,
     get_current_requester, get_verified_target_users)
 from api.app.schemas import (FamUserRoleAssignmentCreateSchema,
+                             FamUserRoleAssignmentJobCreateSchema,
+                             FamUserRoleAssignmentJobRes,
                              FamUserRoleAssignmentRes, RequesterSchema)
 from api.app.schemas.fam_user_role_assignment_create_response import FamUserRoleAssignmentCreateRes
 from api.app.schemas.target_user_validation_result import TargetUserValidationResultSchema
+from api.app.utils import utils
 from api.app.utils.audit_util import (AuditEventLog, AuditEventOutcome,
                                       AuditEventType)
 from fastapi import APIRouter, Depends, Request, Response
@@ -69,6 +76,10 @@ def create_user_role_assignment_many(
     )
 
     try:
+        # IDIM verification may have used most of the request time: do not start granting without enough left.
+        request_deadline.ensure_time_left(
+            REQUEST_DEADLINE_DB_WORK_SECONDS, "granting the role assignments"
+        )
         role = crud_role.get_role(db, role_assignment_request.role_id)
 
         audit_event_log.role = role
@@ -98,9 +109,11 @@ def create_user_role_assignment_many(
 
         audit_event_log.user_assignment_results = response.assignments_detail
 
-        # sending user notification after event is finished (for all verified users)
+        # queue user notification after event is finished (for all verified users), sent after commit
         if role_assignment_request.requires_send_user_email:
-            send_users_access_granted_emails(target_users.verified_users, assignments_results)
+            send_users_access_granted_emails(
+                db, target_users.verified_users, assignments_results, requester
+            )
 
         return response
 
@@ -114,6 +127,66 @@ def create_user_role_assignment_many(
         audit_event_log.log_event()
 
 
+@router.post(
+    "/jobs",
+    response_model=FamUserRoleAssignmentJobRes,
+    status_code=HTTPStatus.ACCEPTED,
+    # Same guards as granting in the request; the users are verified with IDIM by the job.
+    dependencies=[
+        Depends(enforce_self_grant_guard),
+        Depends(enforce_bceid_terms_conditions_guard),
+        Depends(authorize_by_application_role),
+        Depends(authorize_by_privilege),
+        Depends(authorize_by_user_type),
+    ],
+    summary="Grant many users access to an application's role, as a job.",
+)
+def create_user_role_assignment_job(
+    role_assignment_request: FamUserRoleAssignmentJobCreateSchema,
+    db: Session = Depends(database.get_db),
+    token_claims: dict = Depends(jwt_validation.enforce_fam_client_token),
+    requester: RequesterSchema = Depends(get_current_requester),
+):
+    """
+    Create FAM user_role_xref associations for multiple users in the background,
+    the same way as "POST /user-role-assignment" (with more users allowed).
+    Returns the queued job; its progress and the results of the users processed
+    so far are read with "GET /user-role-assignment/jobs/{user_role_assignment_job_id}".
+    """
+    LOGGER.debug(
+        f"Executing 'create_user_role_assignment_job' "
+        f"with request: {role_assignment_request}, requestor: {token_claims}"
+    )
+    job = crud_user_role_assignment_job.create_job(db, role_assignment_request, requester)
+    role_assignment_job_worker.start_role_assignment_jobs_after_commit(db)
+    return FamUserRoleAssignmentJobRes.model_validate(job)
+
+
+@router.get(
+    "/jobs/{user_role_assignment_job_id}",
+    response_model=FamUserRoleAssignmentJobRes,
+    summary="Get a user role assignment job, with the results so far.",
+)
+def get_user_role_assignment_job(
+    user_role_assignment_job_id: int,
+    db: Session = Depends(database.get_db),
+    _enforce_fam_access_validated=Depends(jwt_validation.enforce_fam_client_token),
+    requester: RequesterSchema = Depends(get_current_requester),
+):
+    """
+    Get a user role assignment job created by the requester. The email sending
+    status of its results is the current one (the emails are sent afterwards).
+    """
+    job = crud_user_role_assignment_job.get_job(db, user_role_assignment_job_id)
+    if job is None or job.create_user != requester.cognito_user_id:
+        utils.raise_http_exception(
+            status_code=HTTPStatus.NOT_FOUND,
+            error_code=ERROR_CODE_INVALID_REQUEST_PARAMETER,
+            error_msg=f"User role assignment job {user_role_assignment_job_id} not found.",
+        )
+    return crud_user_role_assignment_job.to_job_response(db, job)
+
+
 @router.delete(
     "/{user_role_xref_id}",
     status_code=HTTPStatus.NO_CONTENT,
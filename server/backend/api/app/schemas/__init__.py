@@ -17,6 +17,8 @@ from .fam_user_info import FamUserInfoSchema
 from .fam_user_role_assignment_create import FamUserRoleAssignmentCreateSchema
 from .fam_user_role_assignment_create_response import \
     FamUserRoleAssignmentCreateRes
+from .fam_user_role_assignment_job import (
+    FamUserRoleAssignmentJobCreateSchema, FamUserRoleAssignmentJobRes)
 from .fam_user_role_assignment_response import FamUserRoleAssignmentRes
 from .fam_user_type import FamUserTypeSchema
 from .fam_user_update_response import FamUserUpdateResponseSchema
@@ -19,4 +19,5 @@ class FamRoleWithClientSchema(FamRoleMinSchema):
     )
     parent_role: Optional[FamRoleMinSchema] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    # populate_by_name: also read back from its own (field names) dump
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
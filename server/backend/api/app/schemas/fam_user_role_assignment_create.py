@@ -6,9 +6,13 @@ from zoneinfo import ZoneInfo
 from api.app.constants import MAX_NUM_USERS_ASSIGNMENT_GRANT, UserType
 from api.app.datetime_format import BC_TIMEZONE, DATE_FORMAT_YYYY_MM_DD
 from pydantic import (BaseModel, ConfigDict, Field, PrivateAttr,
-                      StringConstraints, field_validator, model_validator)
+                      StringConstraints, ValidationInfo, field_validator,
+                      model_validator)
 from typing_extensions import Annotated
 
+# Validation context of a request validated before and stored (see FamUserRoleAssignmentJobCreateSchema)
+STORED_REQUEST_CONTEXT = "stored_request"
+
 LOGGER = logging.getLogger(__name__)
 
 class FamUserRoleAssignmentUserSchema(BaseModel):
@@ -52,7 +56,7 @@ class FamUserRoleAssignmentCreateSchema(BaseModel):
 
     @field_validator('expiry_date_date')
     @classmethod
-    def validate_expiry_date_date(cls, v):
+    def validate_expiry_date_date(cls, v, info: ValidationInfo):
         if v is None:
             return v
         if isinstance(v, str) and v.strip() == "":
@@ -62,6 +66,9 @@ class FamUserRoleAssignmentCreateSchema(BaseModel):
             dv = datetime.strptime(v, DATE_FORMAT_YYYY_MM_DD).date()
         except Exception:
             raise ValueError('expiry_date_date must be a valid YYYY-MM-DD string')
+        if (info.context or {}).get(STORED_REQUEST_CONTEXT):
+            # validated when the request was made, the date may have passed since
+            return v
         now_bc = datetime.now(bc_tz).date()
         if dv < now_bc:
             raise ValueError('expiry_date_date must be today or in the future (BC timezone)')
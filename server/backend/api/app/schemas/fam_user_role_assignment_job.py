@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Optional
+
+from api.app.constants import (MAX_NUM_USERS_ASSIGNMENT_GRANT_JOB,
+                               RoleAssignmentJobStatus)
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from .fam_user_role_assignment_create import (
+    STORED_REQUEST_CONTEXT, FamUserRoleAssignmentCreateSchema)
+from .fam_user_role_assignment_create_response import \
+    FamUserRoleAssignmentCreateRes
+
+
+class FamUserRoleAssignmentJobCreateSchema(FamUserRoleAssignmentCreateSchema):
+    """
+    Request schema for assigning users to a role as a job; same as
+    FamUserRoleAssignmentCreateSchema, with more users allowed.
+    """
+
+    @field_validator('users')
+    @classmethod
+    def validate_users(cls, v):
+        """
+        Validate the 'users' list to ensure it doesn't exceed the maximum allowed for a job.
+        """
+        if len(v) > MAX_NUM_USERS_ASSIGNMENT_GRANT_JOB:
+            raise ValueError(f"Can only grant at most {MAX_NUM_USERS_ASSIGNMENT_GRANT_JOB} users, you have {len(v)} users in the list")
+        return v
+
+    @classmethod
+    def from_stored_request(cls, role_assignment_request: dict) -> "FamUserRoleAssignmentJobCreateSchema":
+        """
+        The request stored with a job; its expiry date was checked when the job
+        was created and is kept even when it is past by the time the job runs.
+        """
+        return cls.model_validate(role_assignment_request, context={STORED_REQUEST_CONTEXT: True})
+
+
+class FamUserRoleAssignmentJobRes(BaseModel):
+    """
+    A user role assignment job and its progress: "assignments_detail" holds the
+    results of the users processed so far ("processed_count" of "total_count").
+    """
+    user_role_assignment_job_id: int
+    job_status: RoleAssignmentJobStatus
+    total_count: int
+    processed_count: int
+    assignments_detail: List[FamUserRoleAssignmentCreateRes] = Field(validation_alias="results")
+    error_message: Optional[str] = Field(default=None, validation_alias="last_error")
+    create_date: datetime
+
+    model_config = ConfigDict(from_attributes=True)
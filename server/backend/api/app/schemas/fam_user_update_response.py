@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -14,3 +14,6 @@ class FamUserUpdateResponseSchema(BaseModel):
     failed_user_update_list: List[dict]
     ignored_user_update_list: List[dict]
     mismatch_user_update_list: List[dict]
+    # Resumable sync (no explicit page): where this run stopped, and whether it finished a pass over all users.
+    checkpoint_user_id: Optional[int] = None
+    sync_completed: Optional[bool] = None
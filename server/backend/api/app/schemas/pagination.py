@@ -4,7 +4,8 @@ from enum import StrEnum
 from typing import Generic, List
 
 from api.app.constants import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MIN_PAGE,
-                               MIN_PAGE_SIZE, SEARCH_FIELD_MAX_LENGTH,
+                               MIN_PAGE_SIZE, PAGE_CURSOR_MAX_LENGTH,
+                               SEARCH_FIELD_MAX_LENGTH,
                                SEARCH_FIELD_MIN_LENGTH, SortOrderEnum, T,
                                UserRoleSortByEnum)
 from fastapi import Query
@@ -58,6 +59,14 @@ class PageParamsSchema(BaseModel, ABC):
 
     sort_by: StrEnum | None = None
 
+    cursor: str | None = Field(Query(
+        default=None, max_length=PAGE_CURSOR_MAX_LENGTH,
+        description=(
+            "'meta.next_cursor' of the previous page, to get the page after it (keyset pagination, faster for deep pages). "
+            "'pageNumber' is then ignored; 'sortBy' and 'sortOrder' have to stay the same"
+        )
+    ))
+
 
 class UserRolePageParamsSchema(PageParamsSchema):
     sort_by: UserRoleSortByEnum | None = Field(Query(
@@ -73,6 +82,12 @@ class PageResultMetaSchema(BaseModel):
     number_of_pages: int = Field(description='Total pages for query records')
     page_number: int = Field(description='Page number')
     page_size: int = Field(description='Number of records per page')
+    total_estimated: bool = Field(
+        default=False, description="True when 'total' (and 'number_of_pages') is the database's estimate"
+    )
+    next_cursor: str | None = Field(
+        default=None, description="Cursor to get the next page with, None on the last page"
+    )
 
 
 class PagedResultsSchema(BaseModel, Generic[T]):
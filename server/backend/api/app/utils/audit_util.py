@@ -116,7 +116,7 @@ class AuditEventLog:
                 "cognitoUsername": self.requesting_user.cognito_user_id if self.requesting_user else None,
             },
 
-            "requestIP": self.request.client.host if self.request.client else "unknown",
+            "requestIP": self.request.client.host if self.request and self.request.client else "unknown",
             "userAssignmentResults": [
                 x.model_dump() for x in self.user_assignment_results
             ],
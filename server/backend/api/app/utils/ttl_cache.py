@@ -0,0 +1,137 @@
+"""
+Bounded (LRU) cache with expiring entries, the base of the process-wide caches
+of this API, and the registry of those caches (to clear them all at once, e.g.
+between tests).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+_registered_caches: List[Any] = []
+
+
+def register_cache(cache):
+    """Registers a process-wide cache (anything with "clear") for "clear_caches"."""
+    _registered_caches.append(cache)
+    return cache
+
+
+def clear_caches():
+    for cache in _registered_caches:
+        cache.clear()
+
+
+class TtlLruCache:
+    """
+    Bounded (LRU) cache, safe to share between threads. An entry expires "ttl"
+    seconds after it is set, or "negative_ttl" seconds for the values
+    "is_negative" is true for (e.g. not found results). When "stale" is given,
+    an expired value (not negative) is still served, as stale, for that long.
+
+    Counts hits (and negative hits, stale hits when used), misses, evictions and
+    the extra "stats" names subclasses count with "count".
+    """
+
+    def __init__(
+        self,
+        ttl: float = 0,
+        max_size: int = 1000,
+        negative_ttl: Optional[float] = None,
+        is_negative: Optional[Callable[[Any], bool]] = None,
+        stale: Optional[float] = None,
+        stats: Iterable[str] = (),
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.is_negative = is_negative
+        self.stale = stale
+        self._stat_names = ["hits"]
+        if is_negative is not None:
+            self._stat_names.append("negative_hits")
+        if stale is not None:
+            self._stat_names.append("stale_hits")
+        self._stat_names += ["misses", "evictions", *stats]
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = self.__new_stats()
+
+    def get(self, key: Hashable, default=None):
+        """:return: the value of "key", or "default" when not cached or expired."""
+        entry = self.get_entry(key, allow_stale=False)
+        return default if entry is None else entry[0]
+
+    def get_entry(self, key: Hashable, allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """:return: (value, stale) of "key", or None when not cached or expired (past "stale")."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                negative = self.__is_negative(value)
+                if now < expires_at:
+                    self._stats["negative_hits" if negative else "hits"] += 1
+                    self._entries.move_to_end(key)
+                    return value, False
+
+                if not negative and self.stale and now < expires_at + self.stale:
+                    if allow_stale:
+                        self._stats["stale_hits"] += 1
+                        self._entries.move_to_end(key)
+                        return value, True
+                else:
+                    del self._entries[key]
+
+            self._stats["misses"] += 1
+            return None
+
+    def peek(self, key: Hashable, default=None):
+        """:return: the value of "key", expired or not, or "default". Not counted in the stats."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: Hashable, value, ttl: Optional[float] = None):
+        """Sets "key" for "ttl" seconds (by default "ttl", or "negative_ttl" for a negative value)."""
+        if ttl is None:
+            ttl = self.negative_ttl if self.__is_negative(value) else self.ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def discard_if(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Removes the entries "predicate(key, value)" is true for. :return: the number removed."""
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def count(self, stat: str, n: int = 1):
+        with self._lock:
+            self._stats[stat] += n
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            hits = sum(self._stats.get(stat, 0) for stat in ("hits", "negative_hits", "stale_hits"))
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats = self.__new_stats()
+
+    def __is_negative(self, value) -> bool:
+        return self.is_negative is not None and self.is_negative(value)
+
+    def __new_stats(self) -> dict:
+        return {stat: 0 for stat in self._stat_names}
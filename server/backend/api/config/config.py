@@ -1,9 +1,11 @@
 import json
 import logging
 import os
+import threading
+import time
 
 import boto3
-from api.app.constants import ApiInstanceEnv
+from api.app.constants import ApiInstanceEnv, DbPoolMode, DbSessionClass
 
 LOGGER = logging.getLogger(__name__)
 
@@ -37,11 +39,7 @@ def get_db_string():
 
 
 def get_aws_db_string():
-    secret_value = get_aws_db_secret()
-    secret_json = json.loads(secret_value["SecretString"])
-
-    username = secret_json.get("username")
-    password = secret_json.get("password")
+    username, password = get_aws_db_credentials()
 
     host = get_env_var("PG_HOST")
     port = get_env_var("PG_PORT")
@@ -78,14 +76,65 @@ def get_user_pool_domain_name():
     return get_env_var(env_var)
 
 
+# Secrets Manager values are cached for the life of the process (Lambda
+# container) and re-read after the TTL, or straight away when invalidated
+# (e.g. the database rejected credentials after a secret rotation).
+AWS_SECRET_CACHE_TTL_SECONDS = 300
+
+_secretsmanager_client = None
+_lambda_client = None
+_aws_secret_cache = {}
+_aws_secret_cache_lock = threading.Lock()
+
+
+def get_secretsmanager_client():
+    global _secretsmanager_client
+    if _secretsmanager_client is None:
+        session = boto3.session.Session()
+        _secretsmanager_client = session.client(
+            service_name="secretsmanager", region_name=get_aws_region()
+        )
+    return _secretsmanager_client
+
+
+def get_lambda_client():
+    global _lambda_client
+    if _lambda_client is None:
+        session = boto3.session.Session()
+        _lambda_client = session.client(
+            service_name="lambda", region_name=get_aws_region()
+        )
+    return _lambda_client
+
+
+def get_aws_secret(secret_name: str) -> dict:
+    with _aws_secret_cache_lock:
+        cached = _aws_secret_cache.get(secret_name)
+        if cached and time.monotonic() - cached[0] < AWS_SECRET_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        secret_value = get_secretsmanager_client().get_secret_value(SecretId=secret_name)
+        _aws_secret_cache[secret_name] = (time.monotonic(), secret_value)
+        LOGGER.debug(f"Secret {secret_name} retrieved from secrets manager.")
+        return secret_value
+
+
+def invalidate_aws_secret(secret_name: str):
+    with _aws_secret_cache_lock:
+        _aws_secret_cache.pop(secret_name, None)
+
+
 def get_aws_db_secret():
-    secret_name = os.environ.get("DB_SECRET")
+    return get_aws_secret(os.environ.get("DB_SECRET"))
+
 
-    # Create a Secrets Manager client
-    session = boto3.session.Session()
-    client = session.client(service_name="secretsmanager", region_name=get_aws_region())
+def invalidate_aws_db_secret():
+    invalidate_aws_secret(os.environ.get("DB_SECRET"))
 
-    return client.get_secret_value(SecretId=secret_name)
+
+def get_aws_db_credentials():
+    secret_json = json.loads(get_aws_db_secret()["SecretString"])
+    return secret_json.get("username"), secret_json.get("password")
 
 
 class MissingEnvironmentVariable(Exception):
@@ -125,12 +174,7 @@ def get_fam_oidc_client_id():
     if not _client_id:
         client_id_secret_name = os.environ.get("COGNITO_CLIENT_ID_SECRET")
         if client_id_secret_name:
-            session = boto3.session.Session()
-            client = session.client(
-                service_name="secretsmanager", region_name=get_aws_region()
-            )
-            secret_value = client.get_secret_value(SecretId=client_id_secret_name)
-            _client_id = secret_value["SecretString"]
+            _client_id = get_aws_secret(client_id_secret_name)["SecretString"]
 
     if not _client_id:
         _client_id = os.environ.get("COGNITO_CLIENT_ID")
@@ -186,6 +230,97 @@ def get_gc_notify_email_api_key():
     return gc_notify_email_api_key
 
 
+def get_request_deadline_seconds():
+    # Time a request has for its work, outbound calls included; under the 15s Lambda timeout
+    # (itself under the 29s API Gateway timeout), so the API answers before being cut off.
+    return float(os.environ.get("REQUEST_DEADLINE_SECONDS", "14"))
+
+
+def get_slow_query_seconds():
+    # SQL statements taking longer are logged as warnings (see query_stats).
+    return float(os.environ.get("SLOW_QUERY_SECONDS", "0.5"))
+
+
+def get_query_repeat_threshold():
+    # The same statement executed this many times in a request is reported as repeated (likely N+1).
+    return int(os.environ.get("QUERY_REPEAT_THRESHOLD", "5"))
+
+
+def get_catalog_version_check_seconds():
+    # How often the cached application catalog compares its version with the database (see catalog).
+    return float(os.environ.get("CATALOG_VERSION_CHECK_SECONDS", "30"))
+
+
+def get_requester_cache_ttl_seconds():
+    # How long a requester (user, delegated admin, terms acceptance) is cached; 0 disables (see requester_cache).
+    return float(os.environ.get("REQUESTER_CACHE_TTL_SECONDS", "30"))
+
+
+def get_requester_version_check_seconds():
+    # How often the cached requesters are checked against the database requester version (see requester_cache).
+    return float(os.environ.get("REQUESTER_VERSION_CHECK_SECONDS", "5"))
+
+
+def get_role_assignment_job_worker_function():
+    # Lambda running the role assignment jobs on AWS; not set locally, where jobs run in a local thread.
+    return os.environ.get("ROLE_ASSIGNMENT_JOB_WORKER_FUNCTION")
+
+
+def get_http_pool_maxsize():
+    # Connections kept open per upstream host (Forest Client, IDIM Proxy, GC Notify).
+    return int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))
+
+
+def is_on_lambda():
+    return os.environ.get("AWS_LAMBDA_FUNCTION_NAME") is not None  # Set by the Lambda runtime.
+
+
+def get_db_pool_mode():
+    # A Lambda container serves one request at a time: one pooled connection (to RDS Proxy) is enough.
+    default_pool_mode = DbPoolMode.SINGLE if is_on_lambda() else DbPoolMode.QUEUE
+    return DbPoolMode(os.environ.get("DB_POOL_MODE", default_pool_mode))
+
+
+def get_db_pool_size():
+    # Connections kept open in the "queue" pool mode.
+    return int(os.environ.get("DB_POOL_SIZE", "5"))
+
+
+def get_db_pool_max_overflow():
+    # Connections opened over the pool size when all are in use, closed when returned.
+    return int(os.environ.get("DB_POOL_MAX_OVERFLOW", "5"))
+
+
+def get_db_pool_timeout_seconds():
+    # Wait for a connection when all are in use before failing the request.
+    return float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "5"))
+
+
+def get_db_pool_recycle_seconds():
+    # Pooled connections are replaced after this long, under the RDS Proxy idle client timeout (1800s).
+    return int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1500"))
+
+
+# (statement_timeout, idle_in_transaction_session_timeout) defaults of the sessions of each class.
+# An http request answers within its deadline (REQUEST_DEADLINE_SECONDS); a transaction can stay idle
+# during an outbound call, itself cut to the deadline.
+DB_SESSION_TIMEOUTS_SECONDS = {
+    DbSessionClass.API: (10, 20),
+    DbSessionClass.JOB: (60, 60),
+}
+
+
+def get_db_session_timeouts_seconds(session_class: DbSessionClass):
+    # e.g. DB_STATEMENT_TIMEOUT_SECONDS_API, DB_IDLE_IN_TRANSACTION_TIMEOUT_SECONDS_JOB
+    statement_timeout, idle_in_transaction_timeout = DB_SESSION_TIMEOUTS_SECONDS[session_class]
+    return (
+        float(os.environ.get(f"DB_STATEMENT_TIMEOUT_SECONDS_{session_class.name}", statement_timeout)),
+        float(os.environ.get(
+            f"DB_IDLE_IN_TRANSACTION_TIMEOUT_SECONDS_{session_class.name}", idle_in_transaction_timeout
+        )),
+    )
+
+
 # For local development, you can override this function since it doesn't work outside AWS
 def is_bcsc_key_enabled():
     return os.environ.get("ENABLE_BCSC_JWKS_ENDPOINT", "True") == "True"
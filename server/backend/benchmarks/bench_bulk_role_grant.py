@@ -0,0 +1,172 @@
+"""
+Benchmarks granting a forest client scoped (abstract) role to 50 users x 20
+forest clients against the local database.
+
+Compares the previous per-assignment flow (find_or_create user, update user
+properties, find_or_create forest client child role, create assignment and one
+audit record per user, each flushing) with the set-based
+"create_user_role_assignment_many". Every run grants to new users and new
+forest clients in a transaction that is rolled back, so runs are comparable
+and nothing is left in the database. The Forest Client API search is replaced
+by a canned "active" result; only database work is measured.
+
+Usage (from server/backend, local database running):
+    python -m benchmarks.bench_bulk_role_grant [runs] [users] [forest_clients]
+"""
+import os
+import statistics
+import sys
+import time
+from http import HTTPStatus
+from unittest.mock import patch
+
+# The crud modules import jwt_validation, which reads Cognito settings at
+# import time; only placeholders are needed here.
+os.environ.setdefault("COGNITO_REGION", "ca-central-1")
+os.environ.setdefault("COGNITO_USER_POOL_ID", "ca-central-1_benchmark")
+os.environ.setdefault("COGNITO_USER_POOL_DOMAIN", "benchmark")
+os.environ.setdefault("COGNITO_CLIENT_ID", "benchmark_client")
+
+from api.app.constants import RoleType, UserType  # noqa: E402
+from api.app.crud import crud_user, crud_user_role  # noqa: E402
+from api.app.crud.services.permission_audit_service import \
+    PermissionAuditService  # noqa: E402
+from api.app.models import model as models  # noqa: E402
+from api.app.schemas import (FamUserRoleAssignmentCreateSchema,  # noqa: E402
+                             RequesterSchema, TargetUserSchema)
+from api.config import config  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+
+def build_request(run: int, users: int, forest_clients: int, role_id: int):
+    target_users = [
+        TargetUserSchema(
+            user_name=f"BENCH_{run}_{i}",
+            user_guid=f"BENCH{run:04d}{i:023d}",
+            user_type_code=UserType.IDIR,
+            first_name="Bench",
+            last_name=f"User {i}",
+            email=f"bench_{run}_{i}@example.com",
+        )
+        for i in range(users)
+    ]
+    # 9xxxxxxx: outside of the seeded forest client numbers
+    forest_client_numbers = [f"9{run:03d}{i:04d}" for i in range(forest_clients)]
+    request = FamUserRoleAssignmentCreateSchema(
+        users=[
+            {"user_name": user.user_name, "user_guid": user.user_guid}
+            for user in target_users
+        ],
+        user_type_code=UserType.IDIR,
+        role_id=role_id,
+        forest_client_numbers=forest_client_numbers,
+    )
+    return request, target_users
+
+
+def search_returns(fam_role, forest_client_numbers):
+    return {
+        forest_client_number: [{
+            "clientNumber": forest_client_number,
+            "clientName": f"BENCH CLIENT {forest_client_number}",
+            "clientStatusCode": "ACT",
+            "clientTypeCode": "C",
+        }]
+        for forest_client_number in forest_client_numbers
+    }
+
+
+def grant_per_assignment(db: Session, request, target_users, requester):
+    """The flow before the set-based grant, one assignment at a time."""
+    fam_role = db.get(models.FamRole, request.role_id)
+    audit_service = PermissionAuditService(db)
+    fc_returns = search_returns(fam_role, request.forest_client_numbers)
+    granted = 0
+    for target_user in target_users:
+        fam_user = crud_user.find_or_create(
+            db, request.user_type_code, target_user.user_name,
+            target_user.user_guid, requester.cognito_user_id,
+        )
+        fam_user = crud_user.update_user_properties_from_verified_target_user(
+            db, fam_user.user_id, target_user, requester.cognito_user_id,
+        )
+        assignments = []
+        for forest_client_number in request.forest_client_numbers:
+            child_role = crud_user_role.find_or_create_forest_client_child_role(
+                db, forest_client_number, fam_role, requester.cognito_user_id,
+            )
+            res = crud_user_role.create_user_role_assignment(
+                db, fam_user, child_role, requester.cognito_user_id
+            )
+            res.detail.role.forest_client = crud_user_role.FamForestClientSchema.from_api_json(
+                fc_returns[forest_client_number][0]
+            )
+            assignments.append(res)
+        audit_service.store_user_permissions_granted_audit_history(
+            requester=requester, change_target_user=fam_user,
+            new_user_permission_granted_list=assignments,
+        )
+        granted += sum(res.status_code == HTTPStatus.OK for res in assignments)
+    return granted
+
+
+def grant_set_based(db: Session, request, target_users, requester):
+    results = crud_user_role.create_user_role_assignment_many(
+        db, request, target_users, requester
+    )
+    return sum(res.status_code == HTTPStatus.OK for res in results)
+
+
+def main(runs: int, users: int, forest_clients: int):
+    engine = create_engine(config.get_db_string())
+    statement_count = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args):
+        nonlocal statement_count
+        statement_count += 1
+
+    with Session(engine) as db:
+        abstract_role = (
+            db.query(models.FamRole)
+            .filter(models.FamRole.role_type_code == RoleType.ROLE_TYPE_ABSTRACT)
+            .order_by(models.FamRole.role_id)
+            .first()
+        )
+        performer = db.query(models.FamUser).order_by(models.FamUser.user_id).first()
+        requester = RequesterSchema(
+            cognito_user_id=performer.cognito_user_id or "bench@idir",
+            user_name=performer.user_name,
+            user_type_code=performer.user_type_code,
+            user_guid=performer.user_guid or "B" * 32,
+            user_id=performer.user_id,
+        )
+        role_id = abstract_role.role_id
+
+    print(f"granting {abstract_role.role_name}: {users} users x {forest_clients} "
+          f"forest clients, {runs} run(s) each")
+    flows = [("per assignment", grant_per_assignment), ("set-based", grant_set_based)]
+    with patch.object(crud_user_role, "search_forest_clients_by_number", search_returns):
+        for name, grant in flows:
+            timings = []
+            statements = []
+            for run in range(runs):
+                request, target_users = build_request(run, users, forest_clients, role_id)
+                with Session(engine) as db:
+                    db.connection()  # connect/begin outside of the timing
+                    statement_count = 0
+                    start = time.perf_counter()
+                    granted = grant(db, request, target_users, requester)
+                    db.flush()
+                    timings.append(time.perf_counter() - start)
+                    statements.append(statement_count)
+                    db.rollback()
+                assert granted == users * forest_clients
+            print(f"{name:15} median {statistics.median(timings) * 1000:8.1f} ms "
+                  f"min {min(timings) * 1000:8.1f} ms  statements {statistics.median(statements):6.0f}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [5, 50, 20][len(args):]))
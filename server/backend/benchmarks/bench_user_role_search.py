@@ -0,0 +1,152 @@
+"""
+Benchmarks the keyword search of the user role assignments of an application
+(the 'search' of GET /fam-applications/{application_id}/user-role-assignment)
+on a synthetic application with 500k assignments, against the local database.
+
+Compares the previous filter ('OR' of 'ilike' on every joined column and
+'to_char' of the create date, a sequential scan of the join) with the indexed
+search of "crud_application" (see V99 migration), through the same paginated
+query (first page and total). The synthetic application (25k users x 20
+forest client roles by default) is created in a transaction that is rolled
+back, nothing is left in the database.
+
+Usage (from server/backend, local database running and migrated):
+    python -m benchmarks.bench_user_role_search [runs] [users] [roles]
+"""
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+# The crud modules import jwt_validation, which reads Cognito settings at
+# import time; only placeholders are needed here.
+os.environ.setdefault("COGNITO_REGION", "ca-central-1")
+os.environ.setdefault("COGNITO_USER_POOL_ID", "ca-central-1_benchmark")
+os.environ.setdefault("COGNITO_USER_POOL_DOMAIN", "benchmark")
+os.environ.setdefault("COGNITO_CLIENT_ID", "benchmark_client")
+
+from api.app.constants import (MIN_PAGE, SortOrderEnum,  # noqa: E402
+                               UserRoleSortByEnum, UserType)
+from api.app.crud import crud_application  # noqa: E402
+from api.app.datetime_format import TIMESTAMP_FORMAT_DEFAULT  # noqa: E402
+from api.app.models import model as models  # noqa: E402
+from api.app.schemas import RequesterSchema  # noqa: E402
+from api.app.schemas.pagination import UserRolePageParamsSchema  # noqa: E402
+from api.config import config  # noqa: E402
+from sqlalchemy import create_engine, func, or_, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+BENCH_APPLICATION_NAME = "BENCH_USER_ROLE_SEARCH"
+BENCH_TABLES = ["fam_user", "fam_role", "fam_forest_client", "fam_user_role_xref"]
+
+# keyword: what it matches in the synthetic application
+SEARCH_KEYWORDS = {
+    "bench_user_01234": "one user name (20 roles)",
+    "Surname 2345": "a few full names",
+    "example.org": "every email",
+    "Bench Role 07": "one role display name",
+    "98000011": "one forest client number",
+    "nomatch": "nothing",
+}
+
+
+def create_synthetic_application(db: Session, users: int, roles: int) -> int:
+    """Inserts the application, its forest client roles, users and users x roles assignments."""
+    application_id = db.execute(text(
+        "INSERT INTO app_fam.fam_application (application_name, application_description, create_user) "
+        "VALUES (:name, 'User role search benchmark', 'bench') RETURNING application_id"
+    ), {"name": BENCH_APPLICATION_NAME}).scalar_one()
+    db.execute(text(
+        "INSERT INTO app_fam.fam_forest_client (forest_client_number, create_user) "
+        "SELECT '980000' || lpad(i::text, 2, '0'), 'bench' FROM generate_series(1, :roles) i"
+    ), {"roles": roles})
+    db.execute(text(
+        "INSERT INTO app_fam.fam_role (role_name, display_name, application_id, client_number_id, "
+        "    role_type_code, create_user) "
+        "SELECT 'BENCH_ROLE_' || fc.forest_client_number, "
+        "    'Bench Role ' || right(fc.forest_client_number, 2), :application_id, fc.client_number_id, 'C', 'bench' "
+        "FROM app_fam.fam_forest_client fc WHERE fc.forest_client_number LIKE '980000%'"
+    ), {"application_id": application_id})
+    db.execute(text(
+        "INSERT INTO app_fam.fam_user (user_name, user_guid, user_type_code, first_name, last_name, "
+        "    email, create_user) "
+        "SELECT 'BENCH_USER_' || lpad(i::text, 5, '0'), md5('bench' || i), 'I', "
+        "    'Given' || i, 'Surname ' || i, 'bench.user.' || i || '@example.org', 'bench' "
+        "FROM generate_series(1, :users) i"
+    ), {"users": users})
+    # create dates spread over 2 years
+    db.execute(text(
+        "INSERT INTO app_fam.fam_user_role_xref (user_id, role_id, create_user, create_date) "
+        "SELECT u.user_id, r.role_id, 'bench', "
+        "    now() - ((u.user_id + r.role_id) % 730) * interval '1 day' "
+        "FROM app_fam.fam_user u CROSS JOIN app_fam.fam_role r "
+        "WHERE u.create_user = 'bench' AND r.application_id = :application_id"
+    ), {"application_id": application_id})
+    analyze(db)
+    return application_id
+
+
+def analyze(db: Session):
+    for table in BENCH_TABLES:
+        db.execute(text(f"ANALYZE app_fam.{table}"))
+
+
+def legacy_filter_criteria(page_params: UserRolePageParamsSchema):
+    """The filter before the indexed search."""
+    search_pattern = f"%{page_params.search}%"
+    return or_(
+        func.to_char(models.FamUserRoleXref.create_date, TIMESTAMP_FORMAT_DEFAULT).ilike(search_pattern),
+        models.FamUser.user_name.ilike(search_pattern),
+        models.FamUser.user_type_code.ilike(search_pattern),
+        models.FamUser.email.ilike(search_pattern),
+        models.FamUser.full_name.ilike(search_pattern),
+        models.FamRole.display_name.ilike(search_pattern),
+        models.FamForestClient.forest_client_number.ilike(search_pattern),
+    )
+
+
+def main(runs: int, users: int, roles: int):
+    engine = create_engine(config.get_db_string())
+    requester = RequesterSchema(
+        cognito_user_id="bench@idir", user_name="BENCH", user_type_code=UserType.IDIR,
+        user_guid="B" * 32, user_id=0,
+    )
+    get_application_role_assignments = crud_application.get_application_role_assignments.__wrapped__
+    indexed_filter_criteria = getattr(crud_application, "__build_filter_criteria")
+
+    with Session(engine) as db, patch.object(crud_application.crud_utils, "is_app_admin", return_value=True):
+        start = time.perf_counter()
+        application_id = create_synthetic_application(db, users, roles)
+        print(f"{users * roles} assignments ({users} users x {roles} roles) created in "
+              f"{time.perf_counter() - start:.1f} s, {runs} run(s) each")
+
+        # newest assignments' day, e.g. "2025-04-11"
+        date_prefix = db.scalar(text("SELECT to_char(now(), 'YYYY-MM-DD')"))
+        keywords = {**SEARCH_KEYWORDS, date_prefix: "one create date"}
+        for keyword, matches in keywords.items():
+            page_params = UserRolePageParamsSchema(
+                page=MIN_PAGE, size=50, search=keyword,
+                sort_by=UserRoleSortByEnum.CREATE_DATE, sort_order=SortOrderEnum.DESC
+            )
+            print(f"'{keyword}' ({matches})")
+            for name, filter_criteria in [("previous", legacy_filter_criteria), ("indexed", indexed_filter_criteria)]:
+                timings = []
+                with patch.object(crud_application, "__build_filter_criteria", filter_criteria):
+                    for _ in range(runs):
+                        start = time.perf_counter()
+                        paged_results = get_application_role_assignments(
+                            db=db, application_id=application_id, requester=requester, page_params=page_params
+                        )
+                        timings.append(time.perf_counter() - start)
+                print(f"  {name:9} median {statistics.median(timings) * 1000:8.1f} ms "
+                      f"min {min(timings) * 1000:8.1f} ms  total {paged_results.meta.total}")
+        db.rollback()
+        # table statistics are not rolled back: analyzed again without the synthetic rows
+        analyze(db)
+        db.commit()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [5, 25000, 20][len(args):]))
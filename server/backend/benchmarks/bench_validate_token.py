@@ -0,0 +1,77 @@
+"""
+Microbenchmark for "jwt_validation.validate_token".
+
+Compares the full RS256 verification path (verified claims cache cleared
+before every call) with the cached path (same access token reused, as the
+frontend does until the token expires).
+
+Usage (from server/backend):
+    python -m benchmarks.bench_validate_token [iterations]
+"""
+import os
+import sys
+import time
+import timeit
+
+# jwt_validation reads Cognito settings at import time; only placeholders are
+# needed here since no request leaves the process.
+os.environ.setdefault("COGNITO_REGION", "ca-central-1")
+os.environ.setdefault("COGNITO_USER_POOL_ID", "ca-central-1_benchmark")
+os.environ.setdefault("COGNITO_USER_POOL_DOMAIN", "benchmark")
+os.environ.setdefault("COGNITO_CLIENT_ID", "benchmark_client")
+
+import jwt  # noqa: E402
+from api.app import jwt_validation  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from jwt.algorithms import RSAAlgorithm  # noqa: E402
+
+KID = "benchmark-kid"
+
+
+def setup_token() -> str:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update({"kid": KID, "alg": "RS256", "use": "sig"})
+    jwt_validation.jwks_key_store.load({"keys": [jwk]})
+
+    now = time.time()
+    claims = {
+        "iss": f"https://cognito-idp.{jwt_validation.aws_region}.amazonaws.com/"
+        f"{jwt_validation.user_pool_id}",
+        "client_id": os.environ["COGNITO_CLIENT_ID"],
+        "token_use": "access",
+        "username": "benchmark_user@idir",
+        "cognito:groups": ["FAM_ADMIN"],
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": KID})
+
+
+def main(iterations: int):
+    token = setup_token()
+    get_rsa_key = jwt_validation.get_rsa_key
+
+    def uncached():
+        jwt_validation.verified_claims_cache.clear()
+        jwt_validation.validate_token(token, get_rsa_key)
+
+    def cached():
+        jwt_validation.validate_token(token, get_rsa_key)
+
+    uncached_total = timeit.timeit(uncached, number=iterations)
+    cached()  # prime the cache
+    cached_total = timeit.timeit(cached, number=iterations)
+
+    uncached_us = uncached_total / iterations * 1_000_000
+    cached_us = cached_total / iterations * 1_000_000
+    print(f"iterations:        {iterations}")
+    print(f"full verification: {uncached_us:10.1f} us/call")
+    print(f"cached claims:     {cached_us:10.1f} us/call")
+    print(f"saving per call:   {uncached_us - cached_us:10.1f} us "
+          f"({uncached_us / cached_us:.0f}x)")
+    print(f"cache stats:       {jwt_validation.verified_claims_cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
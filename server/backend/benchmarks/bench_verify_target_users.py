@@ -0,0 +1,110 @@
+"""
+Benchmarks "validate_target_users" against a local fake IDIM Proxy that
+answers every lookup after a fixed delay (the injected latency).
+
+Compares verifying the users one at a time ("max_concurrency=1", how they were
+verified before) with the default concurrency cap.
+
+Usage (from server/backend):
+    python -m benchmarks.bench_verify_target_users [users] [latency_ms]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+# The validator imports jwt_validation, which reads Cognito settings at
+# import time; only placeholders are needed here since no request leaves the
+# process.
+os.environ.setdefault("COGNITO_REGION", "ca-central-1")
+os.environ.setdefault("COGNITO_USER_POOL_ID", "ca-central-1_benchmark")
+os.environ.setdefault("COGNITO_USER_POOL_DOMAIN", "benchmark")
+os.environ.setdefault("COGNITO_CLIENT_ID", "benchmark_client")
+os.environ.setdefault("IDIM_PROXY_API_KEY", "benchmark")
+
+from api.app.constants import (IDIM_VERIFY_MAX_CONCURRENCY,  # noqa: E402
+                               UserType)
+from api.app.crud.validator.target_user_validator import \
+    validate_target_users  # noqa: E402
+from api.app.schemas import RequesterSchema, TargetUserSchema  # noqa: E402
+from api.config import config  # noqa: E402
+
+
+class FakeIdimProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(FakeIdimProxyHandler.latency)
+        user_id = parse_qs(urlsplit(self.path).query)["userId"][0]
+        body = json.dumps({
+            "found": True,
+            "userId": user_id,
+            "guid": to_user_guid(user_id),
+            "firstName": "Bench",
+            "lastName": user_id,
+            "email": f"{user_id}@example.com",
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DummyFamRole:
+    application = None
+
+
+def to_user_guid(user_name: str) -> str:
+    return f"{user_name:0>32}"[-32:]
+
+
+def main(users: int, latency_ms: int):
+    FakeIdimProxyHandler.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeIdimProxyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fake_idim_proxy_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    requester = RequesterSchema(
+        user_name="BENCH_REQUESTER",
+        user_type_code=UserType.IDIR,
+        user_guid=to_user_guid("BENCH_REQUESTER"),
+        user_id=1,
+    )
+    target_users = [
+        TargetUserSchema(
+            user_name=f"BENCH_{i}",
+            user_type_code=UserType.IDIR,
+            user_guid=to_user_guid(f"BENCH_{i}"),
+        )
+        for i in range(users)
+    ]
+
+    print(f"verifying {users} users, fake IDIM Proxy latency {latency_ms} ms")
+    with patch.object(config, "get_idim_proxy_api_baseurl", lambda env: fake_idim_proxy_url):
+        for name, max_concurrency in [
+            ("one at a time", 1),
+            (f"concurrency {IDIM_VERIFY_MAX_CONCURRENCY}", IDIM_VERIFY_MAX_CONCURRENCY),
+        ]:
+            start = time.perf_counter()
+            result = validate_target_users(
+                requester, target_users, DummyFamRole(), max_concurrency=max_concurrency
+            )
+            elapsed = time.perf_counter() - start
+            assert len(result.verified_users) == users, result.failed_users
+            print(f"{name:15} {elapsed * 1000:8.0f} ms")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [30, 500][len(args):]))
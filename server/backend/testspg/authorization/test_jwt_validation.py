@@ -3,13 +3,14 @@ import logging
 import time
 
 import starlette.testclient
-from api.app.jwt_validation import (ERROR_CLAIMS, ERROR_EXPIRED_TOKEN,
+from api.app.jwt_validation import (JwksKeyStore, VerifiedClaimsCache, ERROR_CLAIMS, ERROR_EXPIRED_TOKEN,
                                     ERROR_INVALID_ALGORITHM,
                                     ERROR_INVALID_CLIENT, ERROR_MISSING_KID,
                                     ERROR_NO_RSA_KEY, ERROR_TOKEN_DECODE,
                                     JWT_CLIENT_ID_KEY)
 from api.app.main import internal_api_prefix
 from Crypto.PublicKey import RSA
+from jwt.algorithms import RSAAlgorithm
 from testspg.constants import FAM_APPLICATION_ID
 from testspg.jwt_utils import (assert_error_response, create_jwt_claims,
                                create_jwt_token, headers)
@@ -143,3 +144,113 @@ def test_get_application_user_role_assignment_invalid_signature_failure(
     response = test_client_fixture_unit.get(f"{endPoint}", headers=headers(token))
 
     assert_error_response(response, 401, ERROR_CLAIMS)
+
+
+def _jwks_for(rsa_key, kid):
+    public_key = RSAAlgorithm(RSAAlgorithm.SHA256).prepare_key(
+        rsa_key.publickey().exportKey("PEM")
+    )
+    jwk = RSAAlgorithm.to_jwk(public_key, as_dict=True)
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return {"keys": [jwk]}
+
+
+def test_jwks_key_store_serves_known_kid_without_fetch(mocker):
+    key_store = JwksKeyStore("https://jwks.example")
+    key_store.load(_jwks_for(RSA.generate(2048), "kid-1"))
+    fetch = mocker.patch.object(key_store, "fetch")
+
+    assert key_store.get_signing_key("kid-1") is not None
+    assert key_store.get_signing_key("kid-1") is not None
+    fetch.assert_not_called()
+    assert key_store.get_stats()["hits"] == 2
+    assert key_store.get_stats()["misses"] == 0
+
+
+def test_jwks_key_store_fetches_unknown_kid_once_within_rate_limit(mocker):
+    key_store = JwksKeyStore("https://jwks.example", min_fetch_interval=60)
+    key_store.load(_jwks_for(RSA.generate(2048), "kid-1"))
+    rotated_jwks = _jwks_for(RSA.generate(2048), "kid-2")
+
+    def fake_fetch():
+        key_store._last_fetch_at = time.monotonic()
+        key_store.load(rotated_jwks)
+
+    fetch = mocker.patch.object(key_store, "fetch", side_effect=fake_fetch)
+
+    assert key_store.get_signing_key("kid-2") is not None
+    assert key_store.version == 2
+    # unknown kid right after a fetch is rate limited
+    assert key_store.get_signing_key("kid-unknown") is None
+    assert fetch.call_count == 1
+    assert key_store.get_stats()["misses"] == 2
+
+
+def test_jwks_key_store_starts_one_background_refresh_when_stale(mocker):
+    key_store = JwksKeyStore("https://jwks.example", refresh_interval=0)
+    key_store.load(_jwks_for(RSA.generate(2048), "kid-1"))
+    thread = mocker.patch("api.app.jwt_validation.threading.Thread")
+
+    key_store.get_signing_key("kid-1")
+    key_store.get_signing_key("kid-1")
+
+    assert thread.call_count == 1
+
+
+def test_jwks_key_store_retries_failed_refresh_after_min_fetch_interval(mocker):
+    key_store = JwksKeyStore(
+        "https://jwks.example", refresh_interval=3600, min_fetch_interval=30
+    )
+    key_store.load(_jwks_for(RSA.generate(2048), "kid-1"))
+    mocker.patch.object(key_store, "fetch", side_effect=Exception("jwks down"))
+
+    key_store._background_refresh()
+
+    assert key_store._refresh_due_at <= time.monotonic() + 30
+    assert key_store._refreshing is False
+    # current keys are still served
+    assert key_store.get_signing_key("kid-1") is not None
+
+
+def test_verified_claims_cache_hit_until_token_expiry(mocker):
+    key_store = JwksKeyStore("https://jwks.example")
+    claims_cache = VerifiedClaimsCache(key_store)
+    claims = {"username": "test", "exp": time.time() + 60}
+
+    claims_cache.put("token-a", claims)
+    assert claims_cache.get("token-a") == claims
+    assert claims_cache.get("token-b") is None
+
+    # the token "exp" has passed
+    mocker.patch("api.app.utils.ttl_cache.time.monotonic", return_value=time.monotonic() + 60)
+    assert claims_cache.get("token-a") is None
+    assert claims_cache.get_stats()["size"] == 0
+
+
+def test_verified_claims_cache_evicted_on_key_set_rotation():
+    jwks = _jwks_for(RSA.generate(2048), "kid-1")
+    key_store = JwksKeyStore("https://jwks.example")
+    key_store.load(jwks)
+    claims_cache = VerifiedClaimsCache(key_store)
+    claims_cache.put("token-a", {"exp": time.time() + 60})
+
+    # background refresh reloading the same key set keeps the cached claims
+    key_store.load(jwks)
+    assert claims_cache.get("token-a") is not None
+
+    key_store.load(_jwks_for(RSA.generate(2048), "kid-2"))
+    assert claims_cache.get("token-a") is None
+
+
+def test_verified_claims_cache_is_bounded_lru():
+    claims_cache = VerifiedClaimsCache(JwksKeyStore("https://jwks.example"), max_size=2)
+    exp = time.time() + 60
+    claims_cache.put("token-a", {"exp": exp})
+    claims_cache.put("token-b", {"exp": exp})
+    claims_cache.get("token-a")  # token-b becomes least recently used
+    claims_cache.put("token-c", {"exp": exp})
+
+    assert claims_cache.get("token-a") is not None
+    assert claims_cache.get("token-b") is None
+    assert claims_cache.get("token-c") is not None
+    assert claims_cache.get_stats()["evictions"] == 1
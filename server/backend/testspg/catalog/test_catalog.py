@@ -0,0 +1,109 @@
+import dataclasses
+
+import pytest
+from api.app import catalog
+from api.app.models.model import FamApplication, FamApplicationClient
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from testspg.constants import FAM_APPLICATION_ID, FOM_DEV_APPLICATION_ID
+
+TEST_APPLICATION_NAME = "CATALOG_TEST_APP"
+TEST_COGNITO_CLIENT_ID = "catalog_test_client"
+
+
+def add_test_application(db: Session) -> FamApplication:
+    application = FamApplication(
+        application_name=TEST_APPLICATION_NAME,
+        application_description="Catalog test application",
+        app_environment="DEV",
+        create_user="test",
+    )
+    db.add(application)
+    db.flush()
+    db.add(FamApplicationClient(
+        cognito_client_id=TEST_COGNITO_CLIENT_ID,
+        application_id=application.application_id,
+        create_user="test",
+    ))
+    db.flush()
+    return application
+
+
+@pytest.fixture(scope="function")
+def committed_test_application(db_pg_connection: Session):
+    """The test application, committed (the catalog reads committed rows only), deleted after the test."""
+    with Session(bind=db_pg_connection.get_bind()) as db:
+        application_id = add_test_application(db).application_id
+        db.commit()
+        yield application_id
+
+        db.execute(delete(FamApplicationClient).where(FamApplicationClient.application_id == application_id))
+        db.execute(delete(FamApplication).where(FamApplication.application_id == application_id))
+        db.commit()
+
+
+def test_catalog_lookups(db_pg_session: Session, committed_test_application: int):
+    fam_catalog = catalog.get_catalog(db_pg_session)
+
+    application = fam_catalog.get_application(FAM_APPLICATION_ID)
+    assert application.application_name == "FAM"
+    assert fam_catalog.get_application(FOM_DEV_APPLICATION_ID).application_name == "FOM_DEV"
+    test_catalog_application = fam_catalog.get_application_by_client_id(TEST_COGNITO_CLIENT_ID)
+    assert test_catalog_application.application_id == committed_test_application
+    assert test_catalog_application.app_environment == "DEV"
+    assert test_catalog_application.cognito_client_ids == (TEST_COGNITO_CLIENT_ID,)
+    assert fam_catalog.get_application(0) is None
+    assert fam_catalog.get_application_by_client_id("not_a_client") is None
+
+    # immutable snapshot
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        application.application_name = "CHANGED"
+    with pytest.raises(TypeError):
+        fam_catalog.applications[0] = application
+
+
+def test_catalog_version_checked_periodically(
+    db_pg_session: Session, db_pg_connection: Session, monkeypatch, request
+):
+    monkeypatch.setenv("CATALOG_VERSION_CHECK_SECONDS", "60")
+
+    fam_catalog = catalog.get_catalog(db_pg_session)
+    for _ in range(3):
+        assert catalog.get_catalog(db_pg_session) is fam_catalog
+    # not queried until the next check
+    assert catalog.catalog_cache.get_stats()["version_checks"] == 1
+
+    # uncommitted change of the caller's transaction: not loaded
+    add_test_application(db_pg_session)
+    monkeypatch.setattr(catalog.catalog_cache, "_next_check_at", 0.0)
+    assert catalog.get_catalog(db_pg_session) is fam_catalog
+    db_pg_session.rollback()
+
+    # committed, changed by the triggers: the next check (due) reloads the catalog
+    request.getfixturevalue("committed_test_application")
+    assert catalog.get_catalog(db_pg_session).get_application_by_client_id(TEST_COGNITO_CLIENT_ID) is None
+    monkeypatch.setattr(catalog.catalog_cache, "_next_check_at", 0.0)
+    reloaded_catalog = catalog.get_catalog(db_pg_session)
+
+    assert reloaded_catalog.version > fam_catalog.version
+    application = reloaded_catalog.get_application_by_client_id(TEST_COGNITO_CLIENT_ID)
+    assert application.application_name == TEST_APPLICATION_NAME
+    assert catalog.catalog_cache.get_stats() == {
+        "hits": 4, "version_checks": 3, "reloads": 2,
+        "version": reloaded_catalog.version, "applications": len(reloaded_catalog.applications),
+    }
+
+    # same version: checked, not reloaded
+    monkeypatch.setattr(catalog.catalog_cache, "_next_check_at", 0.0)
+    assert catalog.get_catalog(db_pg_session) is reloaded_catalog
+    assert catalog.catalog_cache.get_stats()["reloads"] == 2
+
+
+def test_catalog_served_while_checked(db_pg_session: Session, monkeypatch):
+    fam_catalog = catalog.get_catalog(db_pg_session)
+    monkeypatch.setattr(catalog.catalog_cache, "_next_check_at", 0.0)
+
+    # another thread is checking: the current snapshot is served without waiting
+    with catalog.catalog_cache._check_lock:
+        assert catalog.get_catalog(db_pg_session) is fam_catalog
+    assert catalog.catalog_cache.get_stats()["version_checks"] == 1
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from api.config import config
+
+
+class _FakeSecretsManagerClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        return {"SecretString": json.dumps({"username": "user", "password": f"pw{self.calls}"})}
+
+
+@pytest.fixture(scope="function")
+def fake_secretsmanager_client(monkeypatch):
+    client = _FakeSecretsManagerClient()
+    monkeypatch.setattr(config, "_secretsmanager_client", client)
+    monkeypatch.setattr(config, "_aws_secret_cache", {})
+    monkeypatch.setenv("DB_SECRET", "test-db-secret")
+    return client
+
+
+def test_aws_db_secret_cached_until_ttl(fake_secretsmanager_client, monkeypatch):
+    assert config.get_aws_db_credentials() == ("user", "pw1")
+    assert config.get_aws_db_credentials() == ("user", "pw1")
+    assert fake_secretsmanager_client.calls == 1
+
+    monkeypatch.setattr(config, "AWS_SECRET_CACHE_TTL_SECONDS", 0)
+    assert config.get_aws_db_credentials() == ("user", "pw2")
+    assert fake_secretsmanager_client.calls == 2
+
+
+def test_aws_db_secret_read_again_after_invalidate(fake_secretsmanager_client):
+    assert config.get_aws_db_credentials() == ("user", "pw1")
+
+    config.invalidate_aws_db_secret()
+    assert config.get_aws_db_credentials() == ("user", "pw2")
+    assert fake_secretsmanager_client.calls == 2
+
+
+def test_aws_secrets_cached_by_name(fake_secretsmanager_client):
+    config.get_aws_secret("secret-a")
+    config.get_aws_secret("secret-b")
+    config.get_aws_secret("secret-a")
+    assert fake_secretsmanager_client.calls == 2
+
+    # invalidating one secret keeps the others
+    config.invalidate_aws_secret("secret-a")
+    config.get_aws_secret("secret-b")
+    assert fake_secretsmanager_client.calls == 2
@@ -23,6 +23,7 @@ from api.app.constants import (COGNITO_USERNAME_KEY, DEFAULT_PAGE_SIZE,
                                ERROR_CODE_TERMS_CONDITIONS_REQUIRED, MIN_PAGE,
                                UserType)
 from api.app.crud import crud_user, crud_utils
+from api.app.integration.circuit_breaker import clear_circuit_breakers
 from api.app.main import app, internal_api_prefix
 from api.app.models.model import FamUser
 from api.app.routers.router_guards import (
@@ -32,6 +33,7 @@ from api.app.schemas import RequesterSchema, TargetUserSchema
 from api.app.schemas.fam_user import FamUserSchema
 from api.app.schemas.pagination import UserRolePageParamsSchema
 from api.app.schemas.target_user_validation_result import TargetUserValidationResultSchema
+from api.app.utils.ttl_cache import clear_caches
 from testspg.constants import (ACCESS_GRANT_FOM_DEV_CR_IDIR,
                                FOM_DEV_ADMIN_ROLE, FOM_PROD_ADMIN_ROLE,
                                FOM_TEST_ADMIN_ROLE,
@@ -81,6 +83,20 @@ def db_pg_session(db_pg_connection: Session):
     db_pg_connection.rollback()
 
 
+@pytest.fixture(scope="function")
+def db_pg_savepoint_session(db_pg_connection: Session):
+    """
+    A session for code that commits: its commits are savepoints of a
+    transaction rolled back after the test.
+    """
+    with db_pg_connection.get_bind().connect() as connection:
+        transaction = connection.begin()
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        yield db
+        db.close()
+        transaction.rollback()
+
+
 @pytest.fixture(scope="function")
 def test_client_fixture_unit() -> TestClient:
 
@@ -349,6 +365,22 @@ def setup_new_user(db_pg_session: Session):
     return _setup_new_user
 
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_process_caches():
+    # Caches are shared per process (see ttl_cache.register_cache), start each test empty.
+    clear_caches()
+    yield
+    clear_caches()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_upstream_circuit_breakers():
+    # Circuit breakers are shared per process, start each test with closed circuits.
+    clear_circuit_breakers()
+    yield
+    clear_circuit_breakers()
+
+
 @pytest.fixture(scope="function", autouse=True)
 def mock_forest_client_integration_service():
     # Mocked dependency class object
@@ -1,13 +1,17 @@
 import logging
 from enum import Enum
+from http import HTTPStatus
 from typing import List, Optional
 
 import pytest
-from api.app.constants import (DEFAULT_PAGE_SIZE, MIN_PAGE, SortOrderEnum,
-                               UserType)
-from api.app.crud.services.paginate_service import PaginateService
+from api.app.constants import (DEFAULT_PAGE_SIZE,
+                               ERROR_CODE_INVALID_REQUEST_PARAMETER, MIN_PAGE,
+                               PageCountMode, SortOrderEnum, UserType)
+from api.app.crud.services.paginate_service import (PaginateService,
+                                                    page_count_cache)
 from api.app.models.model import FamUser
 from api.app.schemas.pagination import PageParamsSchema
+from fastapi import HTTPException
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import Select, not_, or_, select
 from sqlalchemy.orm import Session
@@ -281,3 +285,121 @@ def test_get_paginated_results__users_paged_with_filtering(
         db_paged_users_id_set = { du.user_id for du in db_paged_users}
         result_users_id_set = { rd.user_id for rd in result_data}
         assert len(result_users_id_set.difference(db_paged_users_id_set)) == 0
+
+
+@pytest.mark.parametrize("sort_by", [None, *TestUserSortByEnum])
+@pytest.mark.parametrize("sort_order", [SortOrderEnum.ASC, SortOrderEnum.DESC])
+def test_get_paginated_results__cursor_pages_same_as_page_number_pages(
+    sort_by: TestUserSortByEnum, sort_order: SortOrderEnum, db_pg_session: Session, load_test_users
+):
+    """
+    This case tests on 'PaginateService.get_paginated_results' paging with 'next_cursor'
+    returns the same pages as paging with page number (including NULL emails sorted).
+    """
+    def get_page(page: int, cursor: str | None):
+        page_params = TestUserPageParamsSchema(
+            page=page, size=10, search=None, sort_by=sort_by, sort_order=sort_order, cursor=cursor
+        )
+        return PaginateService(
+            db_pg_session, test_base_query, None, USER_SORT_BY_MAPPED_COLUMN, page_params
+        ).get_paginated_results(TestFamUserInfoSchema)
+
+    first_page = get_page(MIN_PAGE, None)
+    assert first_page.meta.number_of_pages > 2
+    next_cursor = first_page.meta.next_cursor
+    for page in range(MIN_PAGE + 1, first_page.meta.number_of_pages + 1):
+        cursor_page = get_page(MIN_PAGE, next_cursor)
+        page_number_page = get_page(page, None)
+
+        assert cursor_page.meta == page_number_page.meta.model_copy(
+            update={"next_cursor": cursor_page.meta.next_cursor}
+        )
+        assert [user.user_id for user in cursor_page.results] == [
+            user.user_id for user in page_number_page.results
+        ]
+        next_cursor = cursor_page.meta.next_cursor
+
+    assert next_cursor is None  # last page
+
+
+@pytest.mark.parametrize(
+    "cursor_sort_order, cursor",
+    [
+        (SortOrderEnum.ASC, "not-a-cursor"),
+        (SortOrderEnum.ASC, "eyJwYWdlIjogMn0"),  # {"page": 2}
+        (SortOrderEnum.DESC, None),  # cursor of another sorting
+    ],
+)
+def test_get_paginated_results__invalid_cursor(
+    cursor_sort_order: SortOrderEnum, cursor: str | None, db_pg_session: Session, load_test_users
+):
+    if cursor is None:
+        cursor = PaginateService(
+            db_pg_session, test_base_query, None, USER_SORT_BY_MAPPED_COLUMN,
+            TestUserPageParamsSchema(page=MIN_PAGE, size=10, search=None, sort_by=None, sort_order=cursor_sort_order)
+        ).get_paginated_results(TestFamUserInfoSchema).meta.next_cursor
+    page_params = TestUserPageParamsSchema(
+        page=MIN_PAGE, size=10, search=None, sort_by=None, sort_order=SortOrderEnum.ASC, cursor=cursor
+    )
+
+    with pytest.raises(HTTPException) as e:
+        PaginateService(db_pg_session, test_base_query, None, USER_SORT_BY_MAPPED_COLUMN, page_params)
+
+    assert e.value.status_code == HTTPStatus.BAD_REQUEST
+    assert e.value.detail["code"] == ERROR_CODE_INVALID_REQUEST_PARAMETER
+
+
+@pytest.mark.parametrize("count_mode", list(PageCountMode))
+@pytest.mark.parametrize("page", [MIN_PAGE, 3, 100000])
+def test_get_paginated_results__count_modes_same_total(
+    count_mode: PageCountMode, page: int, db_pg_session: Session, load_test_users
+):
+    """
+    This case tests on 'PaginateService.get_paginated_results' total count is the
+    same with each count mode (under the estimate threshold), including past the last page.
+    """
+    mock_user_data_load = load_test_users["idir_users"] + load_test_users["bceid_users"]
+    existing_testdb_seeded_users = get_existing_testdb_seeded_users(db_pg_session, TEST_USER_NAME_PREFIX)
+    page_params = TestUserPageParamsSchema(page=page, size=10, search=None, sort_by=None, sort_order=None)
+
+    paged_result = PaginateService(
+        db_pg_session, test_base_query, None, USER_SORT_BY_MAPPED_COLUMN, page_params, count_mode
+    ).get_paginated_results(TestFamUserInfoSchema)
+
+    assert paged_result.meta.total == len(mock_user_data_load) + len(existing_testdb_seeded_users)
+    assert paged_result.meta.total_estimated is False
+
+
+def test_get_paginated_results__estimated_count_reused_by_next_pages(db_pg_session: Session, load_test_users):
+    def get_page(page: int, search: str | None = None):
+        page_params = TestUserPageParamsSchema(page=page, size=10, search=search, sort_by=None, sort_order=None)
+        return PaginateService(
+            db_pg_session, test_base_query, __build_test_filter_criteria(page_params),
+            USER_SORT_BY_MAPPED_COLUMN, page_params, PageCountMode.ESTIMATED
+        ).get_paginated_results(TestFamUserInfoSchema)
+
+    total = get_page(MIN_PAGE).meta.total
+    assert get_page(2).meta.total == total
+    assert page_count_cache.get_stats()["hits"] == 1
+
+    # another filter is counted again
+    assert get_page(2, TEST_USER_NAME_BCEID_PREFIX).meta.total < total
+    assert page_count_cache.get_stats()["hits"] == 1
+
+
+def test_get_paginated_results__estimated_total_over_threshold(
+    db_pg_session: Session, load_test_users, monkeypatch
+):
+    monkeypatch.setattr("api.app.crud.services.paginate_service.PAGE_COUNT_ESTIMATE_THRESHOLD", 1)
+    page_params = TestUserPageParamsSchema(page=MIN_PAGE, size=10, search=None, sort_by=None, sort_order=None)
+
+    paged_result = PaginateService(
+        db_pg_session, test_base_query, None, USER_SORT_BY_MAPPED_COLUMN, page_params, PageCountMode.ESTIMATED
+    ).get_paginated_results(TestFamUserInfoSchema)
+
+    assert paged_result.meta.total_estimated is True
+    assert paged_result.meta.total >= 1
+    assert paged_result.meta.number_of_pages == __get_number_of_pages(paged_result.meta.total, 10)
+    # a full page, there may be more whatever the estimate
+    assert len(paged_result.results) == 10
+    assert paged_result.meta.next_cursor is not None
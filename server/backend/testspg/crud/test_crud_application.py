@@ -1,12 +1,16 @@
 import logging
+from datetime import datetime
 
 import pytest
-from api.app.constants import (DEFAULT_PAGE_SIZE, MIN_PAGE, SortOrderEnum,
-                               UserRoleSortByEnum, UserType)
+from api.app.constants import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MIN_PAGE,
+                               SortOrderEnum, UserRoleSortByEnum, UserType)
 from api.app.crud import crud_application
 from api.app.crud.services.paginate_service import PaginateService
+from api.app.datetime_format import TIMESTAMP_FORMAT_DEFAULT
+from api.app.models import model as models
 from api.app.schemas.pagination import UserRolePageParamsSchema
 from api.app.schemas.requester import RequesterSchema
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 from testspg.constants import (FOM_DEV_APPLICATION_ID,
                                NOT_EXIST_APPLICATION_ID, TEST_REQUESTER)
@@ -115,3 +119,113 @@ def test_get_application_role_assignments_on_pagination(
             contains_any_insensitive(result_data[i], search_attributes, test_page_params.search)
             for i in range(len(result_data) - 1)
         )
+
+
+@pytest.mark.parametrize("sort_by", list(UserRoleSortByEnum))
+@pytest.mark.parametrize("sort_order", [SortOrderEnum.ASC, SortOrderEnum.DESC])
+def test_get_application_role_assignments_cursor_pagination(
+    mocker, db_pg_session: Session, load_fom_dev_user_role_test_data, sort_by, sort_order
+):
+    """
+    Paging with 'next_cursor' returns the same user role assignments as paging
+    with page number, for every sortBy column.
+    """
+    dummy_test_requester = RequesterSchema(**TEST_REQUESTER, user_type_code=UserType.IDIR)
+    mocker.patch("api.app.crud.crud_utils.is_app_admin", return_value=True)
+    original_get_application_role_assignments_fn = crud_application.get_application_role_assignments.__wrapped__
+
+    def get_page(page: int, cursor: str | None):
+        page_params = UserRolePageParamsSchema(
+            page=page, size=10, search=None, sort_by=sort_by, sort_order=sort_order, cursor=cursor
+        )
+        return original_get_application_role_assignments_fn(
+            db=db_pg_session, application_id=FOM_DEV_APPLICATION_ID,
+            requester=dummy_test_requester, page_params=page_params
+        )
+
+    first_page = get_page(MIN_PAGE, None)
+    assert first_page.meta.number_of_pages > 1
+    next_cursor = first_page.meta.next_cursor
+    for page in range(MIN_PAGE + 1, first_page.meta.number_of_pages + 1):
+        cursor_page = get_page(MIN_PAGE, next_cursor)
+        assert cursor_page.meta.page_number == page
+        assert [item.user_role_xref_id for item in cursor_page.results] == [
+            item.user_role_xref_id for item in get_page(page, None).results
+        ]
+        next_cursor = cursor_page.meta.next_cursor
+
+    assert next_cursor is None
+
+
+@pytest.mark.parametrize("search", ["IDIR", "submitter", "990099", "test", "NOT_EXISTS", "DATE_PREFIX"])
+def test_get_application_role_assignments_search_matches_all_columns(
+    mocker, db_pg_session: Session, load_fom_dev_user_role_test_data, search
+):
+    """
+    The indexed keyword search finds the same user role assignments as an
+    'ilike' of the keyword on every searched column of the joined rows.
+    """
+    dummy_test_requester = RequesterSchema(**TEST_REQUESTER, user_type_code=UserType.IDIR)
+    mocker.patch("api.app.crud.crud_utils.is_app_admin", return_value=True)
+    original_get_application_role_assignments_fn = crud_application.get_application_role_assignments.__wrapped__
+    db_pg_session.flush()
+    if search == "DATE_PREFIX":
+        # e.g. "2025-04-11": the day the test data was created
+        search = db_pg_session.scalar(
+            select(func.to_char(models.FamUserRoleXref.create_date, "YYYY-MM-DD"))
+            .join(models.FamRole)
+            .where(models.FamRole.application_id == FOM_DEV_APPLICATION_ID)
+            .order_by(models.FamUserRoleXref.create_date.desc())
+            .limit(1)
+        )
+
+    paged_results = original_get_application_role_assignments_fn(
+        db=db_pg_session, application_id=FOM_DEV_APPLICATION_ID, requester=dummy_test_requester,
+        page_params=UserRolePageParamsSchema(
+            page=MIN_PAGE, size=MAX_PAGE_SIZE, search=search, sort_by=None, sort_order=None
+        )
+    )
+
+    search_pattern = f"%{search}%"
+    expected_ids = db_pg_session.scalars(
+        select(models.FamUserRoleXref.user_role_xref_id)
+        .join(models.FamUser)
+        .join(models.FamRole)
+        .outerjoin(models.FamRole.forest_client_relation)
+        .where(
+            models.FamRole.application_id == FOM_DEV_APPLICATION_ID,
+            or_(
+                models.FamUser.user_name.ilike(search_pattern),
+                models.FamUser.email.ilike(search_pattern),
+                models.FamUser.full_name.ilike(search_pattern),
+                models.FamRole.display_name.ilike(search_pattern),
+                models.FamForestClient.forest_client_number.ilike(search_pattern),
+                func.to_char(models.FamUserRoleXref.create_date, TIMESTAMP_FORMAT_DEFAULT).ilike(search_pattern),
+            ),
+        )
+    ).all()
+    assert sorted(item.user_role_xref_id for item in paged_results.results) == sorted(expected_ids)
+    assert paged_results.meta.total == len(expected_ids)
+    if search != "NOT_EXISTS":
+        assert len(expected_ids) > 0
+
+
+@pytest.mark.parametrize(
+    "search_keyword, expected_range",
+    [
+        ("2025", (datetime(2025, 1, 1), datetime(2026, 1, 1))),
+        ("2025-12", (datetime(2025, 12, 1), datetime(2026, 1, 1))),
+        ("2024-02-29", (datetime(2024, 2, 29), datetime(2024, 3, 1))),
+        ("2025-04-11 23", (datetime(2025, 4, 11, 23), datetime(2025, 4, 12))),
+        ("2025-04-11 20:29", (datetime(2025, 4, 11, 20, 29), datetime(2025, 4, 11, 20, 30))),
+        ("2025-04-11 20:29:02", (datetime(2025, 4, 11, 20, 29, 2), datetime(2025, 4, 11, 20, 29, 3))),
+        ("2025-13", None),
+        ("2025-02-30", None),
+        ("2025-4", None),
+        ("04-11", None),
+        ("20:29", None),
+        ("submitter", None),
+    ],
+)
+def test_search_keyword_date_range(search_keyword, expected_range):
+    assert crud_application.__search_keyword_date_range(search_keyword) == expected_range
@@ -0,0 +1,216 @@
+import logging
+from datetime import timedelta
+
+import pytest
+import requests
+from api.app import email_outbox_dispatcher
+from api.app.constants import (EMAIL_OUTBOX_DISPATCH_BATCH_SIZE,
+                               EMAIL_OUTBOX_MAX_ATTEMPTS, EmailSendingStatus)
+from api.app.crud import crud_email_outbox
+from api.app.email_outbox_dispatcher import (SendRateLimiter,
+                                             dispatch_email_outbox,
+                                             dispatch_outbox_batch)
+from api.app.request_deadline import RequestDeadlineExceeded
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from testspg.constants import TEST_CREATOR
+
+LOGGER = logging.getLogger(__name__)
+
+TEST_EMAIL_PARAMS = {
+    "email_address": "outbox.test@example.com",
+    "template_id": "0806a36e-b33d-4e43-a401-b1eb92777116",
+    "personalisation": {"user_name": "OUTBOX_TEST", "first_name": "Outbox"},
+}
+
+
+class FakeEmailService:
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.sent = []
+
+    def send_email(self, email_params: dict):
+        self.sent.append(email_params)
+        if self.error:
+            raise self.error
+        return {"id": "f6b2a1c4-5ad1-4cd2-9e0e-6a1c2a9f3b11"}
+
+
+def http_error(status_code: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(f"{status_code} error", response=response)
+
+
+def dispatch(db: Session, email_service: FakeEmailService) -> int:
+    return dispatch_outbox_batch(db, email_service, SendRateLimiter(1000))
+
+
+@pytest.fixture(scope="function")
+def db_pg_session(db_pg_savepoint_session: Session):
+    # the dispatcher commits
+    return db_pg_savepoint_session
+
+
+def test_create_outbox_email_queued(db_pg_session: Session):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+    db_pg_session.refresh(outbox_email)
+
+    assert outbox_email.email_outbox_id is not None
+    assert outbox_email.email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+    assert outbox_email.attempt_count == 0
+    assert outbox_email.send_to_email == TEST_EMAIL_PARAMS["email_address"]
+    assert crud_email_outbox.get_queued_outbox_emails_due(db_pg_session, 10) == [outbox_email]
+
+
+def test_dispatch_outbox_batch_sends_queued_emails(db_pg_session: Session):
+    outbox_emails = [
+        crud_email_outbox.create_outbox_email(db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR)
+        for _ in range(3)
+    ]
+    email_service = FakeEmailService()
+
+    assert dispatch(db_pg_session, email_service) == 3
+
+    assert email_service.sent == [TEST_EMAIL_PARAMS] * 3
+    for outbox_email in outbox_emails:
+        assert outbox_email.email_sending_status == EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS
+        assert outbox_email.notification_id is not None
+        assert outbox_email.attempt_count == 1
+    # sent emails are not sent again
+    assert dispatch(db_pg_session, email_service) == 0
+
+
+def test_dispatch_outbox_batch_retries_later(db_pg_session: Session):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+
+    assert dispatch(db_pg_session, FakeEmailService(requests.ConnectionError("down"))) == 1
+
+    db_pg_session.refresh(outbox_email)
+    assert outbox_email.email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+    assert outbox_email.attempt_count == 1
+    assert outbox_email.last_error == "down"
+    assert outbox_email.next_attempt_date > db_pg_session.scalar(select(func.localtimestamp()))
+    # not due before the backoff is over
+    assert crud_email_outbox.get_queued_outbox_emails_due(db_pg_session, 10) == []
+
+
+@pytest.mark.parametrize(
+    "error, attempt_count",
+    [
+        (http_error(400), 0),  # rejected by GC Notify, retrying does not help
+        (http_error(500), EMAIL_OUTBOX_MAX_ATTEMPTS - 1),  # last attempt
+    ],
+)
+def test_dispatch_outbox_batch_gives_up(db_pg_session: Session, error, attempt_count):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+    outbox_email.attempt_count = attempt_count
+
+    assert dispatch(db_pg_session, FakeEmailService(error)) == 1
+
+    assert outbox_email.email_sending_status == EmailSendingStatus.SENT_TO_EMAIL_SERVICE_FAILURE
+    assert outbox_email.attempt_count == attempt_count + 1
+    assert crud_email_outbox.get_queued_outbox_emails_due(db_pg_session, 10) == []
+
+
+def test_dispatch_outbox_batch_retries_rate_limited(db_pg_session: Session):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+
+    dispatch(db_pg_session, FakeEmailService(http_error(429)))
+
+    assert outbox_email.email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+
+
+class DispatcherStopped(BaseException):
+    pass
+
+
+def test_dispatch_outbox_batch_claims_before_sending(db_pg_session: Session, mocker):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+    email_service = FakeEmailService()
+
+    # stopped after sending, before recording the outcome: the claim is committed
+    mocker.patch.object(email_outbox_dispatcher, "__record_attempt", side_effect=DispatcherStopped)
+    with pytest.raises(DispatcherStopped):
+        dispatch(db_pg_session, email_service)
+    db_pg_session.rollback()
+    mocker.stopall()
+
+    assert email_service.sent == [TEST_EMAIL_PARAMS]
+    assert outbox_email.email_sending_status == EmailSendingStatus.SENDING_TO_EMAIL_SERVICE
+    assert outbox_email.attempt_count == 1
+    # not sent again while claimed
+    assert dispatch(db_pg_session, email_service) == 0
+
+    # claimed again once the claim has run out
+    outbox_email.next_attempt_date = func.localtimestamp() - timedelta(seconds=1)
+    db_pg_session.commit()
+    assert dispatch(db_pg_session, email_service) == 1
+    assert email_service.sent == [TEST_EMAIL_PARAMS] * 2
+    assert outbox_email.email_sending_status == EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS
+    assert outbox_email.attempt_count == 2
+
+
+def test_dispatch_outbox_batch_gives_up_claim_on_last_attempt(db_pg_session: Session):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+    outbox_email.email_sending_status = EmailSendingStatus.SENDING_TO_EMAIL_SERVICE
+    outbox_email.attempt_count = EMAIL_OUTBOX_MAX_ATTEMPTS
+    outbox_email.next_attempt_date = func.localtimestamp() - timedelta(seconds=1)
+    email_service = FakeEmailService()
+
+    assert dispatch(db_pg_session, email_service) == 1
+
+    assert email_service.sent == []
+    assert outbox_email.email_sending_status == EmailSendingStatus.SENT_TO_EMAIL_SERVICE_FAILURE
+    assert outbox_email.attempt_count == EMAIL_OUTBOX_MAX_ATTEMPTS
+
+
+def test_dispatch_outbox_batch_releases_emails_out_of_time(db_pg_session: Session):
+    outbox_email = crud_email_outbox.create_outbox_email(
+        db_pg_session, TEST_EMAIL_PARAMS, TEST_CREATOR
+    )
+
+    dispatch(db_pg_session, FakeEmailService(RequestDeadlineExceeded("no time left")))
+
+    assert outbox_email.email_sending_status == EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE
+    assert outbox_email.attempt_count == 0
+    assert crud_email_outbox.get_queued_outbox_emails_due(db_pg_session, 10) == [outbox_email]
+
+
+@pytest.mark.parametrize(
+    "time_budget_seconds, batch_sizes",
+    [
+        (60, [EMAIL_OUTBOX_DISPATCH_BATCH_SIZE]),
+        (1, [9]),  # what can be sent at the send rate in the time left (a bit under 1s)
+        (0.05, []),  # no time to send any email
+    ],
+)
+def test_dispatch_email_outbox_batch_fits_time_budget(mocker, time_budget_seconds, batch_sizes):
+    def get_no_db():
+        yield None
+
+    mocker.patch.object(email_outbox_dispatcher.database, "get_job_db", new=get_no_db)
+    dispatch_spy = mocker.patch.object(email_outbox_dispatcher, "dispatch_outbox_batch", return_value=0)
+
+    assert dispatch_email_outbox(FakeEmailService(), time_budget_seconds) == 0
+    assert [call.args[3] for call in dispatch_spy.call_args_list] == batch_sizes
+
+
+def test_handler_time_budget_under_lambda_timeout(mocker):
+    dispatch_spy = mocker.patch.object(email_outbox_dispatcher, "dispatch_email_outbox", return_value=3)
+    context = mocker.Mock(get_remaining_time_in_millis=lambda: 15000)
+
+    assert email_outbox_dispatcher.handler({}, context) == {"attempted_count": 3}
+    dispatch_spy.assert_called_once_with(time_budget_seconds=13)
@@ -1,11 +1,18 @@
 import logging
+from unittest.mock import patch
 
 import pytest
-from api.app.constants import CURRENT_TERMS_AND_CONDITIONS_VERSION, UserType
+from api.app import request_deadline
+from api.app.constants import (CURRENT_TERMS_AND_CONDITIONS_VERSION,
+                               IDIM_SYNC_BATCH_SECONDS,
+                               IDIM_SYNC_CHECKPOINT_NAME,
+                               IdimSearchUserParamType, UserType)
 from api.app.crud import crud_user
-from api.app.models.model import FamUserTermsConditions
+from api.app.integration.idim_proxy import IdimProxyService
+from api.app.models.model import (FamUser, FamUserIdimSyncCheckpoint,
+                                  FamUserTermsConditions)
 from api.app.schemas import FamUserSchema, TargetUserSchema
-from sqlalchemy import insert
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 from testspg.constants import (TEST_CREATOR, TEST_NEW_BCEID_USER,
                                TEST_NEW_USER, TEST_NOT_EXIST_USER_TYPE,
@@ -308,3 +315,199 @@ def test_fetch_initial_requester_info_can_join_its_delegated_admin_record(
     assert len(fetched_user.fam_access_control_privileges) > 0
     delegated_admin_record = fetched_user.fam_access_control_privileges[0]
     assert delegated_admin_record.user_id == bceid_user.user_id
+
+
+def to_sync_user_guid(user_name: str) -> str:
+    return f"{user_name:0>32}"[-32:]
+
+
+def fake_lookup_idir(self, search_params):
+    return {
+        "found": True,
+        "userId": search_params.userId,
+        "guid": to_sync_user_guid(search_params.userId),
+        "firstName": "SYNCED",
+        "lastName": search_params.userId,
+        "email": f"{search_params.userId}@example.com",
+    }
+
+
+def fake_lookup_business_bceid(self, search_params):
+    by_guid = search_params.searchUserBy == IdimSearchUserParamType.USER_GUID
+    return {
+        "found": True,
+        # searched by guid: user name not known here, nothing to update
+        "userId": None if by_guid else search_params.searchValue,
+        "guid": search_params.searchValue if by_guid else to_sync_user_guid(search_params.searchValue),
+        "businessGuid": "SYNCED_BUSINESS_GUID",
+        "firstName": "SYNCED",
+        "lastName": search_params.searchValue,
+        "email": None,
+    }
+
+
+@pytest.fixture(scope="function")
+def idim_sync_users(db_pg_savepoint_session: Session, monkeypatch):
+    """
+    Returns a function creating users to sync: the sync checkpoint is set to
+    just before them so only they are synced. The sync commits each batch.
+    """
+    monkeypatch.setenv("FAM_UPDATE_USER_INFO_REQUESTER_NAME", "COGUSTAF")
+    db_pg_savepoint_session.merge(
+        FamUserIdimSyncCheckpoint(
+            sync_name=IDIM_SYNC_CHECKPOINT_NAME,
+            last_user_id=db_pg_savepoint_session.scalar(select(func.max(FamUser.user_id))),
+        )
+    )
+
+    def create_users(users):
+        fam_users = [
+            FamUser(
+                user_type_code=user_type_code,
+                user_name=user_name,
+                user_guid=user_guid,
+                create_user=TEST_CREATOR,
+            )
+            for user_type_code, user_name, user_guid in users
+        ]
+        db_pg_savepoint_session.add_all(fam_users)
+        db_pg_savepoint_session.flush()
+        return fam_users
+
+    with patch.object(IdimProxyService, "lookup_idir", fake_lookup_idir), patch.object(
+        IdimProxyService, "lookup_business_bceid", fake_lookup_business_bceid
+    ):
+        yield create_users
+
+
+def test_update_user_info_from_idim_source_resumes_from_checkpoint(
+    db_pg_savepoint_session: Session, idim_sync_users
+):
+    fam_users = idim_sync_users(
+        [(UserType.IDIR, f"IDIM_SYNC_{i}", None) for i in range(4)]
+        + [(UserType.BCEID, "IDIM_SYNC_BCEID", to_sync_user_guid("IDIM_SYNC_BCEID"))]
+    )
+    user_ids = [fam_user.user_id for fam_user in fam_users]
+
+    # no time budget: one batch of 2 users per run, each run resuming after the last one
+    runs = [
+        crud_user.update_user_info_from_idim_source(
+            db_pg_savepoint_session, False, 1, 2, time_budget_seconds=0
+        )
+        for _ in range(3)
+    ]
+
+    assert [run.users_count_on_page for run in runs] == [2, 2, 1]
+    assert [run.checkpoint_user_id for run in runs] == [user_ids[1], user_ids[3], user_ids[4]]
+    assert [run.sync_completed for run in runs] == [False, False, True]
+    synced_user_ids = [
+        user["user_id"] for run in runs for user in run.success_user_update_list
+    ]
+    assert synced_user_ids == user_ids
+    # pass over all users done: next run starts from the first user again
+    checkpoint = db_pg_savepoint_session.get(FamUserIdimSyncCheckpoint, IDIM_SYNC_CHECKPOINT_NAME)
+    assert checkpoint.last_user_id == 0
+
+    db_pg_savepoint_session.expire_all()
+    idir_user = db_pg_savepoint_session.get(FamUser, user_ids[0])
+    assert idir_user.user_guid == to_sync_user_guid("IDIM_SYNC_0")
+    assert idir_user.first_name == "SYNCED"
+    assert idir_user.email == "IDIM_SYNC_0@example.com"
+    bceid_user = db_pg_savepoint_session.get(FamUser, user_ids[4])
+    assert bceid_user.user_name == "IDIM_SYNC_BCEID"
+    assert bceid_user.business_guid == "SYNCED_BUSINESS_GUID"
+
+
+def test_update_user_info_from_idim_source_results_per_user(
+    db_pg_savepoint_session: Session, idim_sync_users
+):
+    fam_users = idim_sync_users(
+        [
+            (UserType.IDIR, "IDIM_SYNC_OK", None),
+            # guid in FAM does not match the one found in IDIM
+            (UserType.IDIR, "IDIM_SYNC_MISMATCH", to_sync_user_guid("OTHER")),
+            (UserType.IDIR, "IDIM_SYNC_NOT_FOUND", None),
+            (UserType.IDIR, "IDIM_SYNC_ERROR", None),
+            # IDIM returns a guid already used by another IDIR user
+            (UserType.IDIR, "IDIM_SYNC_DUP_GUID", None),
+        ]
+    )
+    existing_guid_user = db_pg_savepoint_session.scalars(
+        select(FamUser).where(
+            FamUser.user_type_code == UserType.IDIR, FamUser.user_guid.is_not(None)
+        )
+    ).first()
+
+    def lookup_idir(self, search_params):
+        if search_params.userId == "IDIM_SYNC_NOT_FOUND":
+            return {"found": False}
+        if search_params.userId == "IDIM_SYNC_ERROR":
+            raise RuntimeError("IDIM Proxy unavailable")
+        result = fake_lookup_idir(self, search_params)
+        if search_params.userId == "IDIM_SYNC_DUP_GUID":
+            result["guid"] = existing_guid_user.user_guid
+        return result
+
+    with patch.object(IdimProxyService, "lookup_idir", lookup_idir):
+        result = crud_user.update_user_info_from_idim_source(db_pg_savepoint_session, False, 1, 100)
+
+    def user_names(update_list):
+        return [user["user_name"] for user in update_list]
+
+    # the lookup failing (e.g. IDIM timed out) is retried by the next run
+    assert result.sync_completed is False
+    assert result.checkpoint_user_id == fam_users[2].user_id
+    assert result.users_count_on_page == len(fam_users)
+    assert user_names(result.success_user_update_list) == ["IDIM_SYNC_OK"]
+    assert user_names(result.mismatch_user_update_list) == ["IDIM_SYNC_MISMATCH"]
+    assert user_names(result.failed_user_update_list) == [
+        "IDIM_SYNC_NOT_FOUND", "IDIM_SYNC_ERROR", "IDIM_SYNC_DUP_GUID"
+    ]
+    # the user failing the update did not fail the others in the same batch
+    db_pg_savepoint_session.expire_all()
+    assert db_pg_savepoint_session.get(FamUser, fam_users[0].user_id).first_name == "SYNCED"
+    assert db_pg_savepoint_session.get(FamUser, fam_users[4].user_id).user_guid is None
+
+
+def test_update_user_info_from_idim_source_keeps_committed_batches(
+    db_pg_savepoint_session: Session, idim_sync_users, monkeypatch
+):
+    fam_users = idim_sync_users([(UserType.IDIR, f"IDIM_SYNC_{i}", None) for i in range(4)])
+    update_users_from_idim = getattr(crud_user, "__update_users_from_idim")
+    update_calls = []
+
+    def failing_second_batch(*args):
+        update_calls.append(args)
+        if len(update_calls) == 2:
+            raise RuntimeError("database unavailable")
+        return update_users_from_idim(*args)
+
+    monkeypatch.setattr(crud_user, "__update_users_from_idim", failing_second_batch)
+    with pytest.raises(RuntimeError):
+        crud_user.update_user_info_from_idim_source(db_pg_savepoint_session, False, 1, 2)
+    db_pg_savepoint_session.rollback()
+
+    # the first batch is kept, the next run resumes after it
+    checkpoint = db_pg_savepoint_session.get(FamUserIdimSyncCheckpoint, IDIM_SYNC_CHECKPOINT_NAME)
+    assert checkpoint.last_user_id == fam_users[1].user_id
+    assert db_pg_savepoint_session.get(FamUser, fam_users[0].user_id).first_name == "SYNCED"
+    assert db_pg_savepoint_session.get(FamUser, fam_users[2].user_id).first_name is None
+
+
+def test_update_user_info_from_idim_source_within_request_deadline(
+    db_pg_savepoint_session: Session, idim_sync_users, monkeypatch
+):
+    fam_users = idim_sync_users([(UserType.IDIR, f"IDIM_SYNC_{i}", None) for i in range(4)])
+
+    # too little time left for a batch: not started
+    with request_deadline.request_deadline(IDIM_SYNC_BATCH_SECONDS - 1):
+        with pytest.raises(request_deadline.RequestDeadlineExceeded):
+            crud_user.update_user_info_from_idim_source(db_pg_savepoint_session, False, 1, 2)
+    db_pg_savepoint_session.rollback()
+
+    # too little time left after the first batch: no other batch started
+    monkeypatch.setattr(request_deadline, "has_time_left", lambda seconds: False)
+    result = crud_user.update_user_info_from_idim_source(db_pg_savepoint_session, False, 1, 2)
+    assert result.users_count_on_page == 2
+    assert result.checkpoint_user_id == fam_users[1].user_id
+    assert result.sync_completed is False
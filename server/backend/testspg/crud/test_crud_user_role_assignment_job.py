@@ -0,0 +1,235 @@
+import logging
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from zoneinfo import ZoneInfo
+
+import pytest
+import requests
+from api.app import role_assignment_job_worker
+from api.app.constants import (ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS,
+                               EmailSendingStatus, RoleAssignmentJobStatus,
+                               UserType)
+from api.app.datetime_format import BC_TIMEZONE
+from api.app.crud import crud_user_role_assignment_job
+from api.app.models.model import FamEmailOutbox
+from api.app.schemas import FamUserRoleAssignmentJobCreateSchema
+from api.app.schemas.target_user_validation_result import (
+    FailedTargetUserSchema, TargetUserValidationResultSchema)
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from testspg.constants import FOM_DEV_REVIEWER_ROLE_ID
+from testspg.test_data.user_role_assignment_test_data import \
+    create_test_requester
+
+LOGGER = logging.getLogger(__name__)
+
+JOB_TEST_USERS = [
+    {"user_name": "JOB_TEST_USER_1", "user_guid": "JOBTESTGUID1234567890ABCDEF12345"},
+    {"user_name": "JOB_TEST_USER_2", "user_guid": "JOBTESTGUID2345678901234567890AB"},
+    {"user_name": "JOB_TEST_USER_3", "user_guid": "JOBTESTGUID3456789012345678901AB"},
+]
+NOT_IN_IDIM_USER_NAME = JOB_TEST_USERS[2]["user_name"]
+
+
+def create_job_request(
+    role_id: int = FOM_DEV_REVIEWER_ROLE_ID, requires_send_user_email: bool = False
+) -> FamUserRoleAssignmentJobCreateSchema:
+    return FamUserRoleAssignmentJobCreateSchema(
+        users=JOB_TEST_USERS,
+        user_type_code=UserType.IDIR,
+        role_id=role_id,
+        requires_send_user_email=requires_send_user_email,
+    )
+
+
+@pytest.fixture
+def mock_validate_target_users(mocker):
+    """IDIM verification: all users found but NOT_IN_IDIM_USER_NAME."""
+    def _validate_target_users(requester, target_users, role):
+        return TargetUserValidationResultSchema(
+            verified_users=[user for user in target_users if user.user_name != NOT_IN_IDIM_USER_NAME],
+            failed_users=[
+                FailedTargetUserSchema(
+                    user_name=user.user_name, user_guid=user.user_guid, error_reason="User not found"
+                )
+                for user in target_users
+                if user.user_name == NOT_IN_IDIM_USER_NAME
+            ],
+        )
+
+    return mocker.patch(
+        "api.app.role_assignment_job_worker.validate_target_users",
+        side_effect=_validate_target_users,
+    )
+
+
+@pytest.fixture
+def mock_validate_target_users_with_email(mock_validate_target_users):
+    """Same as mock_validate_target_users, the users found have an email."""
+    validate_target_users = mock_validate_target_users.side_effect
+
+    def _validate_target_users(requester, target_users, role):
+        result = validate_target_users(requester, target_users, role)
+        result.verified_users = [
+            user.model_copy(update={"email": f"{user.user_name.lower()}@example.com"})
+            for user in result.verified_users
+        ]
+        return result
+
+    mock_validate_target_users.side_effect = _validate_target_users
+    return mock_validate_target_users
+
+
+def test_create_job_queued(db_pg_session: Session):
+    job = crud_user_role_assignment_job.create_job(
+        db_pg_session, create_job_request(), create_test_requester()
+    )
+
+    assert job.user_role_assignment_job_id is not None
+    assert job.job_status == RoleAssignmentJobStatus.QUEUED
+    assert job.total_count == 3
+    assert job.processed_count == 0
+    assert job.results == []
+    assert crud_user_role_assignment_job.get_next_job_to_process(db_pg_session) == job
+
+
+def test_process_job_batch_saves_progress(db_pg_session: Session, mock_validate_target_users):
+    job = crud_user_role_assignment_job.create_job(
+        db_pg_session, create_job_request(), create_test_requester()
+    )
+
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job, batch_size=2) == 2
+
+    assert job.job_status == RoleAssignmentJobStatus.IN_PROGRESS
+    assert job.processed_count == 2
+    assert [result["status_code"] for result in job.results] == [HTTPStatus.OK, HTTPStatus.OK]
+    assert [result["detail"]["user"]["user_name"] for result in job.results] == [
+        user["user_name"] for user in JOB_TEST_USERS[:2]
+    ]
+
+    # next batch: the remaining user, not found in IDIM
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job, batch_size=2) == 1
+
+    assert job.job_status == RoleAssignmentJobStatus.COMPLETED
+    assert job.processed_count == 3
+    assert len(job.results) == 3
+    assert job.results[2]["status_code"] == HTTPStatus.BAD_REQUEST
+    assert job.results[2]["error_message"] == "User not found"
+    assert mock_validate_target_users.call_count == 2
+    # completed jobs are not processed again
+    assert crud_user_role_assignment_job.get_next_job_to_process(db_pg_session) is None
+
+
+def test_process_job_batch_fails_job(db_pg_session: Session, mock_validate_target_users):
+    job = crud_user_role_assignment_job.create_job(
+        db_pg_session, create_job_request(role_id=-1), create_test_requester()
+    )
+
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job) == 0
+
+    assert job.job_status == RoleAssignmentJobStatus.FAILED
+    assert job.processed_count == 0
+    assert "Role id -1 does not exist." in job.last_error
+    assert crud_user_role_assignment_job.get_next_job_to_process(db_pg_session) is None
+
+
+def test_process_job_batch_retries_unavailable_upstream(db_pg_session: Session, mocker):
+    mocker.patch(
+        "api.app.role_assignment_job_worker.validate_target_users",
+        side_effect=requests.ConnectionError("IDIM not available"),
+    )
+    job = crud_user_role_assignment_job.create_job(
+        db_pg_session, create_job_request(), create_test_requester()
+    )
+
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job) == 0
+
+    # retried later, not failed
+    assert job.job_status == RoleAssignmentJobStatus.IN_PROGRESS
+    assert job.attempt_count == 1
+    assert job.processed_count == 0
+    assert "IDIM not available" in job.last_error
+    assert crud_user_role_assignment_job.get_next_job_to_process(db_pg_session) is None
+
+    # last attempt
+    job.attempt_count = ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS - 1
+    job.next_attempt_date = func.now()
+    db_pg_session.flush()
+    assert crud_user_role_assignment_job.get_next_job_to_process(db_pg_session) == job
+
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job) == 0
+
+    assert job.job_status == RoleAssignmentJobStatus.FAILED
+    assert job.attempt_count == ROLE_ASSIGNMENT_JOB_MAX_ATTEMPTS
+    assert crud_user_role_assignment_job.get_next_job_to_process(db_pg_session) is None
+
+
+def test_process_job_batch_with_expiry_date_past_since_created(
+    db_pg_session: Session, mock_validate_target_users
+):
+    role_assignment_request = create_job_request()
+    role_assignment_request.expiry_date_date = (
+        datetime.now(ZoneInfo(BC_TIMEZONE)).date() + timedelta(days=1)
+    ).isoformat()
+    job = crud_user_role_assignment_job.create_job(
+        db_pg_session, role_assignment_request, create_test_requester()
+    )
+    # the job runs after the expiry date
+    job.role_assignment_request = {**job.role_assignment_request, "expiry_date_date": "2020-01-01"}
+    db_pg_session.flush()
+
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job, batch_size=2) == 2
+
+    assert job.job_status == RoleAssignmentJobStatus.IN_PROGRESS
+    assert [result["status_code"] for result in job.results] == [HTTPStatus.OK, HTTPStatus.OK]
+    # granted with the stored expiry date
+    assert datetime.fromisoformat(job.results[0]["detail"]["expiry_date"]).year == 2020
+
+
+def test_job_response_reads_email_sending_status(
+    db_pg_session: Session, mock_validate_target_users_with_email
+):
+    job = crud_user_role_assignment_job.create_job(
+        db_pg_session, create_job_request(requires_send_user_email=True), create_test_requester()
+    )
+    role_assignment_job_worker.process_job_batch(db_pg_session, job)
+
+    def email_sending_statuses():
+        job_res = crud_user_role_assignment_job.to_job_response(db_pg_session, job)
+        return [result.email_sending_status for result in job_res.assignments_detail]
+
+    assert email_sending_statuses() == [
+        EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE,
+        EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE,
+        EmailSendingStatus.NOT_REQUIRED,  # not found in IDIM
+    ]
+
+    # sent by the email outbox dispatcher afterwards
+    user_role_xref_id = job.results[0]["detail"]["user_role_xref_id"]
+    db_pg_session.execute(
+        update(FamEmailOutbox)
+        .where(FamEmailOutbox.user_role_xref_ids.contains([user_role_xref_id]))
+        .values(email_sending_status=EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS)
+    )
+    assert email_sending_statuses() == [
+        EmailSendingStatus.SENT_TO_EMAIL_SERVICE_SUCCESS,
+        EmailSendingStatus.QUEUED_FOR_EMAIL_SERVICE,
+        EmailSendingStatus.NOT_REQUIRED,
+    ]
+
+
+def test_start_role_assignment_jobs_only_after_commit(db_pg_session: Session, mocker):
+    start_mock = mocker.patch(
+        "api.app.role_assignment_job_worker.start_role_assignment_jobs"
+    )
+    role_assignment_job_worker.start_role_assignment_jobs_after_commit(db_pg_session)
+
+    # a savepoint released is not the job committed
+    with db_pg_session.begin_nested():
+        pass
+    start_mock.assert_not_called()
+
+    # not started after a rollback, nor after the next commit
+    db_pg_session.rollback()
+    assert role_assignment_job_worker.START_AFTER_COMMIT_KEY not in db_pg_session.info
+    start_mock.assert_not_called()
@@ -4,13 +4,14 @@ from datetime import datetime, timedelta, timezone, time as dt_time
 from zoneinfo import ZoneInfo
 from api.app.datetime_format import BC_TIMEZONE
 from http import HTTPStatus
+from sqlalchemy import event, select
 from sqlalchemy.orm import Session
 import pytest
 from api.app.schemas import TargetUserSchema
 from api.app.schemas.fam_user_role_assignment_create_response import FamUserRoleAssignmentCreateRes
 from api.app.crud import crud_user_role
+from api.app.models import model as models
 from api.app.constants import UserType, MAX_NUM_USERS_ASSIGNMENT_GRANT
-import api.app.crud.crud_user as crud_user
 from testspg.constants import (
     FOM_DEV_SUBMITTER_ROLE_ID,
     FOM_DEV_REVIEWER_ROLE_ID,
@@ -276,18 +277,59 @@ class TestCrudMultiUserForestClientLogic:
         # Expected: 2 users * 2 forest clients = 4 assignments
         assert len(results) >= len(verified_users)
 
+    def test_crud_forest_client_numbers_searched_once_per_request(self, db_pg_session: Session):
+        """
+        TEST: Forest client numbers are validated with one FC API search for the whole request.
+        Verify:
+        - Exactly one search with all requested numbers, regardless of the number of users
+        - Each user gets an assignment for each forest client child role
+        """
+        verified_users = [CRUD_TEST_USER_1, CRUD_TEST_USER_2, CRUD_TEST_USER_3]
+        forest_clients = [FC_NUMBER_EXISTS_ACTIVE_00001018, FC_NUMBER_EXISTS_ACTIVE_00001011]
+        request = create_role_assignment_request(
+            users=verified_users,
+            user_type_code=UserType.BCEID,
+            role_id=FOM_DEV_SUBMITTER_ROLE_ID,  # Abstract role
+            forest_client_numbers=forest_clients
+        )
+        requester = create_test_requester()
+
+        with patch("api.app.crud.crud_user_role.ForestClientIntegrationService") as mock_fc_service_class:
+            mock_search = mock_fc_service_class.return_value.search
+            mock_search.return_value = [
+                {
+                    "clientNumber": forest_client_number,
+                    "clientName": f"CLIENT {forest_client_number}",
+                    "clientStatusCode": "ACT",
+                    "clientTypeCode": "C",
+                }
+                for forest_client_number in forest_clients
+            ]
+            results = crud_user_role.create_user_role_assignment_many(
+                db=db_pg_session,
+                request=request,
+                verified_users=verified_users,
+                requester=requester,
+            )
+
+        # Assert: one upstream search for 3 users * 2 forest clients
+        mock_search.assert_called_once()
+        assert mock_search.call_args.args[0].forest_client_numbers == forest_clients
+        assert len(results) == len(verified_users) * len(forest_clients)
+        for result in results:
+            assert result.status_code == HTTPStatus.OK
+
 
 class TestCrudMultiUserEdgeCases:
     """Test edge cases for multi-user CRUD operations."""
 
-    def test_crud_per_user_error_isolation(self, db_pg_session: Session):
+    def test_crud_bulk_error_reported_per_user(self, db_pg_session: Session):
         """
-        TEST: Error in one user doesn't affect others.
+        TEST: Valid users are granted with shared set-based statements; a failed statement is reported per user.
         Verify:
-            - User 1: succeeds
-            - User 2: fails (db error simulated)
-            - User 3: succeeds
-            - All 3 return a result with appropriate status
+            - Each user gets a result with the error (500)
+            - The session is still usable after the failed statement (savepoint rolled back)
+            - The users upserted before the failed statement are rolled back too
         """
         verified_users = [CRUD_TEST_USER_1, CRUD_TEST_USER_2, CRUD_TEST_USER_3]
         request = create_role_assignment_request(
@@ -298,36 +340,121 @@ class TestCrudMultiUserEdgeCases:
         )
         requester = create_test_requester()
 
-        # Patch crud_user.find_or_create to raise an exception for User 2 only
-        original_find_or_create = crud_user.find_or_create
+        def fail_user_role_insert(conn, cursor, statement, parameters, context, executemany):
+            # the database rejects the assignment insert (table does not exist)
+            if statement.lstrip().upper().startswith("INSERT INTO APP_FAM.FAM_USER_ROLE_XREF"):
+                statement = statement.replace("fam_user_role_xref", "fam_user_role_xref_missing", 1)
+            return statement, parameters
 
-        def find_or_create_side_effect(db, user_type_code, user_name, user_guid, cognito_user_id):
-            if user_name == CRUD_TEST_USER_2.user_name:
-                raise Exception("Simulated DB error for User 2")
-            return original_find_or_create(db, user_type_code, user_name, user_guid, cognito_user_id)
-
-        with patch("api.app.crud.crud_user.find_or_create", side_effect=find_or_create_side_effect):
+        engine = db_pg_session.get_bind()
+        event.listen(engine, "before_cursor_execute", fail_user_role_insert, retval=True)
+        try:
             results = crud_user_role.create_user_role_assignment_many(
                 db=db_pg_session,
                 request=request,
                 verified_users=verified_users,
                 requester=requester,
             )
+        finally:
+            event.remove(engine, "before_cursor_execute", fail_user_role_insert)
 
         # Assert
         assert len(results) == 3
-        # User 1: should succeed
-        assert results[0].status_code == HTTPStatus.OK
-        assert results[0].error_message is None
-        # User 2: should fail (db error)
-        assert results[1].status_code == HTTPStatus.INTERNAL_SERVER_ERROR
-        assert results[1].error_message is not None
-        # User 3: should succeed
-        assert results[2].status_code == HTTPStatus.OK
-        assert results[2].error_message is None
-        # All results should be correct type
         for result in results:
             assert isinstance(result, FamUserRoleAssignmentCreateRes)
+            assert result.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+            assert "fam_user_role_xref_missing" in result.error_message
+        for user in verified_users:
+            assert db_pg_session.execute(
+                select(models.FamUser).where(models.FamUser.user_guid == user.user_guid)
+            ).first() is None
+
+    def test_crud_repeated_user_in_request(self, db_pg_session: Session):
+        """
+        TEST: A user repeated in the request is assigned once.
+        Verify:
+            - First occurrence succeeds (200), the repeated one conflicts (409)
+        """
+        verified_users = [CRUD_TEST_USER_1, CRUD_TEST_USER_2, CRUD_TEST_USER_1]
+        request = create_role_assignment_request(
+            users=verified_users,
+            user_type_code=UserType.IDIR,
+            role_id=FOM_DEV_REVIEWER_ROLE_ID,
+            forest_client_numbers=None
+        )
+        requester = create_test_requester()
+
+        results = crud_user_role.create_user_role_assignment_many(
+            db=db_pg_session,
+            request=request,
+            verified_users=verified_users,
+            requester=requester,
+        )
+
+        assert [result.status_code for result in results] == [
+            HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.CONFLICT
+        ]
+        assert results[2].detail.user_role_xref_id == results[0].detail.user_role_xref_id
+        assert "already assigned to user" in results[2].error_message.lower()
+
+    def test_crud_statement_count_independent_of_request_size(self, db_pg_session: Session):
+        """
+        TEST: The number of SQL statements does not grow with users x forest clients.
+        Verify:
+            - 1 user x 1 forest client and 3 users x 2 forest clients execute the same number of statements
+        """
+        def count_statements(verified_users, forest_clients):
+            request = create_role_assignment_request(
+                users=verified_users,
+                user_type_code=UserType.BCEID,
+                role_id=FOM_DEV_SUBMITTER_ROLE_ID,  # Abstract role
+                forest_client_numbers=forest_clients
+            )
+            statements = []
+            # fresh session state, like a new request (rows looked up by id are kept by the session)
+            db_pg_session.expunge_all()
+
+            def on_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            engine = db_pg_session.get_bind()
+            event.listen(engine, "before_cursor_execute", on_execute)
+            try:
+                with patch("api.app.crud.crud_user_role.ForestClientIntegrationService") as mock_fc_service_class:
+                    mock_fc_service_class.return_value.search.return_value = [
+                        {
+                            "clientNumber": forest_client_number,
+                            "clientName": f"CLIENT {forest_client_number}",
+                            "clientStatusCode": "ACT",
+                            "clientTypeCode": "C",
+                        }
+                        for forest_client_number in forest_clients
+                    ]
+                    results = crud_user_role.create_user_role_assignment_many(
+                        db=db_pg_session,
+                        request=request,
+                        verified_users=verified_users,
+                        requester=create_test_requester(),
+                    )
+            finally:
+                event.remove(engine, "before_cursor_execute", on_execute)
+
+            assert len(results) == len(verified_users) * len(forest_clients)
+            assert all(result.status_code == HTTPStatus.OK for result in results)
+            return len(statements)
+
+        # first grant of a forest client role to one user
+        single_statement_count = count_statements([CRUD_TEST_USER_1], [FC_NUMBER_EXISTS_ACTIVE_00001018])
+        # new users, existing and new forest client child roles
+        many_statement_count = count_statements(
+            [CRUD_TEST_USER_2, CRUD_TEST_USER_3, TargetUserSchema(
+                user_name="CRUD_TEST_USER_4",
+                user_guid="CRUDTESTGUID4567890123456789012A"
+            )],
+            [FC_NUMBER_EXISTS_ACTIVE_00001018, FC_NUMBER_EXISTS_ACTIVE_00001011],
+        )
+
+        assert many_statement_count == single_statement_count
 
     def test_crud_forest_client_number_not_exists(self, db_pg_session: Session, mock_forest_client_integration_service):
         """
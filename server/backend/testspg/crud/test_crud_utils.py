@@ -67,6 +67,19 @@ def test_get_primary_key():
     assert pk_col_name == "user_id"
 
 
+def test_get_by_id_looked_up_once_per_session(db_pg_session: Session, mocker):
+    db_pg_session.expunge_all()
+    execute_spy = mocker.spy(db_pg_session, "execute")
+
+    application = crud_utils.get_by_id(db_pg_session, FamApplication, FOM_DEV_APPLICATION_ID)
+    assert application.application_id == FOM_DEV_APPLICATION_ID
+    del application  # only referenced by the session now
+    assert crud_utils.get_by_id(db_pg_session, FamApplication, FOM_DEV_APPLICATION_ID) is not None
+    assert execute_spy.call_count == 1
+
+    assert crud_utils.get_by_id(db_pg_session, FamApplication, 0) is None
+
+
 def test_get_next(db_pg_session: Session):
     """fixture delivers a db session with one record in it, testing that
     the get_next method returns the primary key of the current record + 1
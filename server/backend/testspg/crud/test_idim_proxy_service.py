@@ -5,7 +5,7 @@ import os
 import pytest
 from unittest.mock import MagicMock, patch
 from api.app.constants import IdimSearchUserParamType
-from api.app.integration.idim_proxy import IdimProxyService
+from api.app.integration.idim_proxy import IdimLookupCache, IdimProxyService
 from api.app.jwt_validation import ERROR_PERMISSION_REQUIRED
 from api.app.schemas import (IdimProxyBceidSearchParamSchema,
                              IdimProxySearchParamSchema, RequesterSchema)
@@ -17,7 +17,8 @@ from api.app.schemas.idim_proxy_idir_users_search import (
 )
 from fastapi import HTTPException
 from requests import HTTPError
-from testspg.constants import (TEST_BCEID_REQUESTER_DICT,
+from testspg.constants import (BUSINESS_GUID_BCEID_LOAD_3_TEST,
+                               TEST_BCEID_REQUESTER_DICT,
                                TEST_IDIR_REQUESTER_DICT,
                                USER_GUID_BCEID_LOAD_3_TEST,
                                USER_GUID_BCEID_LOAD_3_TEST_CHILD_1,
@@ -559,3 +560,111 @@ class TestIdimProxyIdirUsersSearchSchemas:
     def test_search_match_mode_enum_values(self):
         """Test that match mode enum has expected values."""
         assert IdimSearchMatchMode.CONTAINS.value == "Contains"
+
+
+class TestIdimLookupCache:
+    """
+    Testing IDIM lookup cache with mocked IDIM Proxy responses.
+    """
+
+    FOUND_BCEID_USER = {
+        "found": True,
+        "userId": USER_NAME_BCEID_LOAD_3_TEST_CHILD_1,
+        "guid": USER_GUID_BCEID_LOAD_3_TEST_CHILD_1,
+        "businessGuid": BUSINESS_GUID_BCEID_LOAD_3_TEST,
+        "businessLegalName": "Load 3 Test",
+        "firstName": "Child",
+        "lastName": "One",
+        "email": "child.one@example.com",
+    }
+
+    @staticmethod
+    def mock_get(service, api_result):
+        mock_response = MagicMock()
+        mock_response.json.return_value = api_result
+        return patch.object(service.session, "get", return_value=mock_response)
+
+    def test_lookup_idir_cached(self):
+        requester = RequesterSchema(**TEST_IDIR_REQUESTER_DICT)
+        cache = IdimLookupCache()
+        api_result = {"found": True, "userId": "TESTUSER", "guid": "A" * 32}
+
+        first_service = IdimProxyService(requester, cache=cache)
+        with self.mock_get(first_service, api_result) as mock_get:
+            first_service.lookup_idir(IdimProxySearchParamSchema(userId="TESTUSER"))
+        # another requester (same user type), another service instance, case differs
+        second_service = IdimProxyService(
+            RequesterSchema(**{**TEST_IDIR_REQUESTER_DICT, "user_name": "OTHER", "user_id": 99}), cache=cache
+        )
+        with self.mock_get(second_service, api_result) as second_mock_get:
+            result = second_service.lookup_idir(IdimProxySearchParamSchema(userId="testuser"))
+
+        assert mock_get.call_count == 1
+        assert second_mock_get.call_count == 0
+        assert result == api_result
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_lookup_business_bceid_by_user_id_then_guid(self):
+        """Search-then-grant: looked up by user id, then verified by user guid."""
+        service = IdimProxyService(RequesterSchema(**TEST_IDIR_REQUESTER_DICT), cache=IdimLookupCache())
+        with self.mock_get(service, self.FOUND_BCEID_USER) as mock_get:
+            service.lookup_business_bceid(IdimProxyBceidSearchParamSchema(
+                searchUserBy=IdimSearchUserParamType.USER_ID, searchValue=USER_NAME_BCEID_LOAD_3_TEST_CHILD_1
+            ))
+            result = service.lookup_business_bceid(IdimProxyBceidSearchParamSchema(
+                searchUserBy=IdimSearchUserParamType.USER_GUID, searchValue=USER_GUID_BCEID_LOAD_3_TEST_CHILD_1
+            ))
+
+        assert mock_get.call_count == 1
+        assert result["guid"] == USER_GUID_BCEID_LOAD_3_TEST_CHILD_1
+
+    def test_lookup_business_bceid_not_shared_across_organizations(self):
+        cache = IdimLookupCache()
+        search_params = {"searchUserBy": IdimSearchUserParamType.USER_ID, "searchValue": USER_NAME_BCEID_LOAD_3_TEST_CHILD_1}
+        same_org_requester = RequesterSchema(**TEST_BCEID_REQUESTER_DICT)
+        same_org_service = IdimProxyService(same_org_requester, cache=cache)
+        with self.mock_get(same_org_service, self.FOUND_BCEID_USER) as mock_get:
+            same_org_service.lookup_business_bceid(IdimProxyBceidSearchParamSchema(**search_params))
+
+        # requester from another organization: not served from the cache, same-org check applies
+        other_org_service = IdimProxyService(
+            RequesterSchema(**{**TEST_BCEID_REQUESTER_DICT, "business_guid": "OTHERBUSINESSGUID"}), cache=cache
+        )
+        with self.mock_get(other_org_service, self.FOUND_BCEID_USER) as other_org_mock_get:
+            with pytest.raises(HTTPException) as excinfo:
+                other_org_service.lookup_business_bceid(IdimProxyBceidSearchParamSchema(**search_params))
+
+        assert mock_get.call_count == 1
+        assert other_org_mock_get.call_count == 1
+        assert excinfo.value.status_code == 403
+
+    def test_lookup_without_cache(self):
+        """The IDIM user information sync needs current information: every lookup is requested."""
+        cache = IdimLookupCache()
+        service = IdimProxyService(RequesterSchema(**TEST_IDIR_REQUESTER_DICT), cache=cache, use_cache=False)
+        api_result = {"found": True, "userId": "TESTUSER", "guid": "A" * 32}
+
+        with self.mock_get(service, api_result) as mock_get:
+            for _ in range(2):
+                assert service.lookup_idir(IdimProxySearchParamSchema(userId="TESTUSER")) == api_result
+
+        assert mock_get.call_count == 2
+        assert cache.get_stats()["size"] == 0
+        assert cache.get_stats()["misses"] == 0
+
+    def test_lookup_not_found_and_errors(self):
+        requester = RequesterSchema(**TEST_IDIR_REQUESTER_DICT)
+        service = IdimProxyService(requester, cache=IdimLookupCache(negative_ttl=0))
+        search_params = {"userId": "NOT_FOUND_USER"}
+
+        with self.mock_get(service, {"found": False}) as mock_get:
+            service.lookup_idir(IdimProxySearchParamSchema(**search_params))
+            service.lookup_idir(IdimProxySearchParamSchema(**search_params))
+            assert mock_get.call_count == 2  # not found expired (negative_ttl=0)
+
+            mock_get.return_value.raise_for_status.side_effect = HTTPError("500 Server Error")
+            for _ in range(2):
+                with pytest.raises(HTTPError):
+                    service.lookup_idir(IdimProxySearchParamSchema(userId="ERROR_USER"))
+            assert mock_get.call_count == 4  # errors are not cached
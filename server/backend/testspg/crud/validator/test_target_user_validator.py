@@ -1,4 +1,7 @@
 import logging
+import threading
+import time
+
 import pytest
 from api.app.constants import (
     ERROR_CODE_INVALID_REQUEST_PARAMETER,
@@ -268,6 +271,83 @@ def test_validate_target_users_on_bceid_user(mock_lookup_business_bceid):
     assert verified.business_guid == BUSINESS_GUID_BCEID_LOAD_2_TEST
 
 
+@patch.object(IdimProxyService, "lookup_idir")
+def test_validate_target_users_concurrent_keeps_order(mock_lookup_idir):
+    """
+    validate_target_users verifies users concurrently (up to max_concurrency) with one
+    IdimProxyService, verified and failed users keep the request order.
+    """
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def side_effect(param):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        # earlier users answer later
+        time.sleep(0.05 * (10 - int(param.userId[-1])) / 10)
+        with lock:
+            running -= 1
+        if param.userId.startswith("NOT_FOUND"):
+            return {**MOCK_SERACH_IDIR_RETURN, "found": False}
+        return {**MOCK_SERACH_IDIR_RETURN, "guid": f"GUID{param.userId:0>28}", "userId": param.userId}
+    mock_lookup_idir.side_effect = side_effect
+
+    requester = RequesterSchema(**TEST_IDIR_REQUESTER_DICT)
+    user_names = ["USER_0", "NOT_FOUND_1", "USER_2", "USER_3", "NOT_FOUND_4", "USER_5", "USER_6", "USER_7"]
+    target_users = [
+        TargetUserSchema(**{**TEST_IDIR_REQUESTER_DICT, "user_name": user_name, "user_guid": f"GUID{user_name:0>28}"})
+        for user_name in user_names
+    ]
+    fam_role = DummyFamRole(application="FOM")
+
+    with patch(
+        "api.app.crud.validator.target_user_validator.IdimProxyService", wraps=IdimProxyService
+    ) as idim_proxy_service_class:
+        result = validate_target_users(requester, target_users, fam_role, max_concurrency=3)
+
+    assert idim_proxy_service_class.call_count == 1
+    assert mock_lookup_idir.call_count == len(target_users)
+    assert 1 < max_running <= 3
+    assert [user.user_name for user in result.verified_users] == ["USER_0", "USER_2", "USER_3", "USER_5", "USER_6", "USER_7"]
+    assert [user.user_name for user in result.failed_users] == ["NOT_FOUND_1", "NOT_FOUND_4"]
+
+
+@patch.object(IdimProxyService, "lookup_idir")
+def test_validate_target_users_deadline(mock_lookup_idir):
+    """
+    Users not verified within the deadline are failed users; the others are still verified.
+    """
+    release = threading.Event()
+
+    def side_effect(param):
+        if param.userId == "SLOW_USER":
+            release.wait(5)
+        return {**MOCK_SERACH_IDIR_RETURN, "guid": f"GUID{param.userId:0>28}", "userId": param.userId}
+    mock_lookup_idir.side_effect = side_effect
+
+    requester = RequesterSchema(**TEST_IDIR_REQUESTER_DICT)
+    target_users = [
+        TargetUserSchema(**{**TEST_IDIR_REQUESTER_DICT, "user_name": user_name, "user_guid": f"GUID{user_name:0>28}"})
+        for user_name in ["FAST_USER_1", "SLOW_USER", "FAST_USER_2"]
+    ]
+    fam_role = DummyFamRole(application="FOM")
+
+    start = time.monotonic()
+    try:
+        result = validate_target_users(requester, target_users, fam_role, deadline_seconds=0.2)
+    finally:
+        release.set()
+
+    assert time.monotonic() - start < 2
+    assert [user.user_name for user in result.verified_users] == ["FAST_USER_1", "FAST_USER_2"]
+    assert len(result.failed_users) == 1
+    assert result.failed_users[0].user_name == "SLOW_USER"
+    assert "did not complete within 0.2 seconds" in result.failed_users[0].error_reason
+
+
 # --- tests for validate_bceid_same_org
 def test_validate_bceid_same_org_success():
     requester = RequesterSchema(
@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+from api.app import database
+from api.app.constants import DbPoolMode
+from sqlalchemy import exc, text
+
+
+@pytest.fixture(scope="function")
+def db_engine_reset(db_pg_connection, monkeypatch):
+    """
+    'database' creating its engine again (pool mode from the environment) on
+    the test database; disposed after the test.
+    """
+    monkeypatch.setattr(database, "_db_url", db_pg_connection.bind.url.render_as_string(hide_password=False))
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_unpooled_engine", None)
+    monkeypatch.setattr(database, "_session_local", None)
+    database.pool_checkout_stats.clear()
+    yield
+    for engine in (database._engine, database._unpooled_engine):
+        if engine is not None:
+            engine.dispose()
+
+
+def show_timeouts(db):
+    return (
+        db.execute(text("SHOW statement_timeout")).scalar(),
+        db.execute(text("SHOW idle_in_transaction_session_timeout")).scalar(),
+    )
+
+
+def test_get_db_sets_transaction_timeouts_by_session_class(db_engine_reset, monkeypatch):
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_SECONDS_JOB", "90")
+
+    with contextmanager(database.get_db)() as db:
+        assert show_timeouts(db) == ("10s", "20s")
+
+    with contextmanager(database.get_job_db)() as db:
+        assert show_timeouts(db) == ("90s", "1min")
+        db.commit()
+        # the next transaction of the session has them too
+        assert show_timeouts(db) == ("90s", "1min")
+
+    # transaction-local: the pooled connection is back to the server defaults
+    with database._engine.connect() as connection:
+        assert connection.execute(text("SHOW statement_timeout")).scalar() == "0"
+
+
+@pytest.mark.parametrize("pool_mode", list(DbPoolMode))
+def test_get_db_pool_modes(db_engine_reset, monkeypatch, pool_mode: DbPoolMode):
+    monkeypatch.setenv("DB_POOL_MODE", pool_mode.value)
+
+    for _ in range(2):
+        with contextmanager(database.get_db)() as db:
+            assert db.execute(text("SELECT 1")).scalar() == 1
+
+    stats = database.get_db_pool_stats()
+    assert stats["mode"] == pool_mode.value
+    assert stats["checkout"]["checkouts"] == 2
+    assert stats["checkout"]["timeouts"] == 0
+    if pool_mode == DbPoolMode.NULL:
+        assert "size" not in stats
+    else:
+        assert stats["size"] == (1 if pool_mode == DbPoolMode.SINGLE else 5)
+        assert stats["checked_out"] == 0
+        assert stats["idle"] == 1  # the connection is kept for the next session
+
+
+def test_get_db_pool_timeout(db_engine_reset, monkeypatch):
+    monkeypatch.setenv("DB_POOL_MODE", DbPoolMode.SINGLE.value)
+    monkeypatch.setenv("DB_POOL_MAX_OVERFLOW", "5")  # no overflow in the SINGLE mode
+    monkeypatch.setenv("DB_POOL_TIMEOUT_SECONDS", "0.1")
+
+    with contextmanager(database.get_db)() as db:
+        db.execute(text("SELECT 1"))
+        assert database.get_db_pool_stats()["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            with contextmanager(database.get_db)() as other_db:
+                other_db.execute(text("SELECT 1"))
+
+    assert database.get_db_pool_stats()["checkout"]["timeouts"] == 1
+
+
+def test_connect_uses_current_db_credentials(mocker):
+    mocker.patch.object(database.config, "get_aws_db_credentials", return_value=("user", "pw1"))
+    invalidate = mocker.patch.object(database.config, "invalidate_aws_db_secret")
+    dialect = mocker.Mock()
+    cparams = {"host": "db", "user": "url-user", "password": "url-pw"}
+
+    connection = database._connect_with_current_db_credentials(dialect, None, (), cparams)
+
+    assert connection is dialect.connect.return_value
+    dialect.connect.assert_called_once_with(host="db", user="user", password="pw1")
+    invalidate.assert_not_called()
+
+
+def test_connect_refreshes_db_credentials_after_rotation(mocker):
+    mocker.patch.object(
+        database.config, "get_aws_db_credentials", side_effect=[("user", "pw1"), ("user", "pw2")]
+    )
+    invalidate = mocker.patch.object(database.config, "invalidate_aws_db_secret")
+    dialect = mocker.Mock()
+    new_connection = mocker.Mock()
+    dialect.connect.side_effect = [
+        psycopg2.OperationalError("password authentication failed"),
+        new_connection,
+    ]
+
+    connection = database._connect_with_current_db_credentials(dialect, None, (), {"host": "db"})
+
+    assert connection is new_connection
+    invalidate.assert_called_once()
+    assert dialect.connect.call_args_list[1] == mocker.call(host="db", user="user", password="pw2")
+
+
+def test_connect_raises_when_refreshed_db_credentials_fail(mocker):
+    mocker.patch.object(database.config, "get_aws_db_credentials", return_value=("user", "pw1"))
+    mocker.patch.object(database.config, "invalidate_aws_db_secret")
+    dialect = mocker.Mock()
+    dialect.connect.side_effect = psycopg2.OperationalError("password authentication failed")
+
+    with pytest.raises(psycopg2.OperationalError):
+        database._connect_with_current_db_credentials(dialect, None, (), {"host": "db"})
+    assert dialect.connect.call_count == 2
+
+
+@pytest.mark.parametrize("pool_mode", [DbPoolMode.SINGLE, DbPoolMode.QUEUE])
+def test_connect_outside_session(db_engine_reset, monkeypatch, pool_mode: DbPoolMode):
+    monkeypatch.setenv("DB_POOL_MODE", pool_mode.value)
+    monkeypatch.setenv("DB_POOL_TIMEOUT_SECONDS", "0.1")
+
+    with contextmanager(database.get_db)() as db:
+        db.execute(text("SELECT 1"))
+        with database.connect_outside_session(db) as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+            # SINGLE: opened apart from the pool, the session keeps the pooled connection
+            assert database.get_db_pool_stats()["checked_out"] == (1 if pool_mode == DbPoolMode.SINGLE else 2)
+
+    assert database.get_db_pool_stats()["checkout"]["timeouts"] == 0
@@ -4,9 +4,11 @@ from typing import List
 import pytest
 import requests
 from api.app.constants import AppEnv
+from api.app.crud import crud_utils
 from api.app.decorators.forest_client_dec import post_sync_forest_clients_dec
-from api.app.integration.forest_client_integration import \
-    ForestClientIntegrationService
+from api.app.integration.circuit_breaker import CircuitOpenError
+from api.app.integration.forest_client_integration import (
+    ForestClientIntegrationService, forest_client_cache)
 from api.app.models.model import FamApplication
 from api.app.schemas.fam_application_user_role_assignment_get import \
     FamApplicationUserRoleAssignmentGetSchema
@@ -138,4 +140,43 @@ def test_should_skip_client_name_update_when_fc_search_timeout(
 
     # Verify the search was called with retry flag enabled
     assert mock_fc_search.call_count == 1
-    assert mock_fc_search.call_args.kwargs.get("retry_on_timeout") is True
\ No newline at end of file
+    assert mock_fc_search.call_args.kwargs.get("retry_on_timeout") is True
+
+@patch.object(ForestClientIntegrationService, "search")
+def test_should_use_cached_client_names_when_fc_search_unavailable(
+    mock_fc_search,
+    db_pg_session,
+    mocker,
+):
+    """
+    Test that decorator serves the client names last known in the cache, even
+    expired, when Forest Client API search fails (e.g. its circuit is open).
+    """
+    mock_fc_search.side_effect = CircuitOpenError("circuit open")
+    mock_fn_return = APP_USER_ROLE_GET_RESULTS_NO_PAGE_META[
+        TestFcDecoratorFnResultConditions.WITH_FC_IN_RESULTS
+    ]
+    fam_application = FamApplication(app_environment=AppEnv.APP_ENV_TYPE_DEV)
+    mocker.patch("api.app.decorators.forest_client_dec.crud_application.get_application",
+                 return_value=fam_application)
+    fc_numbers = [
+        item.role.forest_client.forest_client_number for item in mock_fn_return
+        if item.role.forest_client is not None
+    ]
+    cached_fc_number = fc_numbers[0]
+    forest_client_cache.store(
+        crud_utils.use_api_instance_by_app(fam_application),
+        [cached_fc_number],
+        [{"clientNumber": cached_fc_number, "clientName": "CACHED CLIENT NAME"}],
+    )
+
+    fn_dec_return = dummy_decorated_get_app_role_assignments_fn(
+        db=db_pg_session,
+        some_results=mock_fn_return
+    )
+
+    for item in fn_dec_return.results:
+        if item.role.forest_client is not None:
+            fc = item.role.forest_client
+            expected_name = "CACHED CLIENT NAME" if fc.forest_client_number == cached_fc_number else None
+            assert fc.client_name == expected_name
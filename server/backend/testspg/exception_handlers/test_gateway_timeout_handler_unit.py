@@ -2,9 +2,11 @@ import json
 from http import HTTPStatus
 
 import pytest
-from api.app.constants import (ERROR_CODE_UPSTREAM_CONNECTION_ERROR,
+from api.app.constants import (ERROR_CODE_REQUEST_DEADLINE_EXCEEDED,
+                               ERROR_CODE_UPSTREAM_CONNECTION_ERROR,
                                ERROR_CODE_UPSTREAM_TIMEOUT)
 from api.app.exception_handlers import requests_gateway_timeout_error_handler
+from api.app.request_deadline import RequestDeadlineExceeded
 from requests import Request as RequestsRequest
 from requests.exceptions import ConnectionError, Timeout
 from starlette.requests import Request
@@ -23,6 +25,11 @@ from starlette.requests import Request
             ERROR_CODE_UPSTREAM_CONNECTION_ERROR,
             "Could not connect to upstream service.",
         ),
+        (
+            lambda: RequestDeadlineExceeded("no time left"),
+            ERROR_CODE_REQUEST_DEADLINE_EXCEEDED,
+            "Request could not complete in time.",
+        ),
     ],
 )
 def test_requests_gateway_timeout_error_handler_returns_gateway_timeout(
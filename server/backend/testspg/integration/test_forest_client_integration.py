@@ -1,9 +1,14 @@
 
 
 import logging
+import time
 
-from api.app.integration.forest_client_integration import \
-    ForestClientIntegrationService
+from api.app.constants import ApiInstanceEnv
+from api.app.integration.circuit_breaker import (CircuitBreaker,
+                                                 CircuitOpenError, CircuitState)
+from api.app.integration.forest_client_integration import (
+    ForestClientCache, ForestClientIntegrationService, forest_client_cache)
+from api.app.request_deadline import request_deadline
 from api.app.schemas.forest_client_integration import \
     ForestClientIntegrationSearchParmsSchema
 from unittest.mock import Mock
@@ -184,6 +189,24 @@ class TestForestClientIntegrationServiceRetryAndErrorHandling(object):
         assert "request failed" in caplog.text.lower()
         assert "after 2 attempt(s)" in caplog.text
 
+    def test_search_no_retry_without_time_left(self, monkeypatch):
+        """
+        Test that search does not retry when the request deadline leaves no time for it.
+        """
+        service = ForestClientIntegrationService()
+        error = requests.exceptions.Timeout("timeout")
+        get_mock = Mock(side_effect=[error, error])
+        sleep_mock = Mock()
+        monkeypatch.setattr(service.session, "get", get_mock)
+        monkeypatch.setattr("api.app.integration.forest_client_integration.time.sleep", sleep_mock)
+
+        with request_deadline(service.RETRY_DELAY_SECONDS):
+            with pytest.raises(requests.exceptions.Timeout):
+                service.search(_make_search_params(), retry_on_timeout=True)
+
+        assert get_mock.call_count == 1
+        sleep_mock.assert_not_called()
+
     def test_search_no_retry_without_flag(self, monkeypatch):
         """
         Test that search does not retry when retry_on_timeout flag is False.
@@ -200,3 +223,177 @@ class TestForestClientIntegrationServiceRetryAndErrorHandling(object):
 
         assert get_mock.call_count == 1
         sleep_mock.assert_not_called()
+
+
+def _make_client(client_number, client_name="TEST CLIENT"):
+    return {
+        "clientNumber": client_number,
+        "clientName": client_name,
+        "clientStatusCode": "ACT",
+        "clientTypeCode": "C",
+    }
+
+
+def _make_number_search_params(forest_client_numbers) -> ForestClientIntegrationSearchParmsSchema:
+    return ForestClientIntegrationSearchParmsSchema(forest_client_numbers=forest_client_numbers)
+
+
+def _wait_for(condition, timeout_seconds=2):
+    deadline = time.monotonic() + timeout_seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestForestClientCache(object):
+    def test_search_only_requests_numbers_not_cached(self, monkeypatch):
+        client_1011 = _make_client("00001011")
+        client_1012 = _make_client("00001012")
+        get_mock = Mock(
+            side_effect=[
+                _make_success_response([client_1011]),
+                _make_success_response([client_1012]),
+            ]
+        )
+        service = ForestClientIntegrationService()
+        monkeypatch.setattr(service.session, "get", get_mock)
+        assert service.search(_make_number_search_params(["00001011", "99999999"])) == [client_1011]
+
+        # services are created per request, the cache is shared
+        another_service = ForestClientIntegrationService()
+        monkeypatch.setattr(another_service.session, "get", get_mock)
+        result = another_service.search(
+            _make_number_search_params(["99999999", "00001011", "00001012"])
+        )
+
+        assert result == [client_1011, client_1012]
+        assert get_mock.call_count == 2
+        second_url = get_mock.call_args.args[0]
+        assert "id=00001012" in second_url
+        assert "id=00001011" not in second_url
+        assert "id=99999999" not in second_url
+        stats = forest_client_cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["negative_hits"] == 1
+        assert stats["misses"] == 3
+
+    def test_stale_client_served_while_refreshed(self, monkeypatch):
+        cache = ForestClientCache(ttl=0, stale=60)
+        get_mock = Mock(
+            side_effect=[
+                _make_success_response([_make_client("00001011", "OLD NAME")]),
+                _make_success_response([_make_client("00001011", "NEW NAME")]),
+            ]
+        )
+        service = ForestClientIntegrationService(cache=cache)
+        monkeypatch.setattr(service.session, "get", get_mock)
+        service.search(_make_number_search_params(["00001011"]))
+
+        result = service.search(_make_number_search_params(["00001011"]))
+
+        assert result[0]["clientName"] == "OLD NAME"
+        assert _wait_for(lambda: cache.get_stats()["refreshes"] == 1)
+        cached, _, _ = cache.lookup(service.api_instance_env, ["00001011"])
+        assert cached["00001011"]["clientName"] == "NEW NAME"
+        assert get_mock.call_count == 2
+
+    def test_not_found_client_not_served_stale(self, monkeypatch):
+        cache = ForestClientCache(negative_ttl=0)
+        get_mock = Mock(return_value=_make_success_response([]))
+        service = ForestClientIntegrationService(cache=cache)
+        monkeypatch.setattr(service.session, "get", get_mock)
+
+        assert service.search(_make_number_search_params(["99999999"])) == []
+        assert service.search(_make_number_search_params(["99999999"])) == []
+
+        assert get_mock.call_count == 2
+
+    def test_cache_keyed_by_api_instance_env_and_bounded(self):
+        cache = ForestClientCache(max_size=2)
+        cache.store(ApiInstanceEnv.TEST, ["00001011", "00001012"], [_make_client("00001011")])
+
+        _, missing, _ = cache.lookup(ApiInstanceEnv.PROD, ["00001011"])
+        assert missing == ["00001011"]
+
+        cache.store(ApiInstanceEnv.TEST, ["00001013"], [_make_client("00001013")])
+        cached, missing, _ = cache.lookup(ApiInstanceEnv.TEST, ["00001011", "00001012", "00001013"])
+        assert missing == ["00001011"]
+        assert cached == {"00001012": None, "00001013": _make_client("00001013")}
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["size"] == 2
+
+
+class TestForestClientCircuitBreaker(object):
+    def test_circuit_opens_after_consecutive_timeouts_and_fails_fast(self, monkeypatch):
+        circuit_breaker = CircuitBreaker("fc-test", failure_threshold=1, reset_timeout=60)
+        service = ForestClientIntegrationService(circuit_breaker=circuit_breaker)
+        get_mock = Mock(side_effect=requests.exceptions.Timeout("timeout"))
+        sleep_mock = Mock()
+        monkeypatch.setattr(service.session, "get", get_mock)
+        monkeypatch.setattr("api.app.integration.forest_client_integration.time.sleep", sleep_mock)
+
+        with pytest.raises(requests.exceptions.Timeout):
+            service.search(_make_search_params(), retry_on_timeout=True)
+        assert circuit_breaker.state == CircuitState.OPEN
+        # the retry is not made (nor waited for) once the circuit is open
+        assert get_mock.call_count == 1
+        sleep_mock.assert_not_called()
+
+        with pytest.raises(CircuitOpenError):
+            service.search(_make_search_params(), retry_on_timeout=True)
+        assert get_mock.call_count == 1
+        stats = circuit_breaker.get_stats()
+        assert stats["opened"] == 1
+        assert stats["rejected"] == 1
+        assert stats["retry_in_seconds"] > 0
+
+    def test_circuit_half_open_probe_closes_or_reopens(self, monkeypatch):
+        circuit_breaker = CircuitBreaker("fc-test", failure_threshold=1, reset_timeout=0)
+        service = ForestClientIntegrationService(circuit_breaker=circuit_breaker)
+        expected_payload = [{"clientNumber": "00001011", "clientName": "TEST CLIENT"}]
+        get_mock = Mock(
+            side_effect=[
+                requests.exceptions.ConnectionError("connection-error"),
+                requests.exceptions.Timeout("timeout"),
+                _make_success_response(expected_payload),
+            ]
+        )
+        monkeypatch.setattr(service.session, "get", get_mock)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            service.search(_make_search_params())
+        assert circuit_breaker.state == CircuitState.OPEN
+
+        # cool-down over: one probe, failing, opens the circuit again
+        with pytest.raises(requests.exceptions.Timeout):
+            service.search(_make_search_params())
+        assert circuit_breaker.state == CircuitState.OPEN
+        assert circuit_breaker.get_stats()["opened"] == 2
+
+        assert service.search(_make_search_params()) == expected_payload
+        assert circuit_breaker.state == CircuitState.CLOSED
+        assert circuit_breaker.get_stats()["consecutive_failures"] == 0
+
+    def test_circuit_half_open_lets_one_probe_through(self):
+        circuit_breaker = CircuitBreaker("fc-test", failure_threshold=1, reset_timeout=0)
+        circuit_breaker.record_failure()
+
+        circuit_breaker.before_request()
+        assert circuit_breaker.state == CircuitState.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            circuit_breaker.before_request()
+
+        circuit_breaker.release()
+        circuit_breaker.before_request()
+
+    def test_search_cached_serves_expired_clients(self, monkeypatch):
+        cache = ForestClientCache(ttl=0, stale=0)
+        service = ForestClientIntegrationService(cache=cache)
+        monkeypatch.setattr(
+            service.session, "get", Mock(return_value=_make_success_response([_make_client("00001011")]))
+        )
+        service.search(_make_number_search_params(["00001011", "99999999"]))
+
+        assert service.search_cached(_make_number_search_params(["00001011", "99999999"])) == [
+            _make_client("00001011")
+        ]
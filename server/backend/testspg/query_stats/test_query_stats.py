@@ -0,0 +1,70 @@
+import json
+import logging
+import re
+
+from api.app import query_stats
+from api.app.main import internal_api_prefix
+from api.app.query_stats import RequestQueryStats
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+SERVER_TIMING_PATTERN = re.compile(r'^db;dur=[\d.]+;desc="(\d+) queries(, [^"]+)?"$')
+
+
+def test_request_query_stats_in_server_timing_and_log(test_client_fixture: TestClient, caplog):
+    with caplog.at_level(logging.INFO, logger=query_stats.__name__):
+        response = test_client_fixture.get(f"{internal_api_prefix}/smoke_test")
+
+    assert response.status_code == 200
+    match = SERVER_TIMING_PATTERN.match(response.headers["Server-Timing"])
+    assert match is not None
+    assert int(match.group(1)) >= 1  # the applications query
+
+    log_items = [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == query_stats.__name__ and "request_queries" in record.getMessage()
+    ]
+    assert len(log_items) == 1
+    assert log_items[0]["path"] == f"{internal_api_prefix}/smoke_test"
+    assert log_items[0]["status"] == 200
+    assert log_items[0]["queries"] == int(match.group(1))
+
+
+def test_request_query_stats_repeated_and_slow_statements(db_pg_session: Session, caplog):
+    stats = RequestQueryStats(slow_query_seconds=0, repeat_threshold=3)
+    token = query_stats._query_stats.set(stats)
+    try:
+        with caplog.at_level(logging.WARNING, logger=query_stats.__name__):
+            for user_name in ["SECRET_A", "SECRET_B", "SECRET_C"]:
+                db_pg_session.execute(
+                    text("SELECT count(*) FROM app_fam.fam_user WHERE user_name = :user_name"),
+                    {"user_name": user_name},
+                )
+            db_pg_session.execute(text("SELECT 1"))
+    finally:
+        query_stats._query_stats.reset(token)
+
+    assert stats.count == 4
+    assert stats.slow_count == 4
+    assert stats.get_repeated_statements() == {
+        "SELECT count(*) FROM app_fam.fam_user WHERE user_name = %(user_name)s": 3
+    }
+    assert stats.get_server_timing().endswith('desc="4 queries, 4 slow, 1 repeated"')
+
+    slow_query_logs = [record.getMessage() for record in caplog.records if "Slow query" in record.getMessage()]
+    assert len(slow_query_logs) == 4
+    assert "{'user_name': 'str'}" in slow_query_logs[0]
+    assert not any("SECRET" in message for message in slow_query_logs)
+
+
+def test_request_query_stats_not_counted_outside_of_request(db_pg_session: Session):
+    assert query_stats.get_request_query_stats() is None
+    db_pg_session.execute(text("SELECT 1"))
+    assert query_stats.get_request_query_stats() is None
+
+
+def test_redact_parameters():
+    assert query_stats.redact_parameters({"a": 1, "b": "x", "c": None}) == {"a": "int", "b": "str", "c": "NoneType"}
+    assert query_stats.redact_parameters(("x", 2)) == ["str", "int"]
+    assert query_stats.redact_parameters([{"a": 1}, {"a": 2}], executemany=True) == "2 parameter sets"
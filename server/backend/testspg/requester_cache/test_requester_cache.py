@@ -0,0 +1,115 @@
+import testspg.jwt_utils as jwt_utils
+from api.app import requester_cache
+from api.app.crud import crud_user, crud_user_terms_conditions
+from api.app.models.model import FamRequesterVersion
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from testspg.constants import TEST_CREATOR
+
+
+def test_requester_cached_until_invalidated(
+    db_pg_session: Session, get_current_requester_by_token, test_rsa_key, mocker
+):
+    # not a spy: it would keep the last user loaded in the (shared) test session
+    fetch_spy = mocker.patch.object(
+        crud_user, "fetch_initial_requester_info",
+        wraps=crud_user.fetch_initial_requester_info,
+    )
+    token = jwt_utils.create_jwt_token(
+        test_rsa_key, username=jwt_utils.COGNITO_USERNAME_BCEID_DELEGATED_ADMIN
+    )
+
+    requester = get_current_requester_by_token(token)
+    assert requester.requires_accept_tc is True
+    assert get_current_requester_by_token(token) == requester
+    assert fetch_spy.call_count == 1
+
+    # the access roles are per token, not cached
+    other_roles_token = jwt_utils.create_jwt_token(
+        test_rsa_key,
+        roles=["FAM_ADMIN"],
+        username=jwt_utils.COGNITO_USERNAME_BCEID_DELEGATED_ADMIN,
+    )
+    assert get_current_requester_by_token(other_roles_token).access_roles == ["FAM_ADMIN"]
+    assert get_current_requester_by_token(token).access_roles == requester.access_roles
+    assert fetch_spy.call_count == 1
+
+    # terms and conditions accepted: loaded again
+    crud_user_terms_conditions.create_user_terms_conditions(
+        db_pg_session, requester.user_id, TEST_CREATOR
+    )
+    db_pg_session.expunge_all()  # the next request, with a new session
+    assert get_current_requester_by_token(token).requires_accept_tc is False
+    assert fetch_spy.call_count == 2
+
+    # profile updated: loaded again
+    crud_user.update(
+        db_pg_session, requester.user_id, {"first_name": "CHANGED"}, TEST_CREATOR
+    )
+    db_pg_session.expunge_all()
+    assert get_current_requester_by_token(token).first_name == "CHANGED"
+    assert fetch_spy.call_count == 3
+    assert requester_cache.requester_cache.get_stats() == {
+        "hits": 3, "misses": 3, "evictions": 0, "invalidations": 2,
+        "version_checks": 1, "version_changes": 0, "size": 1, "hit_rate": 0.5,
+    }
+
+
+def test_requester_cache_cleared_on_version_change(
+    db_pg_session: Session, get_current_requester_by_token, test_rsa_key, mocker, monkeypatch
+):
+    monkeypatch.setenv("REQUESTER_VERSION_CHECK_SECONDS", "60")
+    # not a spy: it would keep the last user loaded in the (shared) test session
+    fetch_spy = mocker.patch.object(
+        crud_user, "fetch_initial_requester_info",
+        wraps=crud_user.fetch_initial_requester_info,
+    )
+    token = jwt_utils.create_jwt_token(test_rsa_key)
+    get_current_requester_by_token(token)
+
+    # changed elsewhere (e.g. a privilege granted through the admin management
+    # API) and committed: the triggers increment the version
+    with db_pg_session.get_bind().engine.begin() as connection:
+        connection.execute(
+            update(FamRequesterVersion).values(version=FamRequesterVersion.version + 1)
+        )
+    get_current_requester_by_token(token)
+    assert fetch_spy.call_count == 1  # not checked until due
+
+    monkeypatch.setattr(requester_cache.requester_cache, "_next_check_at", 0.0)
+    get_current_requester_by_token(token)
+    assert fetch_spy.call_count == 2
+    stats = requester_cache.requester_cache.get_stats()
+    assert (stats["version_checks"], stats["version_changes"]) == (2, 1)
+
+    # same version: checked, not cleared
+    monkeypatch.setattr(requester_cache.requester_cache, "_next_check_at", 0.0)
+    get_current_requester_by_token(token)
+    assert fetch_spy.call_count == 2
+
+
+def test_requester_not_cached(
+    get_current_requester_by_token, test_rsa_key, mocker, monkeypatch
+):
+    # not a spy: it would keep the last user loaded in the (shared) test session
+    fetch_spy = mocker.patch.object(
+        crud_user, "fetch_initial_requester_info",
+        wraps=crud_user.fetch_initial_requester_info,
+    )
+    token = jwt_utils.create_jwt_token(test_rsa_key)
+
+    # loaded before an invalidation: not stored
+    generation = requester_cache.requester_cache.generation
+    assert requester_cache.requester_cache.get(jwt_utils.COGNITO_USERNAME) is None
+    requester = get_current_requester_by_token(token)
+    requester_cache.requester_cache.invalidate([requester.user_id])
+    requester_cache.requester_cache.store(requester, generation)
+    assert requester_cache.requester_cache.get(jwt_utils.COGNITO_USERNAME) is None
+
+    # disabled
+    monkeypatch.setenv("REQUESTER_CACHE_TTL_SECONDS", "0")
+    fetch_spy.reset_mock()
+    for _ in range(2):
+        get_current_requester_by_token(token)
+    assert fetch_spy.call_count == 2
+    assert requester_cache.requester_cache.get_stats()["size"] == 0
@@ -9,10 +9,12 @@ from api.app.constants import (CURRENT_TERMS_AND_CONDITIONS_VERSION,
                                DEFAULT_PAGE_SIZE,
                                ERROR_CODE_INVALID_APPLICATION_ID,
                                ERROR_CODE_TERMS_CONDITIONS_REQUIRED, MIN_PAGE,
-                               SortOrderEnum, UserRoleSortByEnum, UserType)
+                               PAGE_CURSOR_MAX_LENGTH, SortOrderEnum,
+                               UserRoleSortByEnum, UserType)
 from api.app.crud import crud_application
 from api.app.main import internal_api_prefix
 from api.app.models.model import FamUserTermsConditions
+from api.app.requester_cache import requester_cache
 from api.app.routers.router_application import router
 from api.app.routers.router_guards import (
     authorize_by_app_id, enforce_bceid_terms_conditions_guard)
@@ -574,6 +576,8 @@ def test_get_fam_application_user_role_assignment_enforce_bceid_terms_conditions
             }
         ],
     )
+    # inserted directly, not through the API, and not committed: not seen by the requester version check
+    requester_cache.clear()
 
     response = test_client_fixture.get(
         get_application_role_assignment_end_point, headers=jwt_utils.headers(token)
@@ -653,6 +657,7 @@ def test_get_application_user_by_id_application_authorization(
         {"sortBy": "invalid_column", "sortOrder": "asc"},
         {"sortBy": "user_name", "sortOrder": "invalid_sort_order"},
         {"search":"long_search_string_exceeds_maximum_search_length"},
+        {"cursor": "c" * (PAGE_CURSOR_MAX_LENGTH + 1)},
     ]
 )
 def test_get_fam_application_user_role_assignment__pagining_with_invalid_page_params(
@@ -729,7 +734,7 @@ def test_get_fam_application_user_role_assignment__no_params_in_request_then_use
     # validate defaults are provided when no request param is in the request.
     assert mock_fn_call_args[1]["page_params"] == UserRolePageParamsSchema(
         page=MIN_PAGE, size=DEFAULT_PAGE_SIZE, search=None,
-        sort_order=SortOrderEnum.DESC, sort_by=UserRoleSortByEnum.CREATE_DATE
+        sort_order=SortOrderEnum.DESC, sort_by=UserRoleSortByEnum.CREATE_DATE, cursor=None
     )
 
     # !! Below line is very important (to restor the method from mock) for not to interfere subsequent tests cases.
@@ -0,0 +1,41 @@
+import logging
+from http import HTTPStatus
+
+import testspg.jwt_utils as jwt_utils
+from api.app.jwt_validation import ERROR_PERMISSION_REQUIRED
+from api.app.main import internal_api_prefix
+from fastapi.testclient import TestClient
+from testspg.constants import FOM_DEV_ADMIN_ROLE
+
+LOGGER = logging.getLogger(__name__)
+endPoint = f"{internal_api_prefix}/smoke_test"
+
+
+def test_smoke_test_returns_no_stats(test_client_fixture: TestClient):
+    response = test_client_fixture.get(endPoint)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b""
+
+
+def test_smoke_test_stats_requires_token(test_client_fixture: TestClient):
+    response = test_client_fixture.get(f"{endPoint}/stats")
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_smoke_test_stats_requires_fam_admin(test_client_fixture: TestClient, test_rsa_key):
+    token = jwt_utils.create_jwt_token(test_rsa_key, roles=[FOM_DEV_ADMIN_ROLE])
+    response = test_client_fixture.get(f"{endPoint}/stats", headers=jwt_utils.headers(token))
+
+    jwt_utils.assert_error_response(response, HTTPStatus.FORBIDDEN, ERROR_PERMISSION_REQUIRED)
+
+
+def test_smoke_test_stats(test_client_fixture: TestClient, test_rsa_key):
+    token = jwt_utils.create_jwt_token(test_rsa_key)
+    response = test_client_fixture.get(f"{endPoint}/stats", headers=jwt_utils.headers(token))
+
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert "circuit_breakers" in data
+    assert data["db_pool"]["mode"] is not None
@@ -1,5 +1,6 @@
 import copy
 import logging
+from collections import Counter
 from http import HTTPStatus
 
 import pytest
@@ -14,7 +15,9 @@ from api.app.constants import (ERROR_CODE_DIFFERENT_ORG_GRANT_PROHIBITED,
                                ERROR_CODE_SELF_GRANT_PROHIBITED,
                                ERROR_CODE_TERMS_CONDITIONS_REQUIRED,
                                ERROR_CODE_UNKNOWN_STATE, UserType)
-from api.app.crud import crud_application, crud_role, crud_user, crud_user_role
+from api.app import catalog, role_assignment_job_worker
+from api.app.crud import (crud_application, crud_role, crud_user,
+                          crud_user_role, crud_user_role_assignment_job)
 from api.app.crud.services.permission_audit_service import \
     PermissionAuditService
 from api.app.jwt_validation import ERROR_PERMISSION_REQUIRED
@@ -23,6 +26,7 @@ from api.app.models.model import FamPrivilegeChangeAudit, FamUser
 from api.app.schemas.target_user import TargetUserSchema
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from testspg.conftest import create_test_user_role_assignment
 from testspg.constants import (ACCESS_GRANT_FOM_DEV_AR_00000001_BCEID,
@@ -1526,3 +1530,197 @@ def test_delete_user_role_assignment__bceid_requester_cannot_delete_inactive_tar
     assert response.json()["detail"]["code"] == ERROR_CODE_UNKNOWN_STATE
     assert f"Unable to verify the following users: ['{target_user_schema.user_name}']" in response.json()["detail"]["description"]
     assert db_delete_fn_spy.call_count == 0  # db.delete() should not be called.
+
+
+# ------------------ test user role assignment job ----------------------- #
+
+
+def test_create_user_role_assignment_job(
+    test_client_fixture: starlette.testclient.TestClient,
+    db_pg_session: Session,
+    fom_dev_access_admin_token,
+    mocker,
+):
+    """
+    test granting as a job: accepted and queued, then processed by the worker,
+    its results read with the job
+    """
+    validate_target_users_mock = mocker.patch(
+        "api.app.role_assignment_job_worker.validate_target_users",
+        side_effect=lambda requester, target_users, role: TargetUserValidationResultSchema(
+            verified_users=target_users, failed_users=[]
+        ),
+    )
+
+    response = test_client_fixture.post(
+        f"{endPoint}/jobs",
+        json=ACCESS_GRANT_FOM_DEV_CR_IDIR,
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job_data = response.json()
+    assert job_data["job_status"] == "QUEUED"
+    assert job_data["total_count"] == 1
+    assert job_data["processed_count"] == 0
+    assert job_data["assignments_detail"] == []
+    job_id = job_data["user_role_assignment_job_id"]
+
+    job = crud_user_role_assignment_job.get_job(db_pg_session, job_id)
+    assert role_assignment_job_worker.process_job_batch(db_pg_session, job) == 1
+    assert validate_target_users_mock.call_count == 1
+
+    response = test_client_fixture.get(
+        f"{endPoint}/jobs/{job_id}",
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    job_data = response.json()
+    assert job_data["job_status"] == "COMPLETED"
+    assert job_data["processed_count"] == 1
+    assert len(job_data["assignments_detail"]) == 1
+    assert job_data["assignments_detail"][0]["status_code"] == HTTPStatus.OK
+    detail = job_data["assignments_detail"][0]["detail"]
+    assert detail["role_id"] == FOM_DEV_REVIEWER_ROLE_ID
+    assert detail["user"]["user_name"] == ACCESS_GRANT_FOM_DEV_CR_IDIR["users"][0]["user_name"]
+
+
+def test_get_user_role_assignment_job_of_other_requester_not_found(
+    test_client_fixture: starlette.testclient.TestClient,
+    fom_dev_access_admin_token,
+    test_rsa_key,
+):
+    """
+    test a job can only be read by the requester who created it
+    """
+    response = test_client_fixture.post(
+        f"{endPoint}/jobs",
+        json=ACCESS_GRANT_FOM_DEV_CR_IDIR,
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job_id = response.json()["user_role_assignment_job_id"]
+
+    token = jwt_utils.create_jwt_token(
+        test_rsa_key, [], jwt_utils.COGNITO_USERNAME_BCEID_DELEGATED_ADMIN
+    )
+    response = test_client_fixture.get(
+        f"{endPoint}/jobs/{job_id}", headers=jwt_utils.headers(token)
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"]["code"] == ERROR_CODE_INVALID_REQUEST_PARAMETER
+
+
+# ------------------ statements executed per guarded request ----------------------- #
+
+
+@pytest.fixture(scope="function")
+def executed_statements(db_pg_session: Session):
+    """
+    The SQL statements executed on the test database during the test, starting
+    from a fresh session state (nothing loaded yet, like a new request session)
+    and the application catalog loaded.
+    """
+    statements = []
+    catalog.get_catalog(db_pg_session)  # loaded once per process, not by each request
+
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_pg_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record_statement)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _record_statement)
+
+
+def assert_selects_not_repeated(statements: list[str]):
+    # the role, application, assignment... looked up by id by the router guards
+    # and the handler are queried once for the request.
+    repeated_selects = {
+        statement: count for statement, count in Counter(statements).items()
+        if statement.lstrip().upper().startswith("SELECT") and count > 1
+    }
+    assert repeated_selects == {}
+
+
+def test_create_user_role_assignment_many_statements(
+    test_client_fixture: starlette.testclient.TestClient,
+    db_pg_session: Session,
+    fom_dev_access_admin_token,
+    override_depends__get_verified_target_users,
+    executed_statements,
+):
+    override_depends__get_verified_target_users()
+    db_pg_session.expunge_all()
+    executed_statements.clear()
+
+    response = test_client_fixture.post(
+        f"{endPoint}",
+        json=ACCESS_GRANT_FOM_DEV_CR_IDIR,
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert_selects_not_repeated(executed_statements)
+    # requester, role, application, user type; user upsert, assignment, audit
+    assert len(executed_statements) <= 8
+
+
+def test_delete_user_role_assignment_statements(
+    test_client_fixture: starlette.testclient.TestClient,
+    db_pg_session: Session,
+    fom_dev_access_admin_token,
+    override_depends__get_verified_target_users,
+    executed_statements,
+):
+    override_depends__get_verified_target_users()
+    response = test_client_fixture.post(
+        f"{endPoint}",
+        json=ACCESS_GRANT_FOM_DEV_CR_IDIR,
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+    assert response.status_code == HTTPStatus.OK
+    user_role_xref_id = response.json()["assignments_detail"][0]["detail"]["user_role_xref_id"]
+    db_pg_session.expunge_all()
+    executed_statements.clear()
+
+    response = test_client_fixture.delete(
+        f"{endPoint}/{user_role_xref_id}",
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert_selects_not_repeated(executed_statements)
+    # requester, assignment (with its role), application; audit, delete
+    assert len(executed_statements) <= 5
+
+
+def test_user_role_assignment_job_statements(
+    test_client_fixture: starlette.testclient.TestClient,
+    db_pg_session: Session,
+    fom_dev_access_admin_token,
+    executed_statements,
+):
+    db_pg_session.expunge_all()
+    executed_statements.clear()
+    response = test_client_fixture.post(
+        f"{endPoint}/jobs",
+        json=ACCESS_GRANT_FOM_DEV_CR_IDIR,
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert_selects_not_repeated(executed_statements)
+    assert len(executed_statements) <= 5
+
+    db_pg_session.expunge_all()
+    executed_statements.clear()
+    response = test_client_fixture.get(
+        f"{endPoint}/jobs/{response.json()['user_role_assignment_job_id']}",
+        headers=jwt_utils.headers(fom_dev_access_admin_token),
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert_selects_not_repeated(executed_statements)
+    # requester, job
+    assert len(executed_statements) <= 2
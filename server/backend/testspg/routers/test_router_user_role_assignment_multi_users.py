@@ -55,9 +55,9 @@ def mock_crud_create_user_role_assignment_many(mocker):
 
 
 @pytest.fixture
-def mock_email_send(mocker):
-    """Mock GC Notify email send used by send_users_access_granted_emails."""
-    return mocker.patch("api.app.crud.crud_user_role.GCNotifyEmailService.send_user_access_granted_email")
+def mock_email_queue(mocker):
+    """Mock storing the email in the email outbox, used by send_users_access_granted_emails."""
+    return mocker.patch("api.app.crud.crud_user_role.crud_email_outbox.create_outbox_email")
 
 
 @pytest.fixture
@@ -315,11 +315,11 @@ def test_create_multi_user_role_assignment_email_status_per_user(
     fom_dev_access_admin_token,
     override_depends__get_verified_target_users,
     mock_crud_create_user_role_assignment_many,
-    mock_email_send,
+    mock_email_queue,
 ):
     """
     Assign role to 3 users with requires_send_user_email=True.
-    Mock email sending to return success for 2, failure for 1.
+    Mock email queuing to return success for 2, failure for 1.
     Verify:
     - Response contains email_sending_status per user
     - Audit log includes email status
@@ -338,8 +338,8 @@ def test_create_multi_user_role_assignment_email_status_per_user(
         ) for i, user in enumerate([TEST_USER_1_IDIR, TEST_USER_2_IDIR, TEST_USER_3_IDIR])
     ]
 
-    # Simulate 2 successful email sends and 1 failure
-    mock_email_send.side_effect = [None, None, Exception("email failure")]
+    # Simulate 2 successfully queued emails and 1 failure
+    mock_email_queue.side_effect = [None, None, Exception("email failure")]
 
     response = test_client_fixture_unit.post(
         f"{ENDPOINT}",
@@ -351,13 +351,13 @@ def test_create_multi_user_role_assignment_email_status_per_user(
 
     assert "assignments_detail" in response_data
     assert all("email_sending_status" in a for a in response_data["assignments_detail"])
-    # Verify per-user email status: first two success, last one failure
+    # Verify per-user email status: first two queued, last one failure
     assert [a["email_sending_status"] for a in response_data["assignments_detail"]] == [
-        "SENT_TO_EMAIL_SERVICE_SUCCESS",
-        "SENT_TO_EMAIL_SERVICE_SUCCESS",
+        "QUEUED_FOR_EMAIL_SERVICE",
+        "QUEUED_FOR_EMAIL_SERVICE",
         "SENT_TO_EMAIL_SERVICE_FAILURE",
     ]
-    assert mock_email_send.call_count == 3
+    assert mock_email_queue.call_count == 3
 
 
 def test_create_multi_user_role_assignment_audit_batch_summary(
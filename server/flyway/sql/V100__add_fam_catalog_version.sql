@@ -0,0 +1,64 @@
+-- Version of the application catalog (applications and their Cognito
+-- clients) cached in memory by the APIs (see "catalog.py" of the backend and
+-- admin management APIs).
+--
+-- The catalog rows change only through migrations and rare admin actions, so
+-- the APIs keep them in memory and compare this version every few seconds
+-- (one single-row read) instead of reading the rows on every request; a
+-- different version reloads the catalog. The triggers below increment the
+-- version in the transaction changing the rows, including changes made by
+-- migrations and by hand.
+
+-- >> -- Table: fam_catalog_version -- << --
+CREATE TABLE IF NOT EXISTS app_fam.fam_catalog_version
+(
+    catalog_version_id              smallint                        DEFAULT 1 NOT NULL,
+    version                         bigint                          DEFAULT 1 NOT NULL,
+    update_date                     timestamp(6) with time zone     DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT fam_catalog_version_pk PRIMARY KEY (catalog_version_id),
+    CONSTRAINT fam_catalog_version_single_row CHECK (catalog_version_id = 1)
+);
+
+COMMENT ON TABLE app_fam.fam_catalog_version IS 'Single row version of the application catalog (fam_application and fam_application_client rows) cached by the APIs. Maintained by triggers, never written by the applications.'
+;
+COMMENT ON COLUMN app_fam.fam_catalog_version.catalog_version_id IS 'Always 1, the table has a single row.'
+;
+COMMENT ON COLUMN app_fam.fam_catalog_version.version IS 'Incremented by every change of the catalog rows; the APIs reload their cached catalog when it differs.'
+;
+COMMENT ON COLUMN app_fam.fam_catalog_version.update_date IS 'The date and time of the last catalog change.'
+;
+
+INSERT INTO app_fam.fam_catalog_version (catalog_version_id) VALUES (1)
+ON CONFLICT (catalog_version_id) DO NOTHING
+;
+
+-- >> -- Triggers -- << --
+CREATE OR REPLACE FUNCTION app_fam.catalog_version_increment()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    UPDATE app_fam.fam_catalog_version
+    SET version = version + 1, update_date = CURRENT_TIMESTAMP
+    WHERE catalog_version_id = 1;
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION app_fam.catalog_version_increment() FROM PUBLIC;
+
+CREATE TRIGGER fam_application_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE ON app_fam.fam_application
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.catalog_version_increment();
+
+CREATE TRIGGER fam_application_client_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE ON app_fam.fam_application_client
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.catalog_version_increment();
+
+-- -- Add permission on 'fam_catalog_version' table for the API db users
+GRANT SELECT ON app_fam.fam_catalog_version TO ${api_db_username}
+;
+GRANT SELECT ON app_fam.fam_catalog_version TO ${admin_management_api_db_user}
+;
@@ -0,0 +1,80 @@
+-- Version of the requesters (users with their delegated admin privileges and
+-- terms and conditions acceptance) cached in memory by the backend API (see
+-- "requester_cache.py").
+--
+-- The API compares this version every few seconds (one single-row read) and
+-- clears its cached requesters when it differs, so changes made by the admin
+-- management API, the pre-token Lambda, migrations or by hand are seen without
+-- reading the requester on every request. The triggers below increment the
+-- version in the transaction changing the rows. A user row updated without
+-- changing what is cached (e.g. the same information updated at each login)
+-- leaves the version unchanged.
+
+-- >> -- Table: fam_requester_version -- << --
+CREATE TABLE IF NOT EXISTS app_fam.fam_requester_version
+(
+    requester_version_id            smallint                        DEFAULT 1 NOT NULL,
+    version                         bigint                          DEFAULT 1 NOT NULL,
+    update_date                     timestamp(6) with time zone     DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    CONSTRAINT fam_requester_version_pk PRIMARY KEY (requester_version_id),
+    CONSTRAINT fam_requester_version_single_row CHECK (requester_version_id = 1)
+);
+
+COMMENT ON TABLE app_fam.fam_requester_version IS 'Single row version of the requesters (fam_user, fam_access_control_privilege and fam_user_terms_conditions rows) cached by the backend API. Maintained by triggers, never written by the applications.'
+;
+COMMENT ON COLUMN app_fam.fam_requester_version.requester_version_id IS 'Always 1, the table has a single row.'
+;
+COMMENT ON COLUMN app_fam.fam_requester_version.version IS 'Incremented by every change of the requester rows; the API clears its cached requesters when it differs.'
+;
+COMMENT ON COLUMN app_fam.fam_requester_version.update_date IS 'The date and time of the last requester change.'
+;
+
+INSERT INTO app_fam.fam_requester_version (requester_version_id) VALUES (1)
+ON CONFLICT (requester_version_id) DO NOTHING
+;
+
+-- >> -- Triggers -- << --
+CREATE OR REPLACE FUNCTION app_fam.requester_version_increment()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    UPDATE app_fam.fam_requester_version
+    SET version = version + 1, update_date = CURRENT_TIMESTAMP
+    WHERE requester_version_id = 1;
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION app_fam.requester_version_increment() FROM PUBLIC;
+
+CREATE TRIGGER fam_access_control_privilege_requester_version
+    AFTER INSERT OR UPDATE OR DELETE ON app_fam.fam_access_control_privilege
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.requester_version_increment();
+
+CREATE TRIGGER fam_user_terms_conditions_requester_version
+    AFTER INSERT OR UPDATE OR DELETE ON app_fam.fam_user_terms_conditions
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.requester_version_increment();
+
+-- New users are not cached (not found requesters are not cached).
+CREATE TRIGGER fam_user_requester_version
+    AFTER UPDATE ON app_fam.fam_user
+    FOR EACH ROW
+    WHEN (
+        (OLD.user_name, OLD.first_name, OLD.last_name, OLD.email, OLD.user_type_code,
+         OLD.user_guid, OLD.business_guid, OLD.cognito_user_id)
+        IS DISTINCT FROM
+        (NEW.user_name, NEW.first_name, NEW.last_name, NEW.email, NEW.user_type_code,
+         NEW.user_guid, NEW.business_guid, NEW.cognito_user_id)
+    )
+    EXECUTE FUNCTION app_fam.requester_version_increment();
+
+CREATE TRIGGER fam_user_delete_requester_version
+    AFTER DELETE ON app_fam.fam_user
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.requester_version_increment();
+
+-- -- Add permission on 'fam_requester_version' table for the backend API db user
+GRANT SELECT ON app_fam.fam_requester_version TO ${api_db_username}
+;
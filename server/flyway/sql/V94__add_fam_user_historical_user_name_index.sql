@@ -0,0 +1,7 @@
+-- Every login first looks for a historical user (added before first login,
+-- no user_guid yet) by user type and case-insensitive user name. Without an
+-- index that lookup scans the whole fam_user table on every login.
+CREATE INDEX ix_app_fam_fam_user_type_lower_user_name_no_guid
+    ON app_fam.fam_user (user_type_code, LOWER(user_name))
+    WHERE user_guid IS NULL
+;
@@ -0,0 +1,334 @@
+-- Per-user login groups projection read by the Cognito pre-token Lambda.
+--
+-- "v_user_login_group" is the live join of what a user gets in the token
+-- "groups" claim when logging in through a Cognito client. The table
+-- "fam_user_login_group" holds the same rows and is kept current by the
+-- triggers below, so the Lambda reads it with one index lookup instead of
+-- joining the role tables on every login. Expired role assignments stay in
+-- the table and are filtered out at read time.
+--
+-- Maintenance (run as the migration user):
+--   SELECT * FROM app_fam.check_user_login_group();  -- differences, no rows when consistent
+--   SELECT app_fam.rebuild_user_login_group();       -- rebuilds all, returns row count
+
+-- >> -- View: v_user_login_group -- << --
+CREATE OR REPLACE VIEW app_fam.v_user_login_group AS
+    -- Roles of the application the Cognito client belongs to
+    SELECT
+        fam_user.user_id,
+        fam_user.user_type_code,
+        fam_user.user_guid,
+        client.cognito_client_id,
+        role.role_name::varchar(106) AS group_name,
+        role_assignment.expiry_date
+    FROM app_fam.fam_user_role_xref role_assignment
+        JOIN app_fam.fam_user fam_user ON
+            role_assignment.user_id = fam_user.user_id
+        JOIN app_fam.fam_role role ON
+            role_assignment.role_id = role.role_id
+        JOIN app_fam.fam_application_client client ON
+            role.application_id = client.application_id
+    WHERE fam_user.user_guid IS NOT NULL
+    UNION ALL
+    -- "<APP>_ADMIN" for every application administered, FAM clients only
+    SELECT
+        fam_user.user_id,
+        fam_user.user_type_code,
+        fam_user.user_guid,
+        client.cognito_client_id,
+        (application.application_name || '_ADMIN')::varchar(106) AS group_name,
+        NULL::timestamp(6) with time zone AS expiry_date
+    FROM app_fam.fam_application_admin app_admin
+        JOIN app_fam.fam_user fam_user ON
+            app_admin.user_id = fam_user.user_id
+        JOIN app_fam.fam_application application ON
+            app_admin.application_id = application.application_id
+        JOIN app_fam.fam_application fam_application ON
+            fam_application.application_name = 'FAM'
+        JOIN app_fam.fam_application_client client ON
+            fam_application.application_id = client.application_id
+    WHERE fam_user.user_guid IS NOT NULL
+;
+
+COMMENT ON VIEW app_fam.v_user_login_group IS 'Live view of the groups a user receives in the access token when logging in through a Cognito client. Source of app_fam.fam_user_login_group.'
+;
+
+-- >> -- Table: fam_user_login_group -- << --
+CREATE TABLE IF NOT EXISTS app_fam.fam_user_login_group
+(
+    user_id                         bigint                          NOT NULL,
+    user_type_code                  varchar(2)                      NOT NULL,
+    user_guid                       varchar(32)                     NOT NULL,
+    cognito_client_id               varchar(32)                     NOT NULL,
+    group_name                      varchar(106)                    NOT NULL,
+    expiry_date                     timestamp(6) with time zone
+);
+
+COMMENT ON TABLE app_fam.fam_user_login_group IS 'Projection of app_fam.v_user_login_group maintained by triggers on the source tables. Read by the Cognito pre-token Lambda, never written by the applications.'
+;
+COMMENT ON COLUMN app_fam.fam_user_login_group.user_id IS 'Unique ID to reference and identify the user within FAM system.'
+;
+COMMENT ON COLUMN app_fam.fam_user_login_group.user_type_code IS 'Identifies which type of the user it belongs to; IDIR, BCeID etc.'
+;
+COMMENT ON COLUMN app_fam.fam_user_login_group.user_guid IS 'The user guid from the identity provider, as received at login.'
+;
+COMMENT ON COLUMN app_fam.fam_user_login_group.cognito_client_id IS 'The Cognito client the user logs in through.'
+;
+COMMENT ON COLUMN app_fam.fam_user_login_group.group_name IS 'Group added to the access token: a role name, or "<APP>_ADMIN" for FAM clients.'
+;
+COMMENT ON COLUMN app_fam.fam_user_login_group.expiry_date IS 'Copied from app_fam.fam_user_role_xref.expiry_date. Expired groups are filtered out when read. NULL means no expiry.'
+;
+
+-- Create index
+CREATE INDEX ix_app_fam_fam_user_login_group_login ON app_fam.fam_user_login_group
+    (user_guid, user_type_code, cognito_client_id) INCLUDE (group_name, expiry_date)
+;
+CREATE INDEX ix_app_fam_fam_user_login_group_user_id ON app_fam.fam_user_login_group (user_id)
+;
+
+-- >> -- Maintenance functions -- << --
+
+-- Replaces the projection rows of the given users with their live rows.
+-- Concurrent changes for one user are applied one after the other (each
+-- statement reads the latest committed data): each user maps to one of 256
+-- transaction advisory locks ("lock slots", user_id % 256), taken in slot
+-- order by every refresh whatever its size, and all of them by the full
+-- rebuild. The table itself is never locked, so refreshes of other users do
+-- not wait, and a bounded number of slots keeps large refreshes within the
+-- lock table (one lock per user would not).
+CREATE OR REPLACE FUNCTION app_fam.refresh_user_login_group(p_user_ids bigint[])
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    IF p_user_ids IS NULL OR cardinality(p_user_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('app_fam.fam_user_login_group'), lock_slot)
+    FROM (SELECT DISTINCT (unnest(p_user_ids) % 256)::integer AS lock_slot ORDER BY 1) lock_slots;
+
+    -- "IN (SELECT unnest(..))" rather than "= ANY(..)": hashed for large arrays
+    DELETE FROM app_fam.fam_user_login_group
+    WHERE user_id IN (SELECT unnest(p_user_ids));
+
+    INSERT INTO app_fam.fam_user_login_group
+        (user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date)
+    SELECT user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+    FROM app_fam.v_user_login_group
+    WHERE user_id IN (SELECT unnest(p_user_ids));
+END;
+$$;
+
+-- Users whose projection depends on the application: users with a role of
+-- it, its admins, and every admin when it is the FAM application.
+CREATE OR REPLACE FUNCTION app_fam.refresh_application_login_group(p_application_id bigint)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    PERFORM app_fam.refresh_user_login_group(ARRAY(
+        SELECT role_assignment.user_id
+        FROM app_fam.fam_user_role_xref role_assignment
+            JOIN app_fam.fam_role role ON role_assignment.role_id = role.role_id
+        WHERE role.application_id = p_application_id
+        UNION
+        SELECT app_admin.user_id
+        FROM app_fam.fam_application_admin app_admin
+        WHERE app_admin.application_id = p_application_id
+            OR EXISTS (
+                SELECT 1 FROM app_fam.fam_application application
+                WHERE application.application_id = p_application_id
+                    AND application.application_name = 'FAM'
+            )
+    ));
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION app_fam.rebuild_user_login_group()
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+DECLARE
+    v_row_count bigint;
+BEGIN
+    -- All the lock slots, in the same order as the refreshes (see
+    -- refresh_user_login_group): waits for them, not for the Lambda reads
+    PERFORM pg_advisory_xact_lock(hashtext('app_fam.fam_user_login_group'), lock_slot)
+    FROM (SELECT generate_series(0, 255) AS lock_slot ORDER BY 1) lock_slots;
+
+    DELETE FROM app_fam.fam_user_login_group;
+
+    INSERT INTO app_fam.fam_user_login_group
+        (user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date)
+    SELECT user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+    FROM app_fam.v_user_login_group;
+
+    GET DIAGNOSTICS v_row_count = ROW_COUNT;
+    RETURN v_row_count;
+END;
+$$;
+
+-- "missing": in the live view, not in the projection
+-- "extra": in the projection, not in the live view
+CREATE OR REPLACE FUNCTION app_fam.check_user_login_group()
+RETURNS TABLE (
+    difference varchar,
+    user_id bigint,
+    user_type_code varchar,
+    user_guid varchar,
+    cognito_client_id varchar,
+    group_name varchar,
+    expiry_date timestamp with time zone
+)
+LANGUAGE sql
+STABLE
+AS $$
+    (
+        SELECT 'missing', user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+        FROM (
+            SELECT user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+            FROM app_fam.v_user_login_group
+            EXCEPT ALL
+            SELECT user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+            FROM app_fam.fam_user_login_group
+        ) missing
+    )
+    UNION ALL
+    (
+        SELECT 'extra', user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+        FROM (
+            SELECT user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+            FROM app_fam.fam_user_login_group
+            EXCEPT ALL
+            SELECT user_id, user_type_code, user_guid, cognito_client_id, group_name, expiry_date
+            FROM app_fam.v_user_login_group
+        ) extra
+    )
+$$;
+
+REVOKE EXECUTE ON FUNCTION app_fam.refresh_user_login_group(bigint[]) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION app_fam.refresh_application_login_group(bigint) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION app_fam.rebuild_user_login_group() FROM PUBLIC;
+
+-- >> -- Triggers -- << --
+
+-- fam_user_role_xref and fam_application_admin: statement level, refreshing
+-- each user touched by the statement once.
+CREATE OR REPLACE FUNCTION app_fam.user_login_group_user_rows_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM app_fam.refresh_user_login_group(ARRAY(SELECT DISTINCT user_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM app_fam.refresh_user_login_group(ARRAY(
+            SELECT user_id FROM new_rows UNION SELECT user_id FROM old_rows
+        ));
+    ELSE
+        PERFORM app_fam.refresh_user_login_group(ARRAY(SELECT DISTINCT user_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER fam_user_role_xref_login_group_insert
+    AFTER INSERT ON app_fam.fam_user_role_xref
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.user_login_group_user_rows_changed();
+CREATE TRIGGER fam_user_role_xref_login_group_update
+    AFTER UPDATE ON app_fam.fam_user_role_xref
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.user_login_group_user_rows_changed();
+CREATE TRIGGER fam_user_role_xref_login_group_delete
+    AFTER DELETE ON app_fam.fam_user_role_xref
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.user_login_group_user_rows_changed();
+
+CREATE TRIGGER fam_application_admin_login_group_insert
+    AFTER INSERT ON app_fam.fam_application_admin
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.user_login_group_user_rows_changed();
+CREATE TRIGGER fam_application_admin_login_group_update
+    AFTER UPDATE ON app_fam.fam_application_admin
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.user_login_group_user_rows_changed();
+CREATE TRIGGER fam_application_admin_login_group_delete
+    AFTER DELETE ON app_fam.fam_application_admin
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_fam.user_login_group_user_rows_changed();
+
+-- fam_user: the user guid is set for historical users at first login.
+-- Other user updates (every login) do not fire it.
+CREATE OR REPLACE FUNCTION app_fam.user_login_group_user_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    PERFORM app_fam.refresh_user_login_group(ARRAY[NEW.user_id]);
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER fam_user_login_group_update
+    AFTER UPDATE OF user_guid, user_type_code ON app_fam.fam_user
+    FOR EACH ROW
+    WHEN (OLD.user_guid IS DISTINCT FROM NEW.user_guid
+        OR OLD.user_type_code IS DISTINCT FROM NEW.user_type_code)
+    EXECUTE FUNCTION app_fam.user_login_group_user_changed();
+
+-- fam_role, fam_application and fam_application_client: rare changes (mostly
+-- migrations), refreshing every user of the application(s) involved.
+CREATE OR REPLACE FUNCTION app_fam.user_login_group_application_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = app_fam, pg_temp
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM app_fam.refresh_application_login_group(OLD.application_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.application_id IS NOT NULL THEN
+        PERFORM app_fam.refresh_application_login_group(NEW.application_id);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER fam_role_login_group_update
+    AFTER UPDATE OF role_name, application_id ON app_fam.fam_role
+    FOR EACH ROW
+    WHEN (OLD.role_name IS DISTINCT FROM NEW.role_name
+        OR OLD.application_id IS DISTINCT FROM NEW.application_id)
+    EXECUTE FUNCTION app_fam.user_login_group_application_changed();
+
+CREATE TRIGGER fam_application_login_group_update
+    AFTER UPDATE OF application_name ON app_fam.fam_application
+    FOR EACH ROW
+    WHEN (OLD.application_name IS DISTINCT FROM NEW.application_name)
+    EXECUTE FUNCTION app_fam.user_login_group_application_changed();
+
+CREATE TRIGGER fam_application_client_login_group_change
+    AFTER INSERT OR UPDATE OR DELETE ON app_fam.fam_application_client
+    FOR EACH ROW
+    EXECUTE FUNCTION app_fam.user_login_group_application_changed();
+
+-- >> -- Populate -- << --
+SELECT app_fam.rebuild_user_login_group()
+;
+
+-- -- Add permission on 'fam_user_login_group' table for the auth lambda db user
+GRANT SELECT ON app_fam.fam_user_login_group TO ${auth_lambda_db_user}
+;
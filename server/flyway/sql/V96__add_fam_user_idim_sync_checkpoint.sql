@@ -0,0 +1,35 @@
+-- Create fam_user_idim_sync_checkpoint table
+-- The sync of user information from IDIM ("PUT /users/users-information")
+-- processes users in user_id order within a time budget per invocation and
+-- records here the last user_id it processed, so the next invocation resumes
+-- from there. The checkpoint goes back to 0 when a pass over all users ends.
+CREATE TABLE IF NOT EXISTS app_fam.fam_user_idim_sync_checkpoint
+(
+    sync_name                       varchar(50)     NOT NULL,
+    last_user_id                    bigint          DEFAULT 0 NOT NULL,
+    pass_start_date                 timestamp(6)    DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    update_user                     varchar(100),
+    update_date                     timestamp(6)    DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add table/column comments
+COMMENT ON TABLE app_fam.fam_user_idim_sync_checkpoint IS 'Progress of the sync of user information from IDIM, so the next run resumes where the last one stopped.'
+;
+COMMENT ON COLUMN app_fam.fam_user_idim_sync_checkpoint.sync_name IS 'Name of the sync the checkpoint belongs to.'
+;
+COMMENT ON COLUMN app_fam.fam_user_idim_sync_checkpoint.last_user_id IS 'The last user_id processed in the current pass over the users; 0 when a new pass starts.'
+;
+COMMENT ON COLUMN app_fam.fam_user_idim_sync_checkpoint.pass_start_date IS 'The date and time the current pass over the users started.'
+;
+COMMENT ON COLUMN app_fam.fam_user_idim_sync_checkpoint.update_user IS 'The user or proxy account that created or last updated the record.'
+;
+COMMENT ON COLUMN app_fam.fam_user_idim_sync_checkpoint.update_date IS 'The date and time the record was created or last updated.'
+;
+
+-- Add constraints
+ALTER TABLE app_fam.fam_user_idim_sync_checkpoint ADD CONSTRAINT fam_user_idim_sync_checkpoint_pk PRIMARY KEY (sync_name)
+;
+
+-- -- Add permision on 'fam_user_idim_sync_checkpoint' table for app access management api db user
+GRANT SELECT, INSERT, UPDATE ON app_fam.fam_user_idim_sync_checkpoint TO ${api_db_username}
+;
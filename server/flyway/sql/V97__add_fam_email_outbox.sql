@@ -0,0 +1,84 @@
+-- Create fam_email_outbox table
+-- Notification emails (GC Notify) are not sent inside the request granting the
+-- access anymore: the request stores the email here, in the same transaction
+-- as the grant, and the email outbox dispatcher sends it afterwards (with
+-- retries). "email_sending_status" uses the same values as the
+-- "email_sending_status" of the grant responses, which are read from here by
+-- the role assignments ("user_role_xref_ids") the email notifies of.
+--
+-- The dispatcher claims the emails of a batch before sending them:
+-- "email_sending_status" SENDING_TO_EMAIL_SERVICE, "attempt_count"
+-- incremented and "next_attempt_date" set to the end of the claim, committed
+-- before any email is sent. The outcome of each email is then committed as
+-- soon as it is known. An email left SENDING_TO_EMAIL_SERVICE by a dispatcher
+-- stopped while sending (e.g. the Lambda timed out) may have been sent; it is
+-- claimed again only once its claim has run out.
+CREATE TABLE IF NOT EXISTS app_fam.fam_email_outbox
+(
+    email_outbox_id                 bigint          GENERATED BY DEFAULT AS IDENTITY (START WITH 1 INCREMENT BY 1),
+    template_id                     varchar(36)     NOT NULL,
+    send_to_email                   varchar(250)    NOT NULL,
+    personalisation                 jsonb           NOT NULL,
+    email_sending_status            varchar(50)     DEFAULT 'QUEUED_FOR_EMAIL_SERVICE' NOT NULL,
+    attempt_count                   integer         DEFAULT 0 NOT NULL,
+    next_attempt_date               timestamp(6)    DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    last_error                      varchar(1000),
+    notification_id                 varchar(36),
+    user_role_xref_ids              bigint[],
+    create_user                     varchar(100)    NOT NULL,
+    create_date                     timestamp(6)    DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    update_user                     varchar(100),
+    update_date                     timestamp(6)    DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add table/column comments
+COMMENT ON TABLE app_fam.fam_email_outbox IS 'Notification emails waiting to be sent, or sent, through GC Notify by the email outbox dispatcher.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.email_outbox_id IS 'Automatically generated key used to identify the uniqueness of an email.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.template_id IS 'GC Notify id of the email template.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.send_to_email IS 'Email address the email is sent to.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.personalisation IS 'GC Notify personalisation (template variables) of the email.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.email_sending_status IS 'QUEUED_FOR_EMAIL_SERVICE until the email is sent to GC Notify (SENT_TO_EMAIL_SERVICE_SUCCESS) or sending it failed for good (SENT_TO_EMAIL_SERVICE_FAILURE); SENDING_TO_EMAIL_SERVICE while claimed by the dispatcher sending it.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.attempt_count IS 'Number of times sending the email was attempted.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.next_attempt_date IS 'The date and time from which sending a queued email is (re)attempted, or, for an email being sent, the end of the dispatcher claim.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.last_error IS 'Error of the last failed attempt.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.notification_id IS 'GC Notify id of the notification, once sent.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.user_role_xref_ids IS 'The user role assignments (fam_user_role_xref) the email notifies of, when sent for role assignments.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.create_user IS 'The user or proxy account that created the record.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.create_date IS 'The date and time the record was created.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.update_user IS 'The user or proxy account that created or last updated the record.'
+;
+COMMENT ON COLUMN app_fam.fam_email_outbox.update_date IS 'The date and time the record was created or last updated.'
+;
+
+-- Add constraints
+ALTER TABLE app_fam.fam_email_outbox ADD CONSTRAINT fam_email_outbox_pk PRIMARY KEY (email_outbox_id)
+;
+ALTER TABLE app_fam.fam_email_outbox ADD CONSTRAINT fam_email_outbox_status_chk
+    CHECK (email_sending_status IN ('QUEUED_FOR_EMAIL_SERVICE', 'SENDING_TO_EMAIL_SERVICE', 'SENT_TO_EMAIL_SERVICE_SUCCESS', 'SENT_TO_EMAIL_SERVICE_FAILURE'))
+;
+
+-- Create indexes, the dispatcher reads queued emails and claimed emails whose claim has run out
+CREATE INDEX ix_app_fam_fam_email_outbox_queued ON app_fam.fam_email_outbox (next_attempt_date)
+    WHERE email_sending_status IN ('QUEUED_FOR_EMAIL_SERVICE', 'SENDING_TO_EMAIL_SERVICE')
+;
+CREATE INDEX ix_app_fam_fam_email_outbox_user_role_xref_ids ON app_fam.fam_email_outbox USING gin (user_role_xref_ids)
+;
+
+-- -- Add permision on 'fam_email_outbox' table for app access management api db user and admin management api db user
+GRANT SELECT, INSERT, UPDATE ON app_fam.fam_email_outbox TO ${api_db_username}
+;
+GRANT SELECT, INSERT ON app_fam.fam_email_outbox TO ${admin_management_api_db_user}
+;
@@ -0,0 +1,74 @@
+-- Create fam_user_role_assignment_job table
+-- Large user role assignment (grant) requests can run as a job instead of in
+-- the request: the request stores the job here and returns its id, and the
+-- role assignment job worker grants the users a batch at a time, saving the
+-- results of each batch ("processed_count" is the checkpoint) so a job
+-- interrupted midway resumes where it stopped. A batch failing on an error
+-- that may not happen again (IDIM or database not available) is retried later
+-- ("attempt_count", "next_attempt_date"); the job fails on other errors, or
+-- once the batch has failed too many times.
+CREATE TABLE IF NOT EXISTS app_fam.fam_user_role_assignment_job
+(
+    user_role_assignment_job_id     bigint          GENERATED BY DEFAULT AS IDENTITY (START WITH 1 INCREMENT BY 1),
+    job_status                      varchar(20)     DEFAULT 'QUEUED' NOT NULL,
+    role_assignment_request         jsonb           NOT NULL,
+    requester                       jsonb           NOT NULL,
+    total_count                     integer         NOT NULL,
+    processed_count                 integer         DEFAULT 0 NOT NULL,
+    results                         jsonb           DEFAULT '[]'::jsonb NOT NULL,
+    attempt_count                   integer         DEFAULT 0 NOT NULL,
+    next_attempt_date               timestamp(6)    DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    last_error                      varchar(1000),
+    create_user                     varchar(100)    NOT NULL,
+    create_date                     timestamp(6)    DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    update_user                     varchar(100),
+    update_date                     timestamp(6)    DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add table/column comments
+COMMENT ON TABLE app_fam.fam_user_role_assignment_job IS 'User role assignment requests run as jobs by the role assignment job worker, with their progress and results.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.user_role_assignment_job_id IS 'Automatically generated key used to identify the uniqueness of a job.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.job_status IS 'QUEUED until the worker starts it, IN_PROGRESS until all users are processed (COMPLETED) or it stops on an error (FAILED).'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.role_assignment_request IS 'The user role assignment request of the job.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.requester IS 'The requester of the job (as authorized when the job was created); the grants are made on their behalf.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.total_count IS 'Number of users in the request.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.processed_count IS 'Number of users of the request processed so far, in request order.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.results IS 'Role assignment results of the users processed so far.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.attempt_count IS 'Number of times processing the next batch of users failed in a row.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.next_attempt_date IS 'The date and time from which the worker processes the next batch of users (later after a failed batch).'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.last_error IS 'Error the job failed with, or the last batch failed with when retried.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.create_user IS 'The user or proxy account that created the record.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.create_date IS 'The date and time the record was created.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.update_user IS 'The user or proxy account that created or last updated the record.'
+;
+COMMENT ON COLUMN app_fam.fam_user_role_assignment_job.update_date IS 'The date and time the record was created or last updated.'
+;
+
+-- Add constraints
+ALTER TABLE app_fam.fam_user_role_assignment_job ADD CONSTRAINT fam_user_role_assignment_job_pk PRIMARY KEY (user_role_assignment_job_id)
+;
+ALTER TABLE app_fam.fam_user_role_assignment_job ADD CONSTRAINT fam_user_role_assignment_job_status_chk
+    CHECK (job_status IN ('QUEUED', 'IN_PROGRESS', 'COMPLETED', 'FAILED'))
+;
+
+-- Create index, only unfinished jobs are read by the worker
+CREATE INDEX ix_app_fam_fam_user_role_assignment_job_unfinished ON app_fam.fam_user_role_assignment_job (user_role_assignment_job_id)
+    WHERE job_status IN ('QUEUED', 'IN_PROGRESS')
+;
+
+-- -- Add permision on 'fam_user_role_assignment_job' table for app access management api db user
+GRANT SELECT, INSERT, UPDATE ON app_fam.fam_user_role_assignment_job TO ${api_db_username}
+;
@@ -0,0 +1,49 @@
+-- Indexes for the keyword search of the user role assignments of an
+-- application (GET /fam-applications/{application_id}/user-role-assignment
+-- "search"), which matches the keyword anywhere ('%keyword%', case
+-- insensitive) in the user name, email, full name, role display name and
+-- forest client number, or as a date prefix of the assignment create date.
+--
+-- B-tree indexes cannot serve a leading wildcard; the pg_trgm GIN indexes
+-- below serve ILIKE '%keyword%' for keywords of 3 characters or more (the
+-- minimum search length), so the search looks up the matching users, roles
+-- and forest clients instead of scanning every assignment of the
+-- application. The full name index is on the same expression as the
+-- "FamUser.full_name" SQL expression (first_name || ' ' || last_name) so the
+-- planner can match it.
+CREATE EXTENSION IF NOT EXISTS pg_trgm
+;
+
+CREATE INDEX IF NOT EXISTS ix_app_fam_fam_user_user_name_trgm ON app_fam.fam_user
+    USING gin (user_name gin_trgm_ops)
+;
+CREATE INDEX IF NOT EXISTS ix_app_fam_fam_user_email_trgm ON app_fam.fam_user
+    USING gin (email gin_trgm_ops)
+;
+CREATE INDEX IF NOT EXISTS ix_app_fam_fam_user_full_name_trgm ON app_fam.fam_user
+    USING gin ((first_name || ' ' || last_name) gin_trgm_ops)
+;
+CREATE INDEX IF NOT EXISTS ix_app_fam_fam_role_display_name_trgm ON app_fam.fam_role
+    USING gin (display_name gin_trgm_ops)
+;
+CREATE INDEX IF NOT EXISTS ix_app_fam_fam_forest_client_number_trgm ON app_fam.fam_forest_client
+    USING gin (forest_client_number gin_trgm_ops)
+;
+
+-- Date prefix search (e.g. '2025-04') as a create date range, also the
+-- default sort of the user role assignments.
+CREATE INDEX IF NOT EXISTS ix_app_fam_fam_user_role_xref_create_date ON app_fam.fam_user_role_xref (create_date)
+;
+
+COMMENT ON INDEX app_fam.ix_app_fam_fam_user_user_name_trgm IS 'Trigram index for the keyword (ILIKE ''%keyword%'') search on the user name.'
+;
+COMMENT ON INDEX app_fam.ix_app_fam_fam_user_email_trgm IS 'Trigram index for the keyword (ILIKE ''%keyword%'') search on the user email.'
+;
+COMMENT ON INDEX app_fam.ix_app_fam_fam_user_full_name_trgm IS 'Trigram index for the keyword (ILIKE ''%keyword%'') search on the user full name (first_name || '' '' || last_name).'
+;
+COMMENT ON INDEX app_fam.ix_app_fam_fam_role_display_name_trgm IS 'Trigram index for the keyword (ILIKE ''%keyword%'') search on the role display name.'
+;
+COMMENT ON INDEX app_fam.ix_app_fam_fam_forest_client_number_trgm IS 'Trigram index for the keyword (ILIKE ''%keyword%'') search on the forest client number.'
+;
+COMMENT ON INDEX app_fam.ix_app_fam_fam_user_role_xref_create_date IS 'Sort and date prefix search of the user role assignments by create date.'
+;